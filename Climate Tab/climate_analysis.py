@@ -0,0 +1,257 @@
+"""
+Climate Analysis Module
+Predictive alert rules evaluated over (material x day) forecast arrays
+"""
+
+from datetime import datetime, timedelta
+from operator import itemgetter, methodcaller
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Alert rule thresholds (percent delay / production drop, and day counts)
+DELAY_PERIOD_THRESHOLD = 20.0
+DELAY_PERIOD_MIN_DAYS = 2
+PRODUCTION_DROP_THRESHOLD = 15.0
+SUPPLY_RISK_DELAY = 15.0
+SUPPLY_RISK_LEVELS = ('HIGH', 'CRITICAL')
+SUPPLY_RISK_MIN_DAYS = 3
+EXTREME_CONDITIONS = ('severe_drought', 'flooding', 'extreme_heat', 'frost', 'storm')
+EXTREME_WORDS = ('severe', 'extreme', 'critical', 'emergency')
+
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def is_extreme_condition(condition: Optional[str]) -> bool:
+    """True when a forecast condition describes extreme weather"""
+    condition = (condition or '').lower()
+    return any(keyword in condition for keyword in EXTREME_CONDITIONS + EXTREME_WORDS)
+
+
+def _production_values(rows: List[Dict], key: str) -> np.ndarray:
+    # Missing or zero production figures leave the day out of the production-drop rule
+    values = np.array(list(map(methodcaller('get', key), rows)) + [None], dtype=object)[:-1]
+    present = values.astype(bool)
+    production = np.full(len(rows), np.nan)
+    production[present] = values[present].astype(float)
+    return production
+
+
+class ForecastMatrix:
+    """
+    Forecast rows laid out as (material x day) arrays. Row i of every array
+    is one material (in order of first appearance), column j its j-th
+    forecast by date; `valid` marks the cells that hold a forecast.
+    ClimateDataManager builds one per cached forecast window and shares it,
+    so the arrays are never modified after construction.
+    """
+
+    def __init__(self, rows: List[Dict]):
+        names = list(map(itemgetter('material_name'), rows))
+        # A material's id is the one on its first row
+        first_ids = dict(zip(reversed(names), reversed(list(map(itemgetter('material_id'), rows)))))
+        self.material_names = list(dict.fromkeys(names))
+        self.material_ids = [first_ids[name] for name in self.material_names]
+        material_codes = {name: code for code, name in enumerate(self.material_names)}
+
+        self.conditions = list(dict.fromkeys(map(itemgetter('expected_condition'), rows)))
+        condition_codes = {condition: code for code, condition in enumerate(self.conditions)}
+
+        count = len(rows)
+        codes = np.fromiter(map(material_codes.__getitem__, names), dtype=np.intp, count=count)
+        # Dates as microseconds after the first forecast: cheaper to convert than datetime64
+        self.base_date = rows[0]['forecast_date'] if rows else datetime.now()
+        dates = np.fromiter(((date - self.base_date) // _MICROSECOND for date in map(itemgetter('forecast_date'), rows)),
+                            dtype=np.int64, count=count)
+
+        # Group by material, by date within a material, keeping row order for equal dates
+        order = np.argsort(dates, kind='stable')
+        order = order[np.argsort(codes[order], kind='stable')]
+        codes = codes[order]
+        counts = np.bincount(codes, minlength=len(self.material_names))
+        positions = np.arange(count) - (np.cumsum(counts) - counts)[codes]
+        shape = (len(self.material_names), int(counts.max()) if count else 0)
+
+        def layout(values, fill, dtype):
+            matrix = np.full(shape, fill, dtype=dtype)
+            matrix[codes, positions] = values[order]
+            return matrix
+
+        def field(key, dtype):
+            return np.fromiter(map(itemgetter(key), rows), dtype=dtype, count=count)
+
+        self.valid = layout(np.ones(count, dtype=bool), False, bool)
+        self.dates = layout(dates, np.iinfo(np.int64).max, np.int64)
+        self.delay = layout(field('delay_percent', float), 0.0, float)
+        self.days_from_now = layout(field('days_from_now', np.int64), 0, np.int64)
+        self.condition = layout(np.fromiter(map(condition_codes.__getitem__, map(itemgetter('expected_condition'), rows)),
+                                            dtype=np.intp, count=count), 0, np.intp)
+        self.risk_level_high = layout(np.fromiter(map(SUPPLY_RISK_LEVELS.__contains__, map(itemgetter('risk_level'), rows)),
+                                                  dtype=bool, count=count), False, bool)
+        self.original_production = layout(_production_values(rows, 'original_production'), np.nan, float)
+        self.expected_production = layout(_production_values(rows, 'expected_production'), np.nan, float)
+        self.extreme_condition = np.array([is_extreme_condition(condition) for condition in self.conditions], dtype=bool)
+
+    def active(self, end_date: Optional[datetime] = None) -> np.ndarray:
+        """Cells holding a forecast, up to end_date when given (a per-material prefix)"""
+        if end_date is None:
+            return self.valid
+        return self.valid & (self.dates <= (end_date - self.base_date) // _MICROSECOND)
+
+
+def _delay_periods(matrix: ForecastMatrix, active: np.ndarray, horizon: str) -> List:
+    """Runs of consecutive days above the delay threshold"""
+    high = active & (matrix.delay > DELAY_PERIOD_THRESHOLD)
+    padded = np.zeros((high.shape[0], high.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = high
+    edges = np.diff(padded, axis=1)
+    materials, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)  # exclusive; row-major order pairs each end with its start
+    lengths = ends - starts
+    keep = lengths >= DELAY_PERIOD_MIN_DAYS
+    materials, starts, lengths = materials[keep], starts[keep], lengths[keep]
+    if not len(materials):
+        return []
+
+    # Add each period's days in date order, as a running sum would, longest periods first
+    by_length = np.argsort(-lengths, kind='stable')
+    totals = np.zeros(len(lengths))
+    peaks = np.full(len(lengths), -np.inf)
+    for offset in range(int(lengths.max())):
+        ongoing = by_length[:np.count_nonzero(lengths > offset)]
+        values = matrix.delay[materials[ongoing], starts[ongoing] + offset]
+        totals[ongoing] += values
+        peaks[ongoing] = np.maximum(peaks[ongoing], values)
+
+    alerts = []
+    start_days = matrix.days_from_now[materials, starts]
+    for material_index, start_day, duration, total, max_delay in zip(
+            materials.tolist(), start_days.tolist(), lengths.tolist(), totals.tolist(), peaks.tolist()):
+        material = matrix.material_names[material_index]
+        avg_delay = total / duration
+        severity = 'CRITICAL' if max_delay > 40 else 'HIGH' if max_delay > 25 else 'MEDIUM'
+        alerts.append((material_index, {
+            'material_name': material,
+            'material_id': matrix.material_ids[material_index],
+            'alert_type': 'PREDICTED_DELAYS',
+            'severity': severity,
+            'days_until_impact': start_day,
+            'duration_days': duration,
+            'expected_delay': f"{avg_delay:.1f}%",
+            'peak_delay': f"{max_delay:.1f}%",
+            'urgency_score': 100 - start_day,  # More urgent if happening sooner
+            'message': f"{material} expected {avg_delay:.1f}% delays for {duration} days starting in {start_day} days ({horizon})",
+            'recommendation': f"Consider ordering {material} earlier or sourcing from alternative suppliers",
+            'horizon': horizon
+        }))
+    return alerts
+
+
+def _production_drops(matrix: ForecastMatrix, active: np.ndarray, horizon: str) -> List:
+    """Days whose expected production is well below the original production"""
+    with np.errstate(invalid='ignore'):
+        drops = ((matrix.original_production - matrix.expected_production) / matrix.original_production) * 100
+        hits = active & (drops > PRODUCTION_DROP_THRESHOLD)
+    materials, _ = np.nonzero(hits)
+
+    alerts = []
+    for material_index, production_drop, days_from_now, condition in zip(
+            materials.tolist(), drops[hits].tolist(),
+            matrix.days_from_now[hits].tolist(), matrix.condition[hits].tolist()):
+        material = matrix.material_names[material_index]
+        alerts.append((material_index, {
+            'material_name': material,
+            'material_id': matrix.material_ids[material_index],
+            'alert_type': 'PREDICTED_PRODUCTION_DROP',
+            'severity': 'CRITICAL' if production_drop > 30 else 'HIGH',
+            'days_until_impact': days_from_now,
+            'production_drop': f"{production_drop:.1f}%",
+            'urgency_score': 100 - days_from_now,
+            'message': f"{material} production expected to drop {production_drop:.1f}% in {days_from_now} days",
+            'recommendation': f"Increase {material} inventory buffer by {int(production_drop * 1.5)}% before impact",
+            'horizon': horizon,
+            'expected_condition': matrix.conditions[condition]
+        }))
+    return alerts
+
+
+def _weather_extremes(matrix: ForecastMatrix, active: np.ndarray, horizon: str) -> List:
+    """Days forecasting extreme weather"""
+    hits = active & matrix.extreme_condition[matrix.condition]
+    materials, _ = np.nonzero(hits)
+
+    alerts = []
+    for material_index, days_from_now, condition in zip(
+            materials.tolist(), matrix.days_from_now[hits].tolist(), matrix.condition[hits].tolist()):
+        material = matrix.material_names[material_index]
+        weather = matrix.conditions[condition]
+        alerts.append((material_index, {
+            'material_name': material,
+            'material_id': matrix.material_ids[material_index],
+            'alert_type': 'EXTREME_WEATHER_WARNING',
+            'severity': 'CRITICAL',
+            'days_until_impact': days_from_now,
+            'urgency_score': 100 - days_from_now,
+            'weather_condition': weather,
+            'message': f"Extreme weather ({weather}) predicted for {material} in {days_from_now} days",
+            'recommendation': f"Secure {material} inventory and consider emergency sourcing arrangements",
+            'horizon': horizon
+        }))
+    return alerts
+
+
+def _supply_chain_risks(matrix: ForecastMatrix, active: np.ndarray, horizon: str,
+                        affected_count: Callable[[int], int]) -> List:
+    """Materials with several risky days that feed products in stock"""
+    risky = active & ((matrix.delay > SUPPLY_RISK_DELAY) | matrix.risk_level_high)
+    risk_days = risky.sum(axis=1)
+    # Running sum along each row; the zeros for other days leave it unchanged
+    totals = np.cumsum(np.where(risky, matrix.delay, 0.0), axis=1)[:, -1] if risky.shape[1] else np.zeros(len(risky))
+    earliest = np.where(risky, matrix.days_from_now, np.iinfo(np.int64).max).min(axis=1, initial=np.iinfo(np.int64).max)
+
+    alerts = []
+    for material_index in np.flatnonzero(risk_days >= SUPPLY_RISK_MIN_DAYS).tolist():
+        material = matrix.material_names[material_index]
+        material_id = matrix.material_ids[material_index]
+        # Only materials that pass the forecast rule cost a product lookup
+        affected = affected_count(material_id)
+        if affected <= 0:
+            continue
+        days = int(risk_days[material_index])
+        earliest_impact = int(earliest[material_index])
+        avg_risk_delay = float(totals[material_index]) / days
+        urgency = (100 - earliest_impact) + (affected * 2)  # More products = higher urgency
+        alerts.append((material_index, {
+            'material_name': material,
+            'material_id': material_id,
+            'alert_type': 'SUPPLY_CHAIN_RISK',
+            'severity': 'HIGH' if affected > 3 else 'MEDIUM',
+            'days_until_impact': earliest_impact,
+            'affected_products_count': affected,
+            'risk_days_count': days,
+            'avg_delay': f"{avg_risk_delay:.1f}%",
+            'urgency_score': min(urgency, 100),
+            'message': f"{material} supply chain at risk - {days} problematic days in {horizon}, affecting {affected} products",
+            'recommendation': f"Review {material} suppliers and consider diversifying sources for {affected} affected products",
+            'horizon': horizon
+        }))
+    return alerts
+
+
+def analyze_forecasts(matrix: ForecastMatrix, horizon: str, affected_count: Callable[[int], int],
+                      end_date: Optional[datetime] = None) -> List[Dict]:
+    """
+    Predictive alerts for every material in matrix, over the forecasts up to
+    end_date (all of them when None). affected_count(material_id) returns the
+    number of in-stock products made from a material. Alerts are ordered by
+    (urgency_score, days_until_impact), and within that by material and
+    then delay, production, weather and supply-chain alerts.
+    """
+    active = matrix.active(end_date)
+    alerts = (_delay_periods(matrix, active, horizon)
+              + _production_drops(matrix, active, horizon)
+              + _weather_extremes(matrix, active, horizon)
+              + _supply_chain_risks(matrix, active, horizon, affected_count))
+    # Stable sorts: material order first, rule order within a material
+    alerts.sort(key=lambda item: item[0])
+    return sorted((alert for _, alert in alerts), key=lambda x: (x['urgency_score'], x['days_until_impact']))
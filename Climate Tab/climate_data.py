@@ -14,6 +14,9 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.database import get_db, close_db
+from core.climate_cache import climate_cache
+from core import demand
+from climate_analysis import ForecastMatrix, analyze_forecasts
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -22,22 +25,21 @@ import json
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Predictive alert horizons: name -> (days ahead, label used in alert messages)
+FORECAST_HORIZONS = {
+    'week': (7, "next week"),
+    'two_weeks': (14, "next 2 weeks"),
+    'month': (30, "next month"),
+}
+# Forecasts are fetched at least this far ahead so every horizon slices one cached fetch
+FORECAST_WINDOW_DAYS = max(days_ahead for days_ahead, _ in FORECAST_HORIZONS.values())
+# Stock cover reported for products and materials with no recent sales
+NO_DEMAND_DAYS = 999
+
 class ClimateDataManager:
     """Climate data access and management class with rule-based automation and performance optimization"""
     
     def __init__(self):
-        self.material_mapping = {
-            1: "Wheat",
-            2: "Sugarcane", 
-            3: "Cotton",
-            4: "Rice"
-        }
-        
-        # Performance optimization - caching
-        self._cache = {}
-        self._cache_timeout = 300  # 5 minutes cache timeout
-        self._last_refresh = {}
-        
         # Rule-based thresholds for automation
         self.thresholds = {
             'high_risk_delay': 30.0,  # 30% delay threshold
@@ -177,30 +179,64 @@ class ClimateDataManager:
                 'configured': False
             }
         
-    def _is_cache_valid(self, key: str) -> bool:
-        """Check if cached data is still valid"""
-        if key not in self._cache or key not in self._last_refresh:
-            return False
-        
-        cache_age = (datetime.now() - self._last_refresh[key]).total_seconds()
-        return cache_age < self._cache_timeout
+    def clear_cache(self):
+        """Clear all cached climate data (shared by every manager in this process)"""
+        climate_cache.clear()
     
-    def _get_cached_data(self, key: str):
-        """Get data from cache if valid"""
-        if self._is_cache_valid(key):
-            return self._cache[key]
-        return None
+    def _cached(self, key, loader, tables, fallback, error_message):
+        """
+        Load through the shared climate cache, returning fallback (uncached)
+        on error. The value is shared with every other caller: read it, never
+        modify it; public methods hand out copies.
+        """
+        try:
+            return climate_cache.get_or_load(key, loader, tables)
+        except Exception as e:
+            logger.error(f"{error_message}: {e}")
+            return fallback
     
-    def _set_cache_data(self, key: str, data):
-        """Set data in cache"""
-        self._cache[key] = data
-        self._last_refresh[key] = datetime.now()
+    def _query(self, query, params=None, one=False):
+        """Run a read query on its own connection; errors propagate to the caller"""
+        connection, cursor = self.get_connection()
+        try:
+            cursor.execute(query, params or ())
+            return cursor.fetchone() if one else cursor.fetchall()
+        finally:
+            cursor.close()
+            connection.close()
     
-    def clear_cache(self):
-        """Clear all cached data"""
-        self._cache.clear()
-        self._last_refresh.clear()
-        logger.info("Climate data cache cleared")
+    @property
+    def material_mapping(self) -> Dict[int, str]:
+        """Tracked materials as {material_id: name}, read from RawMaterials"""
+        return dict(self._cached(('material_mapping',), self._load_material_mapping, ('RawMaterials',),
+                                 {}, "Error loading raw materials"))
+    
+    def _load_material_mapping(self) -> Dict[int, str]:
+        rows = self._query("SELECT material_id, name FROM RawMaterials ORDER BY material_id")
+        return {row['material_id']: row['name'] for row in rows}
+    
+    def _status_from_row(self, row) -> Dict[str, Any]:
+        """Current-status dict for a ClimateProduction row joined to its material"""
+        original = float(row['original_production'])
+        expected = float(row['expected_production'])
+        delay_percent = float(row['delay_percent'])
+        
+        # Use current date if data is not from today or within the last 7 days
+        data_age = abs((datetime.now() - row['timestamp']).days)
+        display_timestamp = datetime.now() if data_age > 7 else row['timestamp']
+        
+        return {
+            'material_id': row['material_id'],
+            'material_name': row['material_name'],
+            'current_condition': row['expected_condition'],
+            'category': row['category'],
+            'original_production': original,
+            'expected_production': expected,
+            'delay_percent': delay_percent,
+            'production_impact': expected - original,
+            'risk_level': self._calculate_risk_level(delay_percent),
+            'last_updated': display_timestamp
+        }
         
     def get_connection(self):
         """Get database connection"""
@@ -213,345 +249,214 @@ class ClimateDataManager:
 
     def get_current_climate_status(self) -> List[Dict[str, Any]]:
         """Get current climate status for all raw materials with caching"""
-        # Check cache first
-        cached_data = self._get_cached_data('current_climate_status')
-        if cached_data is not None:
-            logger.debug("Returning cached climate status data")
-            return cached_data
-            
-        connection = None
-        cursor = None
-        try:
-            connection, cursor = self.get_connection()
-            
-            results = []
-            for material_id, material_name in self.material_mapping.items():
-                # Get latest climate data for each material
-                if material_name == "Wheat":
-                    table = "WheatProduction"
-                elif material_name == "Cotton":
-                    table = "CottonProduction"
-                elif material_name == "Rice":
-                    table = "RiceProduction"
-                elif material_name == "Sugarcane":
-                    table = "SugarcaneProduction"
-                else:
-                    continue
-                
-                query = f"""
-                    SELECT 
-                        material_id,
-                        timestamp,
-                        expected_condition,
-                        category,
-                        original_production,
-                        delay_percent,
-                        expected_production
-                    FROM {table}
-                    WHERE material_id = %s
-                    AND timestamp >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-                    ORDER BY timestamp DESC
-                    LIMIT 1
-                """
-                
-                cursor.execute(query, (material_id,))
-                result = cursor.fetchone()
-                
-                # If no recent data found, get the most recent data but use current date for display
-                if not result:
-                    query_fallback = f"""
-                        SELECT 
-                            material_id,
-                            timestamp,
-                            expected_condition,
-                            category,
-                            original_production,
-                            delay_percent,
-                            expected_production
-                        FROM {table}
-                        WHERE material_id = %s
-                        ORDER BY timestamp DESC
-                        LIMIT 1
-                    """
-                    cursor.execute(query_fallback, (material_id,))
-                    result = cursor.fetchone()
-                
-                if result:
-                    # Calculate production impact
-                    original = float(result['original_production'])
-                    expected = float(result['expected_production'])
-                    delay_percent = float(result['delay_percent'])
-                    
-                    # Determine risk level
-                    risk_level = self._calculate_risk_level(delay_percent)
-                    
-                    # Use current date if data is not from today or within the last 7 days
-                    data_age = abs((datetime.now() - result['timestamp']).days)
-                    display_timestamp = datetime.now() if data_age > 7 else result['timestamp']
-                    
-                    results.append({
-                        'material_id': material_id,
-                        'material_name': material_name,
-                        'current_condition': result['expected_condition'],
-                        'category': result['category'],
-                        'original_production': original,
-                        'expected_production': expected,
-                        'delay_percent': delay_percent,
-                        'production_impact': expected - original,
-                        'risk_level': risk_level,
-                        'last_updated': display_timestamp
-                    })
-            
-            # Cache the results
-            self._set_cache_data('current_climate_status', results)
-            logger.debug(f"Cached climate status data for {len(results)} materials")
-            
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error getting current climate status: {e}")
-            return []
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
+        return [dict(status) for status in self._climate_status()['rows']]
+    
+    def _climate_status(self) -> Dict[str, Any]:
+        """Shared cached status: 'rows' in material order, and the same dicts 'by_material' id"""
+        return self._cached(('current_climate_status',), self._load_current_climate_status,
+                            ('ClimateProduction', 'RawMaterials'), {'rows': [], 'by_material': {}},
+                            "Error getting current climate status")
+    
+    def _load_current_climate_status(self) -> Dict[str, Any]:
+        # Latest row per material in one query; the MAX is a single
+        # primary-key lookup per material, however many materials there are
+        query = """
+            SELECT 
+                cp.material_id,
+                rm.name AS material_name,
+                cp.timestamp,
+                cp.expected_condition,
+                cp.category,
+                cp.original_production,
+                cp.delay_percent,
+                cp.expected_production
+            FROM RawMaterials rm
+            JOIN ClimateProduction cp
+                ON cp.material_id = rm.material_id
+                AND cp.timestamp = (
+                    SELECT MAX(latest.timestamp)
+                    FROM ClimateProduction latest
+                    WHERE latest.material_id = rm.material_id
+                )
+            ORDER BY rm.material_id
+        """
+        results = [self._status_from_row(row) for row in self._query(query)]
+        logger.debug(f"Loaded climate status data for {len(results)} materials")
+        return {'rows': results, 'by_material': {status['material_id']: status for status in results}}
 
     def get_material_status(self, material_id: int) -> Optional[Dict[str, Any]]:
         """Get current climate status for a specific material"""
-        connection = None
-        cursor = None
-        try:
-            # Get all current status data
-            all_status = self.get_current_climate_status()
-            
-            # Find the specific material
-            for material_status in all_status:
-                if material_status.get('material_id') == material_id:
-                    return material_status
-            
-            # If not found in current status, get latest data directly
-            connection, cursor = self.get_connection()
-            
-            material_name = self.material_mapping.get(material_id)
-            if not material_name:
-                return None
-                
-            # Get table name for the material
-            table_map = {
-                "Wheat": "WheatProduction",
-                "Cotton": "CottonProduction", 
-                "Rice": "RiceProduction",
-                "Sugarcane": "SugarcaneProduction"
-            }
-            
-            table = table_map.get(material_name)
-            if not table:
-                return None
-            
-            query = f"""
-                SELECT 
-                    material_id,
-                    timestamp,
-                    expected_condition,
-                    category,
-                    original_production,
-                    delay_percent,
-                    expected_production
-                FROM {table}
-                WHERE material_id = %s
-                AND timestamp >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-                ORDER BY timestamp DESC
-                LIMIT 1
-            """
-            
-            cursor.execute(query, (material_id,))
-            row = cursor.fetchone()
-            
-            # If no recent data found, get the most recent data
-            if not row:
-                query_fallback = f"""
-                    SELECT 
-                        material_id,
-                        timestamp,
-                        expected_condition,
-                        category,
-                        original_production,
-                        delay_percent,
-                        expected_production
-                    FROM {table}
-                    WHERE material_id = %s
-                    ORDER BY timestamp DESC
-                    LIMIT 1
-                """
-                cursor.execute(query_fallback, (material_id,))
-                row = cursor.fetchone()
-            
-            if row:
-                risk_level = self._calculate_risk_level(float(row['delay_percent']))
-                
-                # Use current date if data is not from today or within the last 7 days
-                data_age = abs((datetime.now() - row['timestamp']).days)
-                display_timestamp = datetime.now() if data_age > 7 else row['timestamp']
-                
-                return {
-                    'material_id': row['material_id'],
-                    'material_name': material_name,
-                    'last_updated': display_timestamp,
-                    'current_condition': row['expected_condition'],
-                    'category': row['category'],
-                    'delay_percent': float(row['delay_percent']),
-                    'risk_level': risk_level,
-                    'original_production': row['original_production'],
-                    'expected_production': row['expected_production'],
-                    'production_impact': float(row['expected_production']) - float(row['original_production'])
-                }
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error getting material status for material_id {material_id}: {e}")
-            return None
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
+        # A lookup in the shared all-materials status: one query however many materials are asked for
+        status = self._climate_status()['by_material'].get(material_id)
+        return dict(status) if status is not None else None
 
     def get_climate_forecast(self, days_ahead: int = 7) -> List[Dict[str, Any]]:
         """Get climate forecast for next N days"""
-        connection = None
-        cursor = None
+        return self.get_climate_forecasts([days_ahead])[days_ahead]
+    
+    def get_climate_forecasts(self, horizons) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Forecasts for several horizons as {days_ahead: forecast}, each shaped
+        like get_climate_forecast(days_ahead). Every material is fetched once
+        for the widest horizon (at least FORECAST_WINDOW_DAYS, so the usual
+        horizons share one cached fetch) and the shorter ones are sliced
+        from it in memory.
+        """
+        horizons = sorted(set(horizons))
+        window = self._forecast_window(max(horizons))
+        if window is None:
+            return {days_ahead: [] for days_ahead in horizons}
+        
+        # Rows are in (material, date) order, so every slice keeps that order
+        forecasts = {}
+        for days_ahead in horizons:
+            end_date = window['start_date'] + timedelta(days=days_ahead)
+            forecasts[days_ahead] = [dict(row) for row in window['rows'] if row['forecast_date'] <= end_date]
+        return forecasts
+    
+    def _forecast_window(self, days_ahead: int) -> Optional[Dict[str, Any]]:
+        """Shared cached forecast of every material for max(days_ahead, FORECAST_WINDOW_DAYS) days; None on error"""
+        window_days = max(days_ahead, FORECAST_WINDOW_DAYS)
+        return self._cached(('climate_forecast', window_days), lambda: self._load_forecast_window(window_days),
+                            ('ClimateProduction', 'RawMaterials'), None, "Error getting climate forecast")
+    
+    def _load_forecast_window(self, days_ahead: int) -> Dict[str, Any]:
+        # Calculate date range
+        start_date = datetime.now()
+        end_date = start_date + timedelta(days=days_ahead)
+        
+        # Every material in one query: one primary-key range scan per material
+        query = """
+            SELECT 
+                cp.material_id,
+                rm.name AS material_name,
+                cp.timestamp,
+                cp.expected_condition,
+                cp.category,
+                cp.delay_percent,
+                cp.expected_production,
+                cp.original_production
+            FROM RawMaterials rm
+            JOIN ClimateProduction cp
+                ON cp.material_id = rm.material_id
+                AND cp.timestamp BETWEEN %s AND %s
+            ORDER BY rm.material_id, cp.timestamp ASC
+        """
+        forecast_data = self._query(query, (start_date, end_date))
+        
+        results = []
+        for row in forecast_data:
+            risk_level = self._calculate_risk_level(float(row['delay_percent']))
+            
+            results.append({
+                'material_id': row['material_id'],
+                'material_name': row['material_name'],
+                'forecast_date': row['timestamp'],
+                'expected_condition': row['expected_condition'],
+                'category': row['category'],
+                'delay_percent': float(row['delay_percent']),
+                'risk_level': risk_level,
+                'days_from_now': (row['timestamp'].date() - start_date.date()).days
+            })
+        
+        # Laid out as arrays once per load; every alert horizon reads the cached layout
+        return {'start_date': start_date, 'rows': results, 'matrix': ForecastMatrix(results)}
+
+    def get_demand_index(self) -> Dict[str, Dict]:
+        """
+        Daily demand rates from the DemandRates index, for O(1) lookups:
+        {'by_sku': {SKU: units/day}, 'by_material': {material_id: {'daily_rate',
+        'current_stock', 'safety_stock'}}}. Dropped from the cache after
+        every sale, so it is never older than the last checkout. Shared with
+        other callers; read-only.
+        """
+        return self._cached(('demand_index',), self._load_demand_index, ('DemandRates', 'Products'),
+                            {'by_sku': {}, 'by_material': {}}, "Error loading demand rates")
+    
+    def _load_demand_index(self) -> Dict[str, Dict]:
+        connection, cursor = self.get_connection()
         try:
-            connection, cursor = self.get_connection()
-            
-            # Calculate date range
-            start_date = datetime.now()
-            end_date = start_date + timedelta(days=days_ahead)
-            
-            results = []
-            for material_id, material_name in self.material_mapping.items():
-                # Get forecast data for each material
-                table_map = {
-                    "Wheat": "WheatProduction",
-                    "Cotton": "CottonProduction", 
-                    "Rice": "RiceProduction",
-                    "Sugarcane": "SugarcaneProduction"
-                }
-                
-                table = table_map.get(material_name)
-                if not table:
-                    continue
-                
-                query = f"""
-                    SELECT 
-                        timestamp,
-                        expected_condition,
-                        category,
-                        delay_percent,
-                        expected_production,
-                        original_production
-                    FROM {table}
-                    WHERE material_id = %s 
-                    AND timestamp BETWEEN %s AND %s
-                    ORDER BY timestamp ASC
-                """
-                
-                cursor.execute(query, (material_id, start_date, end_date))
-                forecast_data = cursor.fetchall()
-                
-                for row in forecast_data:
-                    risk_level = self._calculate_risk_level(float(row['delay_percent']))
-                    
-                    results.append({
-                        'material_id': material_id,
-                        'material_name': material_name,
-                        'forecast_date': row['timestamp'],
-                        'expected_condition': row['expected_condition'],
-                        'category': row['category'],
-                        'delay_percent': float(row['delay_percent']),
-                        'risk_level': risk_level,
-                        'days_from_now': (row['timestamp'].date() - start_date.date()).days
-                    })
-            
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error getting climate forecast: {e}")
-            return []
+            products = demand.get_stock_demand(cursor)
         finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
-
+            cursor.close()
+            connection.close()
+        
+        by_material = {}
+        for product in products.values():
+            material = by_material.setdefault(product['material_id'], {'daily_rate': 0.0, 'current_stock': 0, 'safety_stock': 0})
+            material['daily_rate'] += product['daily_rate']
+            material['current_stock'] += product['stock']
+            material['safety_stock'] += product['low_stock_threshold']
+        return {
+            'by_sku': {sku: product['daily_rate'] for sku, product in products.items()},
+            'by_material': by_material
+        }
+    
     def get_affected_products(self, material_id: int) -> List[Dict[str, Any]]:
         """Get products that use a specific raw material"""
-        connection = None
-        cursor = None
-        try:
-            connection, cursor = self.get_connection()
-            
-            query = """
-                SELECT 
-                    p.SKU,
-                    p.name,
-                    p.price,
-                    p.cost,
-                    p.stock,
-                    p.low_stock_threshold,
-                    rm.name as material_name
-                FROM Products p
-                JOIN RawMaterials rm ON p.material_id = rm.material_id
-                WHERE p.material_id = %s
-                AND p.stock > 0
-                ORDER BY p.stock ASC
-            """
-            
-            cursor.execute(query, (material_id,))
-            products = cursor.fetchall()
-            
-            results = []
-            for product in products:
-                # Calculate days until critical stock
-                current_stock = int(product['stock'])
-                threshold = int(product['low_stock_threshold'])
-                
-                # Estimate days based on average daily sales (simplified)
-                days_until_critical = max(0, (current_stock - threshold) // 2)  # Assume 2 units/day avg
-                
-                # Determine priority
-                if current_stock <= threshold:
-                    priority = "CRITICAL"
-                elif days_until_critical <= 3:
-                    priority = "HIGH"
-                elif days_until_critical <= 7:
-                    priority = "MEDIUM"
-                else:
-                    priority = "LOW"
-                
-                results.append({
-                    'sku': product['SKU'],
-                    'product_name': product['name'],
-                    'current_stock': current_stock,
-                    'threshold': threshold,
-                    'days_until_critical': days_until_critical,
-                    'priority': priority,
-                    'material_name': product['material_name'],
-                    'price': float(product['price']),
-                    'category': 'General'  # Default category since column may not exist
-                })
-            
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error getting affected products: {e}")
-            return []
-        finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
+        return [dict(product) for product in self._affected_products(material_id)]
+    
+    def _affected_products(self, material_id: int) -> List[Dict[str, Any]]:
+        """Shared cached get_affected_products(material_id)"""
+        return self._cached(('affected_products', material_id), lambda: self._load_affected_products(material_id),
+                            ('Products', 'RawMaterials', 'DemandRates'), [], "Error getting affected products")
+    
+    def _load_affected_products(self, material_id: int) -> List[Dict[str, Any]]:
+        query = """
+            SELECT 
+                p.SKU,
+                p.name,
+                p.price,
+                p.cost,
+                p.stock,
+                p.low_stock_threshold,
+                rm.name as material_name
+            FROM Products p
+            JOIN RawMaterials rm ON p.material_id = rm.material_id
+            WHERE p.material_id = %s
+            AND p.stock > 0
+            ORDER BY p.stock ASC
+        """
+        products = self._query(query, (material_id,))
+        demand_rates = self.get_demand_index()['by_sku']
+        
+        results = []
+        for product in products:
+            # Calculate days until critical stock
+            current_stock = int(product['stock'])
+            threshold = int(product['low_stock_threshold'])
+            
+            # Days of cover above the threshold at the product's recent daily sales rate
+            daily_demand = demand_rates.get(product['SKU'], 0.0)
+            if daily_demand > 0:
+                days_until_critical = max(0, int((current_stock - threshold) / daily_demand))
+            else:
+                days_until_critical = NO_DEMAND_DAYS
+            
+            # Determine priority
+            if current_stock <= threshold:
+                priority = "CRITICAL"
+            elif days_until_critical <= 3:
+                priority = "HIGH"
+            elif days_until_critical <= 7:
+                priority = "MEDIUM"
+            else:
+                priority = "LOW"
+            
+            results.append({
+                'sku': product['SKU'],
+                'product_name': product['name'],
+                'current_stock': current_stock,
+                'threshold': threshold,
+                'days_until_critical': days_until_critical,
+                'daily_demand': round(daily_demand, 2),
+                'priority': priority,
+                'material_name': product['material_name'],
+                'price': float(product['price']),
+                'category': 'General'  # Default category since column may not exist
+            })
+        
+        return results
 
     def _calculate_risk_level(self, delay_percent: float) -> str:
         """Calculate risk level based on delay percentage"""
@@ -567,7 +472,7 @@ class ClimateDataManager:
     def get_overall_climate_risk(self) -> Dict[str, Any]:
         """Calculate overall climate risk score"""
         try:
-            status_data = self.get_current_climate_status()
+            status_data = self._climate_status()['rows']
             
             if not status_data:
                 return {'risk_score': 0, 'risk_level': 'LOW', 'materials_at_risk': 0}
@@ -635,7 +540,7 @@ class ClimateDataManager:
                         'days_until_impact': earliest_risk['days_from_now'],
                         'expected_condition': earliest_risk['expected_condition'],
                         'message': f"{material} {earliest_risk['risk_level'].lower()} risk in {earliest_risk['days_from_now']} days",
-                        'affected_products_count': len(self.get_affected_products(earliest_risk['material_id']))
+                        'affected_products_count': len(self._affected_products(earliest_risk['material_id']))
                     }
                     alerts.append(alert)
             
@@ -647,227 +552,42 @@ class ClimateDataManager:
 
     def get_predictive_alerts(self, time_horizon: str = 'week') -> List[Dict[str, Any]]:
         """Get predictive alerts based on upcoming climate data (week/month ahead)"""
+        return self.get_predictive_alerts_by_horizon([time_horizon])[time_horizon]
+    
+    def get_predictive_alerts_by_horizon(self, time_horizons=('week', 'two_weeks', 'month')) -> Dict[str, List[Dict[str, Any]]]:
+        """Predictive alerts for several horizons as {time_horizon: alerts}, from one forecast fetch"""
         try:
-            alerts = []
-            
-            # Set time horizon
-            if time_horizon == 'week':
-                days_ahead = 7
-                horizon_label = "next week"
-            elif time_horizon == 'month':
-                days_ahead = 30
-                horizon_label = "next month"
-            else:
-                days_ahead = 14
-                horizon_label = "next 2 weeks"
-            
-            # Get forecast data for the specified period
-            forecast_data = self.get_climate_forecast(days_ahead)
-            
-            # Group by material for analysis
-            material_forecasts = {}
-            for item in forecast_data:
-                material = item['material_name']
-                if material not in material_forecasts:
-                    material_forecasts[material] = []
-                material_forecasts[material].append(item)
-            
-            # Analyze each material for predictive concerns
-            for material, forecasts in material_forecasts.items():
-                material_id = forecasts[0]['material_id']
-                
-                # Sort by date to analyze trends
-                forecasts = sorted(forecasts, key=lambda x: x['forecast_date'])
-                
-                # Check for various predictive scenarios
-                alerts.extend(self._analyze_delay_patterns(material, material_id, forecasts, horizon_label))
-                alerts.extend(self._analyze_production_drops(material, material_id, forecasts, horizon_label))
-                alerts.extend(self._analyze_weather_extremes(material, material_id, forecasts, horizon_label))
-                alerts.extend(self._analyze_supply_chain_risks(material, material_id, forecasts, horizon_label))
-            
-            # Sort by urgency and days until impact
-            alerts = sorted(alerts, key=lambda x: (x['urgency_score'], x['days_until_impact']))
-            
-            return alerts
+            # Unknown horizon names fall back to two weeks
+            settings = {horizon: FORECAST_HORIZONS.get(horizon, FORECAST_HORIZONS['two_weeks']) for horizon in time_horizons}
+            window = self._forecast_window(max(days_ahead for days_ahead, _ in settings.values()))
+            if window is None:
+                return {horizon: [] for horizon in time_horizons}
+            
+            # Every horizon is a per-material prefix of the one (material x day) layout
+            matrix = window['matrix']
+            affected_count = lambda material_id: len(self._affected_products(material_id))
+            return {
+                horizon: analyze_forecasts(matrix, horizon_label, affected_count,
+                                           end_date=window['start_date'] + timedelta(days=days_ahead))
+                for horizon, (days_ahead, horizon_label) in settings.items()
+            }
             
         except Exception as e:
             logger.error(f"Error getting predictive alerts: {e}")
-            return []
-
-    def _analyze_delay_patterns(self, material: str, material_id: int, forecasts: List[Dict], horizon: str) -> List[Dict]:
-        """Analyze for upcoming delay patterns"""
-        alerts = []
-        
-        try:
-            # Look for consecutive high-delay periods
-            high_delay_periods = []
-            current_period = []
-            
-            for forecast in forecasts:
-                if forecast['delay_percent'] > 20:  # 20% delay threshold
-                    current_period.append(forecast)
-                else:
-                    if len(current_period) >= 2:  # 2+ consecutive days
-                        high_delay_periods.append(current_period)
-                    current_period = []
-            
-            # Check final period
-            if len(current_period) >= 2:
-                high_delay_periods.append(current_period)
-            
-            # Generate alerts for significant delay periods
-            for period in high_delay_periods:
-                start_day = period[0]['days_from_now']
-                end_day = period[-1]['days_from_now']
-                max_delay = max(f['delay_percent'] for f in period)
-                avg_delay = sum(f['delay_percent'] for f in period) / len(period)
-                
-                severity = 'CRITICAL' if max_delay > 40 else 'HIGH' if max_delay > 25 else 'MEDIUM'
-                urgency = 100 - start_day  # More urgent if happening sooner
-                
-                alert = {
-                    'material_name': material,
-                    'material_id': material_id,
-                    'alert_type': 'PREDICTED_DELAYS',
-                    'severity': severity,
-                    'days_until_impact': start_day,
-                    'duration_days': len(period),
-                    'expected_delay': f"{avg_delay:.1f}%",
-                    'peak_delay': f"{max_delay:.1f}%",
-                    'urgency_score': urgency,
-                    'message': f"{material} expected {avg_delay:.1f}% delays for {len(period)} days starting in {start_day} days ({horizon})",
-                    'recommendation': f"Consider ordering {material} earlier or sourcing from alternative suppliers",
-                    'horizon': horizon
-                }
-                alerts.append(alert)
-                
-        except Exception as e:
-            logger.error(f"Error analyzing delay patterns for {material}: {e}")
-        
-        return alerts
-
-    def _analyze_production_drops(self, material: str, material_id: int, forecasts: List[Dict], horizon: str) -> List[Dict]:
-        """Analyze for upcoming production drops"""
-        alerts = []
-        
-        try:
-            for forecast in forecasts:
-                # Calculate production impact if data is available
-                if 'expected_production' in forecast and 'original_production' in forecast:
-                    if forecast['expected_production'] and forecast['original_production']:
-                        production_drop = ((forecast['original_production'] - forecast['expected_production']) 
-                                         / forecast['original_production']) * 100
-                        
-                        if production_drop > 15:  # 15% production drop threshold
-                            severity = 'CRITICAL' if production_drop > 30 else 'HIGH'
-                            urgency = 100 - forecast['days_from_now']
-                            
-                            alert = {
-                                'material_name': material,
-                                'material_id': material_id,
-                                'alert_type': 'PREDICTED_PRODUCTION_DROP',
-                                'severity': severity,
-                                'days_until_impact': forecast['days_from_now'],
-                                'production_drop': f"{production_drop:.1f}%",
-                                'urgency_score': urgency,
-                                'message': f"{material} production expected to drop {production_drop:.1f}% in {forecast['days_from_now']} days",
-                                'recommendation': f"Increase {material} inventory buffer by {int(production_drop * 1.5)}% before impact",
-                                'horizon': horizon,
-                                'expected_condition': forecast.get('expected_condition', 'Unknown')
-                            }
-                            alerts.append(alert)
-                            
-        except Exception as e:
-            logger.error(f"Error analyzing production drops for {material}: {e}")
-        
-        return alerts
-
-    def _analyze_weather_extremes(self, material: str, material_id: int, forecasts: List[Dict], horizon: str) -> List[Dict]:
-        """Analyze for extreme weather conditions"""
-        alerts = []
-        
-        try:
-            extreme_conditions = ['severe_drought', 'flooding', 'extreme_heat', 'frost', 'storm']
-            
-            for forecast in forecasts:
-                condition = forecast.get('expected_condition', '').lower()
-                
-                # Check if condition contains extreme weather keywords
-                for extreme in extreme_conditions:
-                    if extreme in condition or any(word in condition for word in ['severe', 'extreme', 'critical', 'emergency']):
-                        urgency = 100 - forecast['days_from_now']
-                        
-                        alert = {
-                            'material_name': material,
-                            'material_id': material_id,
-                            'alert_type': 'EXTREME_WEATHER_WARNING',
-                            'severity': 'CRITICAL',
-                            'days_until_impact': forecast['days_from_now'],
-                            'urgency_score': urgency,
-                            'weather_condition': forecast['expected_condition'],
-                            'message': f"Extreme weather ({forecast['expected_condition']}) predicted for {material} in {forecast['days_from_now']} days",
-                            'recommendation': f"Secure {material} inventory and consider emergency sourcing arrangements",
-                            'horizon': horizon
-                        }
-                        alerts.append(alert)
-                        break  # One alert per forecast day
-                        
-        except Exception as e:
-            logger.error(f"Error analyzing weather extremes for {material}: {e}")
-        
-        return alerts
-
-    def _analyze_supply_chain_risks(self, material: str, material_id: int, forecasts: List[Dict], horizon: str) -> List[Dict]:
-        """Analyze for supply chain disruption risks"""
-        alerts = []
-        
-        try:
-            # Look for patterns that indicate supply chain risks
-            risk_days = [f for f in forecasts if f['delay_percent'] > 15 or f['risk_level'] in ['HIGH', 'CRITICAL']]
-            
-            if len(risk_days) >= 3:  # Multiple risky days indicate supply chain concern
-                avg_risk_delay = sum(f['delay_percent'] for f in risk_days) / len(risk_days)
-                earliest_impact = min(f['days_from_now'] for f in risk_days)
-                
-                # Check if this affects multiple products
-                affected_products = self.get_affected_products(material_id)
-                affected_count = len(affected_products)
-                
-                if affected_count > 0:
-                    urgency = (100 - earliest_impact) + (affected_count * 2)  # More products = higher urgency
-                    
-                    alert = {
-                        'material_name': material,
-                        'material_id': material_id,
-                        'alert_type': 'SUPPLY_CHAIN_RISK',
-                        'severity': 'HIGH' if affected_count > 3 else 'MEDIUM',
-                        'days_until_impact': earliest_impact,
-                        'affected_products_count': affected_count,
-                        'risk_days_count': len(risk_days),
-                        'avg_delay': f"{avg_risk_delay:.1f}%",
-                        'urgency_score': min(urgency, 100),
-                        'message': f"{material} supply chain at risk - {len(risk_days)} problematic days in {horizon}, affecting {affected_count} products",
-                        'recommendation': f"Review {material} suppliers and consider diversifying sources for {affected_count} affected products",
-                        'horizon': horizon
-                    }
-                    alerts.append(alert)
-                    
-        except Exception as e:
-            logger.error(f"Error analyzing supply chain risks for {material}: {e}")
-        
-        return alerts
+            return {horizon: [] for horizon in time_horizons}
 
     def get_climate_alerts(self) -> List[Dict[str, Any]]:
         """Get comprehensive climate alerts combining current and predictive analysis"""
         try:
             all_alerts = []
             
-            # Get immediate alerts (next 7 days)
-            immediate_alerts = self.get_predictive_alerts('week')
+            # Immediate (next 7 days) and longer-term (next month) alerts from one forecast fetch
+            predictive_alerts = self.get_predictive_alerts_by_horizon(['week', 'month'])
+            immediate_alerts = predictive_alerts['week']
             all_alerts.extend(immediate_alerts)
             
             # Get longer-term alerts (next month) for planning
-            monthly_alerts = self.get_predictive_alerts('month')
+            monthly_alerts = predictive_alerts['month']
             
             # Filter monthly alerts to avoid duplicates with weekly alerts
             for monthly_alert in monthly_alerts:
@@ -901,9 +621,10 @@ class ClimateDataManager:
         try:
             # Get today's data for all materials
             today = datetime.now().date()
+            statuses = self._climate_status()['by_material']
             
             for material_id, material_name in self.material_mapping.items():
-                current_conditions = self.get_material_status(material_id)
+                current_conditions = statuses.get(material_id)
                 
                 if current_conditions:
                     risk_level = current_conditions.get('risk_level', 'LOW')
@@ -929,106 +650,17 @@ class ClimateDataManager:
         
         return alerts
 
-    def get_stock_depletion_alerts(self) -> List[Dict[str, Any]]:
-        """Generate alerts for materials that will run out based on current consumption rates"""
-        alerts = []
-        
-        try:
-            connection, cursor = self.get_connection()
-            
-            # Check each material's stock status
-            for material_id, material_name in self.material_mapping.items():
-                try:
-                    # For demonstration, let's simulate stock levels and consumption rates
-                    # In a real system, this would come from inventory management
-                    simulated_stock_data = {
-                        "Wheat": {"current_stock": 500, "daily_consumption": 25, "safety_stock": 100},
-                        "Sugarcane": {"current_stock": 290, "daily_consumption": 15, "safety_stock": 50},  # Will run out in ~19 days
-                        "Cotton": {"current_stock": 800, "daily_consumption": 20, "safety_stock": 150},
-                        "Rice": {"current_stock": 420, "daily_consumption": 30, "safety_stock": 120}  # Will run out in ~14 days
-                    }
-                    
-                    if material_name in simulated_stock_data:
-                        stock_info = simulated_stock_data[material_name]
-                        current_stock = stock_info["current_stock"]
-                        daily_consumption = stock_info["daily_consumption"]
-                        safety_stock = stock_info["safety_stock"]
-                        
-                        # Calculate days until stock runs out
-                        days_until_empty = current_stock / daily_consumption if daily_consumption > 0 else 999
-                        days_until_safety = (current_stock - safety_stock) / daily_consumption if daily_consumption > 0 else 999
-                        
-                        # Generate alerts based on stock levels
-                        if days_until_empty <= 7:  # Critical - will run out in a week
-                            alerts.append({
-                                'material_name': material_name,
-                                'material_id': material_id,
-                                'alert_type': 'STOCK_DEPLETION_CRITICAL',
-                                'severity': 'CRITICAL',
-                                'days_until_impact': max(1, int(days_until_empty)),
-                                'days_until_empty': int(days_until_empty),
-                                'current_stock': current_stock,
-                                'daily_consumption': daily_consumption,
-                                'urgency_score': 100 - int(days_until_empty),
-                                'message': f"{material_name} will run out in {int(days_until_empty)} days",
-                                'recommendation': f"Immediate restocking required for {material_name}",
-                                'stock_status': 'CRITICAL'
-                            })
-                        elif days_until_empty <= 21:  # High - will run out in three weeks
-                            alerts.append({
-                                'material_name': material_name,
-                                'material_id': material_id,
-                                'alert_type': 'STOCK_DEPLETION_HIGH',
-                                'severity': 'HIGH',
-                                'days_until_impact': int(days_until_empty),
-                                'days_until_empty': int(days_until_empty),
-                                'current_stock': current_stock,
-                                'daily_consumption': daily_consumption,
-                                'urgency_score': 85 - int(days_until_empty * 2),
-                                'message': f"{material_name} will run out in {int(days_until_empty)} days",
-                                'recommendation': f"Order {material_name} within the next week",
-                                'stock_status': 'LOW'
-                            })
-                        elif days_until_safety <= 10:  # Medium - approaching safety stock
-                            alerts.append({
-                                'material_name': material_name,
-                                'material_id': material_id,
-                                'alert_type': 'STOCK_SAFETY_WARNING',
-                                'severity': 'MEDIUM',
-                                'days_until_impact': max(1, int(days_until_safety)),
-                                'days_until_safety': int(days_until_safety),
-                                'current_stock': current_stock,
-                                'safety_stock': safety_stock,
-                                'daily_consumption': daily_consumption,
-                                'urgency_score': 70 - int(days_until_safety),
-                                'message': f"{material_name} will reach safety stock levels in {int(days_until_safety)} days",
-                                'recommendation': f"Plan to reorder {material_name} soon",
-                                'stock_status': 'APPROACHING_SAFETY'
-                            })
-                        
-                except Exception as e:
-                    logger.error(f"Error checking stock for {material_name}: {e}")
-                    continue
-            
-            cursor.close()
-            connection.close()
-            
-            return alerts
-            
-        except Exception as e:
-            logger.error(f"Error getting stock depletion alerts: {e}")
-            return []
-
     def get_smart_recommendations(self, material_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get rule-based smart recommendations for materials"""
         try:
-            climate_status = self.get_current_climate_status()
+            statuses = self._climate_status()
+            if material_id:
+                climate_status = [statuses['by_material'][material_id]] if material_id in statuses['by_material'] else []
+            else:
+                climate_status = statuses['rows']
             recommendations = []
             
             for status in climate_status:
-                if material_id and status['material_id'] != material_id:
-                    continue
-                    
                 # Apply rule-based analysis
                 material_recommendations = []
                 triggered_rules = []
@@ -1098,7 +730,7 @@ class ClimateDataManager:
                 'processed_materials': []
             }
             
-            climate_status = self.get_current_climate_status()
+            climate_status = self._climate_status()['rows']
             
             for status in climate_status:
                 material_result = {
@@ -1150,7 +782,7 @@ Immediate action recommended.
     def get_supplier_integration_suggestions(self) -> List[Dict[str, Any]]:
         """Get rule-based supplier integration suggestions"""
         try:
-            climate_status = self.get_current_climate_status()
+            climate_status = self._climate_status()['rows']
             suggestions = []
             
             for status in climate_status:
@@ -1318,36 +950,21 @@ Immediate action recommended.
         alerts = []
         
         try:
-            connection, cursor = self.get_connection()
+            # Stock and sales rate of every material's products, from the demand index
+            material_demand = self.get_demand_index()['by_material']
             
             # Check each material's stock status
             for material_id, material_name in self.material_mapping.items():
                 try:
-                    # Get current stock level
-                    cursor.execute("SELECT name FROM RawMaterials WHERE material_id = %s", (material_id,))
-                    result = cursor.fetchone()
-                    
-                    if not result:
-                        continue
-                    
-                    # For demonstration, let's simulate stock levels and consumption rates
-                    # In a real system, this would come from inventory management
-                    simulated_stock_data = {
-                        "Wheat": {"current_stock": 500, "daily_consumption": 25, "safety_stock": 100},
-                        "Sugarcane": {"current_stock": 300, "daily_consumption": 15, "safety_stock": 50},
-                        "Cotton": {"current_stock": 800, "daily_consumption": 20, "safety_stock": 150},
-                        "Rice": {"current_stock": 600, "daily_consumption": 30, "safety_stock": 120}
-                    }
-                    
-                    if material_name in simulated_stock_data:
-                        stock_info = simulated_stock_data[material_name]
+                    if material_id in material_demand:
+                        stock_info = material_demand[material_id]
                         current_stock = stock_info["current_stock"]
-                        daily_consumption = stock_info["daily_consumption"]
+                        daily_consumption = round(stock_info["daily_rate"], 2)
                         safety_stock = stock_info["safety_stock"]
                         
                         # Calculate days until stock runs out
-                        days_until_empty = current_stock / daily_consumption if daily_consumption > 0 else 999
-                        days_until_safety = (current_stock - safety_stock) / daily_consumption if daily_consumption > 0 else 999
+                        days_until_empty = current_stock / daily_consumption if daily_consumption > 0 else NO_DEMAND_DAYS
+                        days_until_safety = (current_stock - safety_stock) / daily_consumption if daily_consumption > 0 else NO_DEMAND_DAYS
                         
                         # Generate alerts based on stock levels
                         if days_until_empty <= 7:  # Critical - will run out in a week
@@ -1401,9 +1018,6 @@ Immediate action recommended.
                     logger.error(f"Error checking stock for {material_name}: {e}")
                     continue
             
-            cursor.close()
-            connection.close()
-            
             return alerts
             
         except Exception as e:
@@ -1434,6 +1048,10 @@ def get_climate_alerts():
     """Get current climate alerts"""
     return climate_manager.get_climate_alerts()
 
+def get_cache_stats():
+    """Hit/miss counters of the shared climate data cache"""
+    return climate_cache.stats()
+
 # New Phase 5 convenience functions for rule-based automation
 def get_smart_recommendations(material_id=None):
     """Get rule-based smart recommendations"""
@@ -252,6 +252,11 @@ class ClimateUI:
             # Refresh actions data
             self.refresh_actions_data()
             
+            stats = climate_data.get_cache_stats()
+            self.last_updated_label.config(
+                text=f"Last updated: {current_time} · Cache {stats['hit_rate']:.0f}% ({stats['entries']} cached)"
+            )
+            
         except Exception as e:
             messagebox.showerror("Error", f"Failed to refresh climate data: {str(e)}")
     
@@ -10,120 +10,107 @@ import logging
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from core.database import get_db
+from core.database import (
+    get_thread_connection, release_thread_connection, date_range_clause,
+    comparison_periods, period_sums, split_periods
+)
+from core import events
+from dashboard_cache import QueryCache
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Shared result cache; writers publish table changes through core.events
+query_cache = QueryCache()
+events.subscribe(query_cache.invalidate)
+
+# Rollup sums behind the period-over-period summaries, and the change reported for each
+SUMMARY_MEASURES = {
+    'total_sales': 'r.revenue',
+    'total_orders': 'r.orders',
+    'total_profit': 'r.profit',
+    'total_items_sold': 'r.items',
+}
+SUMMARY_CHANGES = {
+    'total_sales': 'sales_change',
+    'total_orders': 'orders_change',
+    'total_profit': 'profit_change',
+}
+
+
+def _percentage_change(current, previous):
+    if not previous:
+        return 0
+    return ((current - previous) / previous) * 100
+
 class DashboardAnalytics:
     """Main class for dashboard analytics and business intelligence functions"""
     
     def __init__(self):
-        self.connection = None
+        # Connections are checked out per thread from the shared pool, so one
+        # instance can serve the UI thread and background refreshes at once
+        pass
         
     def get_connection(self):
-        """Get database connection"""
-        if not self.connection or not self.connection.is_connected():
-            self.connection, _ = get_db()
-        return self.connection
+        """Get the pooled database connection checked out by the calling thread"""
+        return get_thread_connection()
     
     def close_connection(self):
-        """Close database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        """Return the calling thread's connection to the pool"""
+        release_thread_connection()
 
     # Core Dashboard Functions
     
+    @query_cache.cached('Sales', 'DailySalesRollup')
     def get_sales_summary(self, start_date: str, end_date: str, employee_id: Optional[int] = None, 
-                         supplier_id: Optional[int] = None, category_id: Optional[int] = None) -> Dict[str, Any]:
+                         supplier_id: Optional[int] = None, category_id: Optional[int] = None,
+                         compare: Tuple[str, ...] = ('previous',)) -> Dict[str, Any]:
         """
         Get comprehensive sales summary with profit calculations
-        Returns total sales, orders, profit, and comparison metrics
+        Returns total sales, orders, profit, and comparison metrics.
+        compare lists the comparison periods ('previous', 'last_year'); all of
+        them are summed in the same scan as the current period. The top-level
+        *_change values are against the first one, and every period is under
+        'comparisons'.
         """
+        cursor = None
         try:
             conn = self.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            # Base query for sales summary with extended filtering
-            base_query = """
-                SELECT 
-                    COUNT(DISTINCT s.sale_id) as total_orders,
-                    SUM(s.total) as total_sales,
-                    SUM(si.quantity * (si.price - COALESCE(p.cost, 0))) as total_profit,
-                    AVG(s.total) as avg_order_value,
-                    SUM(si.quantity) as total_items_sold
-                FROM Sales s
-                JOIN SaleItems si ON s.sale_id = si.sale_id
-                LEFT JOIN Products p ON si.SKU = p.SKU
+            # Read the daily rollup; category/supplier 0 rows hold the "all" totals
+            periods = comparison_periods(start_date, end_date, compare)
+            select_sql, select_params, where_sql, where_params = period_sums("r.sale_date", periods, SUMMARY_MEASURES)
+            query = f"""
+                SELECT {select_sql}
+                FROM DailySalesRollup r
+                WHERE {where_sql}
+                  AND r.category_id = %s AND r.supplier_id = %s
             """
-            
-            # Build WHERE clause with conditions
-            conditions = ["DATE(s.sale_datetime) BETWEEN %s AND %s"]
-            params = [start_date, end_date]
+            filter_params = [category_id or 0, supplier_id or 0]
             
             if employee_id:
-                conditions.append("s.employee_id = %s")
-                params.append(employee_id)
-                
-            if supplier_id:
-                conditions.append("p.supplier_id = %s")
-                params.append(supplier_id)
-                
-            if category_id:
-                conditions.append("p.category_id = %s")
-                params.append(category_id)
-            
-            base_query += " WHERE " + " AND ".join(conditions)
-            
-            cursor.execute(base_query, params)
-            current_period = cursor.fetchone()
-            
-            # Calculate previous period for comparison with same filters
-            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            period_days = (end_dt - start_dt).days + 1
-            
-            prev_start = (start_dt - timedelta(days=period_days)).strftime('%Y-%m-%d')
-            prev_end = (start_dt - timedelta(days=1)).strftime('%Y-%m-%d')
-            
-            # Apply same filters to previous period
-            prev_params = [prev_start, prev_end]
-            if employee_id:
-                prev_params.append(employee_id)
-            if supplier_id:
-                prev_params.append(supplier_id)
-            if category_id:
-                prev_params.append(category_id)
-                
-            cursor.execute(base_query.replace("BETWEEN %s AND %s", "BETWEEN %s AND %s"), prev_params)
-            previous_period = cursor.fetchone()
-            
-            # Calculate percentage changes
-            def calc_percentage_change(current, previous):
-                if not previous or previous == 0:
-                    return 0
-                return ((current - previous) / previous) * 100
-            
-            result = {
-                'total_sales': current_period['total_sales'] or 0,
-                'total_orders': current_period['total_orders'] or 0,
-                'total_profit': current_period['total_profit'] or 0,
-                'avg_order_value': current_period['avg_order_value'] or 0,
-                'total_items_sold': current_period['total_items_sold'] or 0,
-                'profit_margin': 0,
-                'sales_change': calc_percentage_change(
-                    current_period['total_sales'] or 0, 
-                    previous_period['total_sales'] or 0
-                ),
-                'orders_change': calc_percentage_change(
-                    current_period['total_orders'] or 0, 
-                    previous_period['total_orders'] or 0
-                ),
-                'profit_change': calc_percentage_change(
-                    current_period['total_profit'] or 0, 
-                    previous_period['total_profit'] or 0
-                )
-            }
+                query += " AND r.employee_id = %s"
+                filter_params.append(employee_id)
+            
+            cursor.execute(query, select_params + where_params + filter_params)
+            totals = split_periods(cursor.fetchone(), periods, SUMMARY_MEASURES)
+            
+            current_period = totals.pop('current')
+            result = dict(current_period)
+            result['avg_order_value'] = (result['total_sales'] / result['total_orders']) if result['total_orders'] else 0
+            result['profit_margin'] = 0
+            
+            # Percentage changes against each comparison period, first one at the top level
+            result['comparisons'] = {}
+            for label, period_totals in totals.items():
+                comparison = dict(period_totals)
+                for measure, change_key in SUMMARY_CHANGES.items():
+                    comparison[change_key] = _percentage_change(current_period[measure], period_totals[measure])
+                result['comparisons'][label] = comparison
+            first = result['comparisons'].get(compare[0], {}) if compare else {}
+            for change_key in SUMMARY_CHANGES.values():
+                result[change_key] = first.get(change_key, 0)
             
             # Calculate profit margin
             if result['total_sales'] > 0:
@@ -133,15 +120,18 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_sales_summary: {e}")
+            query_cache.mark_failed()
             return {
                 'total_sales': 0, 'total_orders': 0, 'total_profit': 0,
                 'avg_order_value': 0, 'total_items_sold': 0, 'profit_margin': 0,
-                'sales_change': 0, 'orders_change': 0, 'profit_change': 0
+                'sales_change': 0, 'orders_change': 0, 'profit_change': 0,
+                'comparisons': {}
             }
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Sales', 'SaleItems', 'Products')
     def get_top_products(self, start_date: str, end_date: str, limit: int = 5, employee_id: Optional[int] = None,
                         supplier_id: Optional[int] = None, category_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get top performing products with profit analysis"""
@@ -170,8 +160,8 @@ class DashboardAnalytics:
             """
             
             # Build WHERE clause with conditions
-            conditions = ["DATE(s.sale_datetime) BETWEEN %s AND %s"]
-            params = [start_date, end_date]
+            date_sql, params = date_range_clause("s.sale_datetime", start_date, end_date)
+            conditions = [date_sql]
             
             if employee_id:
                 conditions.append("s.employee_id = %s")
@@ -198,18 +188,21 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_top_products: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Sales', 'SaleItems', 'Products', 'Employees')
     def get_employee_sales(self, employee_id: int, start_date: str, end_date: str) -> Dict[str, Any]:
         """Get individual employee performance with profit metrics"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            query = """
+            date_sql, date_params = date_range_clause("s.sale_datetime", start_date, end_date)
+            query = f"""
                 SELECT 
                     e.name as employee_name,
                     COUNT(DISTINCT s.sale_id) as total_sales,
@@ -226,11 +219,11 @@ class DashboardAnalytics:
                 JOIN Sales s ON e.employee_id = s.employee_id
                 JOIN SaleItems si ON s.sale_id = si.sale_id
                 LEFT JOIN Products p ON si.SKU = p.SKU
-                WHERE e.employee_id = %s AND DATE(s.sale_datetime) BETWEEN %s AND %s
+                WHERE e.employee_id = %s AND {date_sql}
                 GROUP BY e.employee_id, e.name
             """
             
-            cursor.execute(query, (employee_id, start_date, end_date))
+            cursor.execute(query, [employee_id] + date_params)
             result = cursor.fetchone()
             
             if not result:
@@ -247,6 +240,7 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_employee_sales: {e}")
+            query_cache.mark_failed()
             return {
                 'employee_name': 'Unknown', 'total_sales': 0, 'total_revenue': 0,
                 'total_profit': 0, 'avg_sale_value': 0, 'items_sold': 0, 'profit_margin': 0
@@ -255,32 +249,34 @@ class DashboardAnalytics:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Sales', 'DailySalesRollup')
     def get_daily_sales_data(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """Get daily sales data for chart generation"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            query = """
+            date_sql, date_params = date_range_clause("r.sale_date", start_date, end_date)
+            query = f"""
                 SELECT 
-                    DATE(s.sale_datetime) as sale_date,
-                    SUM(s.total) as daily_revenue,
-                    SUM(si.quantity * (si.price - COALESCE(p.cost, 0))) as daily_profit,
-                    COUNT(DISTINCT s.sale_id) as daily_orders,
-                    SUM(si.quantity) as daily_items
-                FROM Sales s
-                JOIN SaleItems si ON s.sale_id = si.sale_id
-                LEFT JOIN Products p ON si.SKU = p.SKU
-                WHERE DATE(s.sale_datetime) BETWEEN %s AND %s
-                GROUP BY DATE(s.sale_datetime)
-                ORDER BY sale_date
+                    r.sale_date,
+                    SUM(r.revenue) as daily_revenue,
+                    SUM(r.profit) as daily_profit,
+                    SUM(r.orders) as daily_orders,
+                    SUM(r.items) as daily_items
+                FROM DailySalesRollup r
+                WHERE {date_sql}
+                  AND r.category_id = 0 AND r.supplier_id = 0
+                GROUP BY r.sale_date
+                ORDER BY r.sale_date
             """
             
-            cursor.execute(query, (start_date, end_date))
+            cursor.execute(query, date_params)
             return cursor.fetchall()
             
         except Exception as e:
             logger.error(f"Error in get_daily_sales_data: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
@@ -288,28 +284,53 @@ class DashboardAnalytics:
 
     # Performance optimized dashboard data functions
     @staticmethod
+    @query_cache.cached('Sales', 'Products', 'DailySalesRollup')
     def get_dashboard_summary_fast(start_date: str, end_date: str) -> Dict[str, Any]:
         """
         Get essential dashboard summary with minimal data load for fast initial display
         Returns only the most critical metrics with optimized queries
         """
+        cursor = None
         try:
-            conn, cursor = get_db()
-            
-            # Single optimized query for key metrics
-            summary_query = """
+            # The calling thread's pooled connection, so a worker never holds two
+            cursor = get_thread_connection().cursor(dictionary=True)
+            
+            # Key metrics from the daily rollup's "all categories / all suppliers" rows,
+            # current and previous period in one scan
+            periods = comparison_periods(start_date, end_date, ('previous',))
+            measures = {'total_sales': 'r.revenue', 'total_orders': 'r.orders'}
+            select_sql, select_params, where_sql, where_params = period_sums("r.sale_date", periods, measures)
+            current_sql, current_params = date_range_clause("r.sale_date", start_date, end_date)
+            summary_query = f"""
                 SELECT 
-                    COUNT(DISTINCT s.sale_id) as total_orders,
-                    COALESCE(SUM(s.total), 0) as total_sales,
-                    COALESCE(AVG(s.total), 0) as avg_order_value,
-                    COUNT(DISTINCT s.employee_id) as active_employees,
-                    COUNT(DISTINCT s.customer_id) as active_customers
-                FROM Sales s
-                WHERE DATE(s.sale_datetime) BETWEEN %s AND %s
+                    {select_sql},
+                    COUNT(DISTINCT CASE WHEN {current_sql} THEN r.employee_id END) as active_employees
+                FROM DailySalesRollup r
+                WHERE {where_sql}
+                  AND r.category_id = 0 AND r.supplier_id = 0
             """
             
-            cursor.execute(summary_query, (start_date, end_date))
-            summary = cursor.fetchone()
+            cursor.execute(summary_query, select_params + current_params + where_params)
+            row = cursor.fetchone() or {}
+            totals = split_periods(row, periods, measures)
+            current, previous = totals['current'], totals['previous']
+            summary = {
+                'total_orders': current['total_orders'],
+                'total_sales': current['total_sales'],
+                'avg_order_value': (current['total_sales'] / current['total_orders']) if current['total_orders'] else 0,
+                'active_employees': row.get('active_employees') or 0,
+                'sales_change': _percentage_change(current['total_sales'], previous['total_sales']),
+                'orders_change': _percentage_change(current['total_orders'], previous['total_orders']),
+            }
+            
+            # Customers are not a rollup dimension; count them from Sales alone (no item joins)
+            date_sql, date_params = date_range_clause("s.sale_datetime", start_date, end_date)
+            cursor.execute(f"""
+                SELECT COUNT(DISTINCT s.customer_id) as active_customers
+                FROM Sales s
+                WHERE {date_sql}
+            """, date_params)
+            customers = cursor.fetchone()
             
             # Quick low stock count
             low_stock_query = """
@@ -322,32 +343,32 @@ class DashboardAnalytics:
             low_stock = cursor.fetchone()
             
             # Combine results
-            result = dict(summary) if summary else {}
+            result = summary
+            result['active_customers'] = customers['active_customers'] if customers else 0
             result['low_stock_count'] = low_stock['low_stock_count'] if low_stock else 0
             
             return result
             
         except Exception as e:
             logger.error(f"Error getting dashboard summary: {e}")
+            query_cache.mark_failed()
             return {}
         finally:
-            try:
-                if cursor:
-                    cursor.close()
-                if conn and conn.is_connected():
-                    conn.close()
-            except:
-                pass
+            if cursor:
+                cursor.close()
 
     @staticmethod
+    @query_cache.cached('Sales', 'SaleItems', 'Products')
     def get_top_products_fast(start_date: str, end_date: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Get top products with minimal data for fast display
         """
+        cursor = None
         try:
-            conn, cursor = get_db()
+            cursor = get_thread_connection().cursor(dictionary=True)
             
-            query = """
+            date_sql, date_params = date_range_clause("s.sale_datetime", start_date, end_date)
+            query = f"""
                 SELECT 
                     p.SKU,
                     p.name,
@@ -356,34 +377,32 @@ class DashboardAnalytics:
                 FROM SaleItems si
                 JOIN Sales s ON si.sale_id = s.sale_id
                 JOIN Products p ON si.SKU = p.SKU
-                WHERE DATE(s.sale_datetime) BETWEEN %s AND %s
+                WHERE {date_sql}
                 GROUP BY p.SKU, p.name
                 ORDER BY units_sold DESC
                 LIMIT %s
             """
             
-            cursor.execute(query, (start_date, end_date, limit))
+            cursor.execute(query, date_params + [limit])
             return cursor.fetchall()
             
         except Exception as e:
             logger.error(f"Error getting top products: {e}")
+            query_cache.mark_failed()
             return []
         finally:
-            try:
-                if cursor:
-                    cursor.close()
-                if conn and conn.is_connected():
-                    conn.close()
-            except:
-                pass
+            if cursor:
+                cursor.close()
 
     @staticmethod
+    @query_cache.cached('Sales', 'Employees', 'Customers')
     def get_recent_sales_fast(limit: int = 10) -> List[Dict[str, Any]]:
         """
         Get recent sales with minimal data for fast display
         """
+        cursor = None
         try:
-            conn, cursor = get_db()
+            cursor = get_thread_connection().cursor(dictionary=True)
             
             query = """
                 SELECT 
@@ -402,18 +421,15 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error getting recent sales: {e}")
+            query_cache.mark_failed()
             return []
         finally:
-            try:
-                if cursor:
-                    cursor.close()
-                if conn and conn.is_connected():
-                    conn.close()
-            except:
-                pass
+            if cursor:
+                cursor.close()
 
     # Advanced Analytics Functions
     
+    @query_cache.cached('Products')
     def calculate_profit_margins(self) -> List[Dict[str, Any]]:
         """Calculate profit margins for all products"""
         try:
@@ -444,11 +460,13 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in calculate_profit_margins: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Products')
     def get_inventory_value(self) -> Dict[str, float]:
         """Calculate total inventory value using cost and retail prices"""
         try:
@@ -477,6 +495,7 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_inventory_value: {e}")
+            query_cache.mark_failed()
             return {
                 'total_cost_value': 0, 'total_retail_value': 0,
                 'potential_profit': 0, 'total_products': 0, 'total_units': 0
@@ -485,6 +504,7 @@ class DashboardAnalytics:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Suppliers', 'Purchases', 'PurchaseItems')
     def get_supplier_performance(self) -> List[Dict[str, Any]]:
         """Get comprehensive supplier performance metrics"""
         try:
@@ -519,11 +539,13 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_supplier_performance: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Purchases', 'PurchaseItems', 'Suppliers', 'Products')
     def calculate_purchase_roi(self, supplier_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Calculate ROI on purchase decisions and bulk buying benefits"""
         try:
@@ -567,11 +589,13 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in calculate_purchase_roi: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Purchases', 'PurchaseItems', 'Suppliers', 'Products')
     def track_cost_trends(self, supplier_id: Optional[int] = None, product_sku: Optional[str] = None) -> List[Dict[str, Any]]:
         """Track how supplier costs change over time"""
         try:
@@ -615,11 +639,13 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in track_cost_trends: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Categories', 'Products', 'SaleItems')
     def get_category_analytics(self) -> List[Dict[str, Any]]:
         """Get revenue, profit, and performance by product category"""
         try:
@@ -662,11 +688,13 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_category_analytics: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Products', 'Suppliers', 'Categories')
     def get_low_stock_analytics(self) -> List[Dict[str, Any]]:
         """Get low stock items with cost implications"""
         try:
@@ -699,6 +727,7 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_low_stock_analytics: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
@@ -706,6 +735,7 @@ class DashboardAnalytics:
 
     # Utility Functions for Dashboard
     
+    @query_cache.cached('Sales', 'SaleItems', 'Products', 'Employees', 'Customers')
     def get_recent_activities(self, limit: int = 10, employee_id: Optional[int] = None,
                              supplier_id: Optional[int] = None, category_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get recent transactions with profit information"""
@@ -764,6 +794,7 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_recent_activities: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
@@ -796,6 +827,7 @@ class DashboardAnalytics:
             
             cursor.execute(update_query)
             conn.commit()
+            events.publish('Products')
             
             rows_affected = cursor.rowcount
             
@@ -810,13 +842,15 @@ class DashboardAnalytics:
 
     # === PERFORMANCE ANALYSIS FUNCTIONS (Phase 5A) ===
 
+    @query_cache.cached('Sales', 'SaleItems', 'Products', 'Employees')
     def get_employee_performance_ranking(self, start_date: str, end_date: str):
         """Get employee performance ranking with comprehensive metrics"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            query = """
+            date_sql, date_params = date_range_clause("s.sale_datetime", start_date, end_date)
+            query = f"""
                 SELECT 
                     e.employee_id,
                     e.name as employee_name,
@@ -831,28 +865,31 @@ class DashboardAnalytics:
                 JOIN Sales s ON e.employee_id = s.employee_id
                 JOIN SaleItems si ON s.sale_id = si.sale_id
                 LEFT JOIN Products p ON si.SKU = p.SKU
-                WHERE s.sale_datetime BETWEEN %s AND %s
+                WHERE {date_sql}
                 GROUP BY e.employee_id, e.name
                 ORDER BY sales_rank, profit_rank
             """
             
-            cursor.execute(query, (start_date, end_date))
+            cursor.execute(query, date_params)
             return cursor.fetchall()
             
         except Exception as e:
             logger.error(f"Error in get_employee_performance_ranking: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Sales', 'SaleItems', 'Products')
     def get_product_performance_analysis(self, start_date: str, end_date: str):
         """Get detailed product performance analysis"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            query = """
+            date_sql, date_params = date_range_clause("s.sale_datetime", start_date, end_date)
+            query = f"""
                 SELECT 
                     p.SKU,
                     p.name,
@@ -867,21 +904,23 @@ class DashboardAnalytics:
                 FROM Products p
                 JOIN SaleItems si ON p.SKU = si.SKU
                 JOIN Sales s ON si.sale_id = s.sale_id
-                WHERE s.sale_datetime BETWEEN %s AND %s
+                WHERE {date_sql}
                 GROUP BY p.SKU, p.name, p.cost, p.stock
                 ORDER BY revenue_rank, profit_rank
             """
             
-            cursor.execute(query, (start_date, end_date))
+            cursor.execute(query, date_params)
             return cursor.fetchall()
             
         except Exception as e:
             logger.error(f"Error in get_product_performance_analysis: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Sales', 'SaleItems', 'Products', 'Categories')
     def get_cost_efficiency_metrics(self, start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
         """Get cost efficiency metrics for products and categories with optional date filtering"""
         try:
@@ -910,8 +949,8 @@ class DashboardAnalytics:
             # Add date filtering if provided
             params = []
             if start_date and end_date:
-                query += " WHERE s.sale_datetime BETWEEN %s AND %s"
-                params = [start_date, end_date]
+                date_sql, params = date_range_clause("s.sale_datetime", start_date, end_date)
+                query += " WHERE " + date_sql
             
             query += """
                 GROUP BY p.SKU, p.name, p.cost, p.price, c.name
@@ -924,18 +963,21 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_cost_efficiency_metrics: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Sales', 'SaleItems', 'Products', 'Employees')
     def get_employee_productivity_trends(self, employee_id: int, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """Get employee productivity trends over time"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            query = """
+            date_sql, date_params = date_range_clause("s.sale_datetime", start_date, end_date)
+            query = f"""
                 SELECT 
                     DATE(s.sale_datetime) as sale_date,
                     SUM(s.total) as daily_revenue,
@@ -947,21 +989,23 @@ class DashboardAnalytics:
                 JOIN SaleItems si ON s.sale_id = si.sale_id
                 LEFT JOIN Products p ON si.SKU = p.SKU
                 JOIN Employees e ON s.employee_id = e.employee_id
-                WHERE e.employee_id = %s AND s.sale_datetime BETWEEN %s AND %s
+                WHERE e.employee_id = %s AND {date_sql}
                 GROUP BY DATE(s.sale_datetime), e.name
                 ORDER BY sale_date
             """
             
-            cursor.execute(query, (employee_id, start_date, end_date))
+            cursor.execute(query, [employee_id] + date_params)
             return cursor.fetchall()
             
         except Exception as e:
             logger.error(f"Error in get_employee_productivity_trends: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
                 cursor.close()
 
+    @query_cache.cached('Sales')
     def get_performance_benchmarks(self) -> Dict[str, Any]:
         """Get performance benchmarks and targets"""
         try:
@@ -992,6 +1036,7 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_performance_benchmarks: {e}")
+            query_cache.mark_failed()
             return {
                 'sales_benchmark': 0,
                 # Default values for other benchmarks
@@ -1536,6 +1581,7 @@ class DashboardAnalytics:
         else:
             return "Current pricing appears optimal"
 
+    @query_cache.cached('Categories')
     def get_categories(self) -> List[Dict[str, Any]]:
         """Get all product categories"""
         try:
@@ -1548,6 +1594,7 @@ class DashboardAnalytics:
             
         except Exception as e:
             logger.error(f"Error in get_categories: {e}")
+            query_cache.mark_failed()
             return []
         finally:
             if cursor:
@@ -1573,9 +1620,10 @@ def get_recent_sales_fast(limit: int = 10):
 # === CORE ANALYTICS FUNCTION STUBS ===
 
 def get_sales_summary(start_date: str, end_date: str, employee_id: Optional[int] = None,
-                     supplier_id: Optional[int] = None, category_id: Optional[int] = None):
-    """Get comprehensive sales summary with enhanced filtering"""
-    return dashboard_analytics.get_sales_summary(start_date, end_date, employee_id, supplier_id, category_id)
+                     supplier_id: Optional[int] = None, category_id: Optional[int] = None,
+                     compare: Tuple[str, ...] = ('previous',)):
+    """Get comprehensive sales summary with enhanced filtering and comparison periods"""
+    return dashboard_analytics.get_sales_summary(start_date, end_date, employee_id, supplier_id, category_id, compare)
 
 def get_inventory_value():
     """Get total inventory value and metrics"""
@@ -8,6 +8,8 @@ from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
 import logging
 from dashboard_base import DashboardBaseUI, DashboardConstants
+from dashboard_data_service import get_data_service
+from virtual_treeview import VirtualTreeview, ListRowSource
 
 # Get logger instance
 logger = logging.getLogger(__name__)
@@ -17,6 +19,7 @@ class AnalyticsUI(DashboardBaseUI):
     
     def __init__(self, parent, callbacks):
         super().__init__(parent, callbacks)
+        self.data_service = get_data_service(parent)
         self.data_limit_var = None  # Will be initialized in UI creation
         self.chart_style_var = None  # Will be initialized in UI creation
         
@@ -361,7 +364,7 @@ class AnalyticsUI(DashboardBaseUI):
         
         # Top products table
         columns = ('Rank', 'Product', 'Units Sold', 'Revenue', 'Profit', 'Margin %', 'Cost Efficiency')
-        self.top_products_tree = ttk.Treeview(top_products_frame, columns=columns, show='headings', height=8)
+        self.top_products_tree = VirtualTreeview(top_products_frame, columns=columns, show='headings', height=8)
         
         # Configure columns
         self.top_products_tree.heading('Rank', text='#')
@@ -396,7 +399,7 @@ class AnalyticsUI(DashboardBaseUI):
         
         # Category performance table
         columns = ('Category', 'Products', 'Total Stock', 'Inventory Value', 'Revenue', 'Profit', 'Margin %')
-        self.category_tree = ttk.Treeview(category_frame, columns=columns, show='headings', height=8)
+        self.category_tree = VirtualTreeview(category_frame, columns=columns, show='headings', height=8)
         
         # Configure columns
         for col in columns:
@@ -418,7 +421,7 @@ class AnalyticsUI(DashboardBaseUI):
         
         # Supplier performance table
         columns = ('Supplier', 'Total Orders', 'Delivery Rate', 'Avg Cost', 'Products', 'Performance Score')
-        self.supplier_tree = ttk.Treeview(supplier_frame, columns=columns, show='headings', height=8)
+        self.supplier_tree = VirtualTreeview(supplier_frame, columns=columns, show='headings', height=8)
         
         # Configure columns
         for col in columns:
@@ -469,47 +472,57 @@ class AnalyticsUI(DashboardBaseUI):
     
     def refresh_charts(self):
         """Refresh all charts with current data"""
-        if not self.matplotlib_available or not self.dashboard_funcs:
+        if not self.matplotlib_available or not self.dashboard_funcs or not self.current_filters:
             return
         
+        # Get the number of items from dropdown (Tk variables are read on the Tk thread)
+        try:
+            limit = int(self.data_limit_var.get()) if self.data_limit_var else 8
+        except (ValueError, AttributeError):
+            limit = 8
+        
+        filters = self.current_filters
+        self.data_service.submit(
+            'analytics.charts',
+            lambda: self.fetch_chart_data(filters, limit),
+            self.apply_chart_data,
+            lambda e: logger.error(f"Error refreshing charts: {e}")
+        )
+    
+    def fetch_chart_data(self, filters, limit):
+        """Run the chart queries (worker thread)"""
+        return {
+            'top_products': self.dashboard_funcs['get_top_products'](
+                filters['start_date'], filters['end_date'], limit  # Use dynamic limit from dropdown
+            ),
+            'category_data': self.dashboard_funcs['get_category_analytics'](),
+            'margin_data': self.dashboard_funcs['calculate_profit_margins'](),
+        }
+    
+    def apply_chart_data(self, data):
+        """Redraw all charts from fetched data (Tk thread)"""
         try:
             # Refresh top products chart
-            self.update_top_products_chart()
+            self.update_top_products_chart(data['top_products'])
             
             # Refresh category chart
-            self.update_category_chart()
+            self.update_category_chart(data['category_data'])
             
             # Refresh profit margin chart
-            self.update_profit_margin_chart()
+            self.update_profit_margin_chart(data['margin_data'])
             
             # Refresh inventory chart
-            self.update_inventory_chart()
+            self.update_inventory_chart(data['category_data'])
             
         except Exception as e:
             logger.error(f"Error refreshing charts: {e}")
     
-    def update_top_products_chart(self):
+    def update_top_products_chart(self, top_products):
         """Update the top products performance chart - simple and effective"""
         try:
-            if not self.dashboard_funcs or not self.current_filters:
-                return
-            
             # Clear previous chart
             self.products_ax.clear()
             
-            # Get the number of items from dropdown
-            try:
-                limit = int(self.data_limit_var.get()) if self.data_limit_var else 8
-            except (ValueError, AttributeError):
-                limit = 8
-            
-            # Get top products data
-            top_products = self.dashboard_funcs['get_top_products'](
-                self.current_filters['start_date'], 
-                self.current_filters['end_date'], 
-                limit  # Use dynamic limit from dropdown
-            )
-            
             if top_products:
                 # Extract data for chart
                 product_names = []
@@ -587,12 +600,9 @@ class AnalyticsUI(DashboardBaseUI):
             logger.error(f"Error getting color palette: {e}")
             return ['#3498DB'] * count
     
-    def update_category_chart(self):
+    def update_category_chart(self, category_data):
         """Update the category performance chart with optimized display"""
         try:
-            # Get category data
-            category_data = self.dashboard_funcs['get_category_analytics']()
-            
             # Clear previous chart
             self.category_ax.clear()
             
@@ -672,12 +682,9 @@ class AnalyticsUI(DashboardBaseUI):
         except Exception as e:
             logger.error(f"Error updating category chart: {e}")
     
-    def update_profit_margin_chart(self):
+    def update_profit_margin_chart(self, margin_data):
         """Update the profit margin analysis chart with optimized display"""
         try:
-            # Get profit margin data
-            margin_data = self.dashboard_funcs['calculate_profit_margins']()
-            
             # Clear previous chart
             self.margin_ax.clear()
             
@@ -743,12 +750,9 @@ class AnalyticsUI(DashboardBaseUI):
         except Exception as e:
             logger.error(f"Error updating profit margin chart: {e}")
     
-    def update_inventory_chart(self):
+    def update_inventory_chart(self, category_data):
         """Update the inventory value analysis chart with optimized display"""
         try:
-            # Get category data for inventory analysis
-            category_data = self.dashboard_funcs['get_category_analytics']()
-            
             # Clear previous chart
             self.inventory_ax.clear()
             
@@ -840,36 +844,47 @@ class AnalyticsUI(DashboardBaseUI):
     
     def refresh_analytics_tables(self):
         """Refresh all analytics tables"""
+        if not self.dashboard_funcs or not self.current_filters:
+            return
+        
+        filters = self.current_filters
+        self.data_service.submit(
+            'analytics.tables',
+            lambda: self.fetch_table_data(filters),
+            self.apply_table_data,
+            lambda e: logger.error(f"Error refreshing analytics tables: {e}")
+        )
+    
+    def fetch_table_data(self, filters):
+        """Run the analytics table queries (worker thread)"""
+        return {
+            # Top products - limit to top 10 for better performance
+            'top_products': self.dashboard_funcs['get_top_products'](
+                filters['start_date'], filters['end_date'], 10  # Reduced from 15 to 10 for better readability
+            ),
+            'category_data': self.dashboard_funcs['get_category_analytics'](),
+            'supplier_data': self.dashboard_funcs['get_supplier_performance'](),
+        }
+    
+    def apply_table_data(self, data):
+        """Repopulate all analytics tables from fetched data (Tk thread)"""
         try:
             # Refresh top products table
-            self.update_top_products_table()
+            self.update_top_products_table(data['top_products'])
             
             # Refresh category performance table
-            self.update_category_table()
+            self.update_category_table(data['category_data'])
             
             # Refresh supplier performance table
-            self.update_supplier_table()
+            self.update_supplier_table(data['supplier_data'])
             
         except Exception as e:
             logger.error(f"Error refreshing analytics tables: {e}")
     
-    def update_top_products_table(self):
+    def update_top_products_table(self, top_products):
         """Update top products table"""
         try:
-            if not self.dashboard_funcs or not self.current_filters:
-                return
-            
-            # Clear existing items
-            for item in self.top_products_tree.get_children():
-                self.top_products_tree.delete(item)
-            
-            # Get top products data - limit to top 10 for better performance
-            top_products = self.dashboard_funcs['get_top_products'](
-                self.current_filters['start_date'], 
-                self.current_filters['end_date'], 
-                10  # Reduced from 15 to 10 for better readability
-            )
-            
+            rows = []
             for i, product in enumerate(top_products, 1):
                 # Calculate cost efficiency (revenue per unit cost)
                 cost_efficiency = "N/A"
@@ -877,7 +892,7 @@ class AnalyticsUI(DashboardBaseUI):
                     efficiency = float(product['revenue']) / (float(product['cost']) * float(product['units_sold']))
                     cost_efficiency = f"{efficiency:.2f}x"
                 
-                self.top_products_tree.insert('', 'end', values=(
+                rows.append((
                     i,
                     product['name'][:30] + "..." if len(product['name']) > 30 else product['name'],
                     self.format_number(product['units_sold']),
@@ -887,24 +902,16 @@ class AnalyticsUI(DashboardBaseUI):
                     cost_efficiency
                 ))
             
+            self.top_products_tree.set_source(ListRowSource(rows))
+            
         except Exception as e:
             logger.error(f"Error updating top products table: {e}")
     
-    def update_category_table(self):
+    def update_category_table(self, category_data):
         """Update category performance table"""
         try:
-            if not self.dashboard_funcs:
-                return
-            
-            # Clear existing items
-            for item in self.category_tree.get_children():
-                self.category_tree.delete(item)
-            
-            # Get category data
-            category_data = self.dashboard_funcs['get_category_analytics']()
-            
-            for cat in category_data:
-                self.category_tree.insert('', 'end', values=(
+            rows = [
+                (
                     cat['category_name'],
                     self.format_number(cat['products_count']),
                     self.format_number(cat['total_stock']),
@@ -912,30 +919,25 @@ class AnalyticsUI(DashboardBaseUI):
                     self.format_currency(cat['total_revenue']),
                     self.format_currency(cat['total_profit']),
                     self.format_percentage(cat['profit_margin'])
-                ))
+                )
+                for cat in category_data
+            ]
+            
+            self.category_tree.set_source(ListRowSource(rows))
             
         except Exception as e:
             logger.error(f"Error updating category table: {e}")
     
-    def update_supplier_table(self):
+    def update_supplier_table(self, supplier_data):
         """Update supplier performance table"""
         try:
-            if not self.dashboard_funcs:
-                return
-            
-            # Clear existing items
-            for item in self.supplier_tree.get_children():
-                self.supplier_tree.delete(item)
-            
-            # Get supplier data
-            supplier_data = self.dashboard_funcs['get_supplier_performance']()
-            
+            rows = []
             for supplier in supplier_data:
                 # Calculate performance score (simplified)
                 performance_score = supplier['delivery_success_rate'] or 0
                 score_color = "🟢" if performance_score >= 90 else "🟡" if performance_score >= 70 else "🔴"
                 
-                self.supplier_tree.insert('', 'end', values=(
+                rows.append((
                     supplier['supplier_name'],
                     self.format_number(supplier['total_orders'] or 0),
                     self.format_percentage(supplier['delivery_success_rate'] or 0),
@@ -944,6 +946,8 @@ class AnalyticsUI(DashboardBaseUI):
                     f"{score_color} {self.format_percentage(performance_score)}"
                 ))
             
+            self.supplier_tree.set_source(ListRowSource(rows))
+            
         except Exception as e:
             logger.error(f"Error updating supplier table: {e}")
     
@@ -959,8 +963,8 @@ class AnalyticsUI(DashboardBaseUI):
             self.update_key_metrics_fast(filters)
             self.show_placeholder_charts()
             
-            # Schedule full refresh in background
-            self.parent.after(100, lambda: self.refresh_data(filters))
+            # Full refresh runs on the data service workers
+            self.refresh_data(filters)
             
         except Exception as e:
             logger.error(f"Error in fast analytics refresh: {e}")
@@ -980,14 +984,20 @@ class AnalyticsUI(DashboardBaseUI):
                 
                 from dashboard import get_dashboard_summary_fast, get_top_products_fast
                 
-                # Get fast summary
-                summary = get_dashboard_summary_fast(filters['start_date'], filters['end_date'])
-                
                 # Update summary cards quickly
-                if hasattr(self, 'summary_labels'):
-                    for key, label in self.summary_labels.items():
-                        if key in summary:
-                            label.config(text=self.format_currency(summary[key]) if 'sales' in key else str(summary[key]))
+                def apply_summary(summary):
+                    if hasattr(self, 'summary_labels'):
+                        for key, label in self.summary_labels.items():
+                            if key in summary:
+                                label.config(text=self.format_currency(summary[key]) if 'sales' in key else str(summary[key]))
+                
+                # Get fast summary
+                self.data_service.submit(
+                    'analytics.summary',
+                    lambda: get_dashboard_summary_fast(filters['start_date'], filters['end_date']),
+                    apply_summary,
+                    lambda e: logger.error(f"Error updating fast metrics: {e}")
+                )
                 
             except ImportError:
                 logger.warning("Fast functions not available, using regular metrics")
@@ -0,0 +1,161 @@
+"""
+Result cache for dashboard analytics queries.
+Entries are keyed by method name and normalised arguments, bounded by an
+LRU size limit and a TTL, and dropped as soon as a write to one of the
+tables they read is published through core.events. A result whose tables
+were written while it was loading is returned but not stored, and neither
+is a fallback returned by a query that reported failure with mark_failed().
+"""
+
+import copy
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+
+# Get logger instance (configured in main.py)
+logger = logging.getLogger(__name__)
+
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL_SECONDS = 120  # upper bound for changes made outside this process
+
+
+def _normalise(value):
+    # Equivalent filters must map to the same key ('' / 0 / None all mean "no filter")
+    if value in (None, '', 0) and not isinstance(value, bool):
+        return None
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S') if value.time() != datetime.min.time() else value.strftime('%Y-%m-%d')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalise(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalise(v) for v in value)
+    return value
+
+
+class QueryCache:
+    """Thread-safe LRU + TTL cache with table-based invalidation"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored_at, tables, value)
+        self._lock = threading.Lock()
+        # Bumped on every write to a table (and by clear()); a result loaded while
+        # one of its tables moved may predate the write and is not stored
+        self._generations = defaultdict(int)
+        self._epoch = 0
+        self._calls = threading.local()  # per thread: stack of in-progress cached calls
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0, 'invalidated': 0, 'discarded': 0}
+
+    def mark_failed(self):
+        """
+        Called by a cached function that is about to return a fallback value
+        (after logging a swallowed error), so the fallback is not cached.
+        Also marks every cached call it was made from.
+        """
+        for call in getattr(self._calls, 'stack', ()):
+            call['failed'] = True
+
+    def _generation(self, tables):
+        # Caller holds self._lock
+        return (self._epoch,) + tuple(self._generations[table] for table in sorted(tables))
+
+    def generation(self, tables):
+        # Snapshot to pass to put() for a result about to be loaded from tables
+        with self._lock:
+            return self._generation(tables)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+            stored_at, _, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+        return True, copy.deepcopy(value)
+
+    def put(self, key, tables, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation(tables):
+                # One of the tables was written while the value was loading
+                self._stats['discarded'] += 1
+                return
+            self._entries[key] = (time.monotonic(), frozenset(tables), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evicted'] += 1
+
+    def invalidate(self, tables):
+        # core.events subscriber: drop every entry that read one of the changed tables
+        with self._lock:
+            for table in tables:
+                self._generations[table] += 1
+            stale = [key for key, (_, deps, _) in self._entries.items() if deps & tables]
+            for key in stale:
+                del self._entries[key]
+            self._stats['invalidated'] += len(stale)
+        if stale:
+            logger.debug(f"Dashboard cache: {len(stale)} entries invalidated by writes to {', '.join(sorted(tables))}")
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._stats['invalidated'] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] / lookups * 100) if lookups else 0.0
+        return stats
+
+    def cached(self, *tables):
+        """Decorator caching a query function's result until one of `tables` changes"""
+        def decorator(func):
+            signature = inspect.signature(func)
+            skip_self = next(iter(signature.parameters), None) == 'self'
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = list(bound.arguments.items())
+                if skip_self:
+                    arguments = arguments[1:]
+                key = (func.__qualname__,) + tuple((name, _normalise(value)) for name, value in arguments)
+                found, value = self.get(key)
+                if found:
+                    return value
+                generation = self.generation(tables)
+                stack = self._calls.__dict__.setdefault('stack', [])
+                call = {'failed': False}
+                stack.append(call)
+                try:
+                    value = func(*args, **kwargs)
+                finally:
+                    stack.pop()
+                if not call['failed']:
+                    self.put(key, tables, value, generation)
+                return value
+
+            wrapper.cache = self
+            return wrapper
+        return decorator
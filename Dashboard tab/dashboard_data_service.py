@@ -0,0 +1,196 @@
+"""
+Dashboard data service.
+Runs dashboard queries on a worker pool and hands the results back to the
+Tk main loop through a polled queue, so no subtab blocks the window while
+its data loads. Requests are grouped into channels (one per subtab); a new
+request on a channel supersedes the ones still pending there.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core import database
+from core.database import thread_connection
+
+# Get logger instance (configured in main.py)
+logger = logging.getLogger(__name__)
+
+DATA_WORKERS = 3
+POLL_INTERVAL_MS = 50
+# Pooled connections left for everything outside the dashboard workers: the Tk
+# thread's own checkout, exports, climate loads and alert checks
+POOL_HEADROOM = 2
+
+
+def fan_out_workers():
+    # Service and fan-out workers hold at most one connection each, so together
+    # they must leave POOL_HEADROOM of core.database.POOL_SIZE free
+    return max(1, database.POOL_SIZE - DATA_WORKERS - POOL_HEADROOM)
+
+
+class DashboardDataService:
+    """Worker pool for dashboard queries with results delivered on the Tk thread"""
+
+    def __init__(self, widget, max_workers=DATA_WORKERS, poll_interval_ms=POLL_INTERVAL_MS):
+        self.widget = widget
+        self.poll_interval_ms = poll_interval_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard-data")
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._generations = {}  # channel -> generation of the newest request
+        self._pending = {}  # channel -> future of the newest request
+        self._polling = False
+        self._closed = False
+
+    def submit(self, channel, fetch, on_result, on_error=None):
+        """
+        Run fetch() on a worker thread and call on_result(data) on the Tk thread.
+        Any earlier request on the same channel is cancelled if it has not
+        started yet, and its result is dropped if it has.
+        """
+        with self._lock:
+            if self._closed:
+                return None
+            generation = self._generations.get(channel, 0) + 1
+            self._generations[channel] = generation
+            previous = self._pending.get(channel)
+            if previous is not None:
+                previous.cancel()
+            future = self._executor.submit(self._run, fetch)
+            self._pending[channel] = future
+
+        future.add_done_callback(
+            lambda done: self._results.put((channel, generation, done, on_result, on_error))
+        )
+        self._ensure_polling()
+        return future
+
+    def cancel(self, channel):
+        # Drop whatever is outstanding on a channel (e.g. when its tab is destroyed)
+        with self._lock:
+            self._generations[channel] = self._generations.get(channel, 0) + 1
+            future = self._pending.pop(channel, None)
+        if future is not None:
+            future.cancel()
+
+    def is_busy(self, channel):
+        with self._lock:
+            future = self._pending.get(channel)
+        return future is not None and not future.done()
+
+    @staticmethod
+    def _run(fetch):
+        # A task borrows a pooled connection only if it queries on this thread (a fetch
+        # that just waits on fan_out() holds none) and returns it when done
+        with thread_connection(lazy=True):
+            return fetch()
+
+    def _ensure_polling(self):
+        if self._polling:
+            return
+        self._polling = True
+        try:
+            self.widget.after(self.poll_interval_ms, self._poll)
+        except Exception as e:
+            # Widget already destroyed; nothing left to deliver to
+            self._polling = False
+            logger.debug(f"Dashboard data service cannot schedule polling: {e}")
+
+    def _poll(self):
+        # Runs on the Tk thread: deliver finished results, skipping superseded ones
+        self._polling = False
+        while True:
+            try:
+                channel, generation, future, on_result, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            with self._lock:
+                current = self._generations.get(channel) == generation
+                if current and self._pending.get(channel) is future:
+                    del self._pending[channel]
+            if not current or future.cancelled():
+                continue
+
+            error = future.exception()
+            try:
+                if error is None:
+                    on_result(future.result())
+                elif on_error is not None:
+                    on_error(error)
+                else:
+                    logger.error(f"Error loading dashboard data for {channel}: {error}")
+            except Exception as e:
+                logger.error(f"Error applying dashboard data for {channel}: {e}")
+
+        with self._lock:
+            outstanding = bool(self._pending)
+        if outstanding and not self._closed:
+            self._ensure_polling()
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_data_service(widget):
+    """Shared service for all dashboard subtabs, polled from widget's main loop"""
+    global _service
+    with _service_lock:
+        if _service is None or _service._closed:
+            _service = DashboardDataService(widget.winfo_toplevel())
+        return _service
+
+
+_fan_out_executor = None
+
+
+def _timed_query(query):
+    # Runs on a fan-out worker; the query borrows this thread's pooled connection when it first needs it
+    started = time.perf_counter()
+    with thread_connection(lazy=True):
+        result = query()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def fan_out(queries, label="Dashboard"):
+    """
+    Run independent queries ({name: callable}) at the same time, each on its
+    own pooled connection, and return {name: result}. Total time is set by the
+    slowest query rather than the sum. A failing query is logged and left out
+    of the result. Uses a pool separate from the service workers, so it is
+    safe to call from inside a fetch.
+    """
+    global _fan_out_executor
+    with _service_lock:
+        if _fan_out_executor is None:
+            _fan_out_executor = ThreadPoolExecutor(max_workers=fan_out_workers(), thread_name_prefix="dashboard-query")
+        executor = _fan_out_executor
+
+    started = time.perf_counter()
+    futures = {name: executor.submit(_timed_query, query) for name, query in queries.items()}
+
+    results = {}
+    timings = {}
+    for name, future in futures.items():
+        try:
+            results[name], timings[name] = future.result()
+        except Exception as e:
+            logger.error(f"Error loading {label.lower()} data '{name}': {e}")
+
+    total_ms = (time.perf_counter() - started) * 1000
+    breakdown = ", ".join(f"{name}={ms:.0f}ms" for name, ms in sorted(timings.items(), key=lambda item: -item[1]))
+    logger.info(f"{label} snapshot: {len(results)}/{len(queries)} queries in {total_ms:.0f} ms ({breakdown})")
+    return results
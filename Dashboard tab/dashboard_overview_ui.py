@@ -8,6 +8,7 @@ from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
 import logging
 from dashboard_base import DashboardBaseUI, DashboardConstants, create_metric_card, create_status_indicator
+from dashboard_data_service import get_data_service, fan_out
 
 # Get logger instance
 logger = logging.getLogger(__name__)
@@ -17,6 +18,7 @@ class OverviewUI(DashboardBaseUI):
     
     def __init__(self, parent, callbacks):
         super().__init__(parent, callbacks)
+        self.data_service = get_data_service(parent)
         
         # Import dashboard functions
         try:
@@ -394,9 +396,48 @@ class OverviewUI(DashboardBaseUI):
     
     def refresh_data(self, filters):
         """Refresh all overview data based on current filters"""
+        self.current_filters = filters
+        self.data_service.submit(
+            'overview',
+            lambda: self.fetch_overview_data(filters),
+            self.apply_overview_data,
+            lambda e: logger.error(f"Error refreshing overview data: {e}")
+        )
+    
+    def fetch_overview_data(self, filters):
+        """Run the overview queries (worker thread) and return one data snapshot"""
+        if not self.dashboard_funcs:
+            return {}
+        
+        # Get filter IDs
+        employee_id = filters.get('employee_id')
+        supplier_id = filters.get('supplier_id')
+        category_id = filters.get('category_id')
+        today = datetime.now().strftime('%Y-%m-%d')
+        
+        # Independent queries run concurrently; a failing one leaves its key out
+        # and the section that needs it logs and skips
+        return fan_out({
+            'sales_summary': lambda: self.dashboard_funcs['get_sales_summary'](
+                filters['start_date'], filters['end_date'], employee_id, supplier_id, category_id
+            ),
+            'today_summary': lambda: self.dashboard_funcs['get_sales_summary'](today, today, compare=()),
+            'inventory': lambda: self.dashboard_funcs['get_inventory_value'](),
+            'top_product': lambda: self.dashboard_funcs['get_top_products'](
+                filters['start_date'], filters['end_date'], 1, employee_id, supplier_id, category_id
+            ),
+            'top_products': lambda: self.dashboard_funcs['get_top_products'](
+                filters['start_date'], filters['end_date'], 5
+            ),
+            'profit_margins': lambda: self.dashboard_funcs['calculate_profit_margins'](),
+            'low_stock': lambda: self.dashboard_funcs['get_low_stock_analytics'](),
+            'supplier_performance': lambda: self.dashboard_funcs['get_supplier_performance'](),
+            'activities': lambda: self.dashboard_funcs['get_recent_activities'](10, employee_id, supplier_id, category_id),
+        }, label="Overview")
+    
+    def apply_overview_data(self, data):
+        """Update all overview sections from a fetched snapshot (Tk thread)"""
         try:
-            self.current_filters = filters
-            
             # Check if widgets still exist before updating
             if not hasattr(self, 'last_updated_label') or not self.last_updated_label.winfo_exists():
                 return
@@ -406,22 +447,22 @@ class OverviewUI(DashboardBaseUI):
             
             # Refresh all data sections with error handling
             try:
-                self.update_metrics_cards(filters)
+                self.update_metrics_cards(data)
             except (tk.TclError, AttributeError) as e:
                 logger.warning(f"Metrics cards update skipped - widget may be destroyed: {e}")
             
             try:
-                self.update_quick_stats(filters)
+                self.update_quick_stats(data)
             except (tk.TclError, AttributeError) as e:
                 logger.warning(f"Quick stats update skipped - widget may be destroyed: {e}")
             
             try:
-                self.update_recent_activities(filters)
+                self.update_recent_activities(data)
             except (tk.TclError, AttributeError) as e:
                 logger.warning(f"Recent activities update skipped - widget may be destroyed: {e}")
             
             try:
-                self.update_insights_section(filters)
+                self.update_insights_section(data)
             except (tk.TclError, AttributeError) as e:
                 logger.warning(f"Insights section update skipped - widget may be destroyed: {e}")
             
@@ -441,9 +482,48 @@ class OverviewUI(DashboardBaseUI):
     
     def refresh_data_fast(self, filters):
         """Fast refresh for initial load using optimized dashboard functions"""
+        self.current_filters = filters
+        
+        def on_error(e):
+            logger.error(f"Error in fast refresh: {e}")
+            # Fallback to regular refresh if fast fails
+            self.refresh_data(filters)
+        
+        # The full refresh is queued once the fast snapshot is on screen; a newer
+        # request on the channel drops both
+        self.data_service.submit(
+            'overview',
+            lambda: self.fetch_overview_data_fast(filters),
+            lambda data: (self.apply_overview_data_fast(data), self.refresh_data(filters)),
+            on_error
+        )
+    
+    def fetch_overview_data_fast(self, filters):
+        """Run the fast overview queries (worker thread) and return a data snapshot"""
+        if not self.dashboard_funcs:
+            return {}
+        
+        # Independent queries run concurrently; a failing one leaves its key out
+        # and the section that needs it logs and skips
+        return fan_out({
+            'summary': lambda: self.dashboard_funcs['get_dashboard_summary_fast'](
+                filters['start_date'], filters['end_date']
+            ),
+            'profit_margins': lambda: self.dashboard_funcs['calculate_profit_margins'](),
+            'inventory': lambda: self.dashboard_funcs['get_inventory_value'](),
+            'top_product': lambda: self.dashboard_funcs['get_top_products_fast'](
+                filters['start_date'], filters['end_date'], 1
+            ),
+            'top_products': lambda: self.dashboard_funcs['get_top_products_fast'](
+                filters['start_date'], filters['end_date'], 5
+            ),
+            'recent_sales': lambda: self.dashboard_funcs['get_recent_sales_fast'](10),
+            'low_stock': lambda: self.dashboard_funcs['get_low_stock_analytics'](),
+        }, label="Overview (fast)")
+    
+    def apply_overview_data_fast(self, data):
+        """Update overview sections from a fast snapshot (Tk thread)"""
         try:
-            self.current_filters = filters
-            
             # Check if widgets still exist before updating
             if not hasattr(self, 'last_updated_label') or not self.last_updated_label.winfo_exists():
                 return
@@ -451,51 +531,33 @@ class OverviewUI(DashboardBaseUI):
             # Update last updated timestamp
             self.last_updated_label.config(text=f"Last Updated: {datetime.now().strftime('%H:%M:%S')}")
             
-            # Use fast functions for initial load with error handling
+            # Use fast data for initial load with error handling
             try:
-                self.update_metrics_cards_fast(filters)
+                self.update_metrics_cards_fast(data)
             except (tk.TclError, AttributeError) as e:
                 logger.warning(f"Fast metrics update skipped - widget may be destroyed: {e}")
             
             try:
-                self.update_recent_activities_fast(filters)
+                self.update_recent_activities_fast(data)
             except (tk.TclError, AttributeError) as e:
                 logger.warning(f"Fast activities update skipped - widget may be destroyed: {e}")
             
             try:
-                self.update_insights_section_fast(filters)
+                self.update_insights_section_fast(data)
             except (tk.TclError, AttributeError) as e:
                 logger.warning(f"Fast insights update skipped - widget may be destroyed: {e}")
             
-            # Schedule a complete refresh after 2 seconds to fill in any remaining data
-            try:
-                self.parent.after(2000, lambda: self.refresh_data(filters))
-            except (tk.TclError, AttributeError):
-                pass  # Widget may be destroyed, ignore
-            
         except Exception as e:
             logger.error(f"Error in fast refresh: {e}")
-            # Fallback to regular refresh if fast fails
-            try:
-                self.refresh_data(filters)
-            except:
-                pass  # Don't cascade errors
     
-    def update_metrics_cards(self, filters):
+    def update_metrics_cards(self, data):
         """Update the 6 main metrics cards"""
         try:
-            if not self.dashboard_funcs:
+            if not data:
                 return
             
-            # Get filter IDs
-            employee_id = filters.get('employee_id')
-            supplier_id = filters.get('supplier_id')
-            category_id = filters.get('category_id')
-            
-            # Get sales summary with all filters
-            sales_summary = self.dashboard_funcs['get_sales_summary'](
-                filters['start_date'], filters['end_date'], employee_id, supplier_id, category_id
-            )
+            # Sales summary with all filters
+            sales_summary = data['sales_summary']
             
             # Update sales card
             self.sales_value_label.config(text=self.format_currency(sales_summary['total_sales']))
@@ -517,17 +579,15 @@ class OverviewUI(DashboardBaseUI):
             self.profit_value_label.config(text=self.format_currency(sales_summary['total_profit']))
             self.profit_margin_label.config(text=f"{sales_summary['profit_margin']:.1f}% margin")
             
-            # Get inventory value
-            inventory_data = self.dashboard_funcs['get_inventory_value']()
+            # Inventory value
+            inventory_data = data['inventory']
             
             # Update inventory card
             self.inventory_value_label.config(text=self.format_currency(inventory_data['total_retail_value']))
             self.inventory_count_label.config(text=f"{self.format_number(inventory_data['total_products'])} products")
             
-            # Get top product with all filters
-            top_products = self.dashboard_funcs['get_top_products'](
-                filters['start_date'], filters['end_date'], 1, employee_id, supplier_id, category_id
-            )
+            # Top product with all filters
+            top_products = data['top_product']
             
             # Update top product card
             if top_products:
@@ -542,7 +602,7 @@ class OverviewUI(DashboardBaseUI):
                 self.top_product_sales_label.config(text="-- units sold")
             
             # Calculate average profit margin
-            profit_margins = self.dashboard_funcs['calculate_profit_margins']()
+            profit_margins = data['profit_margins']
             if profit_margins:
                 avg_margin = sum(p['profit_margin'] for p in profit_margins) / len(profit_margins)
                 self.avg_margin_value_label.config(text=self.format_percentage(avg_margin))
@@ -566,18 +626,14 @@ class OverviewUI(DashboardBaseUI):
         except Exception as e:
             logger.error(f"Error updating metrics cards: {e}")
     
-    def update_metrics_cards_fast(self, filters):
-        """Update metrics cards using fast dashboard functions"""
+    def update_metrics_cards_fast(self, data):
+        """Update metrics cards from the fast snapshot"""
         try:
-            if not self.dashboard_funcs or 'get_dashboard_summary_fast' not in self.dashboard_funcs:
-                # Fallback to regular update if fast functions not available
-                self.update_metrics_cards(filters)
+            if not data:
                 return
             
-            # Get fast summary data
-            summary = self.dashboard_funcs['get_dashboard_summary_fast'](
-                filters['start_date'], filters['end_date']
-            )
+            # Fast summary data
+            summary = data['summary']
             
             # Update sales card
             self.sales_value_label.config(text=self.format_currency(summary.get('total_sales', 0)))
@@ -621,7 +677,7 @@ class OverviewUI(DashboardBaseUI):
             
             # Update profit card - calculate actual profit
             try:
-                profit_data = self.dashboard_funcs['calculate_profit_margins']()
+                profit_data = data.get('profit_margins')
                 if profit_data:
                     total_profit = sum(float(p.get('profit', 0)) for p in profit_data)
                     avg_margin = sum(float(p.get('profit_margin', 0)) for p in profit_data) / len(profit_data) if profit_data else 0
@@ -636,17 +692,15 @@ class OverviewUI(DashboardBaseUI):
                 self.profit_value_label.config(text="$0.00")
                 self.profit_margin_label.config(text="No data")
             
-            # Get inventory value (this is already fast)
-            inventory_data = self.dashboard_funcs['get_inventory_value']()
+            # Inventory value (this is already fast)
+            inventory_data = data['inventory']
             
             # Update inventory card
             self.inventory_value_label.config(text=self.format_currency(inventory_data['total_retail_value']))
             self.inventory_count_label.config(text=f"{self.format_number(inventory_data['total_products'])} products")
             
-            # Get top product using fast function
-            top_products = self.dashboard_funcs['get_top_products_fast'](
-                filters['start_date'], filters['end_date'], 1
-            )
+            # Top product from the fast function
+            top_products = data['top_product']
             
             # Update top product card
             if top_products:
@@ -662,7 +716,7 @@ class OverviewUI(DashboardBaseUI):
             
             # Calculate actual average margin and trend
             try:
-                profit_data = self.dashboard_funcs['calculate_profit_margins']()
+                profit_data = data.get('profit_margins')
                 if profit_data:
                     avg_margin = sum(float(p.get('profit_margin', 0)) for p in profit_data) / len(profit_data) if profit_data else 0
                     
@@ -682,43 +736,33 @@ class OverviewUI(DashboardBaseUI):
             
         except Exception as e:
             logger.error(f"Error updating metrics cards fast: {e}")
-            # Fallback to regular update
-            self.update_metrics_cards(filters)
     
-    def update_quick_stats(self, filters):
+    def update_quick_stats(self, data):
         """Update quick statistics panel"""
         try:
-            if not self.dashboard_funcs:
+            if not data:
                 return
             
-            # Get filter IDs
-            employee_id = filters.get('employee_id')
-            supplier_id = filters.get('supplier_id')
-            category_id = filters.get('category_id')
-            
-            # Get sales summary for additional stats with all filters
-            sales_summary = self.dashboard_funcs['get_sales_summary'](
-                filters['start_date'], filters['end_date'], employee_id, supplier_id, category_id
-            )
+            # Sales summary for additional stats with all filters
+            sales_summary = data['sales_summary']
             
             # Update average order value
             self.avg_order_value_label.config(text=f"Average Order Value: {self.format_currency(sales_summary['avg_order_value'])}")
             
             # Update items sold today
-            today = datetime.now().strftime('%Y-%m-%d')
-            today_summary = self.dashboard_funcs['get_sales_summary'](today, today)
+            today_summary = data['today_summary']
             self.items_sold_today_label.config(text=f"Items Sold Today: {self.format_number(today_summary['total_items_sold'])}")
             
             # Mock new customers (would need actual customer tracking)
             self.new_customers_label.config(text="New Customers: --")
             
-            # Get low stock count
-            low_stock_items = self.dashboard_funcs['get_low_stock_analytics']()
+            # Low stock count
+            low_stock_items = data['low_stock']
             low_stock_value = sum(item['reorder_cost'] for item in low_stock_items) if low_stock_items else 0
             self.low_stock_count_label.config(text=f"Low Stock Items: {len(low_stock_items)} ({self.format_currency(low_stock_value)})")
             
-            # Get supplier performance
-            supplier_performance = self.dashboard_funcs['get_supplier_performance']()
+            # Supplier performance
+            supplier_performance = data['supplier_performance']
             if supplier_performance:
                 avg_delivery_rate = sum(s['delivery_success_rate'] for s in supplier_performance) / len(supplier_performance)
                 self.supplier_performance_label.config(text=f"Supplier Performance: {self.format_percentage(avg_delivery_rate)}")
@@ -726,31 +770,26 @@ class OverviewUI(DashboardBaseUI):
                 self.supplier_performance_label.config(text="Supplier Performance: --%")
             
             # Calculate cost savings potential (simplified)
-            inventory_data = self.dashboard_funcs['get_inventory_value']()
+            inventory_data = data['inventory']
             potential_savings = float(inventory_data['potential_profit']) * 0.1  # 10% optimization potential
             self.cost_savings_label.config(text=f"Cost Savings Potential: {self.format_currency(potential_savings)}")
             
         except Exception as e:
             logger.error(f"Error updating quick stats: {e}")
     
-    def update_recent_activities(self, filters):
+    def update_recent_activities(self, data):
         """Update recent activities feed"""
         try:
-            if not self.dashboard_funcs:
+            if not data:
                 return
             
+            # Recent activities with all filters
+            activities = data['activities']
+            
             # Clear existing items
             for item in self.activity_tree.get_children():
                 self.activity_tree.delete(item)
             
-            # Get filter IDs
-            employee_id = filters.get('employee_id')
-            supplier_id = filters.get('supplier_id')
-            category_id = filters.get('category_id')
-            
-            # Get recent activities with all filters
-            activities = self.dashboard_funcs['get_recent_activities'](10, employee_id, supplier_id, category_id)
-            
             for activity in activities:
                 # Format the data
                 time_str = activity['sale_datetime'].strftime('%m/%d %H:%M') if hasattr(activity['sale_datetime'], 'strftime') else str(activity['sale_datetime'])[:16]
@@ -770,21 +809,19 @@ class OverviewUI(DashboardBaseUI):
         except Exception as e:
             logger.error(f"Error updating recent activities: {e}")
     
-    def update_recent_activities_fast(self, filters):
-        """Update recent activities using fast function"""
+    def update_recent_activities_fast(self, data):
+        """Update recent activities from the fast snapshot"""
         try:
-            if not self.dashboard_funcs or 'get_recent_sales_fast' not in self.dashboard_funcs:
-                # Fallback to regular update if fast functions not available
-                self.update_recent_activities(filters)
+            if not data:
                 return
             
+            # Recent sales from the fast function
+            activities = data['recent_sales']
+            
             # Clear existing items
             for item in self.activity_tree.get_children():
                 self.activity_tree.delete(item)
             
-            # Get recent sales using fast function
-            activities = self.dashboard_funcs['get_recent_sales_fast'](10)
-            
             for activity in activities:
                 # Format the data
                 time_str = activity['sale_datetime'].strftime('%m/%d %H:%M') if hasattr(activity['sale_datetime'], 'strftime') else str(activity['sale_datetime'])[:16]
@@ -811,20 +848,16 @@ class OverviewUI(DashboardBaseUI):
             
         except Exception as e:
             logger.error(f"Error updating recent activities fast: {e}")
-            # Fallback to regular update
-            self.update_recent_activities(filters)
     
-    def update_insights_section(self, filters):
+    def update_insights_section(self, data):
         """Update insights and alerts section"""
         try:
-            if not self.dashboard_funcs:
+            if not data:
                 return
             
             # Update top products
             self.top_products_text.delete(1.0, tk.END)
-            top_products = self.dashboard_funcs['get_top_products'](
-                filters['start_date'], filters['end_date'], 5
-            )
+            top_products = data['top_products']
             
             if top_products:
                 self.top_products_text.insert(tk.END, "🏆 TOP PERFORMERS:\n\n")
@@ -843,7 +876,7 @@ class OverviewUI(DashboardBaseUI):
             alerts_count = 0
             
             # Low stock alerts
-            low_stock_items = self.dashboard_funcs['get_low_stock_analytics']()
+            low_stock_items = data['low_stock']
             if low_stock_items:
                 self.alerts_text.insert(tk.END, f"⚠️ LOW STOCK ALERTS:\n")
                 for item in low_stock_items[:3]:  # Show top 3
@@ -856,7 +889,7 @@ class OverviewUI(DashboardBaseUI):
                 alerts_count += len(low_stock_items)
             
             # Performance alerts (simplified)
-            profit_margins = self.dashboard_funcs['calculate_profit_margins']()
+            profit_margins = data['profit_margins']
             low_margin_products = [p for p in profit_margins if p['profit_margin'] < 10]
             if low_margin_products:
                 self.alerts_text.insert(tk.END, f"📉 LOW MARGIN PRODUCTS:\n")
@@ -875,19 +908,15 @@ class OverviewUI(DashboardBaseUI):
         except Exception as e:
             logger.error(f"Error updating insights section: {e}")
     
-    def update_insights_section_fast(self, filters):
-        """Update insights using fast functions"""
+    def update_insights_section_fast(self, data):
+        """Update insights from the fast snapshot"""
         try:
-            if not self.dashboard_funcs or 'get_top_products_fast' not in self.dashboard_funcs:
-                # Fallback to regular update if fast functions not available
-                self.update_insights_section(filters)
+            if not data:
                 return
             
             # Update top products
             self.top_products_text.delete(1.0, tk.END)
-            top_products = self.dashboard_funcs['get_top_products_fast'](
-                filters['start_date'], filters['end_date'], 5
-            )
+            top_products = data['top_products']
             
             if top_products:
                 self.top_products_text.insert(tk.END, "🏆 TOP PERFORMERS:\n\n")
@@ -905,7 +934,7 @@ class OverviewUI(DashboardBaseUI):
             
             try:
                 # Get low stock alerts
-                low_stock_data = self.dashboard_funcs['get_low_stock_analytics']()
+                low_stock_data = data['low_stock']
                 
                 if low_stock_data:
                     self.alerts_text.insert(tk.END, "⚠️ STOCK ALERTS:\n\n")
@@ -931,7 +960,7 @@ class OverviewUI(DashboardBaseUI):
                         
                         # Show performance insights instead
                         try:
-                            profit_data = self.dashboard_funcs['calculate_profit_margins']()
+                            profit_data = data['profit_margins']
                             if profit_data:
                                 avg_margin = sum(float(p.get('profit_margin', 0)) for p in profit_data) / len(profit_data)
                                 self.alerts_text.insert(tk.END, f"📈 INSIGHTS:\n\n")
@@ -957,8 +986,6 @@ class OverviewUI(DashboardBaseUI):
             
         except Exception as e:
             logger.error(f"Error updating insights section fast: {e}")
-            # Fallback to regular update
-            self.update_insights_section(filters)
 
     # Quick action methods
     def open_new_sale(self):
@@ -11,6 +11,8 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.dates as mdates
 from dashboard_base import DashboardBaseUI, DashboardConstants
+from dashboard_data_service import get_data_service
+from virtual_treeview import VirtualTreeview, ListRowSource
 import dashboard
 import sys
 import os
@@ -25,6 +27,7 @@ class PerformanceUI(DashboardBaseUI):
     
     def __init__(self, parent, callbacks):
         super().__init__(parent, callbacks)
+        self.data_service = get_data_service(parent)
         self.performance_data = {}
         self.selected_employee_id = None
         self.create_interface()
@@ -279,7 +282,7 @@ class PerformanceUI(DashboardBaseUI):
         tree_container.pack(fill='both', expand=True)
         
         columns = ('Rank', 'SKU', 'Product', 'Units Sold', 'Revenue', 'Profit', 'Avg Price')
-        self.product_tree = ttk.Treeview(tree_container, columns=columns, show='headings', height=12)
+        self.product_tree = VirtualTreeview(tree_container, columns=columns, show='headings', height=12)
         
         # Configure columns with better sizing
         self.product_tree.heading('Rank', text='Rank')
@@ -403,7 +406,7 @@ class PerformanceUI(DashboardBaseUI):
         tree_container.pack(fill='both', expand=True)
         
         columns = ('Rank', 'SKU', 'Product', 'Cost', 'Price', 'Profit/Unit', 'Margin %', 'Category', 'Units Sold')
-        self.efficiency_tree = ttk.Treeview(tree_container, columns=columns, show='headings', height=12)
+        self.efficiency_tree = VirtualTreeview(tree_container, columns=columns, show='headings', height=12)
         
         # Configure columns with better sizing
         self.efficiency_tree.heading('Rank', text='Rank')
@@ -453,17 +456,29 @@ class PerformanceUI(DashboardBaseUI):
     
     def refresh_performance_data(self):
         """Refresh all performance data with selected date range"""
+        start_date, end_date = self.get_date_range()
+        self.data_service.submit(
+            'performance',
+            lambda: self.fetch_performance_data(start_date, end_date),
+            self.apply_performance_data,
+            lambda e: messagebox.showerror("Error", f"Failed to refresh performance data: {str(e)}")
+        )
+    
+    def fetch_performance_data(self, start_date, end_date):
+        """Run the performance queries (worker thread)"""
+        return {
+            # Employee performance data
+            'employees': dashboard.get_employee_performance_ranking(start_date, end_date),
+            # Product performance data
+            'products': dashboard.get_product_performance_analysis(start_date, end_date),
+            # Cost efficiency data with date range
+            'efficiency': dashboard.get_cost_efficiency_metrics(start_date, end_date),
+        }
+    
+    def apply_performance_data(self, data):
+        """Update all tabs from fetched data (Tk thread)"""
         try:
-            start_date, end_date = self.get_date_range()
-            
-            # Get employee performance data
-            self.performance_data['employees'] = dashboard.get_employee_performance_ranking(start_date, end_date)
-            
-            # Get product performance data
-            self.performance_data['products'] = dashboard.get_product_performance_analysis(start_date, end_date)
-            
-            # Get cost efficiency data with date range
-            self.performance_data['efficiency'] = dashboard.get_cost_efficiency_metrics(start_date, end_date)
+            self.performance_data.update(data)
             
             # Update all tabs
             self.update_employee_performance()
@@ -496,14 +511,10 @@ class PerformanceUI(DashboardBaseUI):
     
     def update_product_performance(self):
         """Update product performance tab with rankings"""
-        # Clear existing data
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-        
         # Populate product rankings
         products_data = self.performance_data.get('products', [])
-        for i, prod in enumerate(products_data, 1):
-            values = (
+        rows = [
+            (
                 i,  # Rank
                 prod.get('SKU', 'N/A'),
                 prod.get('name', 'N/A'),
@@ -512,17 +523,15 @@ class PerformanceUI(DashboardBaseUI):
                 f"${prod.get('total_profit', 0):,.2f}",
                 f"${prod.get('avg_selling_price', 0):,.2f}"
             )
-            self.product_tree.insert('', 'end', values=values)
+            for i, prod in enumerate(products_data, 1)
+        ]
+        self.product_tree.set_source(ListRowSource(rows))
         
         # Update product chart
         self.update_product_chart()
     
     def update_cost_efficiency(self):
         """Update cost efficiency tab with rankings and period indicator"""
-        # Clear existing data
-        for item in self.efficiency_tree.get_children():
-            self.efficiency_tree.delete(item)
-        
         # Populate efficiency data
         efficiency_data = self.performance_data.get('efficiency', [])
         
@@ -539,8 +548,8 @@ class PerformanceUI(DashboardBaseUI):
             # Sort by profit margin for ranking
             sorted_efficiency = sorted(efficiency_data, key=lambda x: float(x.get('profit_margin', 0)), reverse=True)
             
-            for i, eff in enumerate(sorted_efficiency, 1):
-                values = (
+            rows = [
+                (
                     i,  # Rank
                     eff.get('SKU', 'N/A'),
                     eff.get('name', 'N/A'),
@@ -551,8 +560,11 @@ class PerformanceUI(DashboardBaseUI):
                     eff.get('category_name', 'N/A'),
                     f"{eff.get('total_units_sold', 0):,}"
                 )
-                self.efficiency_tree.insert('', 'end', values=values)
+                for i, eff in enumerate(sorted_efficiency, 1)
+            ]
+            self.efficiency_tree.set_source(ListRowSource(rows))
         else:
+            self.efficiency_tree.set_source(None)
             period = self.period_var.get() if hasattr(self, 'period_var') else "selected period"
             self.efficiency_summary.config(text=f"No cost efficiency data available for {period} - Please refresh the data")
     
@@ -643,10 +655,18 @@ class PerformanceUI(DashboardBaseUI):
         if not self.selected_employee_id:
             return
         
+        start_date, end_date = self.get_date_range()
+        employee_id = self.selected_employee_id
+        self.data_service.submit(
+            'performance.employee',
+            lambda: dashboard.get_employee_productivity_trends(employee_id, start_date, end_date),
+            self.draw_employee_chart,
+            self.show_employee_chart_error
+        )
+    
+    def draw_employee_chart(self, trends_data):
+        """Draw the employee trend chart from fetched data (Tk thread)"""
         try:
-            start_date, end_date = self.get_date_range()
-            trends_data = dashboard.get_employee_productivity_trends(self.selected_employee_id, start_date, end_date)
-            
             self.emp_ax.clear()
             
             if trends_data:
@@ -675,7 +695,12 @@ class PerformanceUI(DashboardBaseUI):
             self.emp_canvas.draw()
             
         except Exception as e:
-            logger.error(f"Error updating employee chart: {e}")
+            self.show_employee_chart_error(e)
+    
+    def show_employee_chart_error(self, e):
+        """Show a chart loading error in place of the employee chart"""
+        logger.error(f"Error updating employee chart: {e}")
+        try:
             # Show error message in chart
             self.emp_ax.clear()
             self.emp_ax.text(0.5, 0.5, f'Error loading chart:\n{str(e)}', 
@@ -683,7 +708,9 @@ class PerformanceUI(DashboardBaseUI):
                            transform=self.emp_ax.transAxes, fontsize=9)
             self.emp_ax.set_title('Employee Performance Trend', fontsize=10)
             self.emp_canvas.draw()
-    
+        except tk.TclError:
+            pass  # Widget may be destroyed, ignore
+
     def refresh_data(self, filters):
         """Override to refresh performance data"""
         self.refresh_performance_data()
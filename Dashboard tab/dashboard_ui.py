@@ -8,7 +8,6 @@ from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, timedelta
 import os
 import csv
-import time  # Add time import for caching
 import json
 import logging
 from PIL import Image, ImageTk
@@ -23,6 +22,7 @@ from dashboard_overview_ui import OverviewUI
 from dashboard_analytics_ui import AnalyticsUI
 from dashboard_performance_ui import PerformanceUI
 from dashboard_simulation_ui import SimulationUI
+from dashboard import query_cache
 
 class DashboardUI:
     """Main Dashboard UI class with 4 subtabs: Overview, Analytics, Performance, Simulation"""
@@ -92,6 +92,10 @@ class DashboardUI:
         )
         self.time_label.pack(side=tk.RIGHT)
         
+        # Result cache hit/miss counters
+        self.cache_label = ttk.Label(header_frame, text="", font=DashboardConstants.SMALL_FONT)
+        self.cache_label.pack(side=tk.RIGHT, padx=(0, 15))
+        
         # Update time every minute
         self.update_time()
         
@@ -99,6 +103,7 @@ class DashboardUI:
         """Update the current time display"""
         current_time = datetime.now().strftime('%Y-%m-%d %H:%M')
         self.time_label.config(text=f"📅 {current_time}")
+        self.update_cache_stats()
         # Schedule next update in 60 seconds
         self.parent.after(60000, self.update_time)
         
@@ -197,7 +202,7 @@ class DashboardUI:
         action_frame = ttk.Frame(entity_row)
         action_frame.pack(side=tk.RIGHT)
         
-        ttk.Button(action_frame, text="🔄 Refresh", command=self.refresh_dashboard, width=10).pack(side=tk.LEFT, padx=2)
+        ttk.Button(action_frame, text="🔄 Refresh", command=self.force_refresh, width=10).pack(side=tk.LEFT, padx=2)
         ttk.Button(action_frame, text="📤 Export", command=self.show_export_options, width=10).pack(side=tk.LEFT, padx=2)
         
         # Initialize filter data
@@ -466,10 +471,6 @@ class DashboardUI:
             current_tab_index = self.subtabs_notebook.index(self.subtabs_notebook.select())
             current_tab_name = self.get_tab_name_from_index(current_tab_index)
             
-            # Clear cache when filters change (force refresh)
-            if hasattr(self, '_tab_cache'):
-                self._tab_cache.clear()
-            
             # Only refresh the current tab for immediate feedback
             if current_tab_name:
                 self.refresh_current_tab_only(current_tab_name)
@@ -480,17 +481,21 @@ class DashboardUI:
         except Exception as e:
             logger.error(f"Error refreshing dashboard: {e}")
     
+    def force_refresh(self):
+        """Drop cached query results (e.g. after changes made on another till) and refresh"""
+        query_cache.clear()
+        self.refresh_dashboard()
+    
     def schedule_background_refresh(self, exclude_tab):
-        """Schedule background refresh for other initialized tabs"""
+        """Refresh other initialized tabs in the background"""
         try:
-            # Refresh other tabs in background with a slight delay
+            # Subtabs load through the dashboard data service, so this only queues
+            # work on its pool; a newer refresh supersedes requests still pending
             filters = self.get_current_filters()
             
             for tab_name in self.initialized_tabs:
                 if tab_name != exclude_tab and tab_name in self.subtab_uis:
-                    # Schedule refresh after a short delay to avoid blocking UI
-                    delay = 500  # 500ms delay
-                    self.parent.after(delay, lambda tn=tab_name: self._background_refresh_tab(tn, filters))
+                    self._background_refresh_tab(tab_name, filters)
                     
         except Exception as e:
             logger.error(f"Error scheduling background refresh: {e}")
@@ -525,64 +530,31 @@ class DashboardUI:
             logger.error(f"Error in tab change: {e}")
     
     def refresh_current_tab_only(self, tab_name):
-        """Refresh only the currently active tab for faster switching"""
+        """Refresh only the currently active tab; unchanged data is served from the query cache"""
         try:
-            # Enhanced caching with filter-based cache keys
-            current_time = time.time()
             filters = self.get_current_filters()
-            cache_key = f"{tab_name}_{hash(str(filters))}"
             
-            # Initialize cache if not exists
-            if not hasattr(self, '_tab_cache'):
-                self._tab_cache = {}
-            
-            # Check if we have fresh cached data (30 seconds)
-            if cache_key in self._tab_cache:
-                cached_time, cached_data = self._tab_cache[cache_key]
-                if current_time - cached_time < 30:  # 30-second cache
-                    logger.debug(f"Using cached data for {tab_name} tab")
-                    return
-            
-            # If no cache or cache expired, refresh the current tab
             if tab_name in self.subtab_uis:
                 # Use fast refresh if available, otherwise use regular refresh
                 if hasattr(self.subtab_uis[tab_name], 'refresh_data_fast'):
                     self.subtab_uis[tab_name].refresh_data_fast(filters)
                 elif hasattr(self.subtab_uis[tab_name], 'refresh_data'):
                     self.subtab_uis[tab_name].refresh_data(filters)
-                
-                # Cache the refresh
-                self._tab_cache[cache_key] = (current_time, filters)
-                
-                # Clean old cache entries (keep only recent ones)
-                self._cleanup_cache()
+            
+            self.update_cache_stats()
             
         except Exception as e:
             logger.error(f"Error refreshing current tab {tab_name}: {e}")
     
-    def _cleanup_cache(self):
-        """Clean up old cache entries to prevent memory bloat"""
+    def update_cache_stats(self):
+        """Show query cache hit/miss counters in the header"""
         try:
-            if not hasattr(self, '_tab_cache'):
-                return
-                
-            current_time = time.time()
-            # Remove entries older than 5 minutes
-            max_age = 300  # 5 minutes
-            
-            keys_to_remove = []
-            for key, (cached_time, _) in self._tab_cache.items():
-                if current_time - cached_time > max_age:
-                    keys_to_remove.append(key)
-            
-            for key in keys_to_remove:
-                del self._tab_cache[key]
-                
-            if keys_to_remove:
-                logger.debug(f"Cleaned up {len(keys_to_remove)} old cache entries")
-                
+            stats = query_cache.stats()
+            self.cache_label.config(
+                text=f"⚡ Cache {stats['hit_rate']:.0f}% ({stats['hits']} hits / {stats['misses']} misses, {stats['entries']} cached)"
+            )
         except Exception as e:
-            logger.error(f"Error cleaning cache: {e}")
+            logger.debug(f"Could not update cache stats: {e}")
     
     
     def show_export_options(self):
@@ -109,6 +109,31 @@ CREATE TABLE InventoryAdjustments (
     FOREIGN KEY (employee_id) REFERENCES Employees(employee_id)
 );
 
+-- Daily sales rollup (maintained by log_sale; rebuild with `python -m core.rollups`)
+-- category_id / supplier_id = 0 rows are totals across all categories / suppliers
+CREATE TABLE DailySalesRollup (
+    sale_date DATE NOT NULL,
+    employee_id INT NOT NULL,
+    category_id INT NOT NULL,
+    supplier_id INT NOT NULL,
+    revenue DECIMAL(14, 4) NOT NULL DEFAULT 0,
+    profit DECIMAL(14, 4) NOT NULL DEFAULT 0,
+    orders INT NOT NULL DEFAULT 0,
+    items INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, employee_id, category_id, supplier_id),
+    INDEX idx_rollup_category_date (category_id, supplier_id, sale_date)
+);
+
+-- Per-SKU demand-rate index (maintained by log_sale; rebuild with `python -m core.demand`)
+-- level is the exponentially decayed units sold as of updated_at
+CREATE TABLE DemandRates (
+    SKU VARCHAR(255) NOT NULL PRIMARY KEY,
+    level DOUBLE NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL,
+    tracked_since DATETIME NOT NULL,
+    FOREIGN KEY (SKU) REFERENCES Products(SKU)
+);
+
 -- Create default anonymous customer
 INSERT INTO Customers (customer_id, name, is_anonymous) 
 VALUES (0, 'Anonymous', TRUE);
\ No newline at end of file
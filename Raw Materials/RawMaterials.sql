@@ -14,54 +14,20 @@ ADD CONSTRAINT fk_material_id
 FOREIGN KEY (material_id) REFERENCES RawMaterials(material_id);
 
 
--- Create WheatProduction table
-CREATE TABLE WheatProduction (
-    wheat_id INT AUTO_INCREMENT PRIMARY KEY,
-    material_id INT,
-    timestamp DATETIME,
+-- Create ClimateProduction table
+-- One row per material and day for every raw material. Replaces the former
+-- WheatProduction, CottonProduction, RiceProduction and SugarcaneProduction
+-- tables; existing databases are migrated with `python -m core.climate_production`
+-- (also run automatically on first start).
+CREATE TABLE ClimateProduction (
+    material_id INT NOT NULL,
+    timestamp DATETIME NOT NULL,
     expected_condition TEXT,
     category VARCHAR(50),
     original_production DECIMAL(10,2),
     delay_percent DECIMAL(5,2),
     expected_production DECIMAL(10,2),
+    PRIMARY KEY (material_id, timestamp),
+    INDEX idx_climate_production_timestamp (timestamp, material_id),
     FOREIGN KEY (material_id) REFERENCES RawMaterials(material_id)
 );
-
--- Create CottonProduction table
-CREATE TABLE CottonProduction (
-    cotton_id INT AUTO_INCREMENT PRIMARY KEY,
-    material_id INT,
-    timestamp DATETIME,
-    expected_condition TEXT,
-    category VARCHAR(50),
-    original_production DECIMAL(10,2),
-    delay_percent DECIMAL(5,2),
-    expected_production DECIMAL(10,2),
-    FOREIGN KEY (material_id) REFERENCES RawMaterials(material_id)
-);
-
--- Create RiceProduction table
-CREATE TABLE RiceProduction (
-    rice_id INT AUTO_INCREMENT PRIMARY KEY,
-    material_id INT,
-    timestamp DATETIME,
-    expected_condition TEXT,
-    category VARCHAR(50),
-    original_production DECIMAL(10,2),
-    delay_percent DECIMAL(5,2),
-    expected_production DECIMAL(10,2),
-    FOREIGN KEY (material_id) REFERENCES RawMaterials(material_id)
-);
-
--- Create SugarcaneProduction table
-CREATE TABLE SugarcaneProduction (
-    sugarcane_id INT AUTO_INCREMENT PRIMARY KEY,
-    material_id INT,
-    timestamp DATETIME,
-    expected_condition TEXT,
-    category VARCHAR(50),
-    original_production DECIMAL(10,2),
-    delay_percent DECIMAL(5,2),
-    expected_production DECIMAL(10,2),
-    FOREIGN KEY (material_id) REFERENCES RawMaterials(material_id)
-);
\ No newline at end of file
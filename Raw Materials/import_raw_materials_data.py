@@ -3,11 +3,9 @@
 Raw Materials Data Importer
 Script to import CSV data from the Datasets folder into corresponding database tables
 
-This script imports data for:
-- Wheat production data -> WheatProduction table
-- Rice production data -> RiceProduction table  
-- Cotton production data -> CottonProduction table
-- Sugarcane production data -> SugarcaneProduction table
+All files load into the ClimateProduction table, keyed by the material ID
+in each row (see core/climate_production.py). To track another material,
+add it to RawMaterials and list its CSV in CSV_FILES.
 """
 
 import sys
@@ -22,14 +20,16 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)
 
 from core.database import get_db, close_db
+from core import climate_production, events
+from core.climate_cache import climate_cache
 
-# CSV to table mapping
-CSV_TABLE_MAPPING = {
-    'wheat-data.csv': 'WheatProduction',
-    'rice-data.csv': 'RiceProduction', 
-    'cotton-data.csv': 'CottonProduction',
-    'sugarcane-Data.csv': 'SugarcaneProduction'
-}
+# Production data files; each row carries its own Material_id
+CSV_FILES = [
+    'wheat-data.csv',
+    'rice-data.csv',
+    'cotton-data.csv',
+    'sugarcane-Data.csv'
+]
 
 # Column mapping from CSV headers to database columns
 COLUMN_MAPPING = {
@@ -70,6 +70,7 @@ def setup_raw_materials():
                 print(f"  ℹ️  {name} (ID: {material_id}) already exists")
         
         connection.commit()
+        events.publish('RawMaterials')
         print("✅ RawMaterials setup completed")
         
     except Exception as e:
@@ -93,8 +94,8 @@ def parse_timestamp(timestamp_str):
             print(f"⚠️  Warning: Could not parse timestamp '{timestamp_str}', using current time")
             return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-def import_csv_to_table(csv_file, table_name):
-    """Import data from a CSV file to the corresponding database table"""
+def import_csv_to_table(csv_file, table_name="ClimateProduction"):
+    """Import data from a CSV file into ClimateProduction, replacing the data of the materials it contains"""
     
     csv_path = os.path.join("Datasets", csv_file)
     
@@ -102,17 +103,15 @@ def import_csv_to_table(csv_file, table_name):
         print(f"❌ CSV file not found: {csv_path}")
         return False
     
+    connection = cursor = None
     try:
         connection, cursor = get_db()
+        climate_production.ensure_production_table(cursor)
         
         print(f"\n📊 Importing {csv_file} -> {table_name}")
         
-        # Clear existing data (optional - comment out if you want to keep existing data)
-        cursor.execute(f"DELETE FROM {table_name}")
-        print(f"  🗑️  Cleared existing data from {table_name}")
-        
         # Read and import CSV data
-        imported_count = 0
+        rows = []
         skipped_count = 0
         
         with open(csv_path, 'r', encoding='utf-8') as file:
@@ -129,50 +128,38 @@ def import_csv_to_table(csv_file, table_name):
             if missing_headers:
                 print(f"  ⚠️  Warning: Missing headers: {missing_headers}")
             
-            # Prepare the INSERT statement
-            db_columns = [COLUMN_MAPPING[header] for header in expected_headers if header in actual_headers]
-            placeholders = ', '.join(['%s'] * len(db_columns))
-            insert_query = f"INSERT INTO {table_name} ({', '.join(db_columns)}) VALUES ({placeholders})"
-            
-            print(f"  🔧 SQL Query: {insert_query}")
-            
             # Process each row
             for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 because of header
                 try:
-                    # Extract values in the correct order
-                    values = []
+                    # Extract values in ClimateProduction column order
+                    values = {}
                     for header in expected_headers:
-                        if header in actual_headers:
-                            value = row[header].strip()
-                            
-                            # Special handling for timestamp
-                            if header == 'time_stamp':
-                                value = parse_timestamp(value)
-                            # Special handling for numeric fields
-                            elif header in ['Original_production', 'delay_percent', 'expected_production']:
-                                try:
-                                    value = float(value) if value else 0.0
-                                except ValueError:
-                                    print(f"  ⚠️  Warning: Invalid numeric value '{value}' in row {row_num}, using 0")
-                                    value = 0.0
-                            # Special handling for material_id
-                            elif header == 'Material_id':
-                                try:
-                                    value = int(value) if value else None
-                                except ValueError:
-                                    print(f"  ⚠️  Warning: Invalid material_id '{value}' in row {row_num}, skipping row")
-                                    skipped_count += 1
-                                    continue
-                            
-                            values.append(value)
+                        value = row[header].strip() if header in actual_headers and row[header] else ''
+                        
+                        # Special handling for timestamp
+                        if header == 'time_stamp':
+                            value = parse_timestamp(value)
+                        # Special handling for numeric fields
+                        elif header in ['Original_production', 'delay_percent', 'expected_production']:
+                            try:
+                                value = float(value) if value else 0.0
+                            except ValueError:
+                                print(f"  ⚠️  Warning: Invalid numeric value '{value}' in row {row_num}, using 0")
+                                value = 0.0
+                        # Special handling for material_id
+                        elif header == 'Material_id':
+                            try:
+                                value = int(value)
+                            except ValueError:
+                                print(f"  ⚠️  Warning: Invalid material_id '{value}' in row {row_num}, skipping row")
+                                value = None
+                        
+                        values[COLUMN_MAPPING[header]] = value
                     
-                    # Insert the row
-                    cursor.execute(insert_query, values)
-                    imported_count += 1
-                    
-                    # Progress indicator
-                    if imported_count % 50 == 0:
-                        print(f"  📈 Imported {imported_count} rows...")
+                    if values['material_id'] is None:
+                        skipped_count += 1
+                        continue
+                    rows.append(tuple(values[column] for column in climate_production.PRODUCTION_COLUMNS))
                 
                 except Exception as e:
                     print(f"  ❌ Error processing row {row_num}: {e}")
@@ -180,8 +167,8 @@ def import_csv_to_table(csv_file, table_name):
                     skipped_count += 1
                     continue
         
-        # Commit the transaction
-        connection.commit()
+        # Existing data for these materials is replaced in the same transaction
+        imported_count = climate_production.replace_material_rows(connection, cursor, rows)
         
         print(f"  ✅ Import completed:")
         print(f"     📥 Imported: {imported_count} rows")
@@ -192,8 +179,6 @@ def import_csv_to_table(csv_file, table_name):
         
     except Exception as e:
         print(f"❌ Error importing {csv_file}: {e}")
-        if 'connection' in locals():
-            connection.rollback()
         return False
     finally:
         close_db(connection, cursor)
@@ -205,18 +190,21 @@ def verify_import():
         
         print(f"\n📊 Verifying imported data...")
         
-        for csv_file, table_name in CSV_TABLE_MAPPING.items():
-            cursor.execute(f"SELECT COUNT(*) as count FROM {table_name}")
-            result = cursor.fetchone()
-            count = result['count'] if result else 0
-            
-            print(f"  📋 {table_name}: {count:,} rows")
+        cursor.execute("""
+            SELECT rm.material_id, rm.name, COUNT(cp.material_id) AS count
+            FROM RawMaterials rm
+            LEFT JOIN ClimateProduction cp ON cp.material_id = rm.material_id
+            GROUP BY rm.material_id, rm.name
+            ORDER BY rm.material_id
+        """)
+        for material in cursor.fetchall():
+            print(f"  📋 {material['name']}: {material['count']:,} rows")
             
             # Show sample data
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT 3")
+            cursor.execute("SELECT * FROM ClimateProduction WHERE material_id = %s ORDER BY timestamp LIMIT 3", (material['material_id'],))
             samples = cursor.fetchall()
             if samples:
-                print(f"     Sample data from {table_name}:")
+                print(f"     Sample data for {material['name']}:")
                 for i, sample in enumerate(samples, 1):
                     material_id = sample.get('material_id', 'N/A')
                     timestamp = sample.get('timestamp', 'N/A')
@@ -243,23 +231,26 @@ def main():
         
         # Step 2: Import CSV data for each material
         success_count = 0
-        total_files = len(CSV_TABLE_MAPPING)
+        total_files = len(CSV_FILES)
         
-        for csv_file, table_name in CSV_TABLE_MAPPING.items():
-            if import_csv_to_table(csv_file, table_name):
+        for csv_file in CSV_FILES:
+            if import_csv_to_table(csv_file):
                 success_count += 1
         
         # Step 3: Verify imports
         verify_import()
         
+        # Nothing cached before the import may be served after it
+        climate_cache.clear()
+        
         # Summary
         print(f"\n" + "=" * 80)
         print(f"📊 IMPORT SUMMARY")
         print(f"=" * 80)
         print(f"✅ Successfully imported: {success_count}/{total_files} files")
         print(f"📁 Processed files:")
-        for csv_file, table_name in CSV_TABLE_MAPPING.items():
-            print(f"   • {csv_file} → {table_name}")
+        for csv_file in CSV_FILES:
+            print(f"   • {csv_file} → ClimateProduction")
         
         if success_count == total_files:
             print(f"\n🎉 All imports completed successfully!")
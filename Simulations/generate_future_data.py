@@ -41,6 +41,8 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)
 
 from core.database import get_db
+from core.rollups import rebuild_daily_sales_rollup
+from core.demand import rebuild_demand_rates
 
 class FutureDataGenerator:
     """Enhanced data generator for future sales and inventory management"""
@@ -350,6 +352,10 @@ class FutureDataGenerator:
         # Final commit
         self.conn.commit()
         
+        # Generated sales bypass log_sale, so refresh the dashboard rollup and demand index
+        rebuild_daily_sales_rollup(self.conn, self.cursor)
+        rebuild_demand_rates(self.conn, self.cursor)
+        
         print(f"\n✅ Sales Generation Complete:")
         print(f"   Sales Generated: {sales_generated:,}")
         print(f"   Items Generated: {items_generated:,}")
@@ -17,6 +17,8 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)
 
 from core.database import get_db
+from core.rollups import rebuild_daily_sales_rollup
+from core.demand import rebuild_demand_rates
 
 def generate_unlimited_sales(num_sales=5000):
     """Generate sales data without reducing stock (for testing purposes)"""
@@ -152,6 +154,12 @@ def generate_unlimited_sales(num_sales=5000):
         # Final commit
         conn.commit()
         
+        # Generated sales bypass log_sale, so refresh the dashboard rollup and demand index
+        rebuild_daily_sales_rollup(conn, cursor)
+        print("✓ Daily sales rollup rebuilt")
+        rebuild_demand_rates(conn, cursor)
+        print("✓ Demand rate index rebuilt")
+        
         # Check final count and customer distribution
         cursor.execute("SELECT COUNT(*) as final_count FROM Sales")
         final_count = cursor.fetchone()['final_count']
@@ -5,6 +5,8 @@ import tkinter.font as tkFont
 from core import inventory
 from core import customers 
 from core import sales  
+from core import profiling
+from core import query_stats
 import threading
 import sys
 import os
@@ -19,8 +21,9 @@ if dashboard_tab_path not in sys.path:
 sys.path.append(os.path.join(os.path.dirname(__file__), 'Climate Tab'))
 
 # Standard imports
-from automation.data_exporting import export_treeview_to_csv
+from automation.data_exporting import export_treeview_to_csv, export_query_to_csv
 from dashboard_ui import DashboardUI
+from virtual_treeview import VirtualTreeview, ListRowSource, PagedRowSource, ROW_SOURCE_CHANGED
 from automation.data_importing import show_customer_import_dialog, show_inventory_import_dialog, show_supplier_import_dialog
 from typing import Any, Optional
 
@@ -96,6 +99,8 @@ def apply_styles(widget, master=None):
 
 def alternate_treeview_rows(treeview):
     # Alternate row colors for a Treeview widget
+    if isinstance(treeview, VirtualTreeview):
+        return  # stripes are applied by source row as the view is drawn
     # Configure tags in case they're not already configured
     treeview.tag_configure("evenrow", background="#f9f9f9")
     treeview.tag_configure("oddrow", background="#e9e9e9")
@@ -355,13 +360,13 @@ class SalesUI:
             messagebox.showinfo("Feature Unavailable", "Resend receipt feature not available")
 
     def _threaded_add_to_cart(self):
-        threading.Thread(target=self._on_add_to_cart).start()
+        threading.Thread(target=profiling.profiled("SalesUI.add_to_cart", self._on_add_to_cart)).start()
 
     def _threaded_checkout(self):
-        threading.Thread(target=self._on_checkout).start()
+        threading.Thread(target=profiling.profiled("SalesUI.checkout", self._on_checkout)).start()
 
     def _threaded_empty_cart(self):
-        threading.Thread(target=self._on_empty_cart).start()
+        threading.Thread(target=profiling.profiled("SalesUI.empty_cart", self._on_empty_cart)).start()
 
 class CustomerUI:
     def __init__(self, master):
@@ -485,13 +490,13 @@ class CustomerUI:
         # Do not auto-populate customer_listbox or customer_tree on init
         self.view_customers_callback = None
     def _threaded_search_customer(self):
-        threading.Thread(target=self.search_customer).start()
+        threading.Thread(target=profiling.profiled("CustomerUI.search_customer", self.search_customer)).start()
     def _threaded_add_customer(self):
-        threading.Thread(target=self.add_customer).start()
+        threading.Thread(target=profiling.profiled("CustomerUI.add_customer", self.add_customer)).start()
     def _threaded_update_customer(self):
-        threading.Thread(target=self.update_customer).start()
+        threading.Thread(target=profiling.profiled("CustomerUI.update_customer", self.update_customer)).start()
     def _threaded_delete_customer(self):
-        threading.Thread(target=self.delete_customer).start()
+        threading.Thread(target=profiling.profiled("CustomerUI.delete_customer", self.delete_customer)).start()
     def search_customer(self):
         if self.search_customer_callback:
             self.search_customer_callback(self.customer_listbox)
@@ -639,13 +644,13 @@ class EmployeeUI:
         self.frame.columnconfigure(1, weight=1)
         # Do not auto-populate employee_tree on init
     def _threaded_search_employee(self):
-        threading.Thread(target=self.search_employee).start()
+        threading.Thread(target=profiling.profiled("EmployeeUI.search_employee", self.search_employee)).start()
     def _threaded_add_employee(self):
-        threading.Thread(target=self.add_employee).start()
+        threading.Thread(target=profiling.profiled("EmployeeUI.add_employee", self.add_employee)).start()
     def _threaded_update_employee(self):
-        threading.Thread(target=self.update_employee).start()
+        threading.Thread(target=profiling.profiled("EmployeeUI.update_employee", self.update_employee)).start()
     def _threaded_delete_employee(self):
-        threading.Thread(target=self.delete_employee).start()
+        threading.Thread(target=profiling.profiled("EmployeeUI.delete_employee", self.delete_employee)).start()
     def search_employee(self):
         if self.search_employee_callback:
             self.search_employee_callback(self.employee_listbox)
@@ -792,7 +797,7 @@ class InventoryUI:
         adj_desc = ttk.Label(self.adjust_tab, text="Increase the stock quantity for a product.", font=("Helvetica", 10))
         adj_desc.grid(row=1, column=2, sticky=tk.W, padx=10, pady=(0,10))
         # Inventory Treeview (always visible)
-        self.inventory_tree = ttk.Treeview(self.frame, columns=('SKU', 'Name', 'Category', 'Price', 'Stock', 'Supplier ID', 'Cost'), show='headings')
+        self.inventory_tree = VirtualTreeview(self.frame, columns=('SKU', 'Name', 'Category', 'Price', 'Stock', 'Supplier ID', 'Cost'), show='headings')
         for col in ('SKU', 'Name', 'Category', 'Price', 'Stock', 'Supplier ID', 'Cost'):
             self.inventory_tree.heading(col, text=col)
             
@@ -805,13 +810,16 @@ class InventoryUI:
         self.inventory_tree.column('Supplier ID', width=100, minwidth=80)
         self.inventory_tree.column('Cost', width=80, minwidth=60)
         
-        # Add horizontal scrollbar
+        # Add horizontal and vertical scrollbars
         self.inventory_tree_scroll_x = ttk.Scrollbar(self.frame, orient='horizontal', command=self.inventory_tree.xview)
         self.inventory_tree.configure(xscrollcommand=self.inventory_tree_scroll_x.set)
+        self.inventory_tree_scroll_y = ttk.Scrollbar(self.frame, orient='vertical', command=self.inventory_tree.yview)
+        self.inventory_tree.configure(yscrollcommand=self.inventory_tree_scroll_y.set)
         
         # Grid layout for tree and scrollbar with proper weights
-        self.inventory_tree.grid(row=0, column=1, rowspan=3, sticky=(tk.N, tk.W, tk.E, tk.S), padx=10, pady=5)
-        self.inventory_tree_scroll_x.grid(row=3, column=1, sticky=(tk.W, tk.E), padx=10)
+        self.inventory_tree.grid(row=0, column=1, rowspan=3, sticky=(tk.N, tk.W, tk.E, tk.S), padx=(10, 0), pady=5)
+        self.inventory_tree_scroll_y.grid(row=0, column=2, rowspan=3, sticky=(tk.N, tk.S), pady=5)
+        self.inventory_tree_scroll_x.grid(row=3, column=1, sticky=(tk.W, tk.E), padx=(10, 0))
         
         # Buttons in column 0
         self.view_inventory_button = ttk.Button(self.frame, text="View Inventory", command=self._threaded_view_inventory, style="Blue.TButton")
@@ -845,13 +853,13 @@ class InventoryUI:
             self.adjust_employee_combobox['values'] = []
 
     def _threaded_add_item(self):
-        threading.Thread(target=self.add_item).start()
+        threading.Thread(target=profiling.profiled("InventoryUI.add_item", self.add_item)).start()
     def _threaded_delete_item(self):
-        threading.Thread(target=self.delete_item).start()
+        threading.Thread(target=profiling.profiled("InventoryUI.delete_item", self.delete_item)).start()
     def _threaded_adjust_stock(self):
-        threading.Thread(target=self.adjust_stock).start()
+        threading.Thread(target=profiling.profiled("InventoryUI.adjust_stock", self.adjust_stock)).start()
     def _threaded_view_inventory(self):
-        threading.Thread(target=self.view_inventory).start()
+        threading.Thread(target=profiling.profiled("InventoryUI.view_inventory", self.view_inventory)).start()
     def add_item(self):
         if self.add_item_callback:
             self.add_item_callback(
@@ -888,7 +896,18 @@ class InventoryUI:
             self.adjust_reason_entry.delete(0, tk.END)
             self.adjust_sku_entry.focus_set()
     def _on_export_data(self):
-        export_treeview_to_csv(self.inventory_tree, self.frame)
+        # Streams the inventory from the database on a background thread
+        columns = self.inventory_tree['columns']
+        export_query_to_csv(
+            self.frame,
+            columns,
+            lambda cursor: (
+                format_treeview_values((item['SKU'], item['name'], item['category'], item['price'], item['stock'], item['supplier_id'], item['cost']))
+                for item in inventory.iter_inventory(cursor)
+            ),
+            total_rows=self.inventory_tree.row_count() or None,
+            title="Save Inventory as CSV"
+        )
     
     def _on_import_data(self):
         # Create a refresh callback that updates the inventory tree
@@ -988,10 +1007,29 @@ class ReportsUI:
         )
         self.export_data_btn.grid(row=0, column=7, padx=10, pady=10, sticky="nsew")
 
-        # Remove problematic custom style.layout for scrollbar
-        # Output Report Table
-        self.report_tree = ttk.Treeview(self.frame, columns=(), show='headings', height=14)
-        self.report_tree.pack(fill='both', expand=True, padx=10, pady=(10,0))
+        # Filter for the rows of the current report
+        self.report_filter_frame = ttk.Frame(self.frame)
+        self.report_filter_frame.pack(fill='x', padx=10, pady=(10, 0))
+        ttk.Label(self.report_filter_frame, text="Filter:").pack(side='left')
+        self.report_filter_var = tk.StringVar()
+        self.report_filter_entry = ttk.Entry(self.report_filter_frame, textvariable=self.report_filter_var, width=30)
+        self.report_filter_entry.pack(side='left', padx=5)
+        self.report_filter_var.trace_add('write', self._on_report_filter_changed)
+        self._report_filter_job = None
+        self._report_export_rows = None
+        self._report_export_total = None
+        self.report_status_label = ttk.Label(self.report_filter_frame, text="", font=("Helvetica", 10))
+        self.report_status_label.pack(side='right')
+
+        # Output Report Table: only the rows in view exist as Treeview items
+        self.report_table_frame = ttk.Frame(self.frame)
+        self.report_table_frame.pack(fill='both', expand=True, padx=10, pady=(5,0))
+        self.report_tree = VirtualTreeview(self.report_table_frame, columns=(), show='headings', height=14)
+        self.report_tree_scroll_y = ttk.Scrollbar(self.report_table_frame, orient='vertical', command=self.report_tree.yview)
+        self.report_tree.configure(yscrollcommand=self.report_tree_scroll_y.set)
+        self.report_tree_scroll_y.pack(side='right', fill='y')
+        self.report_tree.pack(side='left', fill='both', expand=True)
+        self.report_tree.bind(ROW_SOURCE_CHANGED, lambda event: self._update_report_status())
 
         # Horizontal Scrollbar (standard style)
         self.report_tree_scroll_x = ttk.Scrollbar(self.frame, orient='horizontal', command=self.report_tree.xview)
@@ -1071,8 +1109,19 @@ class ReportsUI:
             self.customers_map = {}
             self.customer_combobox['values'] = []
 
-    def display_report(self, columns, rows, compact=False):
-        self.report_tree.delete(*self.report_tree.get_children())
+    def display_report(self, columns, rows, compact=False, next_page=None, footer_rows=None, total_rows=None, export_rows=None,
+                       sorted_pages=None):
+        """
+        Show a report. For paged reports, `rows` is the first page and
+        next_page() returns (rows, next_page) for the following one (None when
+        it was the last); footer_rows (totals) are shown once all pages are in.
+        sorted_pages(column, reverse) returns the first (rows, next_page) of the
+        report re-run in that column's order, so sorting never loads every page.
+        export_rows(cursor), when given, streams the whole report for Export Data.
+        """
+        self.report_tree.set_source(None)
+        self._report_export_rows = export_rows
+        self._report_export_total = total_rows
         self.report_tree['columns'] = columns
         
         # Define column widths based on content type
@@ -1108,13 +1157,19 @@ class ReportsUI:
             anchor = 'e' if any(term in col.lower() for term in ["price", "quantity", "stock", "amount", "id"]) else 'w'
             self.report_tree.column(col, width=width, anchor=anchor, minwidth=50, stretch=False)
         
-        # Insert data rows
-        for row in rows:
-            formatted_values = format_treeview_values(row)
-            self.report_tree.insert("", "end", values=formatted_values)
+        # Paged reports fetch the rest as the user scrolls
+        rows = [format_treeview_values(row) for row in rows]
+        footer_rows = [format_treeview_values(row) for row in footer_rows or []]
+        if next_page is None:
+            source = ListRowSource(rows, footer_rows)
+        else:
+            source = PagedRowSource(rows, self._formatted_pages(next_page), footer_rows, total_rows,
+                                    self._formatted_sorted_pages(sorted_pages) if sorted_pages else None)
+        source.filter(self.report_filter_var.get())
+        self.report_tree.set_source(source)
+        self._update_report_status()
         
         # Finalize appearance
-        alternate_treeview_rows(self.report_tree)
         self.report_tree.update_idletasks()
         
         # Manage horizontal scrollbar visibility
@@ -1125,8 +1180,57 @@ class ReportsUI:
         
         self.report_tree.xview_moveto(0)
 
+    def _formatted_pages(self, next_page):
+        # Wraps a report page loader so every page is formatted once, as it arrives
+        def load():
+            rows, following = next_page()
+            return [format_treeview_values(row) for row in rows], (self._formatted_pages(following) if following else None)
+        return load
+
+    def _formatted_sorted_pages(self, sorted_pages):
+        # Same as _formatted_pages, for the first page of a re-sorted report
+        def load(column, reverse):
+            rows, following = sorted_pages(column, reverse)
+            return [format_treeview_values(row) for row in rows], (self._formatted_pages(following) if following else None)
+        return load
+
+    def _on_report_filter_changed(self, *args):
+        # Filter once typing pauses rather than on every keystroke
+        if self._report_filter_job is not None:
+            self.frame.after_cancel(self._report_filter_job)
+        self._report_filter_job = self.frame.after(250, self._apply_report_filter)
+
+    def _apply_report_filter(self):
+        self._report_filter_job = None
+        self.report_tree.filter(self.report_filter_var.get())
+        self._update_report_status()
+
+    def _update_report_status(self):
+        source = self.report_tree.source
+        if source is None:
+            self.report_status_label.configure(text="")
+            return
+        text = f"{len(source):,} rows"
+        if isinstance(source, PagedRowSource) and not source.complete:
+            if source.total_rows is not None:
+                text = f"Loaded {source.loaded_rows:,} of {source.total_rows:,} rows - more load as you scroll"
+            else:
+                text = f"Loaded {source.loaded_rows:,} rows - more load as you scroll"
+        self.report_status_label.configure(text=text)
+
     def _on_export_data(self):
-        export_treeview_to_csv(self.report_tree, self.frame)
+        # Reports that can be streamed are exported in full from the database, not from the table
+        if self._report_export_rows is None:
+            export_treeview_to_csv(self.report_tree, self.frame)
+            return
+        export_rows, total_rows = self._report_export_rows, self._report_export_total
+        export_query_to_csv(
+            self.frame,
+            self.report_tree['columns'],
+            lambda cursor: (format_treeview_values(row) for row in export_rows(cursor)),
+            total_rows=total_rows,
+            title="Save Report as CSV"
+        )
 
 class SuppliersUI:
     def __init__(self, master):
@@ -1267,12 +1371,12 @@ class SuppliersUI:
             alternate_treeview_rows(self.suppliers_tree)
     def _threaded_add_supplier(self):
         
-        threading.Thread(target=self.add_supplier).start()
+        threading.Thread(target=profiling.profiled("SuppliersUI.add_supplier", self.add_supplier)).start()
     def _threaded_update_supplier(self):
-        threading.Thread(target=self.update_supplier).start()
+        threading.Thread(target=profiling.profiled("SuppliersUI.update_supplier", self.update_supplier)).start()
     def _threaded_delete_supplier(self):
         
-        threading.Thread(target=self.delete_supplier).start()
+        threading.Thread(target=profiling.profiled("SuppliersUI.delete_supplier", self.delete_supplier)).start()
         if self.add_supplier_callback:
             self.add_supplier_callback(
                 self.add_supplier_name_entry,
@@ -1359,11 +1463,83 @@ def view_inventory(cursor, inventory_tree):
         handle_error(f"An error occurred while viewing inventory: {e}")
 
 def _populate_inventory_treeview(inventory_list, inventory_tree):
-    inventory_tree.delete(*inventory_tree.get_children())
-    for item in inventory_list:
-        formatted_values = format_treeview_values((item['SKU'], item['name'], item['category'], item['price'], item['stock'], item['supplier_id'], item['cost']))
-        inventory_tree.insert("", "end", values=formatted_values)
-    alternate_treeview_rows(inventory_tree)
+    inventory_tree.set_source(ListRowSource(
+        format_treeview_values((item['SKU'], item['name'], item['category'], item['price'], item['stock'], item['supplier_id'], item['cost']))
+        for item in inventory_list
+    ))
+
+class DiagnosticsWindow:
+    # Session diagnostics: slowest profiled actions and busiest SQL statements
+    def __init__(self, root):
+        self.window = tk.Toplevel(root)
+        self.window.title("Diagnostics")
+        self.window.geometry("1000x600")
+
+        controls = ttk.Frame(self.window, padding="5")
+        controls.pack(fill='x')
+        self.profiling_var = tk.BooleanVar(value=profiling.ENABLED)
+        ttk.Checkbutton(controls, text="Profile actions", variable=self.profiling_var,
+                        command=self._toggle_profiling).pack(side=tk.LEFT, padx=5)
+        self.dumps_var = tk.BooleanVar(value=profiling.CAPTURE_PROFILES)
+        ttk.Checkbutton(controls, text="Save cProfile dumps for slow actions", variable=self.dumps_var,
+                        command=self._toggle_profiling).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Refresh", command=self.refresh).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(controls, text="Reset", command=self.reset).pack(side=tk.RIGHT, padx=5)
+
+        ttk.Label(self.window, text="Slowest actions this session", font=("Helvetica", 11, "bold")).pack(anchor='w', padx=10)
+        action_columns = ("Action", "When", "Total ms", "DB ms", "Queries", "Python ms", "Tk ms", "Profile")
+        self.actions_tree = ttk.Treeview(self.window, columns=action_columns, show='headings', height=12)
+        for col, width in zip(action_columns, (220, 80, 80, 80, 60, 80, 70, 300)):
+            self.actions_tree.heading(col, text=col)
+            self.actions_tree.column(col, width=width, anchor='w' if col in ("Action", "Profile") else 'e')
+        self.actions_tree.pack(fill='both', expand=True, padx=10, pady=5)
+
+        ttk.Label(self.window, text="Busiest SQL statements", font=("Helvetica", 11, "bold")).pack(anchor='w', padx=10)
+        query_columns = ("Calls", "Total ms", "p50 ms", "p95 ms", "p99 ms", "Statement")
+        self.queries_tree = ttk.Treeview(self.window, columns=query_columns, show='headings', height=8)
+        for col, width in zip(query_columns, (60, 80, 70, 70, 70, 600)):
+            self.queries_tree.heading(col, text=col)
+            self.queries_tree.column(col, width=width, anchor='w' if col == "Statement" else 'e')
+        self.queries_tree.pack(fill='both', expand=True, padx=10, pady=5)
+
+        self.refresh()
+
+    def _toggle_profiling(self):
+        profiling.configure_profiling(enabled=self.profiling_var.get(), capture_profiles=self.dumps_var.get())
+
+    def refresh(self):
+        self.actions_tree.delete(*self.actions_tree.get_children())
+        for action in profiling.slowest_actions(limit=100):
+            tk_ms = f"{action['tk_ms']:.0f}" if action['tk_ms'] is not None else "--"
+            self.actions_tree.insert('', 'end', values=(
+                action['name'] + (" (error)" if action['error'] else ""),
+                action['started_at'].strftime('%H:%M:%S'),
+                f"{action['wall_ms'] + (action['tk_ms'] or 0):.0f}",
+                f"{action['db_ms']:.0f}",
+                action['queries'],
+                f"{action['python_ms']:.0f}",
+                tk_ms,
+                action['profile'] or "",
+            ))
+        alternate_treeview_rows(self.actions_tree)
+
+        self.queries_tree.delete(*self.queries_tree.get_children())
+        for stats in query_stats.query_stats(limit=50):
+            self.queries_tree.insert('', 'end', values=(
+                stats['calls'],
+                f"{stats['total_ms']:.0f}",
+                f"{stats['p50_ms']:.1f}",
+                f"{stats['p95_ms']:.1f}",
+                f"{stats['p99_ms']:.1f}",
+                stats['fingerprint'][:300],
+            ))
+        alternate_treeview_rows(self.queries_tree)
+
+    def reset(self):
+        profiling.reset_actions()
+        query_stats.reset_query_stats()
+        self.refresh()
+
 
 class POSApp:
     def __init__(self, root,
@@ -1434,6 +1610,12 @@ class POSApp:
         # Add logout button with the same style as other buttons
         self.logout_button = ttk.Button(user_info_frame, text="Logout", command=self._logout, style="Blue.TButton")
         self.logout_button.pack(side=tk.LEFT, padx=20)
+
+        # Diagnostics window; the button shows when profiling is on, Ctrl+Shift+D always works
+        profiling.attach(self.root)
+        if profiling.ENABLED:
+            ttk.Button(user_info_frame, text="Diagnostics", command=self.show_diagnostics).pack(side=tk.LEFT, padx=5)
+        self.root.bind_all('<Control-Shift-D>', lambda event: self.show_diagnostics())
         
         # Add logo to the top right corner
         try:
@@ -1662,6 +1844,15 @@ class POSApp:
         # Handle logout button click - notify main app that user wants to logout
         if hasattr(self, 'logout_callback') and self.logout_callback:
             self.logout_callback()
+
+    def show_diagnostics(self):
+        # Open (or raise) the diagnostics window
+        window = getattr(self, 'diagnostics_window', None)
+        if window is not None and window.window.winfo_exists():
+            window.refresh()
+            window.window.lift()
+            return
+        self.diagnostics_window = DiagnosticsWindow(self.root)
     
     def refresh_climate_data(self):
         """Refresh climate data callback"""
@@ -13,6 +13,9 @@ import logging
 # Configure logging for automation module
 logger = logging.getLogger(__name__)
 
+from automation.mailer import get_alert_dispatcher, DEFAULT_SMTP_SERVER, DEFAULT_SMTP_PORT
+from core.database import date_range_clause
+
 # Import climate data functionality
 try:
     # Add the parent directory to sys.path to access Climate Tab
@@ -20,7 +23,7 @@ try:
     climate_tab_path = os.path.join(parent_dir, 'Climate Tab')
     if climate_tab_path not in sys.path:
         sys.path.insert(0, climate_tab_path)
-    from climate_data import ClimateDataManager
+    from climate_data import climate_manager
     CLIMATE_AVAILABLE = True
 except ImportError as e:
     logger.debug(f"Climate data module not available: {e}")
@@ -67,11 +70,21 @@ def load_email_config():
             data = json.load(file)
             return {
                 'email': data.get('email', ''),
-                'password': data.get('password', '')
+                'password': data.get('password', ''),
+                'smtp_server': data.get('smtp_server', DEFAULT_SMTP_SERVER),
+                'smtp_port': int(data.get('smtp_port', DEFAULT_SMTP_PORT))
             }
     except Exception as e:
         logger.error(f"Error loading email config: {e}")
-        return {'email': '', 'password': ''}
+        return {'email': '', 'password': '', 'smtp_server': DEFAULT_SMTP_SERVER, 'smtp_port': DEFAULT_SMTP_PORT}
+
+def queue_alert_email(email_config, recipient, msg, description):
+    """Hand an alert email to the background dispatcher and return immediately"""
+    dispatcher = get_alert_dispatcher(email_config['smtp_server'], email_config['smtp_port'])
+    return dispatcher.enqueue(
+        email_config['email'], [recipient], msg.as_string(),
+        email_config['email'], email_config['password'], description
+    )
 
 def send_low_stock_alert(cursor, product):
     """Send low stock alert email to manager"""
@@ -107,12 +120,9 @@ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         
         msg.attach(MIMEText(email_body, 'plain'))
         
-        # Send email
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(email_config['email'], email_config['password'])
-            server.sendmail(email_config['email'], [manager_email], msg.as_string())
-            
-        logger.info(f"Low stock alert sent for {product['name']} (SKU: {product['SKU']}) to {manager_email}")
+        # Queue email; the dispatcher sends it off the sale path
+        if queue_alert_email(email_config, manager_email, msg, f"low stock alert for SKU {product['SKU']}"):
+            logger.info(f"Low stock alert queued for {product['name']} (SKU: {product['SKU']}) to {manager_email}")
         
     except Exception as e:
         logger.error(f"Error sending low stock alert: {e}")
@@ -185,11 +195,8 @@ DigiClimate Store Hub Security System
         
         msg.attach(MIMEText(email_body, 'plain'))
         
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(email_config['email'], email_config['password'])
-            server.sendmail(email_config['email'], [manager_email], msg.as_string())
-            
-        logger.info(f"Large transaction alert sent for Sale ID {sale_data['sale_id']} (${sale_data['total']:.2f})")
+        if queue_alert_email(email_config, manager_email, msg, f"large transaction alert for Sale ID {sale_data['sale_id']}"):
+            logger.info(f"Large transaction alert queued for Sale ID {sale_data['sale_id']} (${sale_data['total']:.2f})")
         
     except Exception as e:
         logger.error(f"Error sending large transaction alert: {e}")
@@ -227,10 +234,16 @@ def generate_end_of_day_report(cursor):
         today = date.today()
         yesterday = today - timedelta(days=1)
         
+        # Half-open day ranges keep the datetime columns index-usable
+        today_sql, today_params = date_range_clause("sale_datetime", today)
+        yesterday_sql, yesterday_params = date_range_clause("sale_datetime", yesterday)
+        today_s_sql, _ = date_range_clause("s.sale_datetime", today)
+        adjustments_sql, _ = date_range_clause("ia.adjustment_datetime", today)
+        
         report_data = {}
         
         # 1. Today's Sales Summary
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 COUNT(*) as total_transactions,
                 SUM(total) as total_revenue,
@@ -238,8 +251,8 @@ def generate_end_of_day_report(cursor):
                 MIN(total) as min_transaction,
                 MAX(total) as max_transaction
             FROM Sales 
-            WHERE DATE(sale_datetime) = %s
-        """, (today,))
+            WHERE {today_sql}
+        """, today_params)
         
         today_summary = cursor.fetchone()
         if today_summary:
@@ -257,13 +270,13 @@ def generate_end_of_day_report(cursor):
             }
         
         # 2. Yesterday's Sales for Comparison
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 COUNT(*) as total_transactions,
                 SUM(total) as total_revenue
             FROM Sales 
-            WHERE DATE(sale_datetime) = %s
-        """, (yesterday,))
+            WHERE {yesterday_sql}
+        """, yesterday_params)
         
         yesterday_summary = cursor.fetchone()
         if yesterday_summary:
@@ -275,7 +288,7 @@ def generate_end_of_day_report(cursor):
             report_data['yesterday_sales'] = {'transactions': 0, 'revenue': 0}
         
         # 3. Top Selling Products Today
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 p.name,
                 p.SKU,
@@ -284,11 +297,11 @@ def generate_end_of_day_report(cursor):
             FROM SaleItems si
             JOIN Products p ON si.SKU = p.SKU
             JOIN Sales s ON si.sale_id = s.sale_id
-            WHERE DATE(s.sale_datetime) = %s
+            WHERE {today_s_sql}
             GROUP BY p.SKU, p.name
             ORDER BY total_sold DESC
             LIMIT 5
-        """, (today,))
+        """, today_params)
         
         top_products = cursor.fetchall()
         report_data['top_products'] = top_products or []
@@ -305,23 +318,23 @@ def generate_end_of_day_report(cursor):
         report_data['low_stock'] = low_stock_items or []
         
         # 5. Employee Performance Today
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 e.name,
                 COUNT(s.sale_id) as transactions,
                 SUM(s.total) as revenue
             FROM Sales s
             JOIN Employees e ON s.employee_id = e.employee_id
-            WHERE DATE(s.sale_datetime) = %s
+            WHERE {today_s_sql}
             GROUP BY e.employee_id, e.name
             ORDER BY revenue DESC
-        """, (today,))
+        """, today_params)
         
         employee_performance = cursor.fetchall()
         report_data['employees'] = employee_performance or []
         
         # 6. Inventory Adjustments Today
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 p.name,
                 p.SKU,
@@ -332,9 +345,9 @@ def generate_end_of_day_report(cursor):
             FROM InventoryAdjustments ia
             JOIN Products p ON ia.SKU = p.SKU
             JOIN Employees e ON ia.employee_id = e.employee_id
-            WHERE DATE(ia.adjustment_datetime) = %s
+            WHERE {adjustments_sql}
             ORDER BY ia.adjustment_datetime DESC
-        """, (today,))
+        """, today_params)
         
         inventory_adjustments = cursor.fetchall()
         report_data['adjustments'] = inventory_adjustments or []
@@ -342,7 +355,6 @@ def generate_end_of_day_report(cursor):
         # 7. Climate Alerts and Raw Materials Status
         if CLIMATE_AVAILABLE:
             try:
-                climate_manager = ClimateDataManager()
                 climate_alerts = climate_manager.get_climate_alerts()
                 
                 # Organize alerts by type for better reporting
@@ -367,15 +379,12 @@ def generate_end_of_day_report(cursor):
                 }
                 
                 # Get raw materials status summary
-                materials_status = {}
-                material_mapping = {1: "wheat", 2: "sugarcane", 3: "cotton", 4: "rice"}
-                for material_id, material_name in material_mapping.items():
-                    try:
-                        status = climate_manager.get_material_status(material_id)
-                        materials_status[material_name] = status
-                    except Exception as e:
-                        logger.debug(f"Error getting status for {material_name}: {e}")
-                        materials_status[material_name] = None
+                # One status read for all materials rather than a lookup per material
+                statuses = {status['material_id']: status for status in climate_manager.get_current_climate_status()}
+                materials_status = {
+                    material_name.lower(): statuses.get(material_id)
+                    for material_id, material_name in climate_manager.material_mapping.items()
+                }
                 
                 report_data['materials_status'] = materials_status
                 
@@ -1,29 +1,248 @@
 import csv
+import gzip
+import logging
+import os
+import threading
+import time
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
+import sys
+# Add the parent directory to the path so we can import our modules
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, parent_dir)
 
-def export_treeview_to_csv(treeview, parent_window=None):
-    # Export the contents of a Tkinter Treeview to a CSV file
-    # Prompt user for file location
-    file_path = filedialog.asksaveasfilename(
+from core.database import thread_connection
+
+# Get logger instance (configured in main.py)
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_ROWS = 1000  # rows written per batch; progress and cancel are checked between batches
+PROGRESS_POLL_MS = 100
+CSV_FILETYPES = [("CSV files", "*.csv"), ("Compressed CSV", "*.csv.gz"), ("All files", "*.*")]
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export when the user cancels it"""
+    pass
+
+
+def write_csv(file_path, columns, rows, progress=None, cancelled=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Write a header and rows to file_path, gzip-compressed when the name ends
+    in .gz. Rows are consumed lazily and written chunk_rows at a time, calling
+    progress(rows_written) after each chunk and stopping with ExportCancelled
+    when cancelled() turns true. Output goes to a .part file that replaces
+    file_path only when complete, so a failed export leaves no partial file.
+    Returns the number of rows written.
+    """
+    opener = gzip.open if file_path.lower().endswith(".gz") else open
+    part_path = file_path + ".part"
+    written = 0
+    try:
+        with opener(part_path, "wt", newline="", encoding="utf-8") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(columns)
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= chunk_rows:
+                    writer.writerows(batch)
+                    written += len(batch)
+                    batch.clear()
+                    if cancelled is not None and cancelled():
+                        raise ExportCancelled()
+                    if progress is not None:
+                        progress(written)
+            writer.writerows(batch)
+            written += len(batch)
+        os.replace(part_path, file_path)
+    except BaseException:
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+    if progress is not None:
+        progress(written)
+    return written
+
+
+class ExportJob:
+    """
+    Runs one export on a background thread. open_rows(cursor) returns the
+    rows to write; it runs on the export thread with a cursor of its own on a
+    pooled connection, so a report or table query can stream straight from
+    the server to the file. Pass uses_db=False for rows already in memory.
+    """
+
+    def __init__(self, file_path, columns, open_rows, total_rows=None, uses_db=True):
+        self.file_path = file_path
+        self.columns = list(columns)
+        self.open_rows = open_rows
+        self.total_rows = total_rows
+        self.uses_db = uses_db
+        self.rows_written = 0
+        self.error = None
+        self.cancelled = False
+        self.elapsed = 0.0
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="csv-export", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _progress(self, written):
+        self.rows_written = written
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            if self.uses_db:
+                with thread_connection() as connection:
+                    cursor = connection.cursor(dictionary=True)
+                    try:
+                        self._write(self.open_rows(cursor), connection)
+                    finally:
+                        try:
+                            cursor.close()
+                        except Exception as e:
+                            # Expected when the connection was dropped mid-result
+                            logger.debug(f"Error closing export cursor: {e}")
+            else:
+                self._write(self.open_rows(None))
+            logger.info(f"Exported {self.rows_written} rows to {self.file_path} in {time.perf_counter() - started:.1f} s")
+        except ExportCancelled:
+            self.cancelled = True
+            logger.info(f"Export to {self.file_path} cancelled after {self.rows_written} rows")
+        except Exception as e:
+            self.error = e
+            logger.error(f"Error exporting to {self.file_path}: {e}")
+        finally:
+            self.elapsed = time.perf_counter() - started
+            self._done.set()
+
+    def _write(self, rows, connection=None):
+        finished = False
+        try:
+            write_csv(self.file_path, self.columns, rows, progress=self._progress, cancelled=self._cancel.is_set)
+            finished = True
+        finally:
+            if not finished and connection is not None:
+                # Cancelled or failed part-way: reading off the rest of the result would take
+                # as long as the export, so drop the connection and let the server abort the query
+                connection.discard()
+            close = getattr(rows, "close", None)
+            if close is not None:
+                close()
+
+
+class ExportProgressDialog:
+    """Small window showing an export's progress with a Cancel button"""
+
+    def __init__(self, parent_window, job):
+        self.parent_window = parent_window
+        self.job = job
+        self.dialog = tk.Toplevel(parent_window)
+        self.dialog.title("Exporting Data")
+        self.dialog.resizable(False, False)
+        self.dialog.transient(parent_window.winfo_toplevel())
+        self.dialog.protocol("WM_DELETE_WINDOW", self._on_cancel)
+
+        frame = ttk.Frame(self.dialog, padding="15")
+        frame.pack(fill='both', expand=True)
+        ttk.Label(frame, text=f"Exporting to {os.path.basename(job.file_path)}").pack(anchor="w")
+        mode = "determinate" if job.total_rows else "indeterminate"
+        self.progress = ttk.Progressbar(frame, length=320, mode=mode, maximum=job.total_rows or 100)
+        self.progress.pack(fill='x', pady=10)
+        if mode == "indeterminate":
+            self.progress.start(15)
+        self.status_label = ttk.Label(frame, text="Starting...")
+        self.status_label.pack(anchor="w")
+        self.cancel_button = ttk.Button(frame, text="Cancel", command=self._on_cancel)
+        self.cancel_button.pack(anchor="e", pady=(10, 0))
+
+        self.dialog.after(PROGRESS_POLL_MS, self._poll)
+
+    def _on_cancel(self):
+        self.job.cancel()
+        self.cancel_button.configure(state="disabled")
+        self.status_label.configure(text="Cancelling...")
+
+    def _poll(self):
+        job = self.job
+        if not job.done:
+            if job.cancel_requested:
+                pass  # keep showing "Cancelling..." while the query is wound down
+            elif job.total_rows:
+                self.progress["value"] = min(job.rows_written, job.total_rows)
+                self.status_label.configure(text=f"{job.rows_written:,} of {job.total_rows:,} rows written")
+            else:
+                self.status_label.configure(text=f"{job.rows_written:,} rows written")
+            self.dialog.after(PROGRESS_POLL_MS, self._poll)
+            return
+
+        self.dialog.destroy()
+        if job.error is not None:
+            messagebox.showerror("Export Failed", f"An error occurred while exporting: {job.error}", parent=self.parent_window)
+        elif not job.cancelled:
+            messagebox.showinfo("Export Successful", f"{job.rows_written:,} rows exported to {job.file_path}", parent=self.parent_window)
+
+
+def ask_export_path(parent_window=None, title="Save Data as CSV"):
+    # Prompts for the export file; a name ending in .csv.gz is written compressed
+    return filedialog.asksaveasfilename(
         parent=parent_window,
         defaultextension=".csv",
-        filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
-        title="Save Treeview Data as CSV"
+        filetypes=CSV_FILETYPES,
+        title=title
     )
+
+
+def export_query_to_csv(parent_window, columns, open_rows, total_rows=None, title="Save Data as CSV"):
+    """
+    Export rows streamed from the database: open_rows(cursor) returns the
+    rows and runs on a background thread, so the window stays responsive
+    however large the export is. Returns the ExportJob, or None if the
+    user cancelled the file prompt.
+    """
+    file_path = ask_export_path(parent_window, title)
     if not file_path:
-        return  # User cancelled
-    try:
-        # Get column headers
-        columns = treeview['columns']
-        with open(file_path, mode='w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            # Write header
-            writer.writerow(columns)
-            # Write all rows
-            for row_id in treeview.get_children():
-                row = treeview.item(row_id)['values']
-                writer.writerow(row)
-        messagebox.showinfo("Export Successful", f"Data exported to {file_path}", parent=parent_window)
-    except Exception as e:
-        messagebox.showerror("Export Failed", f"An error occurred while exporting: {e}", parent=parent_window)
+        return None  # User cancelled
+    job = ExportJob(file_path, columns, open_rows, total_rows=total_rows).start()
+    ExportProgressDialog(parent_window, job)
+    return job
+
+
+def export_treeview_to_csv(treeview, parent_window=None):
+    # Export the contents of a Tkinter Treeview to a CSV file
+    # Prompt user for file location
+    file_path = ask_export_path(parent_window, "Save Treeview Data as CSV")
+    if not file_path:
+        return None  # User cancelled
+    # Get column headers
+    columns = treeview['columns']
+    if hasattr(treeview, 'iter_rows'):
+        # Virtualized tables hold only the visible rows as items; read their row source
+        rows = list(treeview.iter_rows())
+    else:
+        # Tk items can only be read on this thread; the file is written in the background
+        rows = [treeview.item(row_id)['values'] for row_id in treeview.get_children()]
+    job = ExportJob(file_path, columns, lambda cursor: rows, total_rows=len(rows), uses_db=False).start()
+    ExportProgressDialog(parent_window or treeview.winfo_toplevel(), job)
+    return job
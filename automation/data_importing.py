@@ -1,4 +1,6 @@
 import csv
+import itertools
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from datetime import datetime
@@ -9,12 +11,207 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, parent_dir)
 
 from core.database import get_db, close_db
-from core import customers
+from core import customers, inventory, suppliers
+
+IMPORT_BATCH_SIZE = 1000  # rows per multi-row INSERT and commit
+PREVIEW_ROWS = 5  # sample rows shown in the preview dialogs
+PREVIEW_VALIDATE_ROWS = 1000  # rows read and validated up front for the preview
+COUNT_POLL_MS = 200
 
 class DataImportError(Exception):
     """Custom exception for data import errors"""
     pass
 
+# ============================================================================
+# STREAMING PIPELINE
+# ============================================================================
+# An import reads its file once: CsvImportSource parses the header and the
+# first PREVIEW_VALIDATE_ROWS rows for the preview, then rows() continues the
+# same parse for the import. Rows flow through generator stages (parse ->
+# check/convert -> batch insert), so only the preview head and one insert
+# batch are held in memory, whatever the size of the file.
+
+def iter_data_rows(reader):
+    # Non-empty data rows as (row_num, row), numbered like the file (the header is row 1)
+    for row_num, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row if cell):
+            continue
+        yield row_num, row
+
+def _open_csv(file_path, sniff=False):
+    csvfile = open(file_path, 'r', newline='', encoding='utf-8-sig')
+    dialect = csv.excel
+    if sniff:
+        try:
+            # Try to detect CSV dialect
+            sample = csvfile.read(1024)
+            csvfile.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample)
+            except csv.Error:
+                # Use default dialect if detection fails
+                dialect = csv.excel
+        except BaseException:
+            csvfile.close()
+            raise
+    return csvfile, csv.reader(csvfile, dialect)
+
+def count_data_rows(file_path, sniff=False):
+    """Number of non-empty data rows in a CSV file, counted in constant memory"""
+    csvfile, reader = _open_csv(file_path, sniff)
+    with csvfile:
+        next(reader, None)  # header
+        return sum(1 for _ in iter_data_rows(reader))
+
+class CsvImportSource:
+    """
+    One streaming parse of an import file. Opening it reads the header and
+    the first head_rows data rows (the preview validates and samples
+    those); rows() then yields the same head followed by the rest of the
+    file, so the import continues the parse instead of reading the file
+    again. Rows can be read once.
+    """
+    
+    def __init__(self, file_path, sniff=False, head_rows=PREVIEW_VALIDATE_ROWS):
+        self.file_path = file_path
+        self.sniff = sniff
+        self._file, reader = _open_csv(file_path, sniff)
+        try:
+            self.header = next(reader, None)
+            self._rows = iter_data_rows(reader)
+            self.head = list(itertools.islice(self._rows, head_rows))
+        except BaseException:
+            self._file.close()
+            raise
+        # Fewer rows than asked for means the head is the whole file
+        self.complete = len(self.head) < head_rows
+        self.consumed = False
+    
+    def rows(self):
+        """Every data row as (row_num, row): the head, then the rest of the file"""
+        if self.consumed:
+            raise DataImportError(f"Rows of {self.file_path} have already been read")
+        self.consumed = True
+        return itertools.chain(self.head, self._rows)
+    
+    def count_remaining(self):
+        # Counts (and uses up) the rows after the head
+        self.consumed = True
+        return sum(1 for _ in self._rows)
+    
+    def close(self):
+        self.consumed = True
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _preview_csv(file_path, validate_head, read_error, sniff=False):
+    """
+    Open file_path as a CsvImportSource and validate its header and head.
+    Returns (source, is_valid, errors, row_count, sample_data); source is
+    None when the file cannot be read, and row_count only covers the head
+    unless source.complete.
+    """
+    try:
+        source = CsvImportSource(file_path, sniff=sniff)
+    except Exception as e:
+        return None, False, [read_error(e)], 0, []
+    return (source,) + validate_head(source)
+
+def _validate_csv_file(file_path, validate_head, read_error, sniff=False):
+    # Preview validation plus a count of the remaining rows: (is_valid, errors, row_count, sample_data)
+    source, is_valid, errors, row_count, sample_data = _preview_csv(file_path, validate_head, read_error, sniff)
+    if source is None:
+        return is_valid, errors, row_count, sample_data
+    try:
+        with source:
+            row_count += source.count_remaining()
+    except Exception as e:
+        return False, errors + [read_error(e)], 0, []
+    return is_valid, errors, row_count, sample_data
+
+def _open_for_import(file_path, source, preview, validate_head, parent_window):
+    """
+    Source and head validation for an import. Returns the source to read,
+    or (None, errors) when the import should not go ahead: the file is
+    invalid or the user declined the validation warnings.
+    """
+    if source is None:
+        source, is_valid, validation_errors, total_rows, _ = preview(file_path)
+    else:
+        # Continuing a preview's parse: its head is already in memory
+        is_valid, validation_errors, total_rows, _ = validate_head(source)
+    
+    if not is_valid:
+        if source is not None:
+            source.close()
+        error_msg = "CSV validation failed:\n" + "\n".join(validation_errors)
+        if parent_window:
+            messagebox.showerror("Import Failed", error_msg, parent=parent_window)
+        return None, validation_errors
+    
+    # Show preview and confirmation
+    if validation_errors:  # Show warnings
+        rows_found = total_rows if source.complete else f"{total_rows}+"
+        warning_msg = "Validation warnings found:\n" + "\n".join(validation_errors)
+        warning_msg += f"\n\nProceed with import? ({rows_found} rows found)"
+        if parent_window:
+            if not messagebox.askyesno("Import Warning", warning_msg, parent=parent_window):
+                source.close()
+                return None, ["Import cancelled by user"]
+    return source, []
+
+def _match_key(value):
+    # Duplicate checks compare like the database's case-insensitive collation does
+    return str(value or '').rstrip().lower()
+
+def _insert_batch(connection, cursor, batch, insert_many, insert_one, errors):
+    """
+    Insert a batch of (row_num, values) pairs with one multi-row INSERT.
+    If the database rejects the batch, its rows are inserted one at a time
+    instead, so each failing row still gets its own "Row N: Error" entry.
+    Returns the number of rows inserted.
+    """
+    if not batch:
+        return 0
+    try:
+        return insert_many(connection, cursor, [values for _, values in batch])
+    except Exception:
+        inserted = 0
+        for row_num, values in batch:
+            try:
+                insert_one(connection, cursor, *values)
+                inserted += 1
+            except Exception as e:
+                errors.append(f"Row {row_num}: Error - {str(e)}")
+        return inserted
+
+def _insert_batches(connection, cursor, records, batch_size, insert_many, insert_one, errors):
+    """
+    Last pipeline stage: inserts (row_num, values) records batch_size at a
+    time, one commit per batch. Returns the number of rows inserted.
+    """
+    inserted = 0
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            inserted += _insert_batch(connection, cursor, batch, insert_many, insert_one, errors)
+            batch.clear()
+    inserted += _insert_batch(connection, cursor, batch, insert_many, insert_one, errors)
+    return inserted
+
+def _read_error(e):
+    return f"Error reading file: {str(e)}"
+
+# ============================================================================
+# CUSTOMER IMPORT FUNCTIONALITY
+# ============================================================================
+
 def validate_customer_row(row, row_number):
     """
     Validate a single customer row from CSV data.
@@ -45,166 +242,127 @@ def validate_customer_row(row, row_number):
     
     return errors
 
-def validate_csv_structure(file_path):
+def _customer_read_error(e):
+    if isinstance(e, UnicodeDecodeError):
+        return "File encoding error. Please ensure the CSV file is saved in UTF-8 format."
+    return f"Error reading CSV file: {str(e)}"
+
+def _validate_customer_head(source):
     """
-    Validate the CSV file structure and content before importing.
+    Validate the header and the first rows of a customer CSV.
     Returns (is_valid, errors, row_count, sample_data)
     """
     errors = []
-    row_count = 0
     sample_data = []
     
-    try:
-        with open(file_path, 'r', newline='', encoding='utf-8-sig') as csvfile:
-            # Try to detect CSV dialect
-            sample = csvfile.read(1024)
-            csvfile.seek(0)
-            sniffer = csv.Sniffer()
-            
-            try:
-                dialect = sniffer.sniff(sample)
-            except csv.Error:
-                # Use default dialect if detection fails
-                dialect = csv.excel
-            
-            reader = csv.reader(csvfile, dialect)
-            
-            # Read header row
-            try:
-                header = next(reader)
-                row_count += 1
-                
-                # Validate header
-                expected_headers = ['name', 'contact_info', 'address']
-                if len(header) < 3:
-                    errors.append("CSV must have at least 3 columns: name, contact_info, address")
-                    return False, errors, 0, []
-                
-                # Check if header looks reasonable (optional validation)
-                header_lower = [h.lower().strip() for h in header[:3]]
-                if not any('name' in h for h in header_lower):
-                    errors.append("Warning: First column should be 'name' but header doesn't contain 'name'")
-                
-            except StopIteration:
-                errors.append("CSV file is empty")
-                return False, errors, 0, []
-            
-            # Validate data rows
-            for row in reader:
-                row_count += 1
-                if row_count > 1000:  # Limit validation to first 1000 rows for performance
-                    break
-                
-                # Skip empty rows
-                if not any(cell.strip() for cell in row if cell):
-                    continue
-                
-                # Validate this row
-                row_errors = validate_customer_row(row, row_count)
-                errors.extend(row_errors)
-                
-                # Collect sample data (first 5 valid rows)
-                if len(sample_data) < 5 and not row_errors:
-                    sample_data.append({
-                        'name': row[0].strip(),
-                        'contact_info': row[1].strip() if len(row) > 1 else '',
-                        'address': row[2].strip() if len(row) > 2 else ''
-                    })
-    
-    except UnicodeDecodeError:
-        errors.append("File encoding error. Please ensure the CSV file is saved in UTF-8 format.")
+    # Validate header
+    header = source.header
+    if header is None:
+        errors.append("CSV file is empty")
         return False, errors, 0, []
-    except Exception as e:
-        errors.append(f"Error reading CSV file: {str(e)}")
+    
+    if len(header) < 3:
+        errors.append("CSV must have at least 3 columns: name, contact_info, address")
         return False, errors, 0, []
     
+    # Check if header looks reasonable (optional validation)
+    header_lower = [h.lower().strip() for h in header[:3]]
+    if not any('name' in h for h in header_lower):
+        errors.append("Warning: First column should be 'name' but header doesn't contain 'name'")
+    
+    # Validate data rows
+    for row_num, row in source.head:
+        row_errors = validate_customer_row(row, row_num)
+        errors.extend(row_errors)
+        
+        # Collect sample data (first valid rows)
+        if len(sample_data) < PREVIEW_ROWS and not row_errors:
+            sample_data.append({
+                'name': row[0].strip(),
+                'contact_info': row[1].strip() if len(row) > 1 else '',
+                'address': row[2].strip() if len(row) > 2 else ''
+            })
+    
     # Determine if validation passed
     is_valid = len(errors) == 0 or all('Warning:' in error for error in errors)
     
-    return is_valid, errors, row_count - 1, sample_data  # -1 to exclude header row
+    return is_valid, errors, len(source.head), sample_data
+
+def preview_customer_csv(file_path):
+    """
+    Open a customer CSV for import, validating its header and first
+    PREVIEW_VALIDATE_ROWS rows.
+    Returns (source, is_valid, errors, row_count, sample_data)
+    """
+    return _preview_csv(file_path, _validate_customer_head, _customer_read_error, sniff=True)
+
+def validate_csv_structure(file_path):
+    """
+    Validate the CSV file structure and content before importing.
+    The header and the first PREVIEW_VALIDATE_ROWS rows are validated; the
+    rest of the file is only counted.
+    Returns (is_valid, errors, row_count, sample_data)
+    """
+    return _validate_csv_file(file_path, _validate_customer_head, _customer_read_error, sniff=True)
+
+def _customer_records(rows, existing, skip_duplicates, errors):
+    """
+    Pipeline stage: yields (row_num, (name, contact_info, address)) for rows
+    to insert. Skipped rows are reported in errors.
+    """
+    for row_num, row in rows:
+        # Extract data
+        name = row[0].strip() if len(row) > 0 else ''
+        contact_info = row[1].strip() if len(row) > 1 else ''
+        address = row[2].strip() if len(row) > 2 else ''
+        
+        if not name:
+            errors.append(f"Row {row_num}: Skipped - Name is required")
+            continue
+        
+        # Check for duplicates if skip_duplicates is True
+        key = (_match_key(name), _match_key(contact_info))
+        if skip_duplicates and key in existing:
+            errors.append(f"Row {row_num}: Skipped - Duplicate customer (name: {name}, contact: {contact_info})")
+            continue
+        existing.add(key)
+        
+        yield row_num, (name, contact_info, address)
 
-def import_customers_from_csv(file_path, parent_window=None, skip_duplicates=True):
+def import_customers_from_csv(file_path, parent_window=None, skip_duplicates=True, batch_size=IMPORT_BATCH_SIZE, source=None):
     """
-    Import customers from CSV file into the database.
+    Import customers from CSV file into the database in one streaming pass,
+    batch_size rows per INSERT and commit. Pass the source returned by
+    preview_customer_csv to continue its parse instead of reading the file
+    again.
     Returns (success_count, error_count, errors)
     """
     success_count = 0
-    error_count = 0
     errors = []
     
     try:
-        # First validate the file
-        is_valid, validation_errors, total_rows, sample_data = validate_csv_structure(file_path)
-        
-        if not is_valid:
-            error_msg = "CSV validation failed:\n" + "\n".join(validation_errors)
-            if parent_window:
-                messagebox.showerror("Import Failed", error_msg, parent=parent_window)
-            return 0, 0, validation_errors
-        
-        # Show preview and confirmation
-        if validation_errors:  # Show warnings
-            warning_msg = "Validation warnings found:\n" + "\n".join(validation_errors)
-            warning_msg += f"\n\nProceed with import? ({total_rows} rows found)"
-            if parent_window:
-                if not messagebox.askyesno("Import Warning", warning_msg, parent=parent_window):
-                    return 0, 0, ["Import cancelled by user"]
-        
-        # Get database connection
-        connection, cursor = get_db()
+        source, rejected = _open_for_import(file_path, source, preview_customer_csv, _validate_customer_head, parent_window)
+        if source is None:
+            return 0, 0, rejected
         
-        try:
-            with open(file_path, 'r', newline='', encoding='utf-8-sig') as csvfile:
-                reader = csv.reader(csvfile)
-                
-                # Skip header row
-                next(reader)
-                
-                # Import each row
-                for row_num, row in enumerate(reader, start=2):  # Start at 2 since we skipped header
-                    # Skip empty rows
-                    if not any(cell.strip() for cell in row if cell):
-                        continue
-                    
-                    try:
-                        # Extract data
-                        name = row[0].strip() if len(row) > 0 else ''
-                        contact_info = row[1].strip() if len(row) > 1 else ''
-                        address = row[2].strip() if len(row) > 2 else ''
-                        
-                        if not name:
-                            errors.append(f"Row {row_num}: Skipped - Name is required")
-                            error_count += 1
-                            continue
-                        
-                        # Check for duplicates if skip_duplicates is True
-                        if skip_duplicates:
-                            cursor.execute(
-                                "SELECT customer_id FROM Customers WHERE name = %s AND contact_info = %s",
-                                (name, contact_info)
-                            )
-                            if cursor.fetchone():
-                                errors.append(f"Row {row_num}: Skipped - Duplicate customer (name: {name}, contact: {contact_info})")
-                                error_count += 1
-                                continue
-                        
-                        # Add customer to database
-                        customers.add_customer(connection, cursor, name, contact_info, address)
-                        success_count += 1
-                        
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: Error - {str(e)}")
-                        error_count += 1
-                        continue
-        
-        finally:
-            close_db(connection, cursor)
+        with source:
+            # Get database connection
+            connection, cursor = get_db()
+            
+            try:
+                # Existing customers are loaded once, so duplicates are checked without a query per row
+                existing = {(_match_key(name), _match_key(contact)) for name, contact in customers.get_customer_keys(cursor)}
+                records = _customer_records(source.rows(), existing, skip_duplicates, errors)
+                success_count = _insert_batches(connection, cursor, records, batch_size,
+                                                customers.add_customers_bulk, customers.add_customer, errors)
+            finally:
+                close_db(connection, cursor)
     
     except Exception as e:
         errors.append(f"Import failed: {str(e)}")
-        error_count += 1
     
-    return success_count, error_count, errors
+    # Every skipped or failed row has exactly one entry in errors
+    return success_count, len(errors), errors
 
 def show_import_dialog(parent_window=None, refresh_callback=None):
     """
@@ -235,15 +393,63 @@ class ImportPreviewDialog:
     Dialog to preview CSV data before importing.
     """
     
+    # Subclasses point this at their own preview function
+    preview = staticmethod(preview_customer_csv)
+    
     def __init__(self, parent_window, file_path, refresh_callback=None):
         self.parent_window = parent_window
         self.file_path = file_path
         self.refresh_callback = refresh_callback
+        self.total_rows = None
         
-        # Validate file first
-        self.is_valid, self.errors, self.row_count, self.sample_data = validate_csv_structure(file_path)
+        # Validate the header and first rows; the import continues this same parse
+        self.source, self.is_valid, self.errors, self.row_count, self.sample_data = self.preview(file_path)
         
         self.create_dialog()
+        self.dialog.bind("<Destroy>", self._on_destroy, add="+")
+        self._start_row_count()
+    
+    def _row_count_text(self):
+        if self.source is None or self.source.complete:
+            return f"Rows to import: {self.row_count}"
+        if self.total_rows is None:
+            return f"Rows to import: {self.row_count}+ (counting...)"
+        return f"Rows to import: {self.total_rows}"
+    
+    def _start_row_count(self):
+        # Large files are counted on a background thread while the preview is shown
+        if self.source is None or self.source.complete:
+            return
+        
+        def count():
+            try:
+                self.total_rows = count_data_rows(self.file_path, self.source.sniff)
+            except Exception:
+                pass  # the label keeps showing the rows read so far
+            finally:
+                self._count_done = True
+        
+        self._count_done = False
+        threading.Thread(target=count, name="csv-row-count", daemon=True).start()
+        self.dialog.after(COUNT_POLL_MS, self._poll_row_count)
+    
+    def _poll_row_count(self):
+        if not self.dialog.winfo_exists():
+            return
+        if not self._count_done:
+            self.dialog.after(COUNT_POLL_MS, self._poll_row_count)
+            return
+        if self.total_rows is not None:
+            self.row_count_label.configure(text=self._row_count_text())
+    
+    def _take_source(self):
+        # The preview's parse feeds one import; a retry after a failed import reads the file again
+        source, self.source = self.source, None
+        return source
+    
+    def _on_destroy(self, event):
+        if event.widget is self.dialog and self.source is not None:
+            self.source.close()
     
     def create_dialog(self):
         """Create the preview dialog window."""
@@ -284,7 +490,8 @@ class ImportPreviewDialog:
         info_frame.pack(fill=tk.X, pady=(0, 10))
         
         tk.Label(info_frame, text=f"File: {self.file_path.split('/')[-1]}", font=("TkDefaultFont", 10)).pack(anchor=tk.W)
-        tk.Label(info_frame, text=f"Rows to import: {self.row_count}", font=("TkDefaultFont", 10)).pack(anchor=tk.W)
+        self.row_count_label = tk.Label(info_frame, text=self._row_count_text(), font=("TkDefaultFont", 10))
+        self.row_count_label.pack(anchor=tk.W)
         
         # Validation status
         status_frame = tk.Frame(main_frame)
@@ -314,7 +521,7 @@ class ImportPreviewDialog:
         
         # Sample data preview
         if self.sample_data:
-            preview_frame = tk.LabelFrame(main_frame, text="Sample Data (First 5 rows)")
+            preview_frame = tk.LabelFrame(main_frame, text=f"Sample Data (First {PREVIEW_ROWS} rows)")
             preview_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
             
             # Create treeview for sample data
@@ -363,7 +570,8 @@ class ImportPreviewDialog:
             success_count, error_count, errors = import_customers_from_csv(
                 self.file_path, 
                 self.parent_window, 
-                self.skip_duplicates_var.get()
+                self.skip_duplicates_var.get(),
+                source=self._take_source()
             )
             
             self.dialog.configure(cursor="")
@@ -477,169 +685,160 @@ def validate_inventory_row(row, row_number):
     
     return errors
 
-def validate_inventory_csv_structure(file_path):
+def _validate_inventory_head(source):
     """
-    Validate the inventory CSV file structure and content before importing.
+    Validate the header and the first rows of an inventory CSV.
     Returns (is_valid, errors, row_count, sample_data)
     """
     errors = []
-    row_count = 0
     sample_data = []
     
-    try:
-        with open(file_path, 'r', newline='', encoding='utf-8-sig') as csvfile:
-            reader = csv.reader(csvfile)
-            
-            # Check header row
-            try:
-                header = next(reader)
-                expected_headers = ['sku', 'name', 'category_id', 'price', 'stock', 'supplier_id', 'cost']
-                
-                if len(header) < len(expected_headers):
-                    errors.append(f"Missing columns. Expected: {', '.join(expected_headers)}")
-                    return False, errors, 0, []
-                
-                # Check if headers match (case insensitive)
-                # Strip BOM and whitespace from headers
-                header_clean = [h.strip().lower().replace('\ufeff', '') for h in header[:len(expected_headers)]]
-                if header_clean != expected_headers:
-                    errors.append(f"Header mismatch. Expected: {', '.join(expected_headers)}, Found: {', '.join(header[:len(expected_headers)])}")
-            
-            except StopIteration:
-                errors.append("File is empty or has no header row")
-                return False, errors, 0, []
-            
-            # Validate data rows
-            for row_num, row in enumerate(reader, start=2):
-                # Skip empty rows
-                if not any(cell.strip() for cell in row if cell):
-                    continue
-                
-                row_count += 1
-                
-                # Validate row structure
-                row_errors = validate_inventory_row(row, row_num)
-                if row_errors:
-                    errors.extend(row_errors)
-                
-                # Store sample data (first 5 valid rows)
-                if len(sample_data) < 5 and not row_errors:
-                    sample_data.append({
-                        'sku': row[0].strip() if len(row) > 0 else '',
-                        'name': row[1].strip() if len(row) > 1 else '',
-                        'category_id': row[2].strip() if len(row) > 2 else '',
-                        'price': row[3].strip() if len(row) > 3 else '',
-                        'stock': row[4].strip() if len(row) > 4 else '',
-                        'supplier_id': row[5].strip() if len(row) > 5 else '',
-                        'cost': row[6].strip() if len(row) > 6 else '0.00'
-                    })
+    # Check header row
+    header = source.header
+    if header is None:
+        errors.append("File is empty or has no header row")
+        return False, errors, 0, []
     
-    except Exception as e:
-        errors.append(f"Error reading file: {str(e)}")
+    expected_headers = ['sku', 'name', 'category_id', 'price', 'stock', 'supplier_id', 'cost']
+    if len(header) < len(expected_headers):
+        errors.append(f"Missing columns. Expected: {', '.join(expected_headers)}")
         return False, errors, 0, []
     
+    # Check if headers match (case insensitive)
+    # Strip BOM and whitespace from headers
+    header_clean = [h.strip().lower().replace('\ufeff', '') for h in header[:len(expected_headers)]]
+    if header_clean != expected_headers:
+        errors.append(f"Header mismatch. Expected: {', '.join(expected_headers)}, Found: {', '.join(header[:len(expected_headers)])}")
+    
+    # Validate data rows
+    for row_num, row in source.head:
+        # Validate row structure
+        row_errors = validate_inventory_row(row, row_num)
+        if row_errors:
+            errors.extend(row_errors)
+        
+        # Store sample data (first valid rows)
+        if len(sample_data) < PREVIEW_ROWS and not row_errors:
+            sample_data.append({
+                'sku': row[0].strip() if len(row) > 0 else '',
+                'name': row[1].strip() if len(row) > 1 else '',
+                'category_id': row[2].strip() if len(row) > 2 else '',
+                'price': row[3].strip() if len(row) > 3 else '',
+                'stock': row[4].strip() if len(row) > 4 else '',
+                'supplier_id': row[5].strip() if len(row) > 5 else '',
+                'cost': row[6].strip() if len(row) > 6 else '0.00'
+            })
+    
     # Determine if file is valid (no critical errors)
     critical_errors = [e for e in errors if "Error reading file" in e or "Missing columns" in e or "Header mismatch" in e]
-    is_valid = len(critical_errors) == 0 and row_count > 0
+    is_valid = len(critical_errors) == 0 and len(source.head) > 0
     
-    return is_valid, errors, row_count, sample_data
+    return is_valid, errors, len(source.head), sample_data
 
-def import_inventory_from_csv(file_path, parent_window=None, skip_duplicates=True):
+def preview_inventory_csv(file_path):
     """
-    Import inventory items from CSV file into the database.
+    Open an inventory CSV for import, validating its header and first
+    PREVIEW_VALIDATE_ROWS rows.
+    Returns (source, is_valid, errors, row_count, sample_data)
+    """
+    return _preview_csv(file_path, _validate_inventory_head, _read_error)
+
+def validate_inventory_csv_structure(file_path):
+    """
+    Validate the inventory CSV file structure and content before importing.
+    The header and the first PREVIEW_VALIDATE_ROWS rows are validated; the
+    rest of the file is only counted.
+    Returns (is_valid, errors, row_count, sample_data)
+    """
+    return _validate_csv_file(file_path, _validate_inventory_head, _read_error)
+
+def _inventory_records(rows, existing_skus, category_ids, supplier_ids, skip_duplicates, errors):
+    """
+    Pipeline stage: yields (row_num, product values) for rows to insert,
+    checked like inventory.add_item checks them (with the same messages)
+    against the preloaded keys. Skipped and rejected rows are reported in
+    errors.
+    """
+    for row_num, row in rows:
+        try:
+            # Extract data
+            sku = row[0].strip() if len(row) > 0 else ''
+            name = row[1].strip() if len(row) > 1 else ''
+            category_id = row[2].strip() if len(row) > 2 else ''
+            price = row[3].strip() if len(row) > 3 else ''
+            stock = row[4].strip() if len(row) > 4 else ''
+            supplier_id = row[5].strip() if len(row) > 5 else ''
+            cost = row[6].strip() if len(row) > 6 else '0.00'
+            
+            if not all([sku, name, category_id, price, stock]):
+                errors.append(f"Row {row_num}: Skipped - Required fields are missing")
+                continue
+            
+            # Convert values to appropriate types
+            try:
+                category_id_val = int(category_id)
+                price_val = float(price)
+                stock_val = int(stock)
+                supplier_id_val = int(supplier_id) if supplier_id else None
+                cost_val = float(cost) if cost else 0.00
+            except ValueError as ve:
+                errors.append(f"Row {row_num}: Invalid data format - {str(ve)}")
+                continue
+            
+            # Check for duplicates if skip_duplicates is True
+            if skip_duplicates and _match_key(sku) in existing_skus:
+                errors.append(f"Row {row_num}: Skipped - Duplicate SKU ({sku})")
+                continue
+            
+            if price_val <= 0 or stock_val < 0:
+                raise ValueError("Error adding item: Price must be greater than 0 and stock cannot be negative.")
+            if category_id_val not in category_ids:
+                raise ValueError(f"Error adding item: Category with ID '{category_id_val}' does not exist.")
+            if supplier_id_val and supplier_id_val not in supplier_ids:
+                raise ValueError(f"Error adding item: Supplier with ID '{supplier_id_val}' does not exist.")
+            existing_skus.add(_match_key(sku))
+        
+        except Exception as e:
+            errors.append(f"Row {row_num}: Error - {str(e)}")
+            continue
+        
+        yield row_num, (sku, name, category_id_val, price_val, stock_val, supplier_id_val, cost_val)
+
+def import_inventory_from_csv(file_path, parent_window=None, skip_duplicates=True, batch_size=IMPORT_BATCH_SIZE, source=None):
+    """
+    Import inventory items from CSV file into the database in one streaming
+    pass, batch_size rows per INSERT and commit. Pass the source returned by
+    preview_inventory_csv to continue its parse instead of reading the file
+    again.
     Returns (success_count, error_count, errors)
     """
     success_count = 0
-    error_count = 0
     errors = []
     
     try:
-        # First validate the file
-        is_valid, validation_errors, total_rows, sample_data = validate_inventory_csv_structure(file_path)
-        
-        if not is_valid:
-            error_msg = "CSV validation failed:\n" + "\n".join(validation_errors)
-            if parent_window:
-                messagebox.showerror("Import Failed", error_msg, parent=parent_window)
-            return 0, 0, validation_errors
-        
-        # Show preview and confirmation
-        if validation_errors:  # Show warnings
-            warning_msg = "Validation warnings found:\n" + "\n".join(validation_errors)
-            warning_msg += f"\n\nProceed with import? ({total_rows} rows found)"
-            if parent_window:
-                if not messagebox.askyesno("Import Warning", warning_msg, parent=parent_window):
-                    return 0, 0, ["Import cancelled by user"]
-        
-        # Get database connection
-        connection, cursor = get_db()
+        source, rejected = _open_for_import(file_path, source, preview_inventory_csv, _validate_inventory_head, parent_window)
+        if source is None:
+            return 0, 0, rejected
         
-        try:
-            with open(file_path, 'r', newline='', encoding='utf-8-sig') as csvfile:
-                reader = csv.reader(csvfile)
-                
-                # Skip header row
-                next(reader)
-                
-                # Import each row
-                for row_num, row in enumerate(reader, start=2):
-                    # Skip empty rows
-                    if not any(cell.strip() for cell in row if cell):
-                        continue
-                    
-                    try:
-                        # Extract data
-                        sku = row[0].strip() if len(row) > 0 else ''
-                        name = row[1].strip() if len(row) > 1 else ''
-                        category_id = row[2].strip() if len(row) > 2 else ''
-                        price = row[3].strip() if len(row) > 3 else ''
-                        stock = row[4].strip() if len(row) > 4 else ''
-                        supplier_id = row[5].strip() if len(row) > 5 else ''
-                        cost = row[6].strip() if len(row) > 6 else '0.00'
-                        
-                        if not all([sku, name, category_id, price, stock]):
-                            errors.append(f"Row {row_num}: Skipped - Required fields are missing")
-                            error_count += 1
-                            continue
-                        
-                        # Convert values to appropriate types
-                        try:
-                            category_id_val = int(category_id)
-                            price_val = float(price)
-                            stock_val = int(stock)
-                            supplier_id_val = int(supplier_id) if supplier_id else None
-                            cost_val = float(cost) if cost else 0.00
-                        except ValueError as ve:
-                            errors.append(f"Row {row_num}: Invalid data format - {str(ve)}")
-                            error_count += 1
-                            continue
-                        
-                        # Check for duplicates if skip_duplicates is True
-                        if skip_duplicates:
-                            cursor.execute("SELECT SKU FROM Products WHERE SKU = %s", (sku,))
-                            if cursor.fetchone():
-                                errors.append(f"Row {row_num}: Skipped - Duplicate SKU ({sku})")
-                                error_count += 1
-                                continue
-                        
-                        # Add item to database using inventory module
-                        from core import inventory
-                        inventory.add_item(connection, cursor, sku, name, category_id_val, price_val, stock_val, supplier_id_val, cost_val)
-                        success_count += 1
-                        
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: Error - {str(e)}")
-                        error_count += 1
-                        continue
-        
-        finally:
-            close_db(connection, cursor)
+        with source:
+            # Get database connection
+            connection, cursor = get_db()
+            
+            try:
+                # Keys are loaded once, so rows are checked against sets instead of a query each
+                existing_skus, category_ids, supplier_ids = inventory.get_import_keys(cursor)
+                existing_skus = {_match_key(existing_sku) for existing_sku in existing_skus}
+                records = _inventory_records(source.rows(), existing_skus, category_ids, supplier_ids, skip_duplicates, errors)
+                success_count = _insert_batches(connection, cursor, records, batch_size,
+                                                inventory.add_items_bulk, inventory.add_item, errors)
+            finally:
+                close_db(connection, cursor)
     
     except Exception as e:
         errors.append(f"Import failed: {str(e)}")
-        error_count += 1
     
-    return success_count, error_count, errors
+    # Every skipped or failed row has exactly one entry in errors
+    return success_count, len(errors), errors
 
 # ============================================================================
 # SUPPLIER IMPORT FUNCTIONALITY
@@ -675,149 +874,130 @@ def validate_supplier_row(row, row_number):
     
     return errors
 
-def validate_supplier_csv_structure(file_path):
+def _validate_supplier_head(source):
     """
-    Validate the supplier CSV file structure and content before importing.
+    Validate the header and the first rows of a supplier CSV.
     Returns (is_valid, errors, row_count, sample_data)
     """
     errors = []
-    row_count = 0
     sample_data = []
     
-    try:
-        with open(file_path, 'r', newline='', encoding='utf-8-sig') as csvfile:
-            reader = csv.reader(csvfile)
-            
-            # Check header row
-            try:
-                header = next(reader)
-                expected_headers = ['name', 'contact_info', 'address']
-                
-                if len(header) < len(expected_headers):
-                    errors.append(f"Missing columns. Expected: {', '.join(expected_headers)}")
-                    return False, errors, 0, []
-                
-                # Check if headers match (case insensitive)
-                # Strip BOM and whitespace from headers
-                header_clean = [h.strip().lower().replace('\ufeff', '') for h in header[:len(expected_headers)]]
-                if header_clean != expected_headers:
-                    errors.append(f"Header mismatch. Expected: {', '.join(expected_headers)}, Found: {', '.join(header[:len(expected_headers)])}")
-            
-            except StopIteration:
-                errors.append("File is empty or has no header row")
-                return False, errors, 0, []
-            
-            # Validate data rows
-            for row_num, row in enumerate(reader, start=2):
-                # Skip empty rows
-                if not any(cell.strip() for cell in row if cell):
-                    continue
-                
-                row_count += 1
-                
-                # Validate row structure
-                row_errors = validate_supplier_row(row, row_num)
-                if row_errors:
-                    errors.extend(row_errors)
-                
-                # Store sample data (first 5 valid rows)
-                if len(sample_data) < 5 and not row_errors:
-                    sample_data.append({
-                        'name': row[0].strip() if len(row) > 0 else '',
-                        'contact_info': row[1].strip() if len(row) > 1 else '',
-                        'address': row[2].strip() if len(row) > 2 else ''
-                    })
+    # Check header row
+    header = source.header
+    if header is None:
+        errors.append("File is empty or has no header row")
+        return False, errors, 0, []
     
-    except Exception as e:
-        errors.append(f"Error reading file: {str(e)}")
+    expected_headers = ['name', 'contact_info', 'address']
+    if len(header) < len(expected_headers):
+        errors.append(f"Missing columns. Expected: {', '.join(expected_headers)}")
         return False, errors, 0, []
     
+    # Check if headers match (case insensitive)
+    # Strip BOM and whitespace from headers
+    header_clean = [h.strip().lower().replace('\ufeff', '') for h in header[:len(expected_headers)]]
+    if header_clean != expected_headers:
+        errors.append(f"Header mismatch. Expected: {', '.join(expected_headers)}, Found: {', '.join(header[:len(expected_headers)])}")
+    
+    # Validate data rows
+    for row_num, row in source.head:
+        # Validate row structure
+        row_errors = validate_supplier_row(row, row_num)
+        if row_errors:
+            errors.extend(row_errors)
+        
+        # Store sample data (first valid rows)
+        if len(sample_data) < PREVIEW_ROWS and not row_errors:
+            sample_data.append({
+                'name': row[0].strip() if len(row) > 0 else '',
+                'contact_info': row[1].strip() if len(row) > 1 else '',
+                'address': row[2].strip() if len(row) > 2 else ''
+            })
+    
     # Determine if file is valid (no critical errors)
     critical_errors = [e for e in errors if "Error reading file" in e or "Missing columns" in e or "Header mismatch" in e]
-    is_valid = len(critical_errors) == 0 and row_count > 0
+    is_valid = len(critical_errors) == 0 and len(source.head) > 0
     
-    return is_valid, errors, row_count, sample_data
+    return is_valid, errors, len(source.head), sample_data
+
+def preview_supplier_csv(file_path):
+    """
+    Open a supplier CSV for import, validating its header and first
+    PREVIEW_VALIDATE_ROWS rows.
+    Returns (source, is_valid, errors, row_count, sample_data)
+    """
+    return _preview_csv(file_path, _validate_supplier_head, _read_error)
+
+def validate_supplier_csv_structure(file_path):
+    """
+    Validate the supplier CSV file structure and content before importing.
+    The header and the first PREVIEW_VALIDATE_ROWS rows are validated; the
+    rest of the file is only counted.
+    Returns (is_valid, errors, row_count, sample_data)
+    """
+    return _validate_csv_file(file_path, _validate_supplier_head, _read_error)
 
-def import_suppliers_from_csv(file_path, parent_window=None, skip_duplicates=True):
+def _supplier_records(rows, existing_names, skip_duplicates, errors):
     """
-    Import suppliers from CSV file into the database.
+    Pipeline stage: yields (row_num, (name, contact_info, address)) for rows
+    to insert. Skipped and rejected rows are reported in errors.
+    """
+    for row_num, row in rows:
+        # Extract data
+        name = row[0].strip() if len(row) > 0 else ''
+        contact_info = row[1].strip() if len(row) > 1 else ''
+        address = row[2].strip() if len(row) > 2 else ''
+        
+        if not name:
+            errors.append(f"Row {row_num}: Skipped - Name is required")
+            continue
+        
+        # Check for duplicates if skip_duplicates is True
+        if _match_key(name) in existing_names:
+            if skip_duplicates:
+                errors.append(f"Row {row_num}: Skipped - Duplicate supplier name ({name})")
+            else:
+                # suppliers.add_supplier refuses existing names too
+                errors.append(f"Row {row_num}: Error - Supplier with name '{name}' already exists.")
+            continue
+        existing_names.add(_match_key(name))
+        
+        yield row_num, (name, contact_info, address)
+
+def import_suppliers_from_csv(file_path, parent_window=None, skip_duplicates=True, batch_size=IMPORT_BATCH_SIZE, source=None):
+    """
+    Import suppliers from CSV file into the database in one streaming pass,
+    batch_size rows per INSERT and commit. Pass the source returned by
+    preview_supplier_csv to continue its parse instead of reading the file
+    again.
     Returns (success_count, error_count, errors)
     """
     success_count = 0
-    error_count = 0
     errors = []
     
     try:
-        # First validate the file
-        is_valid, validation_errors, total_rows, sample_data = validate_supplier_csv_structure(file_path)
-        
-        if not is_valid:
-            error_msg = "CSV validation failed:\n" + "\n".join(validation_errors)
-            if parent_window:
-                messagebox.showerror("Import Failed", error_msg, parent=parent_window)
-            return 0, 0, validation_errors
-        
-        # Show preview and confirmation
-        if validation_errors:  # Show warnings
-            warning_msg = "Validation warnings found:\n" + "\n".join(validation_errors)
-            warning_msg += f"\n\nProceed with import? ({total_rows} rows found)"
-            if parent_window:
-                if not messagebox.askyesno("Import Warning", warning_msg, parent=parent_window):
-                    return 0, 0, ["Import cancelled by user"]
-        
-        # Get database connection
-        connection, cursor = get_db()
+        source, rejected = _open_for_import(file_path, source, preview_supplier_csv, _validate_supplier_head, parent_window)
+        if source is None:
+            return 0, 0, rejected
         
-        try:
-            with open(file_path, 'r', newline='', encoding='utf-8-sig') as csvfile:
-                reader = csv.reader(csvfile)
-                
-                # Skip header row
-                next(reader)
-                
-                # Import each row
-                for row_num, row in enumerate(reader, start=2):
-                    # Skip empty rows
-                    if not any(cell.strip() for cell in row if cell):
-                        continue
-                    
-                    try:
-                        # Extract data
-                        name = row[0].strip() if len(row) > 0 else ''
-                        contact_info = row[1].strip() if len(row) > 1 else ''
-                        address = row[2].strip() if len(row) > 2 else ''
-                        
-                        if not name:
-                            errors.append(f"Row {row_num}: Skipped - Name is required")
-                            error_count += 1
-                            continue
-                        
-                        # Check for duplicates if skip_duplicates is True
-                        if skip_duplicates:
-                            cursor.execute("SELECT supplier_id FROM Suppliers WHERE name = %s", (name,))
-                            if cursor.fetchone():
-                                errors.append(f"Row {row_num}: Skipped - Duplicate supplier name ({name})")
-                                error_count += 1
-                                continue
-                        
-                        # Add supplier to database
-                        from core import suppliers
-                        suppliers.add_supplier(connection, cursor, name, contact_info, address)
-                        success_count += 1
-                        
-                    except Exception as e:
-                        errors.append(f"Row {row_num}: Error - {str(e)}")
-                        error_count += 1
-                        continue
-        
-        finally:
-            close_db(connection, cursor)
+        with source:
+            # Get database connection
+            connection, cursor = get_db()
+            
+            try:
+                # Existing names are loaded once, so duplicates are checked without a query per row
+                existing_names = {_match_key(existing_name) for existing_name in suppliers.get_supplier_names(cursor)}
+                records = _supplier_records(source.rows(), existing_names, skip_duplicates, errors)
+                success_count = _insert_batches(connection, cursor, records, batch_size,
+                                                suppliers.add_suppliers_bulk, suppliers.add_supplier, errors)
+            finally:
+                close_db(connection, cursor)
     
     except Exception as e:
         errors.append(f"Import failed: {str(e)}")
-        error_count += 1
     
-    return success_count, error_count, errors
+    # Every skipped or failed row has exactly one entry in errors
+    return success_count, len(errors), errors
 
 # ============================================================================
 # DIALOG WRAPPER FUNCTIONS
@@ -880,15 +1060,7 @@ class InventoryImportPreviewDialog(ImportPreviewDialog):
     Dialog to preview inventory CSV data before importing.
     """
     
-    def __init__(self, parent_window, file_path, refresh_callback=None):
-        self.parent_window = parent_window
-        self.file_path = file_path
-        self.refresh_callback = refresh_callback
-        
-        # Validate file first
-        self.is_valid, self.errors, self.row_count, self.sample_data = validate_inventory_csv_structure(file_path)
-        
-        self.create_dialog()
+    preview = staticmethod(preview_inventory_csv)
     
     def create_dialog(self):
         """Create the preview dialog window."""
@@ -911,7 +1083,8 @@ class InventoryImportPreviewDialog(ImportPreviewDialog):
         info_frame.pack(fill='x', padx=10, pady=5)
         
         tk.Label(info_frame, text=f"File: {self.file_path}", font=('Arial', 10, 'bold')).pack(anchor='w')
-        tk.Label(info_frame, text=f"Rows to import: {self.row_count}", font=('Arial', 10)).pack(anchor='w')
+        self.row_count_label = tk.Label(info_frame, text=self._row_count_text(), font=('Arial', 10))
+        self.row_count_label.pack(anchor='w')
         
         # Status
         status_frame = tk.Frame(self.dialog)
@@ -927,7 +1100,7 @@ class InventoryImportPreviewDialog(ImportPreviewDialog):
         tk.Label(status_frame, text=status_text, fg=status_color, font=('Arial', 10, 'bold')).pack(anchor='w')
         
         # Preview data
-        preview_frame = tk.LabelFrame(self.dialog, text="Data Preview (first 5 rows)", font=('Arial', 9, 'bold'))
+        preview_frame = tk.LabelFrame(self.dialog, text=f"Data Preview (first {PREVIEW_ROWS} rows)", font=('Arial', 9, 'bold'))
         preview_frame.pack(fill='both', expand=True, padx=10, pady=5)
         
         # Create treeview for preview
@@ -993,7 +1166,8 @@ class InventoryImportPreviewDialog(ImportPreviewDialog):
             success_count, error_count, errors = import_inventory_from_csv(
                 self.file_path, 
                 self.parent_window, 
-                self.skip_duplicates_var.get()
+                self.skip_duplicates_var.get(),
+                source=self._take_source()
             )
             
             self.dialog.configure(cursor="")
@@ -1030,15 +1204,7 @@ class SupplierImportPreviewDialog(ImportPreviewDialog):
     Dialog to preview supplier CSV data before importing.
     """
     
-    def __init__(self, parent_window, file_path, refresh_callback=None):
-        self.parent_window = parent_window
-        self.file_path = file_path
-        self.refresh_callback = refresh_callback
-        
-        # Validate file first
-        self.is_valid, self.errors, self.row_count, self.sample_data = validate_supplier_csv_structure(file_path)
-        
-        self.create_dialog()
+    preview = staticmethod(preview_supplier_csv)
     
     def create_dialog(self):
         """Create the preview dialog window."""
@@ -1061,7 +1227,8 @@ class SupplierImportPreviewDialog(ImportPreviewDialog):
         info_frame.pack(fill='x', padx=10, pady=5)
         
         tk.Label(info_frame, text=f"File: {self.file_path}", font=('Arial', 10, 'bold')).pack(anchor='w')
-        tk.Label(info_frame, text=f"Rows to import: {self.row_count}", font=('Arial', 10)).pack(anchor='w')
+        self.row_count_label = tk.Label(info_frame, text=self._row_count_text(), font=('Arial', 10))
+        self.row_count_label.pack(anchor='w')
         
         # Status
         status_frame = tk.Frame(self.dialog)
@@ -1077,7 +1244,7 @@ class SupplierImportPreviewDialog(ImportPreviewDialog):
         tk.Label(status_frame, text=status_text, fg=status_color, font=('Arial', 10, 'bold')).pack(anchor='w')
         
         # Preview data
-        preview_frame = tk.LabelFrame(self.dialog, text="Data Preview (first 5 rows)", font=('Arial', 9, 'bold'))
+        preview_frame = tk.LabelFrame(self.dialog, text=f"Data Preview (first {PREVIEW_ROWS} rows)", font=('Arial', 9, 'bold'))
         preview_frame.pack(fill='both', expand=True, padx=10, pady=5)
         
         # Create treeview for preview
@@ -1142,7 +1309,8 @@ class SupplierImportPreviewDialog(ImportPreviewDialog):
             success_count, error_count, errors = import_suppliers_from_csv(
                 self.file_path, 
                 self.parent_window, 
-                self.skip_duplicates_var.get()
+                self.skip_duplicates_var.get(),
+                source=self._take_source()
             )
             
             self.dialog.configure(cursor="")
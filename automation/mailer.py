@@ -0,0 +1,482 @@
+"""
+Background email delivery for Storecore automations.
+Alerts are queued by the sale/stock paths and sent by a worker thread that
+keeps one authenticated SMTP session open between messages. Customer
+receipts go through a durable on-disk outbox so none are lost on restart.
+"""
+import atexit
+import logging
+import os
+import queue
+import smtplib
+import sqlite3
+import threading
+import time
+
+# Configure logging for mailer module
+logger = logging.getLogger(__name__)
+
+DEFAULT_SMTP_SERVER = 'smtp.gmail.com'
+DEFAULT_SMTP_PORT = 465
+ALERT_QUEUE_SIZE = 200
+ALERT_MAX_RETRIES = 3
+ALERT_RETRY_BACKOFF = 2.0  # seconds, doubled after every failed attempt
+SMTP_IDLE_TIMEOUT = 60.0   # close the session after this long without mail
+OUTBOX_PATH = os.path.join("outbox", "receipts_outbox.db")
+OUTBOX_BATCH_SIZE = 20
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_POLL_INTERVAL = 5.0
+OUTBOX_ATTACHMENT_WAIT = 120.0  # seconds a held message waits for its attachment before going out without it
+
+
+class SMTPSession:
+    """
+    Reusable SMTP connection.
+    Connects and logs in lazily, checks the session with NOOP before reuse,
+    and reconnects once if the server has dropped it.
+    """
+
+    def __init__(self, server=DEFAULT_SMTP_SERVER, port=DEFAULT_SMTP_PORT, use_ssl=None, timeout=30):
+        self.server = server
+        self.port = port
+        # Port 465 is implicit TLS; anything else (e.g. a local sink) is plain SMTP
+        self.use_ssl = (port == 465) if use_ssl is None else use_ssl
+        self.timeout = timeout
+        self._smtp = None
+        self._login = None
+        self.last_used = 0.0
+
+    def _connect(self, username, password):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        smtp = smtp_class(self.server, self.port, timeout=self.timeout)
+        if username and password:
+            smtp.login(username, password)
+        self._smtp = smtp
+        self._login = (username, password)
+
+    def _alive(self):
+        try:
+            return self._smtp is not None and self._smtp.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def send(self, sender, recipients, message_text, username=None, password=None):
+        # Send one message, reusing the open session when the login matches
+        if self._smtp is None or self._login != (username, password) or not self._alive():
+            self.close()
+            self._connect(username, password)
+        try:
+            self._smtp.sendmail(sender, recipients, message_text)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._connect(username, password)
+            self._smtp.sendmail(sender, recipients, message_text)
+        self.last_used = time.monotonic()
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                try:
+                    self._smtp.close()
+                except Exception:
+                    pass
+        self._smtp = None
+        self._login = None
+
+
+class AlertDispatcher:
+    """
+    Bounded queue of outgoing alert emails drained by one worker thread.
+    enqueue() never blocks the caller; when the queue is full the alert is
+    dropped and counted. Failed sends are retried with exponential backoff.
+    """
+
+    def __init__(self, server=DEFAULT_SMTP_SERVER, port=DEFAULT_SMTP_PORT, use_ssl=None,
+                 max_queue=ALERT_QUEUE_SIZE, max_retries=ALERT_MAX_RETRIES,
+                 retry_backoff=ALERT_RETRY_BACKOFF, idle_timeout=SMTP_IDLE_TIMEOUT):
+        self.session = SMTPSession(server, port, use_ssl)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'dropped': 0,
+            'retries': 0,
+            'total_send_ms': 0.0,
+            'max_send_ms': 0.0,
+            'last_send_ms': 0.0,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="AlertDispatcher", daemon=True)
+                self._thread.start()
+        return self
+
+    def enqueue(self, sender, recipients, message_text, username=None, password=None, description="alert"):
+        # Queue a message for delivery; returns False if the queue is full
+        self.start()
+        job = {
+            'sender': sender,
+            'recipients': list(recipients),
+            'message': message_text,
+            'username': username,
+            'password': password,
+            'description': description,
+        }
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._stats['dropped'] += 1
+            logger.error(f"Alert queue full, dropping {description}")
+            return False
+        with self._lock:
+            self._stats['enqueued'] += 1
+        return True
+
+    def _deliver(self, job):
+        delay = self.retry_backoff
+        for attempt in range(1, self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                self.session.send(job['sender'], job['recipients'], job['message'],
+                                  job['username'], job['password'])
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with self._lock:
+                    self._stats['sent'] += 1
+                    self._stats['total_send_ms'] += elapsed_ms
+                    self._stats['last_send_ms'] = elapsed_ms
+                    self._stats['max_send_ms'] = max(self._stats['max_send_ms'], elapsed_ms)
+                logger.info(f"Sent {job['description']} in {elapsed_ms:.0f} ms")
+                return True
+            except Exception as e:
+                self.session.close()
+                if attempt == self.max_retries:
+                    with self._lock:
+                        self._stats['failed'] += 1
+                    logger.error(f"Giving up on {job['description']} after {attempt} attempts: {e}")
+                    return False
+                with self._lock:
+                    self._stats['retries'] += 1
+                logger.warning(f"Sending {job['description']} failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                if self._stopping.wait(delay):
+                    # Shutting down: make one last attempt without waiting further
+                    delay = 0
+                delay *= 2
+
+    def _run(self):
+        while True:
+            try:
+                job = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                # Nothing to send for a while; don't hold the SMTP session open
+                self.session.close()
+                if self._stopping.is_set():
+                    return
+                continue
+            if job is None:
+                self._queue.task_done()
+                break
+            try:
+                self._deliver(job)
+            finally:
+                self._queue.task_done()
+        self.session.close()
+
+    def flush(self, timeout=None):
+        # Wait until every queued alert has been attempted
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, timeout=5.0):
+        # Drain what is queued (bounded by timeout) and stop the worker
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._stopping.set()
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+
+    def stats(self):
+        # Queue depth plus delivery counters and send latency
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['avg_send_ms'] = stats['total_send_ms'] / stats['sent'] if stats['sent'] else 0.0
+        return stats
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_alert_dispatcher(server=None, port=None):
+    # Returns the shared alert dispatcher, creating it on first use
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher(server or DEFAULT_SMTP_SERVER, port or DEFAULT_SMTP_PORT)
+            atexit.register(_dispatcher.stop)
+        return _dispatcher
+
+
+def alert_stats():
+    # Counters for the shared dispatcher (empty if no alert has been queued yet)
+    return _dispatcher.stats() if _dispatcher is not None else {}
+
+
+class ReceiptOutbox:
+    """
+    Durable queue of customer receipt emails stored in SQLite.
+    Messages are written to disk before enqueue() returns and are sent by a
+    worker that drains them in batches over one authenticated SMTP session.
+    Messages interrupted by a crash are picked up again on the next start.
+    Status changes are published as events the POS polls with poll_events().
+    """
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    def __init__(self, path=OUTBOX_PATH, server=DEFAULT_SMTP_SERVER, port=DEFAULT_SMTP_PORT, use_ssl=None,
+                 credentials=None, batch_size=OUTBOX_BATCH_SIZE, max_attempts=OUTBOX_MAX_ATTEMPTS,
+                 retry_backoff=ALERT_RETRY_BACKOFF, poll_interval=OUTBOX_POLL_INTERVAL):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.session = SMTPSession(server, port, use_ssl)
+        # Callable returning (username, password); credentials are never written to the outbox
+        self.credentials = credentials
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._events = queue.Queue()
+        self._thread = None
+        with self._db_lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=FULL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    message_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sale_id INTEGER,
+                    sender TEXT NOT NULL,
+                    recipient TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    next_attempt_at REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    sent_at REAL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)")
+            # Anything left mid-send by a crash or forced exit goes back in the queue
+            self._db.execute("UPDATE outbox SET status = ? WHERE status = ?", (self.PENDING, self.SENDING))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="ReceiptOutbox", daemon=True)
+            self._thread.start()
+        return self
+
+    def enqueue(self, sale_id, sender, recipient, message_text, hold=0.0):
+        """
+        Persist a message for delivery and return its message_id. A message
+        enqueued with hold > 0 is not sent for that many seconds unless
+        replace_message() releases it sooner, so it can be stored before its
+        attachment is ready and still goes out if the attachment never comes.
+        """
+        now = time.time()
+        with self._db_lock:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (sale_id, sender, recipient, message, status, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (sale_id, sender, recipient, message_text, self.PENDING, now + hold, now)
+            )
+            message_id = cursor.lastrowid
+        self._publish(message_id, sale_id, recipient, self.PENDING, None)
+        self.start()
+        self._wakeup.set()
+        return message_id
+
+    def replace_message(self, message_id, message_text):
+        # Swap in the complete message for a pending one and make it due now;
+        # returns False if the worker already picked up the original
+        with self._db_lock:
+            cursor = self._db.execute(
+                "UPDATE outbox SET message = ?, next_attempt_at = ? WHERE message_id = ? AND status = ? AND attempts = 0",
+                (message_text, time.time(), message_id, self.PENDING)
+            )
+            replaced = cursor.rowcount == 1
+        self._wakeup.set()
+        return replaced
+
+    def status(self, message_id):
+        # Current delivery state of one message
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT message_id, sale_id, recipient, status, attempts, last_error, created_at, sent_at "
+                "FROM outbox WHERE message_id = ?", (message_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def counts(self):
+        # Number of messages per status
+        with self._db_lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def poll_events(self):
+        # Drain status-change events published since the last call
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _publish(self, message_id, sale_id, recipient, status, error):
+        self._events.put({
+            'message_id': message_id,
+            'sale_id': sale_id,
+            'recipient': recipient,
+            'status': status,
+            'error': error,
+        })
+
+    def _claim_batch(self):
+        # Mark up to batch_size due messages as 'sending' and return them
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT * FROM outbox WHERE status = ? AND next_attempt_at <= ? "
+                "ORDER BY message_id LIMIT ?",
+                (self.PENDING, time.time(), self.batch_size)
+            ).fetchall()
+            if rows:
+                self._db.executemany(
+                    "UPDATE outbox SET status = ? WHERE message_id = ?",
+                    [(self.SENDING, row['message_id']) for row in rows]
+                )
+        return [dict(row) for row in rows]
+
+    def _finish(self, row, error=None):
+        attempts = row['attempts'] + 1
+        now = time.time()
+        if error is None:
+            status, next_attempt = self.SENT, now
+        elif attempts >= self.max_attempts:
+            status, next_attempt = self.FAILED, now
+        else:
+            status, next_attempt = self.PENDING, now + self.retry_backoff * (2 ** (attempts - 1))
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?, sent_at = ? "
+                "WHERE message_id = ?",
+                (status, attempts, error, next_attempt, now if error is None else None, row['message_id'])
+            )
+        self._publish(row['message_id'], row['sale_id'], row['recipient'], status, error)
+        if error is None:
+            logger.info(f"Receipt for Sale #{row['sale_id']} delivered to {row['recipient']}")
+        else:
+            logger.warning(f"Receipt for Sale #{row['sale_id']} not delivered (attempt {attempts}): {error}")
+
+    def _next_due_in(self):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT MIN(next_attempt_at) AS due FROM outbox WHERE status = ?", (self.PENDING,)
+            ).fetchone()
+        if row is None or row['due'] is None:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, row['due'] - time.time()))
+
+    def _release(self, rows, delay):
+        # Put claimed messages back in the queue without counting an attempt
+        with self._db_lock:
+            self._db.executemany(
+                "UPDATE outbox SET status = ?, next_attempt_at = ? WHERE message_id = ? AND status = ?",
+                [(self.PENDING, time.time() + delay, row['message_id'], self.SENDING) for row in rows]
+            )
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = []
+            try:
+                batch = self._claim_batch()
+                if not batch:
+                    if time.monotonic() - self.session.last_used > SMTP_IDLE_TIMEOUT:
+                        self.session.close()
+                    self._wakeup.wait(self._next_due_in())
+                    self._wakeup.clear()
+                    continue
+                # One session for the whole batch; only messages that fail are retried
+                username, password = self.credentials() if self.credentials else (None, None)
+                for row in batch:
+                    try:
+                        self.session.send(row['sender'], [row['recipient']], row['message'], username, password)
+                        self._finish(row)
+                    except Exception as e:
+                        self.session.close()
+                        self._finish(row, str(e))
+            except Exception as e:
+                # Keep the worker alive (e.g. unreadable credentials, a locked outbox file);
+                # whatever it claimed goes back to pending and is retried after a backoff
+                logger.error(f"Receipt outbox worker error: {e}")
+                self.session.close()
+                try:
+                    self._release(batch, self.retry_backoff)
+                except Exception as release_error:
+                    logger.error(f"Could not release claimed receipts: {release_error}")
+                self._stopping.wait(self.retry_backoff)
+        self.session.close()
+
+    def stop(self, timeout=5.0):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_receipt_outbox(server=None, port=None, credentials=None):
+    # Returns the shared receipt outbox, starting its worker on first use
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = ReceiptOutbox(server=server or DEFAULT_SMTP_SERVER, port=port or DEFAULT_SMTP_PORT,
+                                    credentials=credentials)
+            _outbox.start()
+            atexit.register(_outbox.stop)
+        return _outbox
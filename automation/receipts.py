@@ -0,0 +1,613 @@
+"""
+Receipt PDF rendering for Storecore.
+Receipts are rendered to memory on a small worker pool. Each sale is
+rendered once and the same bytes serve the local copy and the email
+attachment, so checkout never waits on ReportLab.
+"""
+import io
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# ReportLab imports for PDF generation
+try:
+    from reportlab.lib.pagesizes import letter, A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.platypus import Image as ReportLabImage  # Use alias to avoid conflict with PIL Image
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+# Pillow is only used to pre-scale the logo
+try:
+    from PIL import Image as PILImage
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Configure logging for receipts module
+logger = logging.getLogger(__name__)
+
+RECEIPTS_DIR = "receipts"
+RENDER_WORKERS = 2
+RENDER_CACHE_SIZE = 50  # most recent sales whose rendered PDF is kept in memory
+SAVE_RECEIPTS_TO_DISK = True
+
+
+def receipt_filename(sale_id=None, for_email=False):
+    # Path under receipts/ for a saved receipt
+    if for_email and sale_id:
+        return os.path.join(RECEIPTS_DIR, f"email_receipt_{sale_id}.pdf")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(RECEIPTS_DIR, f"receipt_{timestamp}.pdf")
+
+
+def save_receipt_pdf(pdf_bytes, filename=None):
+    # Write rendered receipt bytes to disk and return the path
+    filename = filename or receipt_filename()
+    directory = os.path.dirname(filename)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    with open(filename, "wb") as pdf_file:
+        pdf_file.write(pdf_bytes)
+    return filename
+
+
+class ReceiptTemplate:
+    """
+    Precompiled receipt layout: palette, paragraph styles, table styles and
+    the pre-scaled logo are built once. render() only parses the receipt
+    text and fills in the header details, line items and totals.
+    """
+
+    LOGO_PATH = "logo.png"
+    LOGO_SIZE = (2.5, 1.8)  # inches
+    LOGO_DPI = 150
+
+    def __init__(self, logo_path=LOGO_PATH):
+        if not REPORTLAB_AVAILABLE:
+            raise RuntimeError("ReportLab is not installed. Install with: pip install reportlab")
+
+        # Get base styles
+        styles = getSampleStyleSheet()
+
+        # Define premium color palette
+        self.primary_blue = colors.Color(0.1, 0.2, 0.4)  # Dark professional blue
+        self.accent_green = colors.Color(0.0, 0.5, 0.3)  # Professional green
+        self.light_gray = colors.Color(0.95, 0.95, 0.95)  # Light background
+        self.dark_gray = colors.Color(0.3, 0.3, 0.3)     # Dark text
+        self.gold_accent = colors.Color(0.8, 0.6, 0.1)   # Gold highlight
+
+        # Create sophisticated custom styles
+        self.company_title_style = ParagraphStyle(
+            'CompanyTitle',
+            parent=styles['Heading1'],
+            fontSize=28,
+            fontName='Helvetica-Bold',
+            textColor=self.primary_blue,
+            alignment=TA_CENTER,
+            spaceAfter=8,
+            spaceBefore=0,
+            leading=30,
+            letterSpacing=1
+        )
+
+        self.subtitle_style = ParagraphStyle(
+            'Subtitle',
+            parent=styles['Normal'],
+            fontSize=12,
+            fontName='Helvetica-Oblique',
+            textColor=self.accent_green,
+            alignment=TA_CENTER,
+            spaceAfter=25,
+            leading=14
+        )
+
+        self.tagline_style = ParagraphStyle(
+            'TaglineStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            fontName='Helvetica-Oblique',
+            textColor=self.gold_accent,
+            alignment=TA_CENTER,
+            spaceAfter=15,
+            leading=12
+        )
+
+        self.section_header_style = ParagraphStyle(
+            'SectionHeader',
+            parent=styles['Heading2'],
+            fontSize=14,
+            fontName='Helvetica-Bold',
+            textColor=self.primary_blue,
+            alignment=TA_LEFT,
+            spaceAfter=12,
+            spaceBefore=20,
+            borderPadding=5,
+            backColor=self.light_gray,
+            borderColor=self.primary_blue,
+            borderWidth=0.5,
+            leading=16
+        )
+
+        self.footer_style = ParagraphStyle(
+            'FooterText',
+            parent=styles['Normal'],
+            fontSize=10,
+            fontName='Helvetica',
+            textColor=self.dark_gray,
+            alignment=TA_CENTER,
+            spaceAfter=5,
+            leading=12
+        )
+
+        # Table styles are immutable command lists and can be shared by every render
+        self.logo_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.white),
+            ('BOX', (0, 0), (-1, -1), 1, self.light_gray),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 15),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+        ])
+        self.email_indicator_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), self.gold_accent),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ])
+        self.separator_style = TableStyle([
+            ('LINEBELOW', (0, 0), (-1, -1), 2, self.gold_accent),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+        ])
+        self.header_table_style = TableStyle([
+            # Header row styling
+            ('BACKGROUND', (0, 0), (-1, 0), self.primary_blue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 14),
+            ('SPAN', (0, 0), (-1, 0)),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            # Data rows styling
+            ('BACKGROUND', (0, 1), (0, -1), self.light_gray),
+            ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('ALIGN', (0, 1), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 1), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 0.5, self.dark_gray),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ])
+        self.items_table_commands = [
+            # Header styling
+            ('BACKGROUND', (0, 0), (-1, 0), self.primary_blue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            # Data rows - alternating colors
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('ALIGN', (0, 1), (0, -1), 'LEFT'),      # Item names left-aligned
+            ('ALIGN', (1, 1), (-1, -1), 'CENTER'),   # Numbers centered
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            # Professional grid
+            ('GRID', (0, 0), (-1, -1), 0.5, self.dark_gray),
+            ('LINEBELOW', (0, 0), (-1, 0), 2, self.primary_blue),
+            # Padding for readability
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ]
+        self.totals_table_style = TableStyle([
+            # Subtotal and tax rows
+            ('FONTNAME', (1, 0), (-1, 1), 'Helvetica'),
+            ('FONTSIZE', (1, 0), (-1, 1), 11),
+            ('ALIGN', (1, 0), (-1, 1), 'RIGHT'),
+            ('TEXTCOLOR', (1, 0), (-1, 1), self.dark_gray),
+            # Grand total row - make it stand out
+            ('FONTNAME', (1, 3), (-1, 3), 'Helvetica-Bold'),
+            ('FONTSIZE', (1, 3), (-1, 3), 13),
+            ('ALIGN', (1, 3), (-1, 3), 'RIGHT'),
+            ('TEXTCOLOR', (1, 3), (-1, 3), self.accent_green),
+            ('BACKGROUND', (1, 3), (-1, 3), self.light_gray),
+            ('BOX', (1, 3), (-1, 3), 1.5, self.accent_green),
+            # Padding
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ])
+        self.thank_you_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), self.primary_blue),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 14),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('ROUNDEDCORNERS', (0, 0), (-1, -1), 5),
+        ])
+        self.footer_line_style = TableStyle([
+            ('LINEABOVE', (0, 0), (-1, -1), 1, self.gold_accent),
+        ])
+
+        self.logo_bytes = self._load_logo(logo_path)
+
+    def _load_logo(self, logo_path):
+        # Read the logo once, downscaled to its printed size so renders skip the full-size decode
+        if not os.path.exists(logo_path):
+            return None
+        try:
+            with open(logo_path, "rb") as logo_file:
+                data = logo_file.read()
+            if PIL_AVAILABLE:
+                width, height = self.LOGO_SIZE
+                target = (int(width * self.LOGO_DPI), int(height * self.LOGO_DPI))
+                with PILImage.open(io.BytesIO(data)) as image:
+                    if image.width > target[0] or image.height > target[1]:
+                        scaled = image.resize(target)
+                        out = io.BytesIO()
+                        scaled.save(out, format="PNG")
+                        data = out.getvalue()
+            return data
+        except Exception as e:
+            logger.debug(f"Could not load logo: {e}")
+            return None
+
+    def _static_header(self, story, for_email):
+        # Logo, optional email banner, company name and separator
+        if self.logo_bytes:
+            try:
+                width, height = self.LOGO_SIZE
+                logo = ReportLabImage(io.BytesIO(self.logo_bytes), width=width*inch, height=height*inch)
+                logo_table = Table([[logo]], colWidths=[7.5*inch])
+                logo_table.setStyle(self.logo_table_style)
+                story.append(logo_table)
+                story.append(Spacer(1, 15))
+            except Exception as e:
+                logger.debug(f"Could not add logo: {e}")
+
+        # Add "EMAIL COPY" indicator for email receipts
+        if for_email:
+            email_indicator_table = Table([['📧 EMAIL COPY']], colWidths=[7.5*inch])
+            email_indicator_table.setStyle(self.email_indicator_style)
+            story.append(email_indicator_table)
+            story.append(Spacer(1, 15))
+
+        # Company name with elegant typography
+        story.append(Paragraph("DIGICLIMATE STORE HUB", self.company_title_style))
+        story.append(Paragraph("Enterprise Point of Sale System", self.subtitle_style))
+        story.append(Paragraph("Resilience meets innovation", self.tagline_style))
+
+        # Decorative separator line
+        line_table = Table([['']], colWidths=[7.5*inch], rowHeights=[3])
+        line_table.setStyle(self.separator_style)
+        story.append(line_table)
+        story.append(Spacer(1, 20))
+
+    def _static_footer(self, story, for_email):
+        # Thank-you banner, system details and footer line
+        thank_you_table = Table([['Thank you for choosing DigiClimate Store Hub!']], colWidths=[7.5*inch])
+        thank_you_table.setStyle(self.thank_you_style)
+        story.append(thank_you_table)
+        story.append(Spacer(1, 20))
+
+        # Contact information and system details
+        if for_email:
+            story.append(Paragraph("This receipt was emailed from DigiClimate Store Hub v2.0", self.footer_style))
+            story.append(Paragraph("Enterprise Point of Sale & Inventory Management System", self.footer_style))
+            story.append(Paragraph(f"Email generated on {datetime.now().strftime('%A, %B %d, %Y at %I:%M %p')}", self.footer_style))
+        else:
+            story.append(Paragraph("This receipt was generated by DigiClimate Store Hub v2.0", self.footer_style))
+            story.append(Paragraph("Enterprise Point of Sale & Inventory Management System", self.footer_style))
+            story.append(Paragraph(f"Generated on {datetime.now().strftime('%A, %B %d, %Y at %I:%M %p')}", self.footer_style))
+
+        # Add a subtle footer line
+        footer_line_table = Table([['']], colWidths=[7.5*inch], rowHeights=[2])
+        footer_line_table.setStyle(self.footer_line_style)
+        story.append(Spacer(1, 10))
+        story.append(footer_line_table)
+
+    def render(self, receipt_text, sale_id=None, for_email=False):
+        """Render receipt_text into PDF bytes using the precompiled layout"""
+        if for_email and sale_id:
+            pdf_title = f"Receipt #{sale_id} - DigiClimate Store - Resilience meets innovation"
+            pdf_subject = "Purchase Receipt - Email Copy"
+        else:
+            pdf_title = "DigiClimate Store Receipt - Resilience meets innovation"
+            pdf_subject = "Purchase Receipt"
+
+        # Create PDF document with premium settings, rendered into memory
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(
+            buffer, 
+            pagesize=letter,
+            leftMargin=0.5*inch, 
+            rightMargin=0.5*inch,
+            topMargin=0.4*inch, 
+            bottomMargin=0.5*inch,
+            title=pdf_title,
+            author="DigiClimate Store Hub - Resilience meets innovation",
+            subject=pdf_subject
+        )
+
+        # Flowables hold layout state, so each render gets its own story
+        story = []
+        self._static_header(story, for_email)
+
+        # === RECEIPT INFORMATION EXTRACTION ===
+        lines = receipt_text.strip().split('\n')
+
+        date_info = ""
+        customer_info = ""
+        sale_id_info = ""
+        subtotal_amount = ""
+        tax_amount = ""
+        total_amount = ""
+        item_rows = []
+        in_items = False
+        has_items_header = False
+        has_subtotal = False
+        for line in lines:
+            stripped = line.strip()
+            if 'Date:' in line:
+                date_info = line.replace('Date:', '').strip()
+            elif 'Customer:' in line:
+                customer_info = line.replace('Customer:', '').strip()
+            elif 'Sale ID:' in line:
+                sale_id_info = line.replace('Sale ID:', '').strip()
+            elif 'ITEM' in line and 'QTY' in line and 'PRICE' in line:
+                in_items = has_items_header = True
+            elif stripped.startswith('SUBTOTAL:'):
+                in_items = False
+                has_subtotal = True
+                subtotal_amount = line.split('$')[-1].strip()
+            elif 'TAXES:' in line:
+                tax_amount = line.split('$')[-1].strip()
+            elif 'TOTAL:' in line and 'SUBTOTAL' not in line:
+                total_amount = line.split('$')[-1].strip()
+            elif in_items and stripped and not stripped.startswith('-'):
+                parts = stripped.split()
+                if len(parts) >= 4:
+                    item_rows.append([' '.join(parts[:-3]), parts[-3], parts[-2], parts[-1]])
+
+        # === PROFESSIONAL RECEIPT HEADER ===
+        header_data = [
+            ['Receipt Information', ''],
+            ['Date & Time:', date_info],
+            ['Customer:', customer_info],
+            ['Transaction ID:', sale_id_info],
+        ]
+        if for_email:
+            header_data.append(['Email Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
+        else:
+            header_data.append(['Processed by:', 'DigiClimate POS System v2.0'])
+
+        header_table = Table(header_data, colWidths=[2*inch, 5.5*inch])
+        header_table.setStyle(self.header_table_style)
+        story.append(header_table)
+        story.append(Spacer(1, 25))
+
+        # === PREMIUM ITEMS TABLE ===
+        story.append(Paragraph("Purchase Details", self.section_header_style))
+
+        if has_items_header and has_subtotal:
+            table_data = [['Item Description', 'Qty', 'Unit Price', 'Line Total']] + item_rows
+            items_table = Table(table_data, colWidths=[3.5*inch, 0.8*inch, 1.2*inch, 1.2*inch])
+            # Alternating row colors go into the same style pass
+            striping = [('BACKGROUND', (0, i), (-1, i), self.light_gray) for i in range(2, len(table_data), 2)]
+            items_table.setStyle(TableStyle(self.items_table_commands + striping))
+            story.append(items_table)
+            story.append(Spacer(1, 25))
+
+        # === ELEGANT TOTALS SECTION ===
+        totals_data = [
+            ['', 'Subtotal:', f"${subtotal_amount}"],
+            ['', 'Taxes:', f"${tax_amount}"],
+            ['', '', ''],  # Spacer row
+            ['', 'GRAND TOTAL:', f"${total_amount}"]
+        ]
+        totals_table = Table(totals_data, colWidths=[4*inch, 1.5*inch, 1.5*inch])
+        totals_table.setStyle(self.totals_table_style)
+        story.append(totals_table)
+        story.append(Spacer(1, 30))
+
+        # === PROFESSIONAL FOOTER ===
+        self._static_footer(story, for_email)
+
+        # Build the premium PDF
+        doc.build(story)
+        return buffer.getvalue()
+
+
+_template = None
+_template_lock = threading.Lock()
+
+
+def get_receipt_template():
+    # Returns the shared receipt template, building it on first use
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = ReceiptTemplate()
+        return _template
+
+
+def render_receipt_pdf(receipt_text, sale_id=None, for_email=False):
+    """Render the premium PDF receipt for receipt_text and return it as bytes"""
+    return get_receipt_template().render(receipt_text, sale_id=sale_id, for_email=for_email)
+
+
+class ReceiptRenderer:
+    """
+    Renders receipts on a thread pool and hands back futures.
+    Futures are cached per sale_id, so asking for the same sale again
+    (email attachment, resend) reuses the first render.
+    """
+
+    def __init__(self, max_workers=RENDER_WORKERS, cache_size=RENDER_CACHE_SIZE, save_to_disk=SAVE_RECEIPTS_TO_DISK):
+        self.save_to_disk = save_to_disk
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ReceiptRender")
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'renders': 0,
+            'failures': 0,
+            'cache_hits': 0,
+            'total_render_ms': 0.0,
+            'max_render_ms': 0.0,
+            'last_render_ms': 0.0,
+        }
+        if REPORTLAB_AVAILABLE:
+            # Build the shared template off the calling thread so the first sale doesn't pay for it
+            self._executor.submit(get_receipt_template)
+
+    def submit(self, sale_id, receipt_text=None, save_to_disk=None):
+        """
+        Return a future for the sale's receipt, starting a render if needed.
+        The future resolves to {'sale_id', 'pdf', 'path', 'render_ms'}.
+        """
+        save_to_disk = self.save_to_disk if save_to_disk is None else save_to_disk
+        with self._lock:
+            if sale_id is not None and sale_id in self._futures:
+                self._futures.move_to_end(sale_id)
+                self._stats['cache_hits'] += 1
+                return self._futures[sale_id]
+            if receipt_text is None:
+                raise ValueError(f"No receipt text to render for Sale #{sale_id}")
+            future = self._executor.submit(self._render, sale_id, receipt_text, save_to_disk)
+            if sale_id is not None:
+                self._futures[sale_id] = future
+                while len(self._futures) > self.cache_size:
+                    self._futures.popitem(last=False)
+        return future
+
+    def _render(self, sale_id, receipt_text, save_to_disk):
+        started = time.perf_counter()
+        try:
+            pdf_bytes = render_receipt_pdf(receipt_text, sale_id=sale_id)
+        except Exception:
+            with self._lock:
+                self._stats['failures'] += 1
+                # Allow a later request to try again
+                self._futures.pop(sale_id, None)
+            raise
+        render_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats['renders'] += 1
+            self._stats['total_render_ms'] += render_ms
+            self._stats['last_render_ms'] = render_ms
+            self._stats['max_render_ms'] = max(self._stats['max_render_ms'], render_ms)
+        path = None
+        if save_to_disk:
+            try:
+                path = save_receipt_pdf(pdf_bytes, receipt_filename(sale_id))
+                logger.info(f"PDF Receipt saved: {path}")
+            except OSError as e:
+                logger.error(f"Could not save PDF receipt: {e}")
+        logger.debug(f"Rendered receipt for Sale #{sale_id} in {render_ms:.0f} ms")
+        return {'sale_id': sale_id, 'pdf': pdf_bytes, 'path': path, 'render_ms': render_ms}
+
+    def stats(self):
+        # Render counts and timings
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached'] = len(self._futures)
+        stats['avg_render_ms'] = stats['total_render_ms'] / stats['renders'] if stats['renders'] else 0.0
+        return stats
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_receipt_renderer():
+    # Returns the shared receipt renderer, creating it on first use
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ReceiptRenderer()
+        return _renderer
+
+
+def benchmark_receipt_render(receipt_text=None, iterations=50):
+    """
+    Compare per-receipt render time when the layout is rebuilt for every
+    receipt (the old behaviour) against the shared precompiled template.
+    """
+    receipt_text = receipt_text or SAMPLE_RECEIPT
+    template = get_receipt_template()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        ReceiptTemplate().render(receipt_text, sale_id=1)
+    rebuild_ms = (time.perf_counter() - started) * 1000 / iterations
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        template.render(receipt_text, sale_id=1)
+    template_ms = (time.perf_counter() - started) * 1000 / iterations
+
+    return {
+        'iterations': iterations,
+        'rebuild_ms': rebuild_ms,
+        'template_ms': template_ms,
+        'speedup': rebuild_ms / template_ms if template_ms else 0.0,
+    }
+
+
+SAMPLE_RECEIPT = """
+        DIGICLIMATE STORE HUB ENTERPRISE SYSTEM
+        =============================================
+        Date: 2024-01-15 14:32:10
+        Customer: Sample Customer (ID: 1)
+        Sale ID: 1
+        ---------------------------------------------
+        ITEM               QTY   PRICE   TOTAL
+        ---------------------------------------------
+Basmati Rice 5kg    2   $12.50 $ 25.00
+Cotton Towel        3   $ 4.25 $ 12.75
+Brown Sugar 1kg     1   $ 3.10 $  3.10
+---------------------------------------------
+                       SUBTOTAL: $ 40.85
+                          TAXES: $  7.15
+                          TOTAL: $ 48.00
+=============================================
+Thank you for your purchase!
+    DigiClimate Store Hub v2.0
+"""
+
+
+if __name__ == "__main__":
+    results = benchmark_receipt_render()
+    print(f"Per-receipt render over {results['iterations']} runs:")
+    print(f"  rebuilt layout:      {results['rebuild_ms']:.1f} ms")
+    print(f"  precompiled template: {results['template_ms']:.1f} ms")
+    print(f"  speedup:             {results['speedup']:.2f}x")
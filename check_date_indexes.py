@@ -0,0 +1,127 @@
+"""
+Date Range Index Check
+EXPLAINs the dashboard's date-range query shapes and checks that the
+Sales.sale_datetime predicates built by date_range_clause can use an index
+on sale_datetime (run optimize_database.py first to create them)
+"""
+
+import logging
+import os
+import sys
+from datetime import date, timedelta
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.database import get_db, close_db, date_range_clause
+
+logger = logging.getLogger(__name__)
+
+# (name, query with a {dates} placeholder for the predicate on s.sale_datetime)
+DATE_RANGE_QUERIES = [
+    ("sales summary", """
+        SELECT COUNT(*) AS total_sales, SUM(s.total) AS revenue
+        FROM Sales s
+        WHERE {dates}
+    """),
+    ("top products", """
+        SELECT p.SKU, SUM(si.quantity) AS units_sold
+        FROM Products p
+        JOIN SaleItems si ON p.SKU = si.SKU
+        JOIN Sales s ON si.sale_id = s.sale_id
+        WHERE {dates}
+        GROUP BY p.SKU
+        ORDER BY units_sold DESC
+        LIMIT 10
+    """),
+    ("employee sales", """
+        SELECT e.name, COUNT(DISTINCT s.sale_id) AS total_sales
+        FROM Sales s
+        JOIN Employees e ON s.employee_id = e.employee_id
+        WHERE {dates}
+        GROUP BY e.employee_id, e.name
+    """),
+    ("daily trend", """
+        SELECT DATE(s.sale_datetime) AS sale_date, SUM(s.total) AS revenue
+        FROM Sales s
+        WHERE {dates}
+        GROUP BY DATE(s.sale_datetime)
+    """),
+]
+
+# The predicate shape the dashboard used before date_range_clause; it must not qualify
+LEGACY_PREDICATE = "DATE(s.sale_datetime) BETWEEN %s AND %s"
+
+
+def sale_datetime_indexes(cursor):
+    """Names of the Sales indexes whose first column is sale_datetime"""
+    cursor.execute("SHOW INDEX FROM Sales")
+    return {row['Key_name'] for row in cursor.fetchall()
+            if row['Column_name'] == 'sale_datetime' and int(row['Seq_in_index']) == 1}
+
+
+def explain_sales_access(cursor, query, params):
+    """EXPLAIN row for the Sales table (alias s) in query"""
+    cursor.execute("EXPLAIN " + query, params)
+    rows = cursor.fetchall()
+    return next(row for row in rows if row['table'] == 's')
+
+
+def check_date_range_indexes(days=30):
+    """
+    EXPLAIN every query in DATE_RANGE_QUERIES over the last `days` days.
+    Fails a query whose Sales access cannot use a sale_datetime index; the
+    index the optimizer actually picks is reported (on a small table it may
+    still prefer a full scan). Returns True when every query passes.
+    """
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    connection, cursor = get_db()
+    try:
+        indexes = sale_datetime_indexes(cursor)
+        if not indexes:
+            print("✗ Sales has no index on sale_datetime; run optimize_database.py first")
+            return False
+        print(f"Indexes on Sales.sale_datetime: {', '.join(sorted(indexes))}")
+
+        passed = True
+        for name, query in DATE_RANGE_QUERIES:
+            date_sql, params = date_range_clause("s.sale_datetime", start, end)
+            plan = explain_sales_access(cursor, query.format(dates=date_sql), params)
+            usable = indexes & set((plan['possible_keys'] or '').split(','))
+            chosen = plan['key'] if plan['key'] in indexes else None
+            if usable:
+                print(f"✓ {name}: type={plan['type']}, key={plan['key']}, rows={plan['rows']}"
+                      + ("" if chosen else " (optimizer chose not to use the index on this data)"))
+            else:
+                passed = False
+                print(f"✗ {name}: no sale_datetime index usable (possible_keys={plan['possible_keys']})")
+
+        # The old DATE() predicate hides the column from the optimizer; if it
+        # qualified too, the check above would prove nothing
+        legacy_query = DATE_RANGE_QUERIES[0][1].format(dates=LEGACY_PREDICATE)
+        legacy = explain_sales_access(cursor, legacy_query, [start, end])
+        if indexes & set((legacy['possible_keys'] or '').split(',')):
+            print("? legacy DATE() predicate also reports a usable index; check the MySQL version")
+        else:
+            print(f"✓ legacy DATE() predicate: type={legacy['type']}, no sale_datetime index (as expected)")
+        return passed
+
+    except Exception as e:
+        print(f"Error checking date range indexes: {e}")
+        logger.error(f"Error checking date range indexes: {e}")
+        return False
+    finally:
+        close_db(connection, cursor)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+    print("DigiClimate Store Hub - Date Range Index Check")
+    print("=" * 60)
+
+    if check_date_range_indexes():
+        print("\n✓ All date range queries can use the sale_datetime index")
+        sys.exit(0)
+    print("\n✗ Some date range queries cannot use the sale_datetime index")
+    sys.exit(1)
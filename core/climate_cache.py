@@ -0,0 +1,128 @@
+"""
+Process-wide cache for climate data.
+Every ClimateDataManager (the Climate tab, the end-of-day report, scripts)
+reads through the one `climate_cache`, so a result loaded by one is served
+to all. Loads are single-flight: callers asking for a key that is already
+being loaded wait for that load instead of running the query again.
+Entries expire after a TTL and are dropped as soon as a write to one of the
+tables they read is published through core.events (the raw-material
+importer publishes ClimateProduction and RawMaterials).
+Cached values are shared, not copied: every caller gets the same object and
+must treat it as read-only. ClimateDataManager copies only what it hands
+out through its public methods.
+"""
+import logging
+import threading
+import time
+
+from . import events
+
+# Configure logging for climate cache module
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SECONDS = 300  # upper bound for changes made outside this process
+
+
+class _Flight:
+    # One in-progress load; followers wait on `done` and share its result
+    def __init__(self, tables):
+        self.tables = tables
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.stale = False  # set when one of its tables is written during the load
+
+
+class ClimateCache:
+    """Thread-safe TTL cache with single-flight loading and table-based invalidation"""
+
+    def __init__(self, ttl=CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries = {}  # key -> (stored_at, tables, value)
+        self._flights = {}  # key -> _Flight
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'shared': 0, 'errors': 0, 'invalidated': 0}
+
+    def get_or_load(self, key, loader, tables):
+        """
+        Cached value for key, calling loader() to produce it on a miss. tables
+        names what the loader reads; a write to any of them drops the entry.
+        A loader that raises is not cached and its exception reaches every
+        caller waiting on that load. The value is shared by every caller and
+        must not be modified.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, _, value = entry
+                if time.monotonic() - stored_at <= self.ttl:
+                    self._stats['hits'] += 1
+                    return value
+                del self._entries[key]
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats['shared'] += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight(frozenset(tables))
+                self._stats['misses'] += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._stats['errors'] += 1
+            raise
+        else:
+            with self._lock:
+                # A load that overlapped a write to its tables may have read the old rows
+                if not flight.stale:
+                    self._entries[key] = (time.monotonic(), flight.tables, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def invalidate(self, tables):
+        # core.events subscriber: drop every entry that read one of the changed tables
+        with self._lock:
+            for flight in self._flights.values():
+                if flight.tables & tables:
+                    flight.stale = True
+            stale = [key for key, (_, deps, _) in self._entries.items() if deps & tables]
+            for key in stale:
+                del self._entries[key]
+            self._stats['invalidated'] += len(stale)
+        if stale:
+            logger.debug(f"Climate cache: {len(stale)} entries invalidated by writes to {', '.join(sorted(tables))}")
+
+    def clear(self):
+        with self._lock:
+            for flight in self._flights.values():
+                flight.stale = True
+            self._stats['invalidated'] += len(self._entries)
+            self._entries.clear()
+        logger.info("Climate data cache cleared")
+
+    def stats(self):
+        # 'shared' lookups waited on another caller's load instead of querying, so they count as hits
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        served = stats['hits'] + stats['shared']
+        lookups = served + stats['misses']
+        stats['hit_rate'] = (served / lookups * 100) if lookups else 0.0
+        return stats
+
+
+climate_cache = ClimateCache()
+events.subscribe(climate_cache.invalidate)
@@ -0,0 +1,167 @@
+"""
+Climate production fact table.
+
+ClimateProduction holds one row per (material_id, timestamp) for every raw
+material, replacing the per-material WheatProduction, CottonProduction,
+RiceProduction and SugarcaneProduction tables. Materials are whatever
+RawMaterials lists, so tracking a new material is a RawMaterials row plus
+its production data, with no new table or code.
+
+The primary key is the clustered index, so reads by material and time
+(latest row per material, a date range for every material) are index range
+scans that never touch another row. idx_climate_production_timestamp serves
+date-range queries that are not tied to a material.
+
+The legacy tables are copied in on start while ClimateProduction is still
+empty, so a migration that failed is retried on the next start (or run it
+with `python -m core.climate_production`); they are left in place and can
+be dropped once the migration has been checked.
+"""
+import argparse
+import logging
+
+from . import events
+from .database import get_db, close_db
+
+# Configure logging for climate production module
+logger = logging.getLogger(__name__)
+
+LEGACY_TABLES = ("WheatProduction", "CottonProduction", "RiceProduction", "SugarcaneProduction")
+
+PRODUCTION_COLUMNS = (
+    "material_id", "timestamp", "expected_condition", "category",
+    "original_production", "delay_percent", "expected_production",
+)
+
+CREATE_PRODUCTION_TABLE = """
+    CREATE TABLE IF NOT EXISTS ClimateProduction (
+        material_id INT NOT NULL,
+        timestamp DATETIME NOT NULL,
+        expected_condition TEXT,
+        category VARCHAR(50),
+        original_production DECIMAL(10,2),
+        delay_percent DECIMAL(5,2),
+        expected_production DECIMAL(10,2),
+        PRIMARY KEY (material_id, timestamp),
+        INDEX idx_climate_production_timestamp (timestamp, material_id),
+        FOREIGN KEY (material_id) REFERENCES RawMaterials(material_id)
+    )
+"""
+
+# Later rows for the same material and time replace earlier ones
+_UPSERT_SQL = f"""
+    INSERT INTO ClimateProduction ({', '.join(PRODUCTION_COLUMNS)})
+    VALUES ({', '.join(['%s'] * len(PRODUCTION_COLUMNS))})
+    ON DUPLICATE KEY UPDATE
+        {', '.join(f'{column} = VALUES({column})' for column in PRODUCTION_COLUMNS[2:])}
+"""
+
+
+def _table_exists(cursor, table_name):
+    cursor.execute(
+        "SELECT COUNT(*) AS found FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = %s",
+        (table_name,)
+    )
+    return bool(cursor.fetchone()['found'])
+
+
+def _has_rows(cursor, table_name):
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table_name}) AS found")
+    return bool(cursor.fetchone()['found'])
+
+
+def needs_migration(cursor):
+    # ClimateProduction is empty but a legacy table has rows: a first start,
+    # or a migration that failed and was rolled back
+    if _has_rows(cursor, "ClimateProduction"):
+        return False
+    return any(_table_exists(cursor, table) and _has_rows(cursor, table) for table in LEGACY_TABLES)
+
+
+def ensure_production_table(cursor):
+    # Create the fact table if needed; returns True when it was just created
+    if _table_exists(cursor, "ClimateProduction"):
+        return False
+    cursor.execute(CREATE_PRODUCTION_TABLE)
+    return True
+
+
+def migrate_legacy_tables(connection, cursor):
+    """
+    Copy rows from the per-material legacy tables into ClimateProduction
+    with one INSERT ... SELECT per table. Safe to run again: rows already
+    present are updated, not duplicated. Returns the affected row count
+    MySQL reports (an updated row counts twice).
+    """
+    ensure_production_table(cursor)
+    columns = ", ".join(PRODUCTION_COLUMNS)
+    copied = 0
+    try:
+        for table in LEGACY_TABLES:
+            if not _table_exists(cursor, table):
+                continue
+            # Rows without a material or time cannot be keyed and were never readable by material
+            cursor.execute(f"""
+                INSERT INTO ClimateProduction ({columns})
+                SELECT {columns} FROM {table} AS legacy
+                WHERE legacy.material_id IS NOT NULL AND legacy.timestamp IS NOT NULL
+                ON DUPLICATE KEY UPDATE
+                    {', '.join(f'{column} = legacy.{column}' for column in PRODUCTION_COLUMNS[2:])}
+            """)
+            copied += max(cursor.rowcount, 0)
+            logger.info(f"Migrated {table} into ClimateProduction")
+        connection.commit()
+        events.publish('ClimateProduction')
+        return copied
+    except Exception as e:
+        connection.rollback()
+        raise Exception(f"Error migrating climate production data: {e}")
+
+
+def replace_material_rows(connection, cursor, rows):
+    """
+    Replace the production data of the materials present in rows (tuples in
+    PRODUCTION_COLUMNS order) with rows, in one transaction. Returns the
+    number of rows written.
+    """
+    material_ids = sorted({row[0] for row in rows})
+    if not material_ids:
+        return 0
+    try:
+        placeholders = ", ".join(["%s"] * len(material_ids))
+        cursor.execute(f"DELETE FROM ClimateProduction WHERE material_id IN ({placeholders})", tuple(material_ids))
+        cursor.executemany(_UPSERT_SQL, rows)
+        connection.commit()
+        events.publish('ClimateProduction')
+        return len(rows)
+    except Exception as e:
+        connection.rollback()
+        raise Exception(f"Error saving climate production data: {e}")
+
+
+def ensure_climate_production():
+    # Startup hook: create the table and migrate the legacy tables until that has succeeded
+    connection, cursor = get_db()
+    try:
+        if ensure_production_table(cursor):
+            logger.info("Created ClimateProduction table")
+        if needs_migration(cursor):
+            logger.info("ClimateProduction is empty; migrating legacy production tables")
+            migrate_legacy_tables(connection, cursor)
+    finally:
+        close_db(connection, cursor)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+    parser = argparse.ArgumentParser(description="Create ClimateProduction and copy the legacy per-material tables into it")
+    parser.parse_args()
+
+    connection, cursor = get_db()
+    try:
+        rows = migrate_legacy_tables(connection, cursor)
+        print(f"ClimateProduction migrated: {rows} rows written")
+    finally:
+        close_db(connection, cursor)
@@ -1,4 +1,5 @@
 from .database import get_db, close_db
+from . import events
 
 
 def add_customer(connection, cursor, name, contact_info, address):
@@ -7,11 +8,32 @@ def add_customer(connection, cursor, name, contact_info, address):
         params = (name, contact_info, address)
         cursor.execute(query, params)
         connection.commit()
+        events.publish('Customers')
         customer_id = cursor.lastrowid
         return get_customer(cursor, customer_id)
     except Exception as e:        
         raise ValueError(f"Error adding customer: {e}")
 
+def add_customers_bulk(connection, cursor, rows):
+    # Inserts many (name, contact_info, address) rows with one multi-row INSERT and a single commit
+    try:
+        query = "INSERT INTO Customers (name, contact_info, address) VALUES (%s, %s, %s)"
+        cursor.executemany(query, rows)
+        connection.commit()
+        events.publish('Customers')
+        return len(rows)
+    except Exception as e:
+        connection.rollback()
+        raise ValueError(f"Error adding customers: {e}")
+
+def get_customer_keys(cursor):
+    # (name, contact_info) of every customer, the key imports use to skip duplicates
+    try:
+        cursor.execute("SELECT name, contact_info FROM Customers")
+        return {(row['name'], row['contact_info']) for row in cursor.fetchall()}
+    except Exception as e:
+        raise ValueError(f"Error loading customer keys: {e}")
+
 def get_all_customers(cursor):
     try:
         query = "SELECT * FROM Customers"
@@ -46,6 +68,7 @@ def delete_customer(connection, cursor, customer_id):
         query = "DELETE FROM Customers WHERE customer_id = %s"
         cursor.execute(query, (customer_id,))
         connection.commit()
+        events.publish('Customers')
         return customer
     except Exception as e:
         raise ValueError(f"Error deleting customer: {e}")
@@ -129,6 +152,7 @@ def update_customer(connection, cursor, customer_id, name, contact_info, address
         query = "UPDATE Customers SET name = %s, contact_info = %s, address = %s WHERE customer_id = %s"
         cursor.execute(query, (name, contact_info, address, customer_id))
         connection.commit()
+        events.publish('Customers')
         
         # Return updated customer
         updated_customer = get_customer(cursor, customer_id)
@@ -1,37 +1,565 @@
 import mysql.connector
 from mysql.connector.errors import Error
 import logging
+import threading
+import time
+import weakref
+import queue
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from . import query_stats
 
 # Configure logging for database module
 logger = logging.getLogger(__name__)
 
+# Default connection settings and pool sizing
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "Ahsan7424",
+    "database": "store",
+}
+POOL_SIZE = 8
+POOL_TIMEOUT = 10.0
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free within the borrow timeout."""
+    pass
+
+
+class PooledConnection:
+    """
+    Wrapper around a MySQL connection borrowed from a ConnectionPool.
+    Behaves like the underlying connection, except close() hands it back
+    to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool, raw_connection):
+        self._pool = pool
+        self._raw = raw_connection
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise Error("Pooled connection has already been returned to the pool.")
+        return getattr(raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return self._pool._new_cursor(self, *args, **kwargs)
+
+    def is_connected(self):
+        return self._raw is not None and self._raw.is_connected()
+
+    def close(self):
+        # Return the connection to the pool (idempotent)
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._return(raw)
+
+    def discard(self):
+        # Drop the connection instead of returning it, e.g. mid-way through a large
+        # unbuffered result that would take as long to read off as to finish (idempotent)
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._discard(raw)
+
+
+class ConnectionPool:
+    """
+    Fixed-size, thread-safe pool of MySQL connections.
+    Connections are health-checked when borrowed, rolled back when returned,
+    and callers wait (up to `timeout` seconds) when every connection is in use.
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT, **connect_kwargs):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self.size = size
+        self.timeout = timeout
+        self.connect_kwargs = connect_kwargs
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        # Signalled whenever a connection goes idle or a slot frees up
+        self._available = threading.Condition(self._lock)
+        self._created = 0
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            "borrows": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "health_check_failures": 0,
+            "connections_opened": 0,
+            "discarded": 0,
+        }
+
+    def _connect(self):
+        connection = mysql.connector.connect(**self.connect_kwargs)
+        with self._lock:
+            self._stats["connections_opened"] += 1
+        return connection
+
+    def _new_cursor(self, connection, *args, **kwargs):
+        # Single place where cursors are created for pooled connections
+        cursor = connection._raw.cursor(*args, **kwargs)
+        if query_stats.ENABLED:
+            return query_stats.InstrumentedCursor(cursor)
+        return cursor
+
+    def _is_healthy(self, raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout=None):
+        # Borrow a healthy connection, opening a new one if the pool is not yet full
+        if self._closed:
+            raise Error("Connection pool is closed.")
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        waited = False
+        raw = None
+        while raw is None:
+            with self._available:
+                while True:
+                    if self._closed:
+                        raise Error("Connection pool is closed.")
+                    try:
+                        raw = self._idle.get_nowait()
+                        break
+                    except queue.Empty:
+                        pass
+                    if self._created < self.size:
+                        self._created += 1
+                        break
+                    remaining = timeout - (time.perf_counter() - started)
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout:.1f}s waiting for a database connection "
+                            f"(pool size {self.size})."
+                        )
+                    waited = True
+                    self._available.wait(remaining)
+            if raw is None:
+                try:
+                    raw = self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+                break
+            # Health check on borrow; replace dead connections transparently
+            if not self._is_healthy(raw):
+                with self._lock:
+                    self._stats["health_check_failures"] += 1
+                try:
+                    raw.close()
+                except Exception:
+                    pass
+                try:
+                    raw = self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+
+        wait_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._in_use += 1
+            self._stats["borrows"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["total_wait_ms"] += wait_ms
+            self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+        return PooledConnection(self, raw)
+
+    def _release_slot(self):
+        # A connection was closed for good; wake one waiter so it can open a replacement
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    def _return(self, raw):
+        with self._lock:
+            self._in_use -= 1
+        try:
+            # Never hand an open transaction to the next borrower
+            if raw.is_connected():
+                raw.rollback()
+                if not self._closed:
+                    with self._available:
+                        self._idle.put(raw)
+                        self._available.notify()
+                    return
+        except Exception as e:
+            logger.warning(f"Discarding pooled connection after reset failure: {e}")
+        try:
+            raw.close()
+        except Exception:
+            pass
+        self._release_slot()
+
+    def _discard(self, raw):
+        # Close the socket without the QUIT handshake, which would first read off any
+        # pending result; the server aborts the running statement when the client goes
+        with self._lock:
+            self._in_use -= 1
+            self._stats["discarded"] += 1
+        self._release_slot()
+        try:
+            shutdown = getattr(raw, "shutdown", None)
+            if shutdown is not None:
+                shutdown()
+            else:
+                raw.close()
+        except Exception as e:
+            logger.debug(f"Error dropping pooled connection: {e}")
+
+    @contextmanager
+    def connection(self, timeout=None, dictionary=True):
+        # Borrow a connection and cursor for the duration of a with-block
+        connection = self.acquire(timeout)
+        cursor = None
+        try:
+            cursor = connection.cursor(dictionary=dictionary)
+            yield connection, cursor
+        finally:
+            close_db(connection, cursor)
+
+    def stats(self):
+        # Snapshot of pool occupancy and wait metrics
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["open"] = self._created
+            stats["in_use"] = self._in_use
+        stats["idle"] = self._idle.qsize()
+        stats["avg_wait_ms"] = stats["total_wait_ms"] / stats["borrows"] if stats["borrows"] else 0.0
+        return stats
+
+    def close_all(self):
+        # Close idle connections and stop accepting new borrows
+        with self._available:
+            self._closed = True
+            self._available.notify_all()
+        while True:
+            try:
+                raw = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                raw.close()
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_thread_state = threading.local()
+
+
+def get_pool(host=None, user=None, password=None, database=None):
+    # Returns the shared pool for a connection configuration, creating it on first use
+    settings = dict(DB_CONFIG)
+    for key, value in (("host", host), ("user", user), ("password", password), ("database", database)):
+        if value is not None:
+            settings[key] = value
+    key = (settings["host"], settings["user"], settings["database"])
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(size=POOL_SIZE, timeout=POOL_TIMEOUT, **settings)
+            _pools[key] = pool
+        return pool
+
+
+def configure_pool(size=None, timeout=None):
+    # Changes pool sizing; takes effect for pools created after the call
+    global POOL_SIZE, POOL_TIMEOUT
+    if size is not None:
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        POOL_SIZE = size
+    if timeout is not None:
+        POOL_TIMEOUT = timeout
+
+
+def pool_stats():
+    # Returns stats for every pool that has been created
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {f"{user}@{host}/{database}": pool.stats() for (host, user, database), pool in pools}
+
+
 def get_db(host="localhost", user="root", password="Ahsan7424", database="store"):
-    # Establishes a connection to the MySQL database and returns the connection and cursor
-    connection = None
-    cursor = None
+    # Borrows a pooled connection and returns the connection and cursor;
+    # close_db() returns the connection to the pool
     try:
-        # Establish the connection
-        connection = mysql.connector.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=database,
-        )
-        if connection.is_connected():
-            # Use dictionary=True to return results as dictionaries
-            cursor = connection.cursor(dictionary=True)
-            return connection, cursor
-    except Error as e:
+        connection = get_pool(host, user, password, database).acquire()
+        # Use dictionary=True to return results as dictionaries
+        cursor = connection.cursor(dictionary=True)
+        return connection, cursor
+    except (Error, PoolTimeoutError) as e:
         raise Exception(f"Error connecting to the database: {e}")
 
 
+class _ThreadCheckout:
+    # Connection held by one thread; handed back when the owning thread goes away
+    def __init__(self, connection):
+        self.connection = connection
+        self.depth = 0
+        weakref.finalize(self, connection.close)
+
+
+def get_thread_connection():
+    # Returns the connection checked out by the current thread, borrowing one if needed
+    checkout = getattr(_thread_state, "checkout", None)
+    if checkout is None or checkout.connection._raw is None:
+        connection, cursor = get_db()
+        cursor.close()
+        checkout = _ThreadCheckout(connection)
+        _thread_state.checkout = checkout
+    return checkout.connection
+
+
+def release_thread_connection():
+    # Returns the current thread's checked-out connection to the pool
+    checkout = getattr(_thread_state, "checkout", None)
+    cursor = getattr(_thread_state, "cursor", None)
+    _thread_state.cursor = None
+    if cursor is not None:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+    if checkout is not None:
+        _thread_state.checkout = None
+        checkout.connection.close()
+
+
+@contextmanager
+def thread_connection(lazy=False):
+    """
+    Scope a per-thread connection checkout to a with-block.
+    Nested scopes on the same thread share one connection; it goes back
+    to the pool when the outermost scope exits. A lazy scope borrows
+    nothing up front (and yields None): it only returns whatever the
+    thread checked out inside the block, so code that waits on other
+    threads without querying holds no connection meanwhile.
+    """
+    if lazy:
+        if getattr(_thread_state, "checkout", None) is not None:
+            # An enclosing scope owns the checkout
+            yield None
+            return
+        try:
+            yield None
+        finally:
+            release_thread_connection()
+        return
+    connection = get_thread_connection()
+    checkout = _thread_state.checkout
+    checkout.depth += 1
+    try:
+        yield connection
+    finally:
+        checkout.depth -= 1
+        if checkout.depth == 0 and getattr(_thread_state, "checkout", None) is checkout:
+            release_thread_connection()
+
+
+def thread_scoped(func):
+    # Wraps a callback so any thread-bound DB access inside it is released afterwards
+    def wrapper(*args, **kwargs):
+        with thread_connection():
+            return func(*args, **kwargs)
+    wrapper.__name__ = getattr(func, "__name__", "thread_scoped")
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+class ThreadBoundConnection:
+    """
+    Connection handle that can be shared across threads: every attribute
+    access resolves to the connection checked out by the calling thread.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_thread_connection(), name)
+
+    def close(self):
+        release_thread_connection()
+
+
+class ThreadBoundCursor:
+    """
+    Cursor handle that can be shared across threads. Each thread gets its
+    own dictionary cursor on its own pooled connection, so result sets from
+    concurrent handlers never interleave.
+    """
+
+    def _cursor(self):
+        connection = get_thread_connection()
+        cursor = getattr(_thread_state, "cursor", None)
+        if cursor is None or getattr(_thread_state, "cursor_owner", None) is not connection._raw:
+            cursor = connection.cursor(dictionary=True)
+            _thread_state.cursor = cursor
+            _thread_state.cursor_owner = connection._raw
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor(), name)
+
+    def __iter__(self):
+        return iter(self._cursor())
+
+    def close(self):
+        cursor = getattr(_thread_state, "cursor", None)
+        _thread_state.cursor = None
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+def get_shared_db():
+    # Returns a (connection, cursor) pair that is safe to share between UI threads
+    return ThreadBoundConnection(), ThreadBoundCursor()
+
+
 def close_db(connection, cursor):
-    # Closes a database connection and cursor
+    # Closes a cursor and returns its connection to the pool
     try:
         if cursor:
             cursor.close()
-        if connection and connection.is_connected():
+    except Error as e:
+        logger.error(f"Error closing cursor: {e}")
+    # Always hand the connection back, even one the server dropped: the pool
+    # closes dead connections and frees their slot
+    try:
+        if connection:
             connection.close()
-            logger.info("Database connection closed successfully.")
+            logger.debug("Database connection returned to pool.")
     except Error as e:
         logger.error(f"Error closing connection: {e}")
+
+
+STREAM_CHUNK_SIZE = 1000
+
+
+def stream_query(cursor, query, params=(), chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Run a SELECT and yield its rows, fetched chunk_size at a time from the
+    server (cursors are unbuffered), so memory stays bounded however many
+    rows match. The cursor is busy until the generator finishes; if the
+    consumer stops early the rest of the result is read off and dropped so
+    the connection can run its next statement. That costs as much as reading
+    it, so a consumer abandoning a large result should discard() the pooled
+    connection before closing the generator; the drain then stops at once.
+    """
+    cursor.execute(query, params)
+    finished = False
+    try:
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if not chunk:
+                finished = True
+                return
+            yield from chunk
+    finally:
+        if not finished:
+            try:
+                while cursor.fetchmany(chunk_size):
+                    pass
+            except Exception as e:
+                logger.debug(f"Could not drain streamed result: {e}")
+
+
+def _as_date(value):
+    # Accepts a date, datetime or 'YYYY-MM-DD[ ...]' string
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def day_bounds(start_date, end_date=None):
+    # Half-open [start, end + 1 day) bounds for an inclusive range of calendar days
+    start = _as_date(start_date)
+    end = _as_date(end_date) if end_date is not None else start
+    return start.strftime('%Y-%m-%d'), (end + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def date_range_clause(column, start_date, end_date=None):
+    """
+    Index-friendly predicate covering whole days start_date..end_date.
+    Returns ("column >= %s AND column < %s", [start, end + 1 day]) so the
+    column is compared bare instead of being wrapped in DATE().
+    """
+    return f"{column} >= %s AND {column} < %s", list(day_bounds(start_date, end_date))
+
+
+def _one_year_earlier(day):
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:
+        return day.replace(year=day.year - 1, day=28)  # 29 Feb
+
+
+def comparison_periods(start_date, end_date, compare=("previous",)):
+    """
+    Date windows for period-over-period metrics as [(label, start, end)],
+    inclusive 'YYYY-MM-DD' days. 'current' comes first, then each requested
+    comparison: 'previous' (the same number of days just before the range)
+    or 'last_year' (the same dates one year earlier).
+    """
+    start = _as_date(start_date)
+    end = _as_date(end_date)
+    periods = [("current", start, end)]
+    for label in compare:
+        if label == "previous":
+            length = end - start + timedelta(days=1)
+            periods.append((label, start - length, start - timedelta(days=1)))
+        elif label == "last_year":
+            periods.append((label, _one_year_earlier(start), _one_year_earlier(end)))
+        else:
+            raise ValueError(f"Unknown comparison period: {label}")
+    return [(label, s.strftime('%Y-%m-%d'), e.strftime('%Y-%m-%d')) for label, s, e in periods]
+
+
+def period_sums(column, periods, measures):
+    """
+    Conditional aggregation over several date windows in one scan.
+    periods come from comparison_periods(); measures maps an output name to
+    the expression to sum. Returns (select_sql, select_params, where_sql,
+    where_params): select_sql has one "<label>_<name>" column per window and
+    measure, where_sql limits the scan to the union of the windows.
+    """
+    columns, select_params = [], []
+    ranges, where_params = [], []
+    for label, start, end in periods:
+        in_period, bounds = date_range_clause(column, start, end)
+        for name, expression in measures.items():
+            columns.append(f"SUM(CASE WHEN {in_period} THEN {expression} END) AS {label}_{name}")
+            select_params += bounds
+        ranges.append(f"({in_period})")
+        where_params += bounds
+    return ",\n".join(columns), select_params, f"({' OR '.join(ranges)})", where_params
+
+
+def split_periods(row, periods, measures):
+    # {label: {name: value}} from a period_sums() row; empty windows give 0
+    row = row or {}
+    return {
+        label: {name: row.get(f"{label}_{name}") or 0 for name in measures}
+        for label, _, _ in periods
+    }
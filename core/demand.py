@@ -0,0 +1,182 @@
+"""
+Per-SKU demand-rate index.
+
+DemandRates holds one row per SKU with an exponentially weighted moving
+average of the units sold per day, so stock-cover estimates read one row
+per product instead of aggregating SaleItems history.
+
+Each row stores `level`, the units sold with every sale weighted by
+exp(-age / DEMAND_EWMA_DAYS), as of `updated_at`. A sale decays the level
+to its own time and adds its quantity (record_sale, inside log_sale's
+transaction); readers decay it to the present. level / DEMAND_EWMA_DAYS is
+the daily rate, scaled up while a SKU has less history than the average
+spans (`tracked_since`).
+
+Sales that bypass log_sale (imports, simulations) are picked up by
+rebuild_demand_rates, also available as `python -m core.demand` for a
+scheduled refresh.
+"""
+import argparse
+import logging
+import math
+from datetime import datetime, timedelta
+
+from mysql.connector import errorcode
+from mysql.connector.errors import Error
+
+from . import events
+from .database import get_db, close_db
+
+# Configure logging for demand module
+logger = logging.getLogger(__name__)
+
+DEMAND_EWMA_DAYS = 14  # time constant of the average: a sale's weight falls to 1/e after this many days
+DEMAND_LOOKBACK_DAYS = 90  # history read by a rebuild; older sales weigh under 0.2%
+
+CREATE_DEMAND_TABLE = """
+    CREATE TABLE IF NOT EXISTS DemandRates (
+        SKU VARCHAR(255) NOT NULL PRIMARY KEY,
+        level DOUBLE NOT NULL DEFAULT 0,
+        updated_at DATETIME NOT NULL,
+        tracked_since DATETIME NOT NULL,
+        FOREIGN KEY (SKU) REFERENCES Products(SKU)
+    )
+"""
+
+_SECONDS_PER_DAY = 86400
+
+_missing_table_logged = False
+
+
+def ensure_demand_table(cursor):
+    # Create the demand table if needed; returns True when it was just created
+    cursor.execute(
+        "SELECT COUNT(*) AS found FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = 'DemandRates'"
+    )
+    if cursor.fetchone()['found']:
+        return False
+    cursor.execute(CREATE_DEMAND_TABLE)
+    return True
+
+
+def record_sale(cursor, sale_id):
+    """
+    Fold one sale into the demand index. Called inside log_sale's
+    transaction, so the index commits or rolls back together with the sale.
+    """
+    global _missing_table_logged
+    decay_seconds = DEMAND_EWMA_DAYS * _SECONDS_PER_DAY
+    try:
+        cursor.execute(f"""
+            INSERT INTO DemandRates (SKU, level, updated_at, tracked_since)
+            SELECT * FROM (
+                SELECT si.SKU, SUM(si.quantity) AS level, s.sale_datetime AS updated_at, s.sale_datetime AS tracked_since
+                FROM Sales s
+                JOIN SaleItems si ON si.sale_id = s.sale_id
+                WHERE s.sale_id = %s
+                GROUP BY si.SKU, s.sale_datetime
+            ) AS sold
+            ON DUPLICATE KEY UPDATE
+                level = DemandRates.level * EXP(-GREATEST(TIMESTAMPDIFF(SECOND, DemandRates.updated_at, sold.updated_at), 0) / {decay_seconds}) + sold.level,
+                updated_at = GREATEST(DemandRates.updated_at, sold.updated_at)
+        """, (sale_id,))
+    except Error as e:
+        # A missing table must not block checkout; the index can be rebuilt later
+        if e.errno != errorcode.ER_NO_SUCH_TABLE:
+            raise
+        if not _missing_table_logged:
+            logger.warning("DemandRates table is missing; run `python -m core.demand` to build it.")
+            _missing_table_logged = True
+
+
+def rebuild_demand_rates(connection, cursor, now=None):
+    """
+    Recompute every SKU's demand level from the last DEMAND_LOOKBACK_DAYS of
+    sales. Returns the number of SKUs written.
+    """
+    ensure_demand_table(cursor)
+    now = (now or datetime.now()).replace(microsecond=0)
+    try:
+        cursor.execute("DELETE FROM DemandRates")
+        cursor.execute(f"""
+            INSERT INTO DemandRates (SKU, level, updated_at, tracked_since)
+            SELECT si.SKU,
+                   SUM(si.quantity * EXP(-TIMESTAMPDIFF(SECOND, s.sale_datetime, %s) / {DEMAND_EWMA_DAYS * _SECONDS_PER_DAY})),
+                   %s,
+                   MIN(s.sale_datetime)
+            FROM Sales s
+            JOIN SaleItems si ON si.sale_id = s.sale_id
+            WHERE s.sale_datetime >= %s AND s.sale_datetime <= %s
+            GROUP BY si.SKU
+        """, (now, now, now - timedelta(days=DEMAND_LOOKBACK_DAYS), now))
+        rows = cursor.rowcount
+        connection.commit()
+        events.publish('DemandRates')
+        logger.info(f"Rebuilt DemandRates: {rows} SKUs")
+        return rows
+    except Exception as e:
+        connection.rollback()
+        raise Exception(f"Error rebuilding demand rates: {e}")
+
+
+def daily_rate(level, updated_at, tracked_since, now=None):
+    """Units per day for a DemandRates row, decayed to now"""
+    now = now or datetime.now()
+    age_days = max((now - updated_at).total_seconds(), 0) / _SECONDS_PER_DAY
+    # Young SKUs have had less time to build up weight; at least a day so one sale is not an extreme rate
+    history_days = max((now - tracked_since).total_seconds() / _SECONDS_PER_DAY, 1.0)
+    coverage = 1 - math.exp(-history_days / DEMAND_EWMA_DAYS)
+    return float(level) * math.exp(-age_days / DEMAND_EWMA_DAYS) / (DEMAND_EWMA_DAYS * coverage)
+
+
+def get_stock_demand(cursor, now=None):
+    """
+    Every product's stock, low-stock threshold, material and daily demand
+    rate (0.0 for SKUs with no recent sales), keyed by SKU. One read of
+    Products and DemandRates; no sales history is scanned.
+    """
+    try:
+        cursor.execute("""
+            SELECT p.SKU, p.material_id, p.stock, p.low_stock_threshold,
+                   d.level, d.updated_at, d.tracked_since
+            FROM Products p
+            LEFT JOIN DemandRates d ON d.SKU = p.SKU
+        """)
+        now = now or datetime.now()
+        return {
+            row['SKU']: {
+                'material_id': row['material_id'],
+                'stock': int(row['stock']),
+                'low_stock_threshold': int(row['low_stock_threshold'] or 0),
+                'daily_rate': daily_rate(row['level'], row['updated_at'], row['tracked_since'], now) if row['level'] is not None else 0.0,
+            }
+            for row in cursor.fetchall()
+        }
+    except Exception as e:
+        raise ValueError(f"Error loading demand rates: {e}")
+
+
+def ensure_demand_rates():
+    # Startup hook: create the table and backfill it the first time
+    connection, cursor = get_db()
+    try:
+        if ensure_demand_table(cursor):
+            logger.info("Created DemandRates table; backfilling from recent sales")
+            rebuild_demand_rates(connection, cursor)
+    finally:
+        close_db(connection, cursor)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+    parser = argparse.ArgumentParser(description="Rebuild the DemandRates index from recent sales (safe to schedule)")
+    parser.parse_args()
+
+    connection, cursor = get_db()
+    try:
+        rows = rebuild_demand_rates(connection, cursor)
+        print(f"DemandRates rebuilt: {rows} SKUs written")
+    finally:
+        close_db(connection, cursor)
@@ -1,4 +1,5 @@
 from .database import close_db
+from . import events
 
 
 def handle_error(connection, cursor, error_message):
@@ -14,6 +15,7 @@ def add_employee(connection, cursor, name):
         query = "INSERT INTO Employees (name) VALUES (%s)"
         cursor.execute(query, (name,))
         connection.commit()
+        events.publish('Employees')
 
         employee_id = cursor.lastrowid
         return get_employee(cursor, employee_id)
@@ -27,6 +29,7 @@ def update_employee(connection, cursor, employee_id, name):
         query = "UPDATE Employees SET name = %s WHERE employee_id = %s"
         cursor.execute(query, (name, employee_id))
         connection.commit()
+        events.publish('Employees')
 
         return get_employee(cursor, employee_id)
     except Exception as e:
@@ -40,6 +43,7 @@ def delete_employee(connection, cursor, employee_id):
         query = "DELETE FROM Employees WHERE employee_id = %s"
         cursor.execute(query, (employee_id,))
         connection.commit()
+        events.publish('Employees')
         return employee
     except Exception as e:
         handle_error(connection, cursor, f"Error deleting employee: {e}")
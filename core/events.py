@@ -0,0 +1,40 @@
+"""
+In-process data change notifications.
+Writers publish the tables they changed once their transaction commits;
+read-side caches subscribe and drop results that depend on those tables.
+"""
+import logging
+import threading
+
+# Configure logging for events module
+logger = logging.getLogger(__name__)
+
+_subscribers = []
+_lock = threading.Lock()
+
+
+def subscribe(callback):
+    # callback(tables) is called with a frozenset of table names after each write
+    with _lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+
+def unsubscribe(callback):
+    with _lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+
+def publish(*tables):
+    # Notify subscribers that the given tables changed; subscriber errors never reach the writer
+    changed = frozenset(tables)
+    if not changed:
+        return
+    with _lock:
+        subscribers = list(_subscribers)
+    for callback in subscribers:
+        try:
+            callback(changed)
+        except Exception as e:
+            logger.error(f"Error in data change subscriber {getattr(callback, '__name__', callback)}: {e}")
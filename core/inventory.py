@@ -1,4 +1,5 @@
-from .database import close_db
+from .database import close_db, stream_query, STREAM_CHUNK_SIZE
+from . import events
 import logging
 
 # Configure logging for inventory module
@@ -43,6 +44,7 @@ def add_item(connection, cursor, sku, name, category_id, price, stock, supplier_
             (sku, name, category_id, price, stock, supplier_id, cost)
         )
         connection.commit()
+        events.publish('Products')
         return get_item(connection, cursor, sku)
     except Exception as e:
         handle_error(connection, cursor, f"Error adding item: {e}")
@@ -50,6 +52,39 @@ def add_item(connection, cursor, sku, name, category_id, price, stock, supplier_
 
 
 
+def add_items_bulk(connection, cursor, items):
+    """
+    Insert many already-validated products with one multi-row INSERT and a
+    single commit. items are (sku, name, category_id, price, stock,
+    supplier_id, cost) tuples. Rolls back and raises if any row is rejected.
+    """
+    try:
+        cursor.executemany(
+            "INSERT INTO Products (SKU, name, category_id, price, stock, supplier_id, cost) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            items
+        )
+        connection.commit()
+        events.publish('Products')
+        return len(items)
+    except Exception as e:
+        connection.rollback()
+        handle_error(connection, cursor, f"Error adding items: {e}")
+
+
+def get_import_keys(cursor):
+    # Existing SKUs plus valid category and supplier IDs, for validating imports without a query per row
+    try:
+        cursor.execute("SELECT SKU FROM Products")
+        skus = {row["SKU"] for row in cursor.fetchall()}
+        cursor.execute("SELECT category_id FROM Categories")
+        category_ids = {row["category_id"] for row in cursor.fetchall()}
+        cursor.execute("SELECT supplier_id FROM Suppliers")
+        supplier_ids = {row["supplier_id"] for row in cursor.fetchall()}
+        return skus, category_ids, supplier_ids
+    except Exception as e:
+        handle_error(None, cursor, f"Error loading inventory keys: {e}")
+
+
 def delete_item(connection, cursor, sku):
     # Deletes an item from the inventory, including related inventory adjustments
     try:
@@ -59,6 +94,7 @@ def delete_item(connection, cursor, sku):
         # Then, delete the product itself
         cursor.execute("DELETE FROM Products WHERE SKU = %s", (sku,))
         connection.commit()
+        events.publish('Products', 'InventoryAdjustments')
         return item
     except Exception as e:
         handle_error(connection, cursor, f"Error deleting item: {e}")
@@ -111,6 +147,15 @@ def view_inventory(connection, cursor):
         handle_error(connection, cursor, f"Error viewing inventory: {e}")
 
 
+def iter_inventory(cursor, chunk_size=STREAM_CHUNK_SIZE):
+    # Streams the inventory rows of view_inventory (same columns) for exports
+    query = (
+        "SELECT p.SKU, p.name, c.name AS category, p.price, p.stock, p.supplier_id, p.cost "
+        "FROM Products p JOIN Categories c ON c.category_id = p.category_id ORDER BY p.SKU"
+    )
+    return stream_query(cursor, query, (), chunk_size)
+
+
 def check_low_stock(connection, cursor, threshold=None):
     # Get items with low stock using individual product thresholds
     try:
@@ -144,6 +189,7 @@ def adjust_stock(connection, cursor, sku, quantity_change, reason, employee_id):
             (sku, quantity_change, reason, employee_id)
         )
         connection.commit()
+        events.publish('Products', 'InventoryAdjustments')
         
         # Check for low stock and send alert if needed
         if check_and_alert_low_stock:
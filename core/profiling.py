@@ -0,0 +1,195 @@
+"""
+Opt-in per-action profiling for POS UI handlers.
+
+Wrapped handlers (the Ui.py _threaded_* actions and the callbacks built in
+main.create_pos_app_callbacks) record each run as an action with:
+    wall_ms    time the handler took on its thread
+    db_ms      part of it spent in SQL (from core.query_stats cursors)
+    python_ms  the rest: Python code plus Tk calls made inline
+    tk_ms      time from the handler returning until Tk has worked through
+               the redraw/layout it queued (measured with after_idle)
+
+Actions slower than SLOW_ACTION_MS are logged, and with profile capture on
+the outermost action is run under cProfile and kept as a .prof file in
+logs/profiles/ when it turns out slow.
+
+Off by default: set DIGICLIMATE_PROFILE=1 (and DIGICLIMATE_PROFILE_DUMPS=1
+for cProfile dumps) or call configure_profiling() at runtime.
+"""
+import cProfile
+import functools
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from . import query_stats
+
+# Configure logging for profiling module
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("DIGICLIMATE_PROFILE", "0") == "1"
+CAPTURE_PROFILES = os.environ.get("DIGICLIMATE_PROFILE_DUMPS", "0") == "1"
+SLOW_ACTION_MS = float(os.environ.get("DIGICLIMATE_SLOW_ACTION_MS", "300"))
+MAX_ACTIONS = 1000  # actions kept for the diagnostics window
+PROFILE_DIR = os.path.join("logs", "profiles")
+
+_actions = deque(maxlen=MAX_ACTIONS)
+_actions_lock = threading.Lock()
+_local = threading.local()
+_profile_lock = threading.Lock()  # cProfile can only follow one action at a time
+_root = None
+
+
+def configure_profiling(enabled=None, capture_profiles=None, slow_action_ms=None):
+    # Turns profiling on/off at runtime; DB time needs query instrumentation on too
+    global ENABLED, CAPTURE_PROFILES, SLOW_ACTION_MS
+    if enabled is not None:
+        ENABLED = bool(enabled)
+        if ENABLED and not query_stats.ENABLED:
+            query_stats.configure_query_stats(enabled=True)
+    if capture_profiles is not None:
+        CAPTURE_PROFILES = bool(capture_profiles)
+    if slow_action_ms is not None:
+        if slow_action_ms < 0:
+            raise ValueError("Slow action threshold must not be negative.")
+        SLOW_ACTION_MS = float(slow_action_ms)
+
+
+def attach(root):
+    # Tk root used to measure how long the UI takes to catch up after an action
+    global _root
+    _root = root
+
+
+def profiled(name, func):
+    """Wrap a UI handler so each call is recorded as an action while profiling is on"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return func(*args, **kwargs)
+        return _run_action(name, func, args, kwargs)
+    return wrapper
+
+
+def _run_action(name, func, args, kwargs):
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    profile = None
+    if depth == 0 and CAPTURE_PROFILES and _profile_lock.acquire(blocking=False):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active (e.g. a debugger); skip the dump this time
+            profile = None
+            _profile_lock.release()
+
+    started_at = datetime.now()
+    started = time.perf_counter()
+    error = None
+    try:
+        with query_stats.db_time_counter() as db_time:
+            return func(*args, **kwargs)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        wall_ms = (time.perf_counter() - started) * 1000
+        _local.depth = depth
+        if profile is not None:
+            profile.disable()
+            _profile_lock.release()
+
+        action = {
+            'name': name,
+            'started_at': started_at,
+            'thread': threading.current_thread().name,
+            'nested': depth > 0,
+            'wall_ms': wall_ms,
+            'db_ms': db_time[0],
+            'queries': db_time[1],
+            'python_ms': max(wall_ms - db_time[0], 0.0),
+            'tk_ms': None,
+            'error': str(error) if error else None,
+            'profile': None,
+        }
+        if profile is not None and wall_ms >= SLOW_ACTION_MS:
+            action['profile'] = _dump_profile(profile, name, started_at)
+        with _actions_lock:
+            _actions.append(action)
+        if depth == 0:
+            _measure_render(action)
+
+
+def _measure_render(action):
+    # Tk runs idle callbacks in order, so ours fires after the redraws the handler queued
+    done = time.perf_counter()
+
+    def finish():
+        action['tk_ms'] = (time.perf_counter() - done) * 1000
+        _log_if_slow(action)
+
+    try:
+        if _root is None:
+            raise RuntimeError("no Tk root attached")
+        _root.after_idle(finish)
+    except Exception:
+        _log_if_slow(action)
+
+
+def _log_if_slow(action):
+    total_ms = action['wall_ms'] + (action['tk_ms'] or 0)
+    if total_ms < SLOW_ACTION_MS:
+        return
+    tk_part = f", tk {action['tk_ms']:.0f} ms" if action['tk_ms'] is not None else ""
+    dump = f"; profile: {action['profile']}" if action['profile'] else ""
+    logger.warning(
+        f"Slow action {action['name']}: {action['wall_ms']:.0f} ms "
+        f"(db {action['db_ms']:.0f} ms in {action['queries']} queries, "
+        f"python {action['python_ms']:.0f} ms{tk_part}){dump}"
+    )
+
+
+def _dump_profile(profile, name, started_at):
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        path = os.path.join(PROFILE_DIR, f"{started_at.strftime('%Y%m%d_%H%M%S_%f')}_{safe_name}.prof")
+        profile.dump_stats(path)
+        return path
+    except Exception as e:
+        logger.error(f"Error writing profile for {name}: {e}")
+        return None
+
+
+def slowest_actions(limit=50, include_nested=False):
+    """Slowest recorded actions of the session, by wall time plus Tk time"""
+    with _actions_lock:
+        actions = [dict(action) for action in _actions if include_nested or not action['nested']]
+    actions.sort(key=lambda action: action['wall_ms'] + (action['tk_ms'] or 0), reverse=True)
+    return actions[:limit]
+
+
+def action_summary():
+    # Per action name: count, average and worst wall time, average DB share
+    summary = {}
+    with _actions_lock:
+        actions = list(_actions)
+    for action in actions:
+        entry = summary.setdefault(action['name'], {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'db_ms': 0.0})
+        entry['count'] += 1
+        entry['total_ms'] += action['wall_ms']
+        entry['max_ms'] = max(entry['max_ms'], action['wall_ms'])
+        entry['db_ms'] += action['db_ms']
+    for entry in summary.values():
+        entry['avg_ms'] = entry['total_ms'] / entry['count']
+    return summary
+
+
+def reset_actions():
+    with _actions_lock:
+        _actions.clear()
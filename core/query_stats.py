@@ -0,0 +1,303 @@
+"""
+Query instrumentation.
+
+Cursors handed out by the connection pool are wrapped in an
+InstrumentedCursor that times every statement (execute plus fetches) and
+records it under a fingerprint: the SQL with literals and placeholder
+lists collapsed, so the same query with different parameters is counted
+together. Per fingerprint we keep totals and a rolling window of recent
+latencies for p50/p95/p99; per Python call site we keep call counts, which
+shows which tab or module is hitting the database hardest.
+
+Statements slower than SLOW_QUERY_MS are written to logs/slow_queries.log,
+next to logs/digiclimate_store.log.
+
+Recording is a few dictionary updates under a lock, cheap enough to leave on.
+Set DIGICLIMATE_QUERY_STATS=0 to turn it off.
+"""
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Configure logging for query stats module
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("DIGICLIMATE_QUERY_STATS", "1") != "0"
+SLOW_QUERY_MS = float(os.environ.get("DIGICLIMATE_SLOW_QUERY_MS", "250"))
+LATENCY_WINDOW = 500  # recent latencies kept per fingerprint for percentiles
+SLOW_LOG_PATH = os.path.join("logs", "slow_queries.log")
+
+_CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+_SKIP_FILES = (os.path.join(_CORE_DIR, "database.py"), os.path.abspath(__file__))
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_lock = threading.Lock()
+_by_fingerprint = {}
+_by_call_site = {}
+_slow_logger = None
+_tally = threading.local()
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(statement):
+    # Normalised statement text: literals and %s become ?, IN (...) lists become (?+)
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode("utf-8", "replace")
+    text = _STRING_LITERAL.sub("?", statement)
+    text = text.replace("%s", "?")
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _VALUE_LIST.sub("(?+)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def configure_query_stats(enabled=None, slow_query_ms=None):
+    # Turns instrumentation on/off or changes the slow-query threshold at runtime
+    global ENABLED, SLOW_QUERY_MS
+    if enabled is not None:
+        ENABLED = bool(enabled)
+    if slow_query_ms is not None:
+        if slow_query_ms < 0:
+            raise ValueError("Slow query threshold must not be negative.")
+        SLOW_QUERY_MS = float(slow_query_ms)
+
+
+@functools.lru_cache(maxsize=256)
+def _short_path(filename):
+    try:
+        return os.path.relpath(filename)
+    except ValueError:
+        return filename
+
+
+def _call_site():
+    # First frame outside the database layer, as "path/to/module.py:123 in function"
+    frame = sys._getframe(3)
+    while frame is not None and frame.f_code.co_filename in _SKIP_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    code = frame.f_code
+    return f"{_short_path(code.co_filename)}:{frame.f_lineno} in {code.co_name}"
+
+
+def _get_slow_logger():
+    # Dedicated logger so slow statements land in their own file, not the main log
+    global _slow_logger
+    if _slow_logger is None:
+        slow_logger = logging.getLogger("digiclimate.slow_queries")
+        slow_logger.propagate = False
+        if not slow_logger.handlers:
+            try:
+                os.makedirs(os.path.dirname(SLOW_LOG_PATH), exist_ok=True)
+                handler = logging.FileHandler(SLOW_LOG_PATH)
+                handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+                slow_logger.addHandler(handler)
+            except OSError as e:
+                logger.warning(f"Slow query log unavailable ({e}); slow queries go to the main log")
+                slow_logger.propagate = True
+        slow_logger.setLevel(logging.INFO)
+        _slow_logger = slow_logger
+    return _slow_logger
+
+
+def record(statement, elapsed_ms, rows, call_site):
+    """Record one executed statement"""
+    key = fingerprint(statement)
+    with _lock:
+        stats = _by_fingerprint.get(key)
+        if stats is None:
+            stats = _by_fingerprint[key] = {
+                "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "slow": 0,
+                "latencies": deque(maxlen=LATENCY_WINDOW), "call_sites": set(),
+            }
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["rows"] += max(rows, 0)
+        stats["latencies"].append(elapsed_ms)
+        stats["call_sites"].add(call_site)
+
+        site = _by_call_site.get(call_site)
+        if site is None:
+            site = _by_call_site[call_site] = {"calls": 0, "total_ms": 0.0}
+        site["calls"] += 1
+        site["total_ms"] += elapsed_ms
+
+        slow = elapsed_ms >= SLOW_QUERY_MS
+        if slow:
+            stats["slow"] += 1
+
+    if slow:
+        _get_slow_logger().info(f"{elapsed_ms:.1f} ms, {rows} rows, {call_site}: {key}")
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def query_stats(sort_by="total_ms", limit=None):
+    """
+    Per-fingerprint statistics, busiest first: calls, total/avg/max ms,
+    p50/p95/p99 over the recent window, rows, slow count and call sites.
+    """
+    with _lock:
+        snapshot = [
+            (key, dict(stats, latencies=list(stats["latencies"]), call_sites=sorted(stats["call_sites"])))
+            for key, stats in _by_fingerprint.items()
+        ]
+    results = []
+    for key, stats in snapshot:
+        ordered = sorted(stats.pop("latencies"))
+        stats["fingerprint"] = key
+        stats["avg_ms"] = stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0
+        stats["p50_ms"] = _percentile(ordered, 0.50)
+        stats["p95_ms"] = _percentile(ordered, 0.95)
+        stats["p99_ms"] = _percentile(ordered, 0.99)
+        results.append(stats)
+    results.sort(key=lambda item: item[sort_by], reverse=True)
+    return results[:limit] if limit else results
+
+
+def call_site_stats(limit=None):
+    # Call sites ordered by total database time
+    with _lock:
+        sites = [dict(stats, call_site=site) for site, stats in _by_call_site.items()]
+    sites.sort(key=lambda item: item["total_ms"], reverse=True)
+    return sites[:limit] if limit else sites
+
+
+def _count_db_time(elapsed_ms, statements=0):
+    # Adds to every DB-time counter open on this thread (see db_time_counter)
+    counters = getattr(_tally, "counters", None)
+    if counters:
+        for counter in counters:
+            counter[0] += elapsed_ms
+            counter[1] += statements
+
+
+@contextmanager
+def db_time_counter():
+    """
+    Collect the database time spent on the current thread inside a with-block.
+    Yields [elapsed_ms, statements], filled in as statements run.
+    """
+    counter = [0.0, 0]
+    counters = _tally.__dict__.setdefault("counters", [])
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def reset_query_stats():
+    with _lock:
+        _by_fingerprint.clear()
+        _by_call_site.clear()
+
+
+def log_query_summary(limit=10):
+    # Writes the busiest statements and call sites to the main log (e.g. at shutdown)
+    for stats in query_stats(limit=limit):
+        logger.info(
+            f"{stats['calls']} calls, {stats['total_ms']:.0f} ms total, "
+            f"p50 {stats['p50_ms']:.1f} / p95 {stats['p95_ms']:.1f} / p99 {stats['p99_ms']:.1f} ms: "
+            f"{stats['fingerprint'][:200]}"
+        )
+    for site in call_site_stats(limit=limit):
+        logger.info(f"{site['calls']} queries, {site['total_ms']:.0f} ms total from {site['call_site']}")
+
+
+class InstrumentedCursor:
+    """
+    Cursor wrapper that times each statement from execute() through its
+    fetches and records it when the next statement starts or the cursor
+    closes. Everything else is passed through to the wrapped cursor.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._pending = None  # [statement, elapsed_ms, rows, call_site]
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            statement, elapsed_ms, rows, call_site = pending
+            if rows < 0:
+                rows = self._cursor.rowcount if self._cursor.rowcount is not None else -1
+            record(statement, elapsed_ms, rows, call_site)
+
+    def _timed(self, method, statement, *args, **kwargs):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return method(statement, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            _count_db_time(elapsed_ms, 1)
+            rowcount = self._cursor.rowcount
+            # Rows of an unbuffered SELECT are counted as they are fetched
+            rows = 0 if self._cursor.description is not None else (rowcount if rowcount is not None else -1)
+            self._pending = [statement, elapsed_ms, rows, _call_site()]
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._timed(self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        return self._timed(self._cursor.executemany, operation, seq_params, *args, **kwargs)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        _count_db_time(elapsed_ms)
+        pending = self._pending
+        if pending is not None:
+            pending[1] += elapsed_ms
+            if isinstance(result, list):
+                pending[2] += len(result)
+            elif result is not None:
+                pending[2] += 1
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def fetchmany(self, *args):
+        return self._fetch(self._cursor.fetchmany, *args)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        try:
+            self._finish()
+        except Exception as e:
+            logger.debug(f"Could not record query stats: {e}")
+        return self._cursor.close()
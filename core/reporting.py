@@ -1,111 +1,311 @@
 from . import database
 import datetime
+import os
 
-def sales_by_employee(cursor, employee_id):
-    # Returns all sales for a selected employee
-    try:
-        query = """
-            SELECT s.sale_id, s.sale_datetime, s.total, s.customer_id, c.name AS customer_name
+# Rows per page for the Reports tab and per fetchmany() round trip when streaming
+REPORT_PAGE_SIZE = int(os.environ.get("DIGICLIMATE_REPORT_PAGE_SIZE", "500"))
+STREAM_CHUNK_SIZE = int(os.environ.get("DIGICLIMATE_REPORT_CHUNK_SIZE", "1000"))
+
+# Report definitions shared by the list, page and streaming variants.
+# Rows are ordered newest first on `keys` (all DESC, last key unique within
+# the report), which is also the keyset used to resume after a page.
+# `fields` maps output keys to result columns; `sortable` gives the SQL
+# expression (never NULL) a page can be ordered by instead, with `keys`
+# breaking ties. `totals` is the aggregate behind the report's summary row.
+_REPORTS = {
+    "sales_by_employee": {
+        "label": "sales by employee report",
+        "columns": "s.sale_id, s.sale_datetime, s.total, s.customer_id, c.name AS customer_name",
+        "from": """
             FROM Sales s
             JOIN Customers c ON s.customer_id = c.customer_id
-            WHERE s.employee_id = %s
-            ORDER BY s.sale_datetime DESC
-        """
-        cursor.execute(query, (employee_id,))
-        results = cursor.fetchall()
-        return [
-            {
-                "sale_id": row["sale_id"],
-                "sale_datetime": row["sale_datetime"],
-                "total": row["total"],
-                "customer_id": row["customer_id"],
-                "customer_name": row["customer_name"]
-            }
-            for row in results
-        ] if results else []
-    except Exception as e:
-        raise ValueError(f"Error generating sales by employee report: {e}")
-
-def supplier_purchase_report(cursor, supplier_id):
-    # Returns all purchases for a selected supplier
-    try:
-        query = """
-            SELECT p.purchase_id, p.purchase_datetime, pi.SKU, pr.name AS product_name, pi.quantity, pr.price, (pi.quantity * pr.price) AS line_total
+        """,
+        "filter": "s.employee_id = %s",
+        "keys": (("s.sale_datetime", "sale_datetime"), ("s.sale_id", "sale_id")),
+        "fields": {
+            "sale_id": "sale_id",
+            "sale_datetime": "sale_datetime",
+            "total": "total",
+            "customer_id": "customer_id",
+            "customer_name": "customer_name",
+        },
+        "sortable": {
+            "sale_id": "s.sale_id",
+            "sale_datetime": "s.sale_datetime",
+            "total": "s.total",
+            "customer_id": "s.customer_id",
+            "customer_name": "c.name",
+        },
+        "totals": "COUNT(*) AS count, COALESCE(SUM(s.total), 0) AS total",
+    },
+    "supplier_purchases": {
+        "label": "supplier purchase report",
+        "columns": "p.purchase_id, p.purchase_datetime, pi.SKU, pr.name AS product_name, pi.quantity, pr.price, (pi.quantity * pr.price) AS line_total",
+        "from": """
             FROM Purchases p
             JOIN PurchaseItems pi ON p.purchase_id = pi.purchase_id
             JOIN Products pr ON pi.SKU = pr.SKU
-            WHERE p.supplier_id = %s
-            ORDER BY p.purchase_datetime DESC, p.purchase_id DESC
-        """
-        cursor.execute(query, (supplier_id,))
+        """,
+        "filter": "p.supplier_id = %s",
+        "keys": (("p.purchase_datetime", "purchase_datetime"), ("p.purchase_id", "purchase_id"), ("pi.SKU", "SKU")),
+        "fields": {
+            "purchase_id": "purchase_id",
+            "purchase_date": "purchase_datetime",
+            "SKU": "SKU",
+            "product_name": "product_name",
+            "quantity": "quantity",
+            "price": "price",
+            "line_total": "line_total",
+        },
+        "sortable": {
+            "purchase_id": "p.purchase_id",
+            "purchase_date": "p.purchase_datetime",
+            "SKU": "pi.SKU",
+            "product_name": "pr.name",
+            "quantity": "pi.quantity",
+            "price": "pr.price",
+            "line_total": "(pi.quantity * pr.price)",
+        },
+        "totals": "COUNT(*) AS count, COALESCE(SUM(pi.quantity), 0) AS quantity, COALESCE(SUM(pi.quantity * pr.price), 0) AS total",
+    },
+    "inventory_adjustments": {
+        "label": "inventory adjustment history",
+        "columns": "ia.adjustment_id, ia.adjustment_datetime, ia.SKU, ia.quantity_change, ia.reason, e.name AS employee_name",
+        "from": """
+            FROM InventoryAdjustments ia
+            JOIN Employees e ON ia.employee_id = e.employee_id
+        """,
+        "filter": None,
+        "keys": (("ia.adjustment_datetime", "adjustment_datetime"), ("ia.adjustment_id", "adjustment_id")),
+        "fields": {
+            "adjustment_id": "adjustment_id",
+            "date": "adjustment_datetime",
+            "SKU": "SKU",
+            "quantity_change": "quantity_change",
+            "employee_name": "employee_name",
+            "reason": "reason",
+        },
+        "sortable": {
+            "adjustment_id": "ia.adjustment_id",
+            "date": "ia.adjustment_datetime",
+            "SKU": "ia.SKU",
+            "quantity_change": "ia.quantity_change",
+            "employee_name": "e.name",
+            "reason": "COALESCE(ia.reason, '')",
+        },
+        "totals": "COUNT(*) AS count, COALESCE(SUM(ia.quantity_change), 0) AS net_change",
+    },
+    "customer_purchases": {
+        "label": "customer purchase history report",
+        "columns": "s.sale_id, s.sale_datetime, si.SKU, p.name AS product_name, si.quantity, si.price, s.total",
+        "from": """
+            FROM Sales s
+            JOIN SaleItems si ON s.sale_id = si.sale_id
+            JOIN Products p ON si.SKU = p.SKU
+        """,
+        "filter": "s.customer_id = %s",
+        "keys": (("s.sale_datetime", "sale_datetime"), ("s.sale_id", "sale_id"), ("si.SKU", "SKU")),
+        "fields": {
+            "sale_id": "sale_id",
+            "sale_datetime": "sale_datetime",
+            "SKU": "SKU",
+            "product_name": "product_name",
+            "quantity": "quantity",
+            "price": "price",
+            "total": "total",
+        },
+        "sortable": {
+            "sale_id": "s.sale_id",
+            "sale_datetime": "s.sale_datetime",
+            "SKU": "si.SKU",
+            "product_name": "p.name",
+            "quantity": "si.quantity",
+            "price": "si.price",
+            "total": "s.total",
+        },
+        # Matches the report rows: each line shows (and sums) its sale's total
+        "totals": "COUNT(*) AS count, COALESCE(SUM(si.quantity), 0) AS quantity, COALESCE(SUM(s.total), 0) AS total",
+    },
+}
+
+
+def _order_keys(report, sort=None):
+    # [(expression, result alias, descending)]: the report's own keys, or the
+    # sort field (selected as sort_value) followed by the keys as tie-breakers
+    if sort is None:
+        return [(column, alias, True) for column, alias in report["keys"]]
+    field, descending = sort
+    expression = report["sortable"][field]
+    return [(expression, "sort_value", descending)] + [
+        (column, alias, descending) for column, alias in report["keys"] if column != expression
+    ]
+
+
+def _report_query(report, params, after=None, limit=None, sort=None):
+    # Builds the SELECT for a report, resuming strictly after the `after` key when given
+    keys = _order_keys(report, sort)
+    conditions = []
+    query_params = list(params)
+    if report["filter"]:
+        conditions.append(report["filter"])
+    if after is not None:
+        # (k1 < a) OR (k1 = a AND k2 < b) OR ... — expanded so MySQL can range-scan the index
+        branches = []
+        for position, (column, _, descending) in enumerate(keys):
+            parts = [f"{earlier} = %s" for earlier, _, _ in keys[:position]]
+            parts.append(f"{column} {'<' if descending else '>'} %s")
+            branches.append("(" + " AND ".join(parts) + ")")
+            query_params.extend(after[:position])
+            query_params.append(after[position])
+        conditions.append("(" + " OR ".join(branches) + ")")
+
+    columns = report["columns"]
+    if sort is not None:
+        columns += f", {keys[0][0]} AS sort_value"
+    query = f"SELECT {columns} {report['from']}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY " + ", ".join(f"{column} {'DESC' if descending else 'ASC'}" for column, _, descending in keys)
+    if limit is not None:
+        query += " LIMIT %s"
+        query_params.append(limit)
+    return query, tuple(query_params)
+
+
+def _to_record(report, row):
+    return {name: row[column] for name, column in report["fields"].items()}
+
+
+def _fetch_all(cursor, name, params):
+    report = _REPORTS[name]
+    try:
+        query, query_params = _report_query(report, params)
+        cursor.execute(query, query_params)
         results = cursor.fetchall()
-        return [
-            {
-                "purchase_id": row["purchase_id"],
-                "purchase_date": row["purchase_datetime"],
-                "SKU": row["SKU"],
-                "product_name": row["product_name"],
-                "quantity": row["quantity"],
-                "price": row["price"],
-                "line_total": row["line_total"]
-            }
-            for row in results
-        ] if results else []
+        return [_to_record(report, row) for row in results] if results else []
     except Exception as e:
-        raise ValueError(f"Error generating supplier purchase report: {e}")
+        raise ValueError(f"Error generating {report['label']}: {e}")
 
-def inventory_adjustment_history(cursor):
-    # Returns all inventory adjustments
+
+def _fetch_page(cursor, name, params, after=None, page_size=None, sort=None):
+    """
+    One page of a report, newest first, or ordered by sort=(field,
+    descending) when given. Returns (rows, next_key); pass next_key back as
+    `after` (with the same sort) for the following page. next_key is None
+    on the last page.
+    """
+    report = _REPORTS[name]
+    page_size = page_size or REPORT_PAGE_SIZE
     try:
-        query = """
-            SELECT ia.adjustment_id, ia.adjustment_datetime, ia.SKU, ia.quantity_change, ia.reason, e.name AS employee_name
-            FROM InventoryAdjustments ia
-            JOIN Employees e ON ia.employee_id = e.employee_id
-            ORDER BY ia.adjustment_datetime DESC
-        """
-        cursor.execute(query)
-        results = cursor.fetchall()
-        return [
-            {
-                "adjustment_id": row["adjustment_id"],
-                "date": row["adjustment_datetime"],
-                "SKU": row["SKU"],
-                "quantity_change": row["quantity_change"],
-                "employee_name": row["employee_name"],
-                "reason": row["reason"]
-            }
-            for row in results
-        ] if results else []
+        # One extra row tells us whether another page exists without a COUNT
+        query, query_params = _report_query(report, params, after=after, limit=page_size + 1, sort=sort)
+        cursor.execute(query, query_params)
+        results = cursor.fetchall() or []
+    except Exception as e:
+        raise ValueError(f"Error generating {report['label']}: {e}")
+
+    next_key = None
+    if len(results) > page_size:
+        results = results[:page_size]
+        last = results[-1]
+        next_key = tuple(last[alias] for _, alias, _ in _order_keys(report, sort))
+    return [_to_record(report, row) for row in results], next_key
+
+
+def _stream(cursor, name, params, chunk_size=None):
+    """
+    Yields a report's rows one at a time, fetched chunk_size rows per round
+    trip (see database.stream_query), so memory is bounded by the chunk size.
+    The cursor is busy until the generator finishes or is closed.
+    """
+    report = _REPORTS[name]
+    query, query_params = _report_query(report, params)
+    rows = database.stream_query(cursor, query, query_params, chunk_size or STREAM_CHUNK_SIZE)
+    try:
+        for row in rows:
+            yield _to_record(report, row)
     except Exception as e:
-        raise ValueError(f"Error generating inventory adjustment history: {e}")
+        raise ValueError(f"Error generating {report['label']}: {e}")
+    finally:
+        rows.close()
+
+
+def _fetch_totals(cursor, name, params):
+    # Row count and sums for the whole report, without fetching its rows
+    report = _REPORTS[name]
+    try:
+        query = f"SELECT {report['totals']} {report['from']}"
+        if report["filter"]:
+            query += f" WHERE {report['filter']}"
+        cursor.execute(query, tuple(params))
+        return cursor.fetchone() or {}
+    except Exception as e:
+        raise ValueError(f"Error generating {report['label']}: {e}")
+
+
+def sales_by_employee(cursor, employee_id):
+    # Returns all sales for a selected employee
+    return _fetch_all(cursor, "sales_by_employee", (employee_id,))
+
+def sales_by_employee_page(cursor, employee_id, after=None, page_size=None, sort=None):
+    # One page of sales for a selected employee: (rows, next_key)
+    return _fetch_page(cursor, "sales_by_employee", (employee_id,), after, page_size, sort)
+
+def iter_sales_by_employee(cursor, employee_id, chunk_size=None):
+    # Streams sales for a selected employee
+    return _stream(cursor, "sales_by_employee", (employee_id,), chunk_size)
+
+def sales_by_employee_totals(cursor, employee_id):
+    # {'count', 'total'} over all sales for a selected employee
+    return _fetch_totals(cursor, "sales_by_employee", (employee_id,))
+
+def supplier_purchase_report(cursor, supplier_id):
+    # Returns all purchases for a selected supplier
+    return _fetch_all(cursor, "supplier_purchases", (supplier_id,))
+
+def supplier_purchase_page(cursor, supplier_id, after=None, page_size=None, sort=None):
+    # One page of purchase lines for a selected supplier: (rows, next_key)
+    return _fetch_page(cursor, "supplier_purchases", (supplier_id,), after, page_size, sort)
+
+def iter_supplier_purchases(cursor, supplier_id, chunk_size=None):
+    # Streams purchase lines for a selected supplier
+    return _stream(cursor, "supplier_purchases", (supplier_id,), chunk_size)
+
+def supplier_purchase_totals(cursor, supplier_id):
+    # {'count', 'quantity', 'total'} over all purchase lines for a selected supplier
+    return _fetch_totals(cursor, "supplier_purchases", (supplier_id,))
+
+def inventory_adjustment_history(cursor):
+    # Returns all inventory adjustments
+    return _fetch_all(cursor, "inventory_adjustments", ())
+
+def inventory_adjustment_page(cursor, after=None, page_size=None, sort=None):
+    # One page of inventory adjustments: (rows, next_key)
+    return _fetch_page(cursor, "inventory_adjustments", (), after, page_size, sort)
+
+def iter_inventory_adjustments(cursor, chunk_size=None):
+    # Streams inventory adjustments
+    return _stream(cursor, "inventory_adjustments", (), chunk_size)
+
+def inventory_adjustment_totals(cursor):
+    # {'count', 'net_change'} over all inventory adjustments
+    return _fetch_totals(cursor, "inventory_adjustments", ())
 
 def customer_purchase_history(cursor, customer_id):
     """
     Returns all purchases for a selected customer.
     Columns: Sale ID, Date/Time, SKU, Product Name, Quantity, Price, Total
     """
-    try:
-        query = '''
-            SELECT s.sale_id, s.sale_datetime, si.SKU, p.name AS product_name, si.quantity, si.price, s.total
-            FROM Sales s
-            JOIN SaleItems si ON s.sale_id = si.sale_id
-            JOIN Products p ON si.SKU = p.SKU
-            WHERE s.customer_id = %s
-            ORDER BY s.sale_datetime DESC, s.sale_id DESC
-        '''
-        cursor.execute(query, (customer_id,))
-        results = cursor.fetchall()
-        return [
-            {
-                "sale_id": row["sale_id"],
-                "sale_datetime": row["sale_datetime"],
-                "SKU": row["SKU"],
-                "product_name": row["product_name"],
-                "quantity": row["quantity"],
-                "price": row["price"],
-                "total": row["total"]
-            }
-            for row in results
-        ] if results else []
-    except Exception as e:
-        raise ValueError(f"Error generating customer purchase history report: {e}")
\ No newline at end of file
+    return _fetch_all(cursor, "customer_purchases", (customer_id,))
+
+def customer_purchase_page(cursor, customer_id, after=None, page_size=None, sort=None):
+    # One page of purchases for a selected customer: (rows, next_key)
+    return _fetch_page(cursor, "customer_purchases", (customer_id,), after, page_size, sort)
+
+def iter_customer_purchases(cursor, customer_id, chunk_size=None):
+    # Streams purchases for a selected customer
+    return _stream(cursor, "customer_purchases", (customer_id,), chunk_size)
+
+def customer_purchase_totals(cursor, customer_id):
+    # {'count', 'quantity', 'total'} over all purchases for a selected customer
+    return _fetch_totals(cursor, "customer_purchases", (customer_id,))
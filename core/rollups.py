@@ -0,0 +1,197 @@
+"""
+Daily sales rollup maintenance.
+
+DailySalesRollup holds one row per (sale_date, employee_id, category_id,
+supplier_id) with revenue, profit, orders and items, so dashboard queries
+read a few rows per day instead of joining Sales, SaleItems and Products.
+
+category_id / supplier_id = 0 are "all" rows, kept alongside the detail
+rows so order counts stay exact at every level (a sale touching two
+categories is one order, not two). -1 marks lines whose product has no
+category or supplier.
+
+Revenue is each line's share of Sales.total (tax included), so summing
+the "all" rows matches SUM(Sales.total). Profit uses the product cost at
+the time the row is written.
+"""
+import argparse
+import logging
+
+from mysql.connector import errorcode
+from mysql.connector.errors import Error
+
+from . import events
+from .database import get_db, close_db, day_bounds
+
+# Configure logging for rollups module
+logger = logging.getLogger(__name__)
+
+ALL = 0
+UNASSIGNED = -1
+
+CREATE_ROLLUP_TABLE = """
+    CREATE TABLE IF NOT EXISTS DailySalesRollup (
+        sale_date DATE NOT NULL,
+        employee_id INT NOT NULL,
+        category_id INT NOT NULL,
+        supplier_id INT NOT NULL,
+        revenue DECIMAL(14, 4) NOT NULL DEFAULT 0,
+        profit DECIMAL(14, 4) NOT NULL DEFAULT 0,
+        orders INT NOT NULL DEFAULT 0,
+        items INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (sale_date, employee_id, category_id, supplier_id),
+        INDEX idx_rollup_category_date (category_id, supplier_id, sale_date)
+    )
+"""
+
+# (category expression, supplier expression) for each level kept in the table
+_LEVELS = (
+    (f"COALESCE(p.category_id, {UNASSIGNED})", f"COALESCE(p.supplier_id, {UNASSIGNED})"),
+    (f"COALESCE(p.category_id, {UNASSIGNED})", str(ALL)),
+    (str(ALL), f"COALESCE(p.supplier_id, {UNASSIGNED})"),
+    (str(ALL), str(ALL)),
+)
+
+_missing_table_logged = False
+
+
+def _rollup_insert_sql(sale_filter):
+    """
+    INSERT ... SELECT that adds the sales matching sale_filter to the rollup.
+    sale_filter is a condition on a Sales alias written as {s}; it is applied
+    to the outer query and to the per-sale subtotal subquery.
+    """
+    selects = []
+    for category_expr, supplier_expr in _LEVELS:
+        group_by = ["DATE(s.sale_datetime)", "s.employee_id"]
+        group_by += [expr for expr in (category_expr, supplier_expr) if expr != str(ALL)]
+        selects.append(f"""
+            SELECT DATE(s.sale_datetime) AS sale_date,
+                   s.employee_id,
+                   {category_expr} AS category_id,
+                   {supplier_expr} AS supplier_id,
+                   COALESCE(SUM(si.quantity * si.price * s.total / NULLIF(st.subtotal, 0)), 0) AS revenue,
+                   COALESCE(SUM(si.quantity * (si.price - COALESCE(p.cost, 0))), 0) AS profit,
+                   COUNT(DISTINCT s.sale_id) AS orders,
+                   COALESCE(SUM(si.quantity), 0) AS items
+            FROM Sales s
+            JOIN SaleItems si ON si.sale_id = s.sale_id
+            JOIN (
+                SELECT si2.sale_id, SUM(si2.quantity * si2.price) AS subtotal
+                FROM Sales s2
+                JOIN SaleItems si2 ON si2.sale_id = s2.sale_id
+                WHERE {sale_filter.format(s='s2')}
+                GROUP BY si2.sale_id
+            ) st ON st.sale_id = s.sale_id
+            LEFT JOIN Products p ON p.SKU = si.SKU
+            WHERE {sale_filter.format(s='s')}
+            GROUP BY {', '.join(group_by)}""")
+    return f"""
+        INSERT INTO DailySalesRollup
+            (sale_date, employee_id, category_id, supplier_id, revenue, profit, orders, items)
+        SELECT * FROM ({" UNION ALL ".join(selects)}
+        ) AS r
+        ON DUPLICATE KEY UPDATE
+            revenue = DailySalesRollup.revenue + r.revenue,
+            profit = DailySalesRollup.profit + r.profit,
+            orders = DailySalesRollup.orders + r.orders,
+            items = DailySalesRollup.items + r.items
+    """
+
+
+def ensure_rollup_table(cursor):
+    # Create the rollup table if needed; returns True when it was just created
+    cursor.execute(
+        "SELECT COUNT(*) AS found FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = 'DailySalesRollup'"
+    )
+    if cursor.fetchone()['found']:
+        return False
+    cursor.execute(CREATE_ROLLUP_TABLE)
+    return True
+
+
+def record_sale(cursor, sale_id):
+    """
+    Add one sale to the rollup. Called inside log_sale's transaction, so the
+    rollup commits or rolls back together with the sale.
+    """
+    global _missing_table_logged
+    sale_filter = "{s}.sale_id = %s"
+    try:
+        # The filter appears once per subquery and once per outer query, for every level
+        cursor.execute(_rollup_insert_sql(sale_filter), (sale_id, sale_id) * len(_LEVELS))
+    except Error as e:
+        # A missing table must not block checkout; the rollup can be rebuilt later
+        if e.errno != errorcode.ER_NO_SUCH_TABLE:
+            raise
+        if not _missing_table_logged:
+            logger.warning("DailySalesRollup table is missing; run `python -m core.rollups` to build it.")
+            _missing_table_logged = True
+
+
+def rebuild_daily_sales_rollup(connection, cursor, start_date=None, end_date=None):
+    """
+    Recompute the rollup for a date range (inclusive, 'YYYY-MM-DD'), or for
+    all sales when no range is given. Returns the number of rollup rows written.
+    """
+    ensure_rollup_table(cursor)
+    try:
+        if start_date and end_date:
+            bounds = day_bounds(start_date, end_date)
+            cursor.execute("DELETE FROM DailySalesRollup WHERE sale_date >= %s AND sale_date < %s", bounds)
+            sale_filter = "{s}.sale_datetime >= %s AND {s}.sale_datetime < %s"
+            params = bounds * 2 * len(_LEVELS)
+        else:
+            cursor.execute("DELETE FROM DailySalesRollup")
+            sale_filter = "1 = 1"
+            params = ()
+        cursor.execute(_rollup_insert_sql(sale_filter), params)
+        rows = cursor.rowcount
+        connection.commit()
+        events.publish('DailySalesRollup')
+        logger.info(f"Rebuilt DailySalesRollup ({start_date or 'all'} to {end_date or 'all'}): {rows} rows")
+        return rows
+    except Exception as e:
+        connection.rollback()
+        raise Exception(f"Error rebuilding daily sales rollup: {e}")
+
+
+def needs_backfill(cursor):
+    # The rollup is empty but there are sales: a first start, or a backfill that failed and was rolled back
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM DailySalesRollup) AS rolled_up, EXISTS (SELECT 1 FROM Sales) AS sold"
+    )
+    row = cursor.fetchone()
+    return bool(row['sold']) and not row['rolled_up']
+
+
+def ensure_daily_sales_rollup():
+    # Startup hook: create the table and backfill it until that has succeeded
+    connection, cursor = get_db()
+    try:
+        if ensure_rollup_table(cursor):
+            logger.info("Created DailySalesRollup table")
+        if needs_backfill(cursor):
+            logger.info("DailySalesRollup is empty; backfilling from existing sales")
+            rebuild_daily_sales_rollup(connection, cursor)
+    finally:
+        close_db(connection, cursor)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+    parser = argparse.ArgumentParser(description="Backfill or rebuild the DailySalesRollup table")
+    parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD); default rebuilds everything")
+    parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+    if bool(args.start) != bool(args.end):
+        parser.error("--start and --end must be given together")
+
+    connection, cursor = get_db()
+    try:
+        rows = rebuild_daily_sales_rollup(connection, cursor, args.start, args.end)
+        print(f"DailySalesRollup rebuilt: {rows} rows written")
+    finally:
+        close_db(connection, cursor)
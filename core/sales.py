@@ -1,4 +1,7 @@
 from .database import get_db, close_db
+from . import rollups
+from . import demand
+from . import events
 from decimal import Decimal
 
 # Import for low stock alerts and large transaction alerts
@@ -13,6 +16,9 @@ except ImportError:
     check_and_alert_low_stock = None
     check_and_alert_large_transaction = None
 
+# Sales tax applied to every cart subtotal
+TAX_RATE = Decimal('0.175')
+
 class SalesError(Exception):
     """Sales operation error."""
     pass
@@ -42,8 +48,129 @@ def get_product(cursor, sku):
     except Exception as e:
         raise SalesError(f"Error getting product: {e}")
 
-def add_to_cart(cart, sku, quantity):
+def _cart_key(sku):
+    # MySQL compares SKUs case-insensitively, so the cart does too
+    return str(sku).strip().lower()
+
+class Cart:
+    """
+    Shopping cart keyed by SKU.
+    Name and price are captured once when a SKU is first added, and
+    subtotal/taxes/total are kept up to date as lines change, so redraws
+    and quantity edits never touch the database.
+    """
+
+    def __init__(self, tax_rate=TAX_RATE):
+        self.tax_rate = tax_rate
+        self._lines = {}
+        self._subtotal = Decimal('0.00')
+
+    def __iter__(self):
+        return iter(list(self._lines.values()))
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __bool__(self):
+        return bool(self._lines)
+
+    def __contains__(self, sku):
+        return _cart_key(sku) in self._lines
+
+    def _line(self, sku):
+        line = self._lines.get(_cart_key(sku))
+        if line is None:
+            raise SalesError(f"SKU '{sku}' not found in cart.")
+        return line
+
+    def add(self, sku, quantity, cursor=None, product=None):
+        # Add product to cart or increase quantity; looks the product up only the first time
+        if quantity <= 0:
+            raise SalesError("Quantity must be greater than 0.")
+        key = _cart_key(sku)
+        line = self._lines.get(key)
+        if line is None:
+            if product is None:
+                if cursor is None:
+                    raise SalesError(f"Product details for SKU '{sku}' are required.")
+                product = get_product(cursor, sku)
+            line = {
+                'SKU': product['SKU'],
+                'name': product['name'],
+                'price': Decimal(str(product['price'])),
+                'quantity': 0,
+            }
+            self._lines[key] = line
+        line['quantity'] += quantity
+        self._subtotal += line['price'] * quantity
+        return dict(line)
+
+    def remove(self, sku):
+        # Remove product from cart
+        line = self._line(sku)
+        self._subtotal -= line['price'] * line['quantity']
+        del self._lines[_cart_key(sku)]
+
+    def update_quantity(self, sku, quantity):
+        # Update product quantity in cart
+        if quantity <= 0:
+            raise SalesError("Quantity must be greater than 0.")
+        line = self._line(sku)
+        self._subtotal += line['price'] * (quantity - line['quantity'])
+        line['quantity'] = quantity
+
+    def clear(self):
+        self._lines.clear()
+        self._subtotal = Decimal('0.00')
+
+    def items(self):
+        # Snapshot of cart lines with their line totals
+        return [dict(line, line_total=line['price'] * line['quantity']) for line in self._lines.values()]
+
+    def totals(self):
+        # Same shape as calculate_totals(), computed from the running subtotal
+        taxes = self._subtotal * self.tax_rate
+        return {
+            "subtotal": float(self._subtotal),
+            "taxes": float(taxes),
+            "total": float(self._subtotal + taxes),
+        }
+
+    def revalidate(self, cursor):
+        """
+        Refresh every line's name and price with one batched query before checkout.
+        Returns a list of (SKU, old_price, new_price) for lines whose price changed.
+        """
+        if not self._lines:
+            return []
+        skus = [line['SKU'] for line in self._lines.values()]
+        placeholders = ", ".join(["%s"] * len(skus))
+        try:
+            cursor.execute(f"SELECT SKU, name, price FROM Products WHERE SKU IN ({placeholders})", tuple(skus))
+            rows = {_cart_key(row['SKU']): row for row in cursor.fetchall()}
+        except Exception as e:
+            raise SalesError(f"Error revalidating cart: {e}")
+        missing = [line['SKU'] for key, line in self._lines.items() if key not in rows]
+        if missing:
+            raise SalesError(f"Product with SKU '{missing[0]}' not found.")
+        changes = []
+        subtotal = Decimal('0.00')
+        for key, line in self._lines.items():
+            row = rows[key]
+            price = Decimal(str(row['price']))
+            if price != line['price']:
+                changes.append((line['SKU'], line['price'], price))
+            line['name'] = row['name']
+            line['price'] = price
+            subtotal += price * line['quantity']
+        self._subtotal = subtotal
+        return changes
+
+def add_to_cart(cart, sku, quantity, cursor=None):
     # Add product to cart or increase quantity
+    if isinstance(cart, Cart):
+        cart.add(sku, quantity, cursor)
+        return
     if quantity <= 0:
         raise SalesError("Quantity must be greater than 0.")
     for item in cart:
@@ -54,6 +181,9 @@ def add_to_cart(cart, sku, quantity):
 
 def remove_from_cart(cart, sku):
     # Remove product from cart
+    if isinstance(cart, Cart):
+        cart.remove(sku)
+        return
     for item in cart:
         if item['SKU'] == sku:
             cart.remove(item)
@@ -62,6 +192,9 @@ def remove_from_cart(cart, sku):
 
 def update_cart_quantity(cart, sku, quantity):
     # Update product quantity in cart
+    if isinstance(cart, Cart):
+        cart.update_quantity(sku, quantity)
+        return
     if quantity <= 0:
         raise SalesError("Quantity must be greater than 0.")
     for item in cart:
@@ -72,10 +205,14 @@ def update_cart_quantity(cart, sku, quantity):
 
 def get_cart_items(cart):
     # Get all cart items
+    if isinstance(cart, Cart):
+        return cart.items()
     return cart
 
 def calculate_totals(cart, cursor):
     # Calculate subtotal, taxes, and total
+    if isinstance(cart, Cart):
+        return cart.totals()
     try:
         subtotal = Decimal('0.00')
         for item in cart:
@@ -87,74 +224,130 @@ def calculate_totals(cart, cursor):
             price = result['price']
             quantity = Decimal(str(item['quantity']))
             subtotal += price * quantity
-        taxes = subtotal * Decimal('0.175')  # 10% tax
+        taxes = subtotal * TAX_RATE
         total = subtotal + taxes
         return {"subtotal": float(subtotal), "taxes": float(taxes), "total": float(total)}
     except Exception as e:
         raise SalesError(f"Error calculating totals: {e}")
 
+def _cart_quantities(cart):
+    # Collapse cart lines into {SKU: quantity}, preserving first-seen order; SKUs that
+    # differ only in case or padding are one product to MySQL, so they are one line here
+    quantities = {}
+    for item in cart:
+        if item['quantity'] <= 0:
+            raise SalesError(f"Invalid quantity for SKU '{item['SKU']}'.")
+        sku = _cart_key(item['SKU'])
+        quantities[sku] = quantities.get(sku, 0) + item['quantity']
+    return quantities
+
+def _lock_products(cursor, skus):
+    # Lock every cart SKU in one statement (PK order, so concurrent tills cannot deadlock)
+    placeholders = ", ".join(["%s"] * len(skus))
+    cursor.execute(
+        "SELECT SKU, price, stock, low_stock_threshold FROM Products "
+        f"WHERE SKU IN ({placeholders}) ORDER BY SKU FOR UPDATE",
+        tuple(skus)
+    )
+    # SKU comparisons in MySQL are case-insensitive, so match rows the same way
+    return {_cart_key(row['SKU']): row for row in cursor.fetchall()}
+
 def log_sale(connection, cursor, cart, employee_id, customer_id):
-    # Log sale transaction to database
+    """
+    Log a sale as one row-locked transaction and return its sale_id.
+    Round trips stay constant regardless of basket size: one validation
+    query, one SELECT ... FOR UPDATE, one Sales insert, one multi-row
+    SaleItems insert, one conditional stock UPDATE, one DailySalesRollup
+    upsert and one DemandRates upsert.
+    """
     try:
-        # Check if customer_id exists (if provided)
-        if customer_id is not None:
-            cursor.execute("SELECT customer_id FROM Customers WHERE customer_id = %s", (customer_id,))
-            if not cursor.fetchone():
-                raise SalesError(f"Customer ID '{customer_id}' not found.")
-
-        # Check if employee_id exists
-        cursor.execute("SELECT employee_id FROM Employees WHERE employee_id = %s", (employee_id,))
-        if not cursor.fetchone():
-            raise SalesError(f"Employee ID '{employee_id}' not found.")
+        if not cart:
+            raise SalesError("Cart is empty.")
+        quantities = _cart_quantities(cart)
 
-        # Check stock for each item in cart
-        for item in cart:
-            cursor.execute("SELECT stock FROM Products WHERE SKU = %s", (item['SKU'],))
-            result = cursor.fetchone()
-            if not result:
-                raise SalesError(f"Product with SKU '{item['SKU']}' not found.")
-            if result['stock'] < item['quantity']:
-                raise SalesError(f"Not enough stock for SKU '{item['SKU']}'. Available: {result['stock']}, Requested: {item['quantity']}")
+        # Check employee_id (and customer_id if provided) in a single round trip
+        cursor.execute(
+            "SELECT (SELECT COUNT(*) FROM Employees WHERE employee_id = %s) AS employee_found, "
+            "(SELECT COUNT(*) FROM Customers WHERE customer_id = %s) AS customer_found",
+            (employee_id, customer_id)
+        )
+        found = cursor.fetchone()
+        if customer_id is not None and not found['customer_found']:
+            raise SalesError(f"Customer ID '{customer_id}' not found.")
+        if not found['employee_found']:
+            raise SalesError(f"Employee ID '{employee_id}' not found.")
 
-        # Calculate totals
-        totals = calculate_totals(cart, cursor)
+        # Lock all cart rows, then check stock and price against the locked values
+        locked = _lock_products(cursor, list(quantities))
+        lines = []
+        subtotal = Decimal('0.00')
+        for sku, quantity in quantities.items():
+            product = locked.get(sku)
+            if not product:
+                raise SalesError(f"Product with SKU '{sku}' not found.")
+            if product['stock'] < quantity:
+                raise SalesError(f"Not enough stock for SKU '{sku}'. Available: {product['stock']}, Requested: {quantity}")
+            lines.append((product, quantity))
+            subtotal += product['price'] * Decimal(str(quantity))
+        taxes = subtotal * TAX_RATE
+        total = subtotal + taxes
 
         # Insert into Sales table
         cursor.execute(
             "INSERT INTO Sales (sale_datetime, total, employee_id, customer_id) "
             "VALUES (NOW(), %s, %s, %s)",
-            (totals['total'], employee_id, customer_id),
+            (float(total), employee_id, customer_id),
         )
         sale_id = cursor.lastrowid
 
-        # Insert each cart item into SaleItems and decrement stock
-        for item in cart:
-            cursor.execute("SELECT price FROM Products WHERE SKU = %s", (item['SKU'],))
-            price_row = cursor.fetchone()
-            if price_row:
-                price = price_row['price']
-            else:
-                raise SalesError(f"Product with SKU '{item['SKU']}' not found while logging sale.")
-
-            cursor.execute(
-                "INSERT INTO SaleItems (sale_id, SKU, quantity, price) VALUES (%s, %s, %s, %s)",
-                (sale_id, item['SKU'], item['quantity'], price)
-            )
-            cursor.execute(
-                "UPDATE Products SET stock = stock - %s WHERE SKU = %s",
-                (item['quantity'], item['SKU'])
-            )
-            # Check for low stock and send alert if needed
-            if check_and_alert_low_stock:
-                check_and_alert_low_stock(cursor, item['SKU'])
+        # All sale lines in one multi-row INSERT
+        values_sql = ", ".join(["(%s, %s, %s, %s)"] * len(lines))
+        params = []
+        for product, quantity in lines:
+            params.extend((sale_id, product['SKU'], quantity, product['price']))
+        cursor.execute(
+            f"INSERT INTO SaleItems (sale_id, SKU, quantity, price) VALUES {values_sql}",
+            tuple(params)
+        )
+
+        # Decrement every SKU in one conditional UPDATE; a short row count means
+        # some line would have gone negative, so the whole sale is rolled back
+        case_sql = " ".join(["WHEN %s THEN %s"] * len(lines))
+        case_params = []
+        for product, quantity in lines:
+            case_params.extend((product['SKU'], quantity))
+        placeholders = ", ".join(["%s"] * len(lines))
+        cursor.execute(
+            f"UPDATE Products SET stock = stock - CASE SKU {case_sql} END "
+            f"WHERE SKU IN ({placeholders}) AND stock >= CASE SKU {case_sql} END",
+            tuple(case_params) + tuple(product['SKU'] for product, _ in lines) + tuple(case_params)
+        )
+        if cursor.rowcount != len(lines):
+            raise SalesError("Stock changed during checkout. Please try again.")
+
+        # Fold the sale into the daily rollup and the demand index inside the same transaction
+        rollups.record_sale(cursor, sale_id)
+        demand.record_sale(cursor, sale_id)
         connection.commit()
-        
+        events.publish('Sales', 'SaleItems', 'Products', 'DemandRates')
+
+        # Alerts run after commit so row locks are never held during email sends
+        if check_and_alert_low_stock:
+            for product, quantity in lines:
+                threshold = product['low_stock_threshold']
+                if threshold is not None and product['stock'] - quantity <= threshold:
+                    check_and_alert_low_stock(cursor, product['SKU'])
+
         # Check for large transaction and send alert if needed
         if check_and_alert_large_transaction:
-            check_and_alert_large_transaction(cursor, sale_id, totals['total'], employee_id, customer_id)
-        
+            check_and_alert_large_transaction(cursor, sale_id, float(total), employee_id, customer_id)
+
         return sale_id
     except Exception as e:
+        try:
+            connection.rollback()
+        except Exception:
+            pass
         raise SalesError(f"Error logging sale: {e}")
 
 def generate_receipt(cursor, transaction_id):
@@ -1,4 +1,5 @@
 from .database import close_db
+from . import events
 
 
 def handle_error(connection, cursor, e, message=""):
@@ -20,6 +21,7 @@ def add_supplier(connection, cursor, name, contact_info, address):
         query = "INSERT INTO Suppliers (name, contact_info, address) VALUES (%s, %s, %s)"
         cursor.execute(query, (name, contact_info, address))
         connection.commit()
+        events.publish('Suppliers')
         supplier = get_supplier(cursor, cursor.lastrowid)
         return supplier
     except ValueError as ve:
@@ -28,6 +30,28 @@ def add_supplier(connection, cursor, name, contact_info, address):
         handle_error(connection, cursor, e, "Error adding supplier")
 
 
+def add_suppliers_bulk(connection, cursor, rows):
+    # Inserts many (name, contact_info, address) rows with one multi-row INSERT; names must already be checked as new
+    try:
+        query = "INSERT INTO Suppliers (name, contact_info, address) VALUES (%s, %s, %s)"
+        cursor.executemany(query, rows)
+        connection.commit()
+        events.publish('Suppliers')
+        return len(rows)
+    except Exception as e:
+        connection.rollback()
+        raise ValueError(f"Error adding suppliers: {e}")
+
+
+def get_supplier_names(cursor):
+    # Names of all suppliers, for duplicate checks during imports
+    try:
+        cursor.execute("SELECT name FROM Suppliers")
+        return {row['name'] for row in cursor.fetchall()}
+    except Exception as e:
+        raise ValueError(f"Error loading supplier names: {e}")
+
+
 def update_supplier(connection, cursor, supplier_id, name, contact_info, address):
     # Updates an existing supplier's information in the database
     try:
@@ -35,6 +59,7 @@ def update_supplier(connection, cursor, supplier_id, name, contact_info, address
         query = "UPDATE Suppliers SET name = %s, contact_info = %s, address = %s WHERE supplier_id = %s"
         cursor.execute(query, (name, contact_info, address, supplier_id))
         connection.commit()
+        events.publish('Suppliers')
         supplier = get_supplier(cursor, supplier_id)
         return supplier
     except ValueError as ve:
@@ -50,6 +75,7 @@ def delete_supplier(connection, cursor, supplier_id):
         query = "DELETE FROM Suppliers WHERE supplier_id = %s"
         cursor.execute(query, (supplier_id,))
         connection.commit()
+        events.publish('Suppliers')
         return supplier
     except ValueError as ve:
         raise ValueError(str(ve))
@@ -3,7 +3,6 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import json
-import smtplib
 import subprocess
 import sys
 import logging
@@ -21,26 +20,18 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 
-# ReportLab imports for PDF generation
-try:
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.platypus import Image as ReportLabImage  # Use alias to avoid conflict with PIL Image
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.lib import colors
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
-
 # Local application imports
-from core.database import get_db, close_db
+from core.database import get_db, close_db, get_shared_db, thread_connection, thread_scoped
 from core import suppliers
 from core import inventory
 from core import sales
 from core import customers
 from core import employees
+from core import rollups
+from core import climate_production
+from core import demand
+from core import query_stats
+from core import profiling
 
 # Helper function for consistent TreeView text formatting
 def format_treeview_text(value):
@@ -82,6 +73,7 @@ from core.reporting import (
     customer_purchase_history
 )
 from Ui import POSApp, alternate_treeview_rows
+from virtual_treeview import ListRowSource
 from automation.automations import (
     check_and_alert_low_stock,
     get_manager_email,
@@ -90,6 +82,10 @@ from automation.automations import (
     send_large_transaction_alert,
     send_end_of_day_report
 )
+from automation.receipts import (
+    get_receipt_renderer, render_receipt_pdf, save_receipt_pdf, receipt_filename, REPORTLAB_AVAILABLE
+)
+from automation.mailer import get_receipt_outbox, ReceiptOutbox, DEFAULT_SMTP_SERVER, DEFAULT_SMTP_PORT, OUTBOX_ATTACHMENT_WAIT
 
 # Configure logging system with async support for better performance
 def setup_logging():
@@ -175,8 +171,9 @@ def create_pos_app_callbacks(cart, cursor, db_connection):
     """
     Create all callback functions for POSApp instantiation.
     This centralizes the callback creation to avoid duplication.
+    Each callback runs on its own pooled connection for the calling thread.
     """
-    return {
+    callbacks = {
         # --- SALES TAB CALLBACKS ---
         'add_to_cart_callback': lambda product_id_entry, quantity_entry, cart_tree, *_: add_to_cart(
             product_id_entry.get(),
@@ -312,6 +309,8 @@ def create_pos_app_callbacks(cart, cursor, db_connection):
         'get_employees_callback': lambda: employees.view_employees(cursor),
         'get_suppliers_callback': lambda: suppliers.view_suppliers(cursor),
     }
+    # profiled() is a pass-through unless action profiling is switched on
+    return {name: profiling.profiled(name, thread_scoped(callback)) for name, callback in callbacks.items()}
 
 def create_pos_app_instance(root, cart, cursor, db_connection, user_role, username):
     """
@@ -342,11 +341,42 @@ def load_email_config():
             data = json.load(file)
             return {
                 'email': data.get('email', ''),
-                'password': data.get('password', '')
+                'password': data.get('password', ''),
+                'smtp_server': data.get('smtp_server', DEFAULT_SMTP_SERVER),
+                'smtp_port': int(data.get('smtp_port', DEFAULT_SMTP_PORT))
             }
     except Exception as e:
         logger.error(f"Error loading email config: {e}")
-        return {'email': '', 'password': ''}
+        return {'email': '', 'password': '', 'smtp_server': DEFAULT_SMTP_SERVER, 'smtp_port': DEFAULT_SMTP_PORT}
+
+def _receipt_email_credentials():
+    # Read at send time so credentials never sit in the outbox file
+    email_config = load_email_config()
+    return email_config['email'], email_config['password']
+
+def start_receipt_outbox():
+    """Start the receipt outbox worker; receipts left over from a previous run are sent first"""
+    email_config = load_email_config()
+    return get_receipt_outbox(email_config['smtp_server'], email_config['smtp_port'],
+                              credentials=_receipt_email_credentials)
+
+def poll_receipt_outbox(root, outbox, interval_ms=2000):
+    """Relay receipt delivery status from the outbox worker to the Sales tab"""
+    try:
+        for event in outbox.poll_events():
+            if event['status'] == ReceiptOutbox.SENT:
+                text, color = f"Receipt for Sale #{event['sale_id']} delivered to {event['recipient']}.", 'green'
+            elif event['status'] == ReceiptOutbox.FAILED:
+                text, color = f"Receipt for Sale #{event['sale_id']} could not be delivered: {event['error']}", 'red'
+            elif event['error']:
+                text, color = f"Receipt for Sale #{event['sale_id']} delayed, retrying...", 'orange'
+            else:
+                continue
+            if 'pos_app' in globals() and hasattr(pos_app, 'sales_ui'):
+                pos_app.sales_ui.purchase_status.config(text=text, foreground=color)
+    except Exception as e:
+        logger.error(f"Error polling receipt outbox: {e}")
+    root.after(interval_ms, lambda: poll_receipt_outbox(root, outbox, interval_ms))
 
 def get_selected_customer_id():
     if 'selected_customer_id' not in get_selected_customer_id.__dict__:
@@ -363,18 +393,16 @@ def _update_cart_display(cart, cart_tree, cursor):
     # Updates the cart display in the UI with the current items in the cart
     try:
         cart_tree.delete(*cart_tree.get_children())
-        for item in cart:# for every item in the cart
-            product = sales.get_product(cursor, item['SKU'])# gets the product
-            if product:
-                line_total = product['price'] * item['quantity']
-                formatted_values = format_treeview_values((
-                    item['SKU'], 
-                    product['name'], 
-                    item['quantity'], 
-                    f"${product['price']:.2f}",
-                    f"${line_total:.2f}"
-                ))
-                cart_tree.insert("", "end", values=formatted_values)
+        for item in sales.get_cart_items(cart):# for every item in the cart
+            # Cart lines carry the name/price captured when the item was added
+            formatted_values = format_treeview_values((
+                item['SKU'], 
+                item['name'], 
+                item['quantity'], 
+                f"${item['price']:.2f}",
+                f"${item['line_total']:.2f}"
+            ))
+            cart_tree.insert("", "end", values=formatted_values)
         
         # Apply alternating row colors
         alternate_treeview_rows(cart_tree)
@@ -432,7 +460,7 @@ def add_to_cart(sku, quantity, cart_tree, cart, cursor):
         except ValueError:
             handle_error("Invalid quantity entered. Please enter a positive integer.")
             return
-        sales.add_to_cart(cart, sku, quantity)
+        sales.add_to_cart(cart, sku, quantity, cursor)
         _update_cart_display(cart, cart_tree, cursor)
     except ValueError as ve:
         handle_error(str(ve))
@@ -518,14 +546,17 @@ def checkout(receipt_tree, cart_tree, cart, connection, cursor, employee_id):
         if customer_result:
             customer_email = customer_result['contact_info']
         
-        # Calculate totals before clearing the cart
-        totals = sales.calculate_totals(cart, cursor)
+        # Re-check cart prices in one batched query, then total from the refreshed snapshot
+        price_changes = cart.revalidate(cursor)
+        for sku, old_price, new_price in price_changes:
+            logger.info(f"Price for SKU {sku} changed from {old_price} to {new_price} before checkout")
+        totals = cart.totals()
         sale_id = sales.log_sale(connection, cursor, cart, employee_id, customer_id)
         receipt_data = sales.generate_receipt_dict(cursor, sale_id)
         
         # Generate and display receipt
         receipt_text = generate_receipt_text(cursor, sale_id, customer_id, totals)
-        show_receipt(receipt_text)
+        show_receipt(receipt_text, sale_id)
         
         # Store last sale info for potential resend
         global last_sale_info
@@ -603,426 +634,20 @@ def generate_receipt_text(cursor, sale_id, customer_id, totals):
     
     return receipt
 
-def show_receipt(receipt_text):
-    # Display receipt in a message box and save to file
+def show_receipt(receipt_text, sale_id=None):
+    # Display receipt in a message box; the PDF renders (and saves) in the background
+    try:
+        get_receipt_renderer().submit(sale_id, receipt_text)
+    except Exception as e:
+        logger.error(f"Could not start PDF receipt render: {e}")
     show_success_message(f"Transaction Complete:\n{receipt_text}")
-    generate_premium_pdf_receipt(receipt_text, for_email=False)
-
 
 
 def generate_premium_pdf_receipt(receipt_text, sale_id=None, for_email=False):
-    """Generate a premium, professional PDF receipt with advanced styling and layout"""
+    """Generate a premium, professional PDF receipt and save it under receipts/ (synchronous)"""
     try:
-        # Create receipts directory if it doesn't exist
-        receipts_dir = "receipts"
-        if not os.path.exists(receipts_dir):
-            os.makedirs(receipts_dir)
-        
-        # Generate appropriate filename
-        if for_email and sale_id:
-            filename = f"{receipts_dir}/email_receipt_{sale_id}.pdf"
-            pdf_title = f"Receipt #{sale_id} - DigiClimate Store - Resilience meets innovation"
-            pdf_subject = "Purchase Receipt - Email Copy"
-        else:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{receipts_dir}/receipt_{timestamp}.pdf"
-            pdf_title = "DigiClimate Store Receipt - Resilience meets innovation"
-            pdf_subject = "Purchase Receipt"
-        
-        # Create PDF document with premium settings
-        doc = SimpleDocTemplate(
-            filename, 
-            pagesize=letter,
-            leftMargin=0.5*inch, 
-            rightMargin=0.5*inch,
-            topMargin=0.4*inch, 
-            bottomMargin=0.5*inch,
-            title=pdf_title,
-            author="DigiClimate Store Hub - Resilience meets innovation",
-            subject=pdf_subject
-        )
-        
-        # Get base styles
-        styles = getSampleStyleSheet()
-        
-        # Define premium color palette
-        primary_blue = colors.Color(0.1, 0.2, 0.4)  # Dark professional blue
-        accent_green = colors.Color(0.0, 0.5, 0.3)  # Professional green
-        light_gray = colors.Color(0.95, 0.95, 0.95)  # Light background
-        dark_gray = colors.Color(0.3, 0.3, 0.3)     # Dark text
-        gold_accent = colors.Color(0.8, 0.6, 0.1)   # Gold highlight
-        
-        # Create sophisticated custom styles
-        company_title_style = ParagraphStyle(
-            'CompanyTitle',
-            parent=styles['Heading1'],
-            fontSize=28,
-            fontName='Helvetica-Bold',
-            textColor=primary_blue,
-            alignment=TA_CENTER,
-            spaceAfter=8,
-            spaceBefore=0,
-            leading=30,
-            letterSpacing=1
-        )
-        
-        subtitle_style = ParagraphStyle(
-            'Subtitle',
-            parent=styles['Normal'],
-            fontSize=12,
-            fontName='Helvetica-Oblique',
-            textColor=accent_green,
-            alignment=TA_CENTER,
-            spaceAfter=25,
-            leading=14
-        )
-        
-        header_box_style = ParagraphStyle(
-            'HeaderBox',
-            parent=styles['Normal'],
-            fontSize=11,
-            fontName='Helvetica',
-            textColor=dark_gray,
-            alignment=TA_CENTER,
-            spaceAfter=6,
-            leading=13
-        )
-        
-        section_header_style = ParagraphStyle(
-            'SectionHeader',
-            parent=styles['Heading2'],
-            fontSize=14,
-            fontName='Helvetica-Bold',
-            textColor=primary_blue,
-            alignment=TA_LEFT,
-            spaceAfter=12,
-            spaceBefore=20,
-            borderPadding=5,
-            backColor=light_gray,
-            borderColor=primary_blue,
-            borderWidth=0.5,
-            leading=16
-        )
-        
-        total_style = ParagraphStyle(
-            'GrandTotal',
-            parent=styles['Normal'],
-            fontSize=16,
-            fontName='Helvetica-Bold',
-            textColor=accent_green,
-            alignment=TA_RIGHT,
-            spaceAfter=8,
-            leading=20,
-            borderPadding=8,
-            backColor=light_gray,
-            borderColor=accent_green,
-            borderWidth=1
-        )
-        
-        footer_style = ParagraphStyle(
-            'FooterText',
-            parent=styles['Normal'],
-            fontSize=10,
-            fontName='Helvetica',
-            textColor=dark_gray,
-            alignment=TA_CENTER,
-            spaceAfter=5,
-            leading=12
-        )
-        
-        # Build PDF content with premium layout
-        story = []
-        
-        # === PREMIUM HEADER SECTION ===
-        
-        # Add company logo with professional styling
-        logo_path = "logo.png"
-        if os.path.exists(logo_path):
-            try:
-                # Create a frame around the logo
-                logo_table_data = [
-                    [ReportLabImage(logo_path, width=2.5*inch, height=1.8*inch)]
-                ]
-                logo_table = Table(logo_table_data, colWidths=[7.5*inch])
-                logo_table.setStyle(TableStyle([
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('BACKGROUND', (0, 0), (-1, -1), colors.white),
-                    ('BOX', (0, 0), (-1, -1), 1, light_gray),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                    ('TOPPADDING', (0, 0), (-1, -1), 15),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-                ]))
-                story.append(logo_table)
-                story.append(Spacer(1, 15))
-            except Exception as e:
-                logger.debug(f"Could not add logo: {e}")
-        
-        # Add "EMAIL COPY" indicator for email receipts
-        if for_email:
-            email_indicator_data = [['📧 EMAIL COPY']]
-            email_indicator_table = Table(email_indicator_data, colWidths=[7.5*inch])
-            email_indicator_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), gold_accent),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 12),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ]))
-            story.append(email_indicator_table)
-            story.append(Spacer(1, 15))
-        
-        # Company name with elegant typography
-        story.append(Paragraph("DIGICLIMATE STORE HUB", company_title_style))
-        story.append(Paragraph("Enterprise Point of Sale System", subtitle_style))
-        
-        # Add company tagline with distinctive styling
-        tagline_style = ParagraphStyle(
-            'TaglineStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            fontName='Helvetica-Oblique',
-            textColor=gold_accent,
-            alignment=TA_CENTER,
-            spaceAfter=15,
-            leading=12
-        )
-        story.append(Paragraph("Resilience meets innovation", tagline_style))
-        
-        # Decorative separator line
-        line_table = Table([['']], colWidths=[7.5*inch], rowHeights=[3])
-        line_table.setStyle(TableStyle([
-            ('LINEBELOW', (0, 0), (-1, -1), 2, gold_accent),
-            ('TOPPADDING', (0, 0), (-1, -1), 0),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-        ]))
-        story.append(line_table)
-        story.append(Spacer(1, 20))
-        
-        # === RECEIPT INFORMATION EXTRACTION ===
-        lines = receipt_text.strip().split('\n')
-        
-        # Extract information with better parsing
-        date_info = ""
-        customer_info = ""
-        sale_id_info = ""
-        
-        for line in lines:
-            if 'Date:' in line:
-                date_info = line.replace('Date:', '').strip()
-            elif 'Customer:' in line:
-                customer_info = line.replace('Customer:', '').strip()
-            elif 'Sale ID:' in line:
-                sale_id_info = line.replace('Sale ID:', '').strip()
-        
-        # === PROFESSIONAL RECEIPT HEADER ===
-        
-        # Create information box with elegant styling
-        if for_email:
-            header_data = [
-                ['Receipt Information', ''],
-                ['Date & Time:', date_info],
-                ['Customer:', customer_info],
-                ['Transaction ID:', sale_id_info],
-                ['Email Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
-            ]
-        else:
-            header_data = [
-                ['Receipt Information', ''],
-                ['Date & Time:', date_info],
-                ['Customer:', customer_info],
-                ['Transaction ID:', sale_id_info],
-                ['Processed by:', 'DigiClimate POS System v2.0']
-            ]
-        
-        header_table = Table(header_data, colWidths=[2*inch, 5.5*inch])
-        header_table.setStyle(TableStyle([
-            # Header row styling
-            ('BACKGROUND', (0, 0), (-1, 0), primary_blue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('SPAN', (0, 0), (-1, 0)),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            # Data rows styling
-            ('BACKGROUND', (0, 1), (0, -1), light_gray),
-            ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('ALIGN', (0, 1), (0, -1), 'RIGHT'),
-            ('ALIGN', (1, 1), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 0.5, dark_gray),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        
-        story.append(header_table)
-        story.append(Spacer(1, 25))
-        
-        # === PREMIUM ITEMS TABLE ===
-        
-        story.append(Paragraph("Purchase Details", section_header_style))
-        
-        # Parse items from receipt text with improved algorithm
-        item_start = -1
-        item_end = -1
-        for i, line in enumerate(lines):
-            if 'ITEM' in line and 'QTY' in line and 'PRICE' in line:
-                item_start = i + 2  # Skip header and separator
-            elif line.strip().startswith('SUBTOTAL:'):
-                item_end = i
-                break
-        
-        if item_start > -1 and item_end > -1:
-            # Create sophisticated table data
-            table_data = [
-                ['Item Description', 'Qty', 'Unit Price', 'Line Total']
-            ]
-            
-            for i in range(item_start, item_end):
-                line = lines[i].strip()
-                if line and not line.startswith('-') and line:
-                    parts = line.split()
-                    if len(parts) >= 4:
-                        item_name = ' '.join(parts[:-3])
-                        qty = parts[-3]
-                        price = parts[-2]
-                        total = parts[-1]
-                        table_data.append([item_name, qty, price, total])
-            
-            # Create premium items table
-            items_table = Table(table_data, colWidths=[3.5*inch, 0.8*inch, 1.2*inch, 1.2*inch])
-            items_table.setStyle(TableStyle([
-                # Header styling
-                ('BACKGROUND', (0, 0), (-1, 0), primary_blue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                # Data rows - alternating colors
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('ALIGN', (0, 1), (0, -1), 'LEFT'),      # Item names left-aligned
-                ('ALIGN', (1, 1), (-1, -1), 'CENTER'),   # Numbers centered
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                # Professional grid
-                ('GRID', (0, 0), (-1, -1), 0.5, dark_gray),
-                ('LINEBELOW', (0, 0), (-1, 0), 2, primary_blue),
-                # Padding for readability
-                ('LEFTPADDING', (0, 0), (-1, -1), 8),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ]))
-            
-            # Add alternating row colors for better readability
-            for i in range(1, len(table_data)):
-                if i % 2 == 0:
-                    items_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, i), (-1, i), light_gray)
-                    ]))
-            
-            story.append(items_table)
-            story.append(Spacer(1, 25))
-        
-        # === ELEGANT TOTALS SECTION ===
-        
-        # Extract and format totals
-        subtotal_amount = ""
-        tax_amount = ""
-        total_amount = ""
-        
-        for line in lines:
-            if 'SUBTOTAL:' in line:
-                subtotal_amount = line.split('$')[-1].strip()
-            elif 'TAXES:' in line:
-                tax_amount = line.split('$')[-1].strip()
-            elif 'TOTAL:' in line and 'SUBTOTAL' not in line:
-                total_amount = line.split('$')[-1].strip()
-        
-        # Create elegant totals table
-        totals_data = [
-            ['', 'Subtotal:', f"${subtotal_amount}"],
-            ['', 'Taxes:', f"${tax_amount}"],
-            ['', '', ''],  # Spacer row
-            ['', 'GRAND TOTAL:', f"${total_amount}"]
-        ]
-        
-        totals_table = Table(totals_data, colWidths=[4*inch, 1.5*inch, 1.5*inch])
-        totals_table.setStyle(TableStyle([
-            # Subtotal and tax rows
-            ('FONTNAME', (1, 0), (-1, 1), 'Helvetica'),
-            ('FONTSIZE', (1, 0), (-1, 1), 11),
-            ('ALIGN', (1, 0), (-1, 1), 'RIGHT'),
-            ('TEXTCOLOR', (1, 0), (-1, 1), dark_gray),
-            # Grand total row - make it stand out
-            ('FONTNAME', (1, 3), (-1, 3), 'Helvetica-Bold'),
-            ('FONTSIZE', (1, 3), (-1, 3), 13),
-            ('ALIGN', (1, 3), (-1, 3), 'RIGHT'),
-            ('TEXTCOLOR', (1, 3), (-1, 3), accent_green),
-            ('BACKGROUND', (1, 3), (-1, 3), light_gray),
-            ('BOX', (1, 3), (-1, 3), 1.5, accent_green),
-            # Padding
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        
-        story.append(totals_table)
-        story.append(Spacer(1, 30))
-        
-        # === PROFESSIONAL FOOTER ===
-        
-        # Thank you message with style
-        thank_you_data = [
-            ['Thank you for choosing DigiClimate Store Hub!']
-        ]
-        thank_you_table = Table(thank_you_data, colWidths=[7.5*inch])
-        thank_you_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), primary_blue),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 14),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('ROUNDEDCORNERS', (0, 0), (-1, -1), 5),
-        ]))
-        
-        story.append(thank_you_table)
-        story.append(Spacer(1, 20))
-        
-        # Contact information and system details
-        if for_email:
-            story.append(Paragraph("This receipt was emailed from DigiClimate Store Hub v2.0", footer_style))
-            story.append(Paragraph("Enterprise Point of Sale & Inventory Management System", footer_style))
-            story.append(Paragraph(f"Email generated on {datetime.now().strftime('%A, %B %d, %Y at %I:%M %p')}", footer_style))
-        else:
-            story.append(Paragraph("This receipt was generated by DigiClimate Store Hub v2.0", footer_style))
-            story.append(Paragraph("Enterprise Point of Sale & Inventory Management System", footer_style))
-            story.append(Paragraph(f"Generated on {datetime.now().strftime('%A, %B %d, %Y at %I:%M %p')}", footer_style))
-        
-        # Add a subtle footer line
-        footer_line_table = Table([['']], colWidths=[7.5*inch], rowHeights=[2])
-        footer_line_table.setStyle(TableStyle([
-            ('LINEABOVE', (0, 0), (-1, -1), 1, gold_accent),
-        ]))
-        story.append(Spacer(1, 10))
-        story.append(footer_line_table)
-        
-        # Build the premium PDF
-        doc.build(story)
-        
+        pdf_bytes = render_receipt_pdf(receipt_text, sale_id=sale_id, for_email=for_email)
+        filename = save_receipt_pdf(pdf_bytes, receipt_filename(sale_id, for_email))
         logger.info(f"PDF Receipt saved: {filename}")
         return filename
         
@@ -1040,6 +665,8 @@ def generate_premium_pdf_receipt(receipt_text, sale_id=None, for_email=False):
         else:
             logger.error(f"Could not save PDF receipt: {e}")
         return None
+
+
 def send_email_receipt(customer_email, receipt_text, sale_id, show_success_popup=True):
     # Send receipt via email to customer with PDF attachment
     email_config = load_email_config()
@@ -1081,37 +708,44 @@ This is an automated message. Please do not reply to this email.
         
         msg.attach(MIMEText(email_body, 'plain'))
         
-        # Generate PDF for email attachment
-        try:
-            pdf_filename = generate_premium_pdf_receipt(receipt_text, sale_id=sale_id, for_email=True)
-            if pdf_filename and os.path.exists(pdf_filename):
-                # Attach PDF to email
-                with open(pdf_filename, "rb") as attachment:
-                    part = MIMEBase('application', 'octet-stream')
-                    part.set_payload(attachment.read())
-                
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= receipt_{sale_id}.pdf',
-                )
-                msg.attach(part)
-        except Exception as pdf_error:
-            logger.warning(f"Could not attach PDF to email: {pdf_error}")
-        
-        # Send email
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(email_config['email'], email_config['password'])
-            server.sendmail(email_config['email'], [customer_email], msg.as_string())
+        # Persist to the outbox before reporting success, held until the sale's PDF
+        # is attached; the worker delivers it and reports status back to the Sales tab
+        message_id = start_receipt_outbox().enqueue(
+            sale_id, email_config['email'], customer_email, msg.as_string(), hold=OUTBOX_ATTACHMENT_WAIT
+        )
+        future = get_receipt_renderer().submit(sale_id, receipt_text)
+        future.add_done_callback(lambda done: _attach_receipt_pdf(done, msg, sale_id, message_id))
             
         if show_success_popup:
-            show_success_message(f"Receipt has been sent to {customer_email} with PDF attachment")
+            show_success_message(f"Receipt with PDF attachment is being sent to {customer_email}")
         return True
         
     except Exception as e:
-        show_error_message(f"Failed to send email: {str(e)}")
+        show_error_message(f"Failed to queue email: {str(e)}")
         return False
 
+
+def _attach_receipt_pdf(render_future, msg, sale_id, message_id):
+    # Runs when the receipt render completes (on the render worker, or inline if already done).
+    # The queued message is released either way; without the PDF it goes out with the text receipt only.
+    try:
+        rendered = render_future.result()
+        part = MIMEBase('application', 'octet-stream')
+        part.set_payload(rendered['pdf'])
+        encoders.encode_base64(part)
+        part.add_header(
+            'Content-Disposition',
+            f'attachment; filename= receipt_{sale_id}.pdf',
+        )
+        msg.attach(part)
+    except Exception as pdf_error:
+        logger.warning(f"Could not attach PDF to email: {pdf_error}")
+    try:
+        if not start_receipt_outbox().replace_message(message_id, msg.as_string()):
+            logger.warning(f"Receipt email for Sale #{sale_id} was already sent without its PDF")
+    except Exception as e:
+        logger.error(f"Failed to attach PDF to receipt email for Sale #{sale_id}: {e}")
+
 def resend_last_receipt(cursor):
     # Resend the last receipt to customer's email
     global last_sale_info
@@ -1141,7 +775,7 @@ def resend_last_receipt(cursor):
         
         if success:
             # Show specific confirmation for resend action
-            show_success_message(f"Receipt for Sale #{last_sale_info['sale_id']} has been successfully resent to {customer_email}")
+            show_success_message(f"Receipt for Sale #{last_sale_info['sale_id']} is being resent to {customer_email}")
         else:
             show_error_message("Failed to resend receipt")
             
@@ -1367,7 +1001,7 @@ def is_valid_date(date_str):
 def empty_cart(cart_tree, cart, cursor):
     # Empties the cart and updates the display
     cart.clear()
-    _update_cart_display(cart_tree, cart, cursor)
+    _update_cart_display(cart, cart_tree, cursor)
 def add_item(connection, cursor, sku_entry, item_name_entry, category_entry, price_entry, stock_entry, supplier_id_entry, cost_entry=None):
     try:
         sku = sku_entry.get()
@@ -1441,11 +1075,11 @@ def _populate_suppliers_treeview(suppliers_list, suppliers_tree):
 
 def _populate_inventory_treeview(inventory_list, inventory_tree):
     """Populates the inventory treeview with data."""
-    inventory_tree.delete(*inventory_tree.get_children())
-    for item in inventory_list:
-        formatted_values = format_treeview_values((item['SKU'], item['name'], item['category'], item['price'], item['stock'], item['supplier_id'], item['cost']))
-        inventory_tree.insert("", "end", values=formatted_values)
-    alternate_treeview_rows(inventory_tree)
+    # Only the rows in view become Treeview items; sorting and filtering work on the list
+    inventory_tree.set_source(ListRowSource(
+        format_treeview_values((item['SKU'], item['name'], item['category'], item['price'], item['stock'], item['supplier_id'], item['cost']))
+        for item in inventory_list
+    ))
 
 def populate_employees_treeview(employees_list, employee_tree):    
     employee_tree.delete(*employee_tree.get_children())    
@@ -1538,173 +1172,197 @@ def _populate_customers_treeview(customers_list, customer_tree):
         customer_tree.insert("", "end", values=formatted_values)
     alternate_treeview_rows(customer_tree)
 
+def _show_paged_report(columns, load_page, format_row, empty_message, footer_rows, total_rows, iter_records, sort_fields):
+    # Shows the first page now; ReportsUI asks for each further page as the report is scrolled
+    # and streams the whole report through iter_records(cursor) when it is exported.
+    # Sorting on a column re-runs the report ordered by its field in sort_fields and pages again.
+    def page_loader(after, sort=None):
+        def next_page():
+            records, next_key = load_page(after, sort)
+            following = page_loader(next_key, sort) if next_key is not None else None
+            return [format_row(record) for record in records], following
+        return thread_scoped(next_page)
+
+    def sorted_pages(column, reverse):
+        return page_loader(None, (sort_fields[column], reverse) if column is not None else None)()
+
+    def export_rows(export_cursor):
+        yield from (format_row(record) for record in iter_records(export_cursor))
+        yield from footer_rows
+
+    rows, next_page = page_loader(None)()
+    if not rows:
+        rows = [(empty_message,) + ("",) * (len(columns) - 1)]
+        footer_rows = []
+    pos_app.reports_ui.display_report(
+        columns, rows, next_page=next_page, footer_rows=footer_rows, total_rows=total_rows, export_rows=export_rows,
+        sorted_pages=sorted_pages if next_page is not None else None
+    )
+
 def sales_by_employee_callback(employee_id):
     try:
-        sales_list = sales_by_employee(cursor, employee_id)
         columns = ("Sale ID", "Date/Time", "Total", "Customer ID", "Customer Name")
-        rows = []
-        grand_total = 0.0
-        
-        # Process individual sales and calculate grand total
-        for sale in sales_list:
-            sale_total = float(sale['total'])
-            grand_total += sale_total
-            rows.append((
-                sale['sale_id'], 
-                sale['sale_datetime'], 
-                f"${sale_total:.2f}", 
-                sale['customer_id'], 
-                sale['customer_name']
-            ))
-        
-        if not rows:
-            rows = [("No sales found for this employee.", "", "", "", "")]
-        else:
-            # Add separator row and grand total row
-            rows.append(("", "", "", "", ""))
-            rows.append(("─" * 10, "─" * 15, "─" * 12, "─" * 12, "─" * 15))
-            rows.append((
+        totals = reporting.sales_by_employee_totals(cursor, employee_id)
+        sale_count = int(totals.get('count') or 0)
+        grand_total = float(totals.get('total') or 0)
+        
+        # Grand total comes from one aggregate query, so it covers pages not loaded yet
+        footer_rows = [
+            ("", "", "", "", ""),
+            ("─" * 10, "─" * 15, "─" * 12, "─" * 12, "─" * 15),
+            (
                 "GRAND TOTAL",
-                f"{len(sales_list)} sales",
+                f"{sale_count} sales",
                 f"${grand_total:.2f}",
                 "",
                 ""
-            ))
+            ),
+        ]
         
-        pos_app.reports_ui.display_report(columns, rows)
+        _show_paged_report(
+            columns,
+            lambda after, sort: reporting.sales_by_employee_page(cursor, employee_id, after=after, sort=sort),
+            lambda sale: (
+                sale['sale_id'],
+                sale['sale_datetime'],
+                f"${float(sale['total']):.2f}",
+                sale['customer_id'],
+                sale['customer_name']
+            ),
+            "No sales found for this employee.",
+            footer_rows,
+            sale_count,
+            lambda export_cursor: reporting.iter_sales_by_employee(export_cursor, employee_id),
+            ("sale_id", "sale_datetime", "total", "customer_id", "customer_name")
+        )
     except Exception as e:
         handle_error(f"An error occurred while generating the sales by employee report: {e}")
 
 def supplier_purchase_callback(supplier_id):
     try:
-        purchases = supplier_purchase_report(cursor, supplier_id)
         columns = ("Purchase ID", "Date/Time", "SKU", "Product Name", "Quantity", "Price", "Line Total")
-        rows = []
-        grand_total = 0.0
-        total_quantity = 0
-        
-        # Process individual purchases and calculate grand total
-        for p in purchases:
-            line_total = float(p['line_total'])
-            quantity = int(p['quantity'])
-            grand_total += line_total
-            total_quantity += quantity
-            
-            rows.append((
-                p['purchase_id'], 
-                p['purchase_date'], 
-                p['SKU'], 
-                p['product_name'], 
-                quantity,
-                f"${p['price']:.2f}", 
-                f"${line_total:.2f}"
-            ))
-        
-        if not rows:
-            rows = [("No purchases found for this supplier.", "", "", "", "", "", "")]
-        else:
-            # Add separator row and grand total row
-            rows.append(("", "", "", "", "", "", ""))
-            rows.append(("─" * 12, "─" * 15, "─" * 8, "─" * 15, "─" * 8, "─" * 10, "─" * 12))
-            rows.append((
+        totals = reporting.supplier_purchase_totals(cursor, supplier_id)
+        purchase_count = int(totals.get('count') or 0)
+        total_quantity = int(totals.get('quantity') or 0)
+        grand_total = float(totals.get('total') or 0)
+        
+        footer_rows = [
+            ("", "", "", "", "", "", ""),
+            ("─" * 12, "─" * 15, "─" * 8, "─" * 15, "─" * 8, "─" * 10, "─" * 12),
+            (
                 "GRAND TOTAL",
-                f"{len(purchases)} purchases",
+                f"{purchase_count} purchases",
                 "",
                 "",
                 str(total_quantity),
                 "",
                 f"${grand_total:.2f}"
-            ))
+            ),
+        ]
         
-        pos_app.reports_ui.display_report(columns, rows)
+        _show_paged_report(
+            columns,
+            lambda after, sort: reporting.supplier_purchase_page(cursor, supplier_id, after=after, sort=sort),
+            lambda p: (
+                p['purchase_id'],
+                p['purchase_date'],
+                p['SKU'],
+                p['product_name'],
+                int(p['quantity']),
+                f"${p['price']:.2f}",
+                f"${float(p['line_total']):.2f}"
+            ),
+            "No purchases found for this supplier.",
+            footer_rows,
+            purchase_count,
+            lambda export_cursor: reporting.iter_supplier_purchases(export_cursor, supplier_id),
+            ("purchase_id", "purchase_date", "SKU", "product_name", "quantity", "price", "line_total")
+        )
     except Exception as e:
         handle_error(f"An error occurred while generating the supplier purchase report: {e}")
 
 def inventory_adjustment_history_callback():
     try:
-        adjustments = inventory_adjustment_history(cursor)
         columns = ("Adjustment ID", "Date/Time", "SKU", "Quantity Change", "Employee Name", "Reason")
-        rows = []
-        net_change = 0
-        
-        # Process individual adjustments and calculate net change
-        for a in adjustments:
-            quantity_change = int(a['quantity_change'])
-            net_change += quantity_change
-            
-            rows.append((
-                a['adjustment_id'], 
-                a['date'], 
-                a['SKU'], 
-                quantity_change, 
-                a['employee_name'], 
-                a['reason']
-            ))
-        
-        if not rows:
-            rows = [("No adjustments found.", "", "", "", "", "")]
-        else:
-            # Add separator row and summary row
-            rows.append(("", "", "", "", "", ""))
-            rows.append(("─" * 12, "─" * 15, "─" * 8, "─" * 12, "─" * 15, "─" * 15))
-            
-            # Show net change (positive = additions, negative = reductions)
-            net_change_str = f"+{net_change}" if net_change > 0 else str(net_change)
-            rows.append((
+        totals = reporting.inventory_adjustment_totals(cursor)
+        adjustment_count = int(totals.get('count') or 0)
+        net_change = int(totals.get('net_change') or 0)
+        
+        # Show net change (positive = additions, negative = reductions)
+        net_change_str = f"+{net_change}" if net_change > 0 else str(net_change)
+        footer_rows = [
+            ("", "", "", "", "", ""),
+            ("─" * 12, "─" * 15, "─" * 8, "─" * 12, "─" * 15, "─" * 15),
+            (
                 "SUMMARY",
-                f"{len(adjustments)} adjustments",
+                f"{adjustment_count} adjustments",
                 "",
                 net_change_str,
                 "Net Change",
                 ""
-            ))
+            ),
+        ]
         
-        pos_app.reports_ui.display_report(columns, rows)
+        _show_paged_report(
+            columns,
+            lambda after, sort: reporting.inventory_adjustment_page(cursor, after=after, sort=sort),
+            lambda a: (
+                a['adjustment_id'],
+                a['date'],
+                a['SKU'],
+                int(a['quantity_change']),
+                a['employee_name'],
+                a['reason']
+            ),
+            "No adjustments found.",
+            footer_rows,
+            adjustment_count,
+            reporting.iter_inventory_adjustments,
+            ("adjustment_id", "date", "SKU", "quantity_change", "employee_name", "reason")
+        )
     except Exception as e:
         handle_error(f"An error occurred while generating the inventory adjustment history: {e}")
 
 def customer_purchase_history_callback(customer_id):
     try:
-        purchases = customer_purchase_history(cursor, customer_id)
         columns = ("Sale ID", "Date/Time", "SKU", "Product Name", "Quantity", "Price", "Total")
-        rows = []
-        grand_total = 0.0
-        total_quantity = 0
-        
-        # Process individual purchases and calculate grand total
-        for p in purchases:
-            purchase_total = float(p['total'])
-            quantity = int(p['quantity'])
-            grand_total += purchase_total
-            total_quantity += quantity
-            
-            rows.append((
-                p['sale_id'],
-                p['sale_datetime'],
-                p['SKU'],
-                p['product_name'],
-                quantity,
-                f"${p['price']:.2f}",
-                f"${purchase_total:.2f}"
-            ))
-        
-        if not rows:
-            rows = [("No purchases found for this customer.", "", "", "", "", "", "")]
-        else:
-            # Add separator row and grand total row
-            rows.append(("", "", "", "", "", "", ""))
-            rows.append(("─" * 8, "─" * 15, "─" * 8, "─" * 15, "─" * 8, "─" * 10, "─" * 12))
-            rows.append((
+        totals = reporting.customer_purchase_totals(cursor, customer_id)
+        purchase_count = int(totals.get('count') or 0)
+        total_quantity = int(totals.get('quantity') or 0)
+        grand_total = float(totals.get('total') or 0)
+        
+        footer_rows = [
+            ("", "", "", "", "", "", ""),
+            ("─" * 8, "─" * 15, "─" * 8, "─" * 15, "─" * 8, "─" * 10, "─" * 12),
+            (
                 "TOTAL",
-                f"{len(purchases)} purchases",
+                f"{purchase_count} purchases",
                 "",
                 "",
                 str(total_quantity),
                 "",
                 f"${grand_total:.2f}"
-            ))
+            ),
+        ]
         
-        pos_app.reports_ui.display_report(columns, rows)
+        _show_paged_report(
+            columns,
+            lambda after, sort: reporting.customer_purchase_page(cursor, customer_id, after=after, sort=sort),
+            lambda p: (
+                p['sale_id'],
+                p['sale_datetime'],
+                p['SKU'],
+                p['product_name'],
+                int(p['quantity']),
+                f"${p['price']:.2f}",
+                f"${float(p['total']):.2f}"
+            ),
+            "No purchases found for this customer.",
+            footer_rows,
+            purchase_count,
+            lambda export_cursor: reporting.iter_customer_purchases(export_cursor, customer_id),
+            ("sale_id", "sale_datetime", "SKU", "product_name", "quantity", "price", "total")
+        )
     except Exception as e:
         handle_error(f"An error occurred while generating the customer purchase history: {e}")
 
@@ -2166,7 +1824,8 @@ if __name__ == "__main__":
         # Send end-of-day report before logout
         try:
             logger.info("Generating end-of-day report...")
-            send_end_of_day_report(cursor)
+            with thread_connection():
+                send_end_of_day_report(cursor)
         except Exception as e:
             logger.error(f"Error sending end-of-day report: {e}")
         
@@ -2236,20 +1895,48 @@ if __name__ == "__main__":
     
     logger.info(f"Logged in as: {username} (Role: {user_role})")
     
-    db_connection, cursor = get_db()
-    cart = []
+    # Thread-bound handles: every UI thread gets its own pooled connection and cursor
+    db_connection, cursor = get_shared_db()
+    cart = sales.Cart()
+
+    # Dashboard reads the daily sales rollup; create and backfill it on first run
+    try:
+        rollups.ensure_daily_sales_rollup()
+    except Exception as e:
+        logger.error(f"Could not prepare daily sales rollup: {e}")
+
+    # Climate tab estimates stock cover from the demand index; create and backfill it on first run
+    try:
+        demand.ensure_demand_rates()
+    except Exception as e:
+        logger.error(f"Could not prepare demand rate index: {e}")
+
+    # Climate tab reads the unified ClimateProduction table; migrate the per-material tables on first run
+    try:
+        climate_production.ensure_climate_production()
+    except Exception as e:
+        logger.error(f"Could not prepare climate production table: {e}")
 
     global pos_app
     pos_app = create_pos_app_instance(root, cart, cursor, db_connection, user_role, username)
 
+    # Deliver queued receipts (including any left from the last session) in the background
+    poll_receipt_outbox(root, start_receipt_outbox())
+
+    # Start the receipt renderer now so the template is compiled before the first checkout
+    get_receipt_renderer()
+
     # Function to handle application closing (when X button is clicked)
     def on_closing():
         try:
             logger.info("Generating end-of-day report...")
-            send_end_of_day_report(cursor)
+            with thread_connection():
+                send_end_of_day_report(cursor)
         except Exception as e:
             logger.error(f"Error sending end-of-day report: {e}")
         finally:
+            # Busiest statements and call sites of the session, for tuning
+            query_stats.log_query_summary()
             root.destroy()
 
     # Set the window close protocol
@@ -1,7 +1,11 @@
 import sys
 import os
 import json
+import random
+import time
+import unittest
 from datetime import datetime, timedelta
+from typing import Dict, List
 import logging
 
 # Add Climate Tab to path
@@ -9,16 +13,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'Climate Tab'))
 
 # Import climate data manager
 from climate_data import ClimateDataManager
+from climate_analysis import ForecastMatrix, analyze_forecasts
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('climate_alerts_test.log')
-    ]
-)
 logger = logging.getLogger(__name__)
 
 class ClimateAlertTester:
@@ -974,8 +970,280 @@ For questions about climate alerts or system configuration:
                 print(f"❌ An error occurred: {e}")
                 logger.error(f"Error in main loop: {e}")
 
+class ReferenceAlertAnalyzer:
+    """
+    The per-material loop implementation of the predictive alert rules that
+    climate_analysis replaced, kept to check the array engine against.
+    """
+    
+    def __init__(self, affected_counts):
+        self.affected_counts = affected_counts
+    
+    def get_affected_products(self, material_id):
+        return [None] * self.affected_counts.get(material_id, 0)
+    
+    def predictive_alerts(self, forecast_data, horizon_label):
+        alerts = []
+        material_forecasts = {}
+        for item in forecast_data:
+            material_forecasts.setdefault(item['material_name'], []).append(item)
+        for material, forecasts in material_forecasts.items():
+            material_id = forecasts[0]['material_id']
+            forecasts = sorted(forecasts, key=lambda x: x['forecast_date'])
+            alerts.extend(self._analyze_delay_patterns(material, material_id, forecasts, horizon_label))
+            alerts.extend(self._analyze_production_drops(material, material_id, forecasts, horizon_label))
+            alerts.extend(self._analyze_weather_extremes(material, material_id, forecasts, horizon_label))
+            alerts.extend(self._analyze_supply_chain_risks(material, material_id, forecasts, horizon_label))
+        return sorted(alerts, key=lambda x: (x['urgency_score'], x['days_until_impact']))
+
+    def _analyze_delay_patterns(self, material: str, material_id: int, forecasts: List[Dict], horizon: str) -> List[Dict]:
+        """Analyze for upcoming delay patterns"""
+        alerts = []
+        
+        try:
+            # Look for consecutive high-delay periods
+            high_delay_periods = []
+            current_period = []
+            
+            for forecast in forecasts:
+                if forecast['delay_percent'] > 20:  # 20% delay threshold
+                    current_period.append(forecast)
+                else:
+                    if len(current_period) >= 2:  # 2+ consecutive days
+                        high_delay_periods.append(current_period)
+                    current_period = []
+            
+            # Check final period
+            if len(current_period) >= 2:
+                high_delay_periods.append(current_period)
+            
+            # Generate alerts for significant delay periods
+            for period in high_delay_periods:
+                start_day = period[0]['days_from_now']
+                end_day = period[-1]['days_from_now']
+                max_delay = max(f['delay_percent'] for f in period)
+                avg_delay = sum(f['delay_percent'] for f in period) / len(period)
+                
+                severity = 'CRITICAL' if max_delay > 40 else 'HIGH' if max_delay > 25 else 'MEDIUM'
+                urgency = 100 - start_day  # More urgent if happening sooner
+                
+                alert = {
+                    'material_name': material,
+                    'material_id': material_id,
+                    'alert_type': 'PREDICTED_DELAYS',
+                    'severity': severity,
+                    'days_until_impact': start_day,
+                    'duration_days': len(period),
+                    'expected_delay': f"{avg_delay:.1f}%",
+                    'peak_delay': f"{max_delay:.1f}%",
+                    'urgency_score': urgency,
+                    'message': f"{material} expected {avg_delay:.1f}% delays for {len(period)} days starting in {start_day} days ({horizon})",
+                    'recommendation': f"Consider ordering {material} earlier or sourcing from alternative suppliers",
+                    'horizon': horizon
+                }
+                alerts.append(alert)
+                
+        except Exception as e:
+            logger.error(f"Error analyzing delay patterns for {material}: {e}")
+        
+        return alerts
+
+    def _analyze_production_drops(self, material: str, material_id: int, forecasts: List[Dict], horizon: str) -> List[Dict]:
+        """Analyze for upcoming production drops"""
+        alerts = []
+        
+        try:
+            for forecast in forecasts:
+                # Calculate production impact if data is available
+                if 'expected_production' in forecast and 'original_production' in forecast:
+                    if forecast['expected_production'] and forecast['original_production']:
+                        production_drop = ((forecast['original_production'] - forecast['expected_production']) 
+                                         / forecast['original_production']) * 100
+                        
+                        if production_drop > 15:  # 15% production drop threshold
+                            severity = 'CRITICAL' if production_drop > 30 else 'HIGH'
+                            urgency = 100 - forecast['days_from_now']
+                            
+                            alert = {
+                                'material_name': material,
+                                'material_id': material_id,
+                                'alert_type': 'PREDICTED_PRODUCTION_DROP',
+                                'severity': severity,
+                                'days_until_impact': forecast['days_from_now'],
+                                'production_drop': f"{production_drop:.1f}%",
+                                'urgency_score': urgency,
+                                'message': f"{material} production expected to drop {production_drop:.1f}% in {forecast['days_from_now']} days",
+                                'recommendation': f"Increase {material} inventory buffer by {int(production_drop * 1.5)}% before impact",
+                                'horizon': horizon,
+                                'expected_condition': forecast.get('expected_condition', 'Unknown')
+                            }
+                            alerts.append(alert)
+                            
+        except Exception as e:
+            logger.error(f"Error analyzing production drops for {material}: {e}")
+        
+        return alerts
+
+    def _analyze_weather_extremes(self, material: str, material_id: int, forecasts: List[Dict], horizon: str) -> List[Dict]:
+        """Analyze for extreme weather conditions"""
+        alerts = []
+        
+        try:
+            extreme_conditions = ['severe_drought', 'flooding', 'extreme_heat', 'frost', 'storm']
+            
+            for forecast in forecasts:
+                condition = forecast.get('expected_condition', '').lower()
+                
+                # Check if condition contains extreme weather keywords
+                for extreme in extreme_conditions:
+                    if extreme in condition or any(word in condition for word in ['severe', 'extreme', 'critical', 'emergency']):
+                        urgency = 100 - forecast['days_from_now']
+                        
+                        alert = {
+                            'material_name': material,
+                            'material_id': material_id,
+                            'alert_type': 'EXTREME_WEATHER_WARNING',
+                            'severity': 'CRITICAL',
+                            'days_until_impact': forecast['days_from_now'],
+                            'urgency_score': urgency,
+                            'weather_condition': forecast['expected_condition'],
+                            'message': f"Extreme weather ({forecast['expected_condition']}) predicted for {material} in {forecast['days_from_now']} days",
+                            'recommendation': f"Secure {material} inventory and consider emergency sourcing arrangements",
+                            'horizon': horizon
+                        }
+                        alerts.append(alert)
+                        break  # One alert per forecast day
+                        
+        except Exception as e:
+            logger.error(f"Error analyzing weather extremes for {material}: {e}")
+        
+        return alerts
+
+    def _analyze_supply_chain_risks(self, material: str, material_id: int, forecasts: List[Dict], horizon: str) -> List[Dict]:
+        """Analyze for supply chain disruption risks"""
+        alerts = []
+        
+        try:
+            # Look for patterns that indicate supply chain risks
+            risk_days = [f for f in forecasts if f['delay_percent'] > 15 or f['risk_level'] in ['HIGH', 'CRITICAL']]
+            
+            if len(risk_days) >= 3:  # Multiple risky days indicate supply chain concern
+                avg_risk_delay = sum(f['delay_percent'] for f in risk_days) / len(risk_days)
+                earliest_impact = min(f['days_from_now'] for f in risk_days)
+                
+                # Check if this affects multiple products
+                affected_products = self.get_affected_products(material_id)
+                affected_count = len(affected_products)
+                
+                if affected_count > 0:
+                    urgency = (100 - earliest_impact) + (affected_count * 2)  # More products = higher urgency
+                    
+                    alert = {
+                        'material_name': material,
+                        'material_id': material_id,
+                        'alert_type': 'SUPPLY_CHAIN_RISK',
+                        'severity': 'HIGH' if affected_count > 3 else 'MEDIUM',
+                        'days_until_impact': earliest_impact,
+                        'affected_products_count': affected_count,
+                        'risk_days_count': len(risk_days),
+                        'avg_delay': f"{avg_risk_delay:.1f}%",
+                        'urgency_score': min(urgency, 100),
+                        'message': f"{material} supply chain at risk - {len(risk_days)} problematic days in {horizon}, affecting {affected_count} products",
+                        'recommendation': f"Review {material} suppliers and consider diversifying sources for {affected_count} affected products",
+                        'horizon': horizon
+                    }
+                    alerts.append(alert)
+                    
+        except Exception as e:
+            logger.error(f"Error analyzing supply chain risks for {material}: {e}")
+        
+        return alerts
+
+
+def _random_forecasts(materials, days, seed=0):
+    """Forecast rows shaped like ClimateDataManager.get_climate_forecast, with random delays and conditions"""
+    rng = random.Random(seed)
+    conditions = ['Normal growing conditions', 'Mild rainfall', 'Dry spell', 'Severe drought expected',
+                  'Flooding in growing regions', 'Frost risk overnight', 'Extreme heat wave', 'Storm damage likely']
+    weights = [60, 20, 10, 2, 2, 2, 2, 2]
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    manager = ClimateDataManager.__new__(ClimateDataManager)
+    rows = []
+    for material_id in range(1, materials + 1):
+        for day in range(days):
+            delay = round(rng.uniform(0, 15) if rng.random() < 0.85 else rng.uniform(15, 50), 2)
+            original = round(rng.uniform(50, 150), 2)
+            row = {
+                'material_id': material_id,
+                'material_name': f"Material {material_id}",
+                'forecast_date': start + timedelta(days=day),
+                'expected_condition': rng.choices(conditions, weights)[0],
+                'category': 'Test',
+                'delay_percent': delay,
+                'risk_level': manager._calculate_risk_level(delay),
+                'days_from_now': day
+            }
+            if rng.random() < 0.5:
+                row['original_production'] = original
+                row['expected_production'] = round(original * rng.uniform(0.7, 1.05), 2)
+            rows.append(row)
+    return rows
+
+
+def verify_alert_analysis(materials=200, days=365, seed=0):
+    """
+    Check the array alert engine against the loop implementation on random
+    forecasts for every horizon, and time both. Returns True when they agree.
+    """
+    rows = _random_forecasts(materials, days, seed)
+    rng = random.Random(seed)
+    affected_counts = {material_id: rng.choice([0, 1, 2, 5]) for material_id in range(1, materials + 1)}
+    reference = ReferenceAlertAnalyzer(affected_counts)
+    start = rows[0]['forecast_date'] if rows else datetime.now()
+    
+    print(f"\n🔬 Verifying alert analysis: {materials} materials × {days} days")
+    started = time.perf_counter()
+    matrix = ForecastMatrix(rows)
+    print(f"   Array layout built in {(time.perf_counter() - started) * 1000:.1f} ms")
+    matched = True
+    for horizon_days, label in [(7, "next week"), (14, "next 2 weeks"), (30, "next month"), (days, f"next {days} days")]:
+        end_date = start + timedelta(days=horizon_days)
+        window = [row for row in rows if row['forecast_date'] <= end_date]
+        
+        started = time.perf_counter()
+        expected = reference.predictive_alerts(window, label)
+        loop_seconds = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        actual = analyze_forecasts(matrix, label, lambda material_id: affected_counts.get(material_id, 0), end_date=end_date)
+        array_seconds = time.perf_counter() - started
+        
+        status = "✅" if actual == expected else "❌"
+        matched = matched and actual == expected
+        print(f"   {status} {label}: {len(expected)} alerts, loops {loop_seconds * 1000:.1f} ms, arrays {array_seconds * 1000:.1f} ms")
+    return matched
+
+
+class AlertAnalysisTest(unittest.TestCase):
+    """Regression check of the array alert engine, run with `python -m pytest test_climate_alerts.py`"""
+
+    def test_array_engine_matches_loop_reference(self):
+        self.assertTrue(verify_alert_analysis(materials=20, days=60, seed=1))
+
+
 def main():
     """Main function to run the climate alert tester"""
+    # Set up logging here, not on import, so the test run does not write the log file
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(),
+            logging.FileHandler('climate_alerts_test.log')
+        ]
+    )
+    if '--verify-analysis' in sys.argv:
+        sys.exit(0 if verify_alert_analysis() else 1)
     try:
         tester = ClimateAlertTester()
         tester.run()
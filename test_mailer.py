@@ -0,0 +1,174 @@
+"""
+Alert mailer tests against a local SMTP sink.
+Covers queueing, session reuse (NOOP instead of a new login per message)
+and retry with exponential backoff. Run with `python -m unittest test_mailer`.
+"""
+import socketserver
+import threading
+import time
+import unittest
+
+from automation.mailer import AlertDispatcher
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    # Just enough SMTP for smtplib: greeting, EHLO/HELO, MAIL, RCPT, DATA, NOOP, RSET and QUIT
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        sink = self.server
+        with sink.lock:
+            sink.connections += 1
+        self.reply("220 sink ready")
+        mailfrom, rcpttos = None, []
+        for raw in self.rfile:
+            command = raw.decode(errors="replace").strip()
+            verb, _, arg = command.partition(" ")
+            verb = verb.upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 sink")
+            elif verb == "MAIL":
+                mailfrom, rcpttos = arg.partition(":")[2].strip(" <>"), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                rcpttos.append(arg.partition(":")[2].strip(" <>"))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    # Undo dot-stuffing
+                    lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                self.reply(sink.process_message(mailfrom, rcpttos, b"".join(lines).decode()))
+            elif verb == "NOOP":
+                with sink.lock:
+                    sink.noops += 1
+                self.reply("250 OK")
+            elif verb == "RSET":
+                mailfrom, rcpttos = None, []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    """Local SMTP sink recording every message; the first `fail_first` deliveries get a 451"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, fail_first=0):
+        super().__init__(('127.0.0.1', 0), _SinkHandler)
+        self.port = self.server_address[1]
+        self.fail_first = fail_first
+        self.lock = threading.Lock()
+        self.messages = []
+        self.attempt_times = []
+        self.connections = 0
+        self.noops = 0
+
+    def process_message(self, mailfrom, rcpttos, data):
+        with self.lock:
+            self.attempt_times.append(time.monotonic())
+            if len(self.attempt_times) <= self.fail_first:
+                return "451 Temporary failure, try again"
+            self.messages.append((mailfrom, rcpttos, data))
+        return "250 OK"
+
+
+def _message(subject):
+    return f"Subject: {subject}\r\n\r\nStock alert body\r\n"
+
+
+class AlertDispatcherTest(unittest.TestCase):
+
+    def start_sink(self, **kwargs):
+        self.sink = SinkServer(**kwargs)
+        self.loop = threading.Thread(target=self.sink.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.loop.start()
+
+    def make_dispatcher(self, **kwargs):
+        dispatcher = AlertDispatcher('127.0.0.1', self.sink.port, **kwargs)
+        self.addCleanup(dispatcher.stop)
+        return dispatcher
+
+    def tearDown(self):
+        self.sink.shutdown()
+        self.sink.server_close()
+        self.loop.join(1)
+
+    def test_queued_alerts_are_delivered_in_order(self):
+        self.start_sink()
+        dispatcher = self.make_dispatcher()
+        for number in range(5):
+            self.assertTrue(dispatcher.enqueue('store@example.com', ['manager@example.com'],
+                                               _message(f"Alert {number}"), description=f"alert {number}"))
+        self.assertTrue(dispatcher.flush(timeout=10))
+
+        subjects = [data.splitlines()[0] for _, _, data in self.sink.messages]
+        self.assertEqual(subjects, [f"Subject: Alert {number}" for number in range(5)])
+        stats = dispatcher.stats()
+        self.assertEqual((stats['enqueued'], stats['sent'], stats['failed'], stats['queue_depth']), (5, 5, 0, 0))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        self.start_sink()
+        dispatcher = self.make_dispatcher(max_queue=1)
+        # Keep the worker from starting so the first alert stays queued
+        dispatcher.start = lambda: dispatcher
+        self.assertTrue(dispatcher.enqueue('store@example.com', ['manager@example.com'], _message("Queued")))
+        self.assertFalse(dispatcher.enqueue('store@example.com', ['manager@example.com'], _message("Dropped")))
+        del dispatcher.start
+
+        dispatcher.start()
+        self.assertTrue(dispatcher.flush(timeout=10))
+        self.assertEqual(len(self.sink.messages), 1)
+        stats = dispatcher.stats()
+        self.assertEqual((stats['enqueued'], stats['dropped'], stats['sent']), (1, 1, 1))
+
+    def test_session_is_reused_with_noop(self):
+        self.start_sink()
+        dispatcher = self.make_dispatcher()
+        for number in range(3):
+            dispatcher.enqueue('store@example.com', ['manager@example.com'], _message(f"Alert {number}"))
+            # One at a time, so every message after the first finds the session already open
+            self.assertTrue(dispatcher.flush(timeout=10))
+
+        self.assertEqual(len(self.sink.messages), 3)
+        self.assertEqual(self.sink.connections, 1)
+        self.assertEqual(self.sink.noops, 2)
+
+    def test_failed_sends_retry_with_backoff(self):
+        self.start_sink(fail_first=2)
+        dispatcher = self.make_dispatcher(retry_backoff=0.2, max_retries=3)
+        dispatcher.enqueue('store@example.com', ['manager@example.com'], _message("Retried"))
+        self.assertTrue(dispatcher.flush(timeout=10))
+
+        self.assertEqual(len(self.sink.messages), 1)
+        first_wait, second_wait = (later - earlier for earlier, later in
+                                   zip(self.sink.attempt_times, self.sink.attempt_times[1:]))
+        self.assertGreaterEqual(first_wait, 0.2)
+        self.assertGreaterEqual(second_wait, 0.4)
+        stats = dispatcher.stats()
+        self.assertEqual((stats['sent'], stats['retries'], stats['failed']), (1, 2, 0))
+
+    def test_gives_up_after_max_retries(self):
+        self.start_sink(fail_first=10)
+        dispatcher = self.make_dispatcher(retry_backoff=0.01, max_retries=3)
+        dispatcher.enqueue('store@example.com', ['manager@example.com'], _message("Lost"))
+        self.assertTrue(dispatcher.flush(timeout=10))
+
+        self.assertEqual(self.sink.messages, [])
+        self.assertEqual(len(self.sink.attempt_times), 3)
+        stats = dispatcher.stats()
+        self.assertEqual((stats['sent'], stats['retries'], stats['failed']), (0, 2, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,600 @@
+"""
+Virtualized Treeview for large result sets.
+
+VirtualTreeview is a ttk.Treeview that shows rows from a row source but only
+holds Tk items for the rows in view. Scrolling rewrites the values of that
+fixed window of items instead of inserting one item per row, so a 500k-row
+report costs about as much to draw and scroll as a one-screen one. Sorting
+(click a column heading) and filtering run on the row source, never on Tk
+items.
+
+Row sources:
+    ListRowSource   rows already in memory (inventory, dashboard tables)
+    PagedRowSource  rows fetched page by page (keyset pages from
+                    core.reporting) on a background thread as the view
+                    reaches them, keeping a bounded window of pages in
+                    memory; sorting re-runs the report query in the new
+                    order
+"""
+import bisect
+import logging
+import queue
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk, messagebox
+
+# Get logger instance (configured in main.py)
+logger = logging.getLogger(__name__)
+
+WHEEL_ROWS = 3  # rows moved per mouse wheel notch
+LOAD_AHEAD_WINDOWS = 2  # paged sources load this many windows past the view
+PAGE_CACHE_PAGES = 6  # pages a paged source keeps in memory besides the first
+PAGE_POLL_MS = 30  # how often a view checks for pages loaded in the background
+ROW_SOURCE_CHANGED = "<<RowSourceChanged>>"  # generated when the number of rows changes
+LOADING_TEXT = "Loading..."
+
+_page_executor = None
+
+
+def _page_loader():
+    # One thread for every view: pages of a report are found in order anyway,
+    # and it holds at most one pooled connection
+    global _page_executor
+    if _page_executor is None:
+        _page_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="row-pages")
+    return _page_executor
+
+
+def sort_key(value):
+    # Numbers (including formatted ones like "$1,234.50", "12.5%", "3.2x") sort numerically, the rest as text
+    text = "" if value is None else str(value)
+    cleaned = text.strip().replace(",", "").replace("$", "").rstrip("%x").strip()
+    if any(char.isdigit() for char in cleaned):
+        try:
+            return (0, float(cleaned), "")
+        except ValueError:
+            pass
+    return (1, 0.0, text.lower())
+
+
+class ListRowSource:
+    """
+    Rows held in a list. sort() and filter() build an index over the rows;
+    footer rows (totals) always stay at the end, outside sort and filter.
+    """
+
+    def __init__(self, rows=(), footer_rows=()):
+        self._rows = [tuple(row) for row in rows]
+        self._footer = [tuple(row) for row in footer_rows]
+        self._view = None  # row indices in display order, None when unsorted and unfiltered
+        self._sort = None  # (column index, reverse)
+        self._filter = None  # lower-cased filter text
+
+    @property
+    def complete(self):
+        return True
+
+    @property
+    def scroll_length(self):
+        # Rows the scrollbar spans; paged sources count rows not fetched yet
+        return len(self)
+
+    def _body_length(self):
+        return len(self._rows) if self._view is None else len(self._view)
+
+    def __len__(self):
+        return self._body_length() + len(self._footer)
+
+    def row(self, index):
+        body = self._body_length()
+        if index >= body:
+            return self._footer[index - body]
+        return self._rows[index if self._view is None else self._view[index]]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def page_requests(self, first, last):
+        # Hook for sources that load lazily; list rows are always all there
+        return []
+
+    def _matches(self, row):
+        return any(self._filter in str(value).lower() for value in row)
+
+    def _rebuild(self):
+        if self._sort is None and self._filter is None:
+            self._view = None
+            return
+        indices = range(len(self._rows))
+        if self._filter is not None:
+            indices = [index for index in indices if self._matches(self._rows[index])]
+        if self._sort is not None:
+            column, reverse = self._sort
+            indices = sorted(indices, key=lambda index: sort_key(self._rows[index][column]), reverse=reverse)
+        self._view = list(indices)
+
+    def sort(self, column, reverse=False):
+        self._sort = (column, reverse) if column is not None else None
+        self._rebuild()
+
+    def filter(self, text):
+        text = (text or "").strip().lower()
+        self._filter = text or None
+        self._rebuild()
+
+
+class PagedRowSource:
+    """
+    Rows fetched a page at a time, of which only the first page and the
+    PAGE_CACHE_PAGES most recently used others stay in memory, so memory
+    does not grow with the size of the report. next_page() returns (rows,
+    next_page), with next_page None after the last page; each page keeps the
+    keyset loader that fetched it, so an evicted page is fetched again when
+    it scrolls back into view. Loading is split so it can run off the Tk
+    thread: page_requests(first, last) returns the (key, loader) pairs rows
+    first..last still need, and add_page(key, result) stores what a loader
+    returned (row() is None for a row whose page is not in memory).
+
+    Footer rows are shown once the last page is in. Filtering applies to
+    pages as they arrive; changing it starts paging over from the first
+    page. Sorting re-runs the query through sorted_pages(column, reverse)
+    (column None restores the original order) and pages again.
+    """
+
+    def __init__(self, rows, next_page, footer_rows=(), total_rows=None, sorted_pages=None):
+        self._sorted_pages = sorted_pages
+        self._pending_footer = [tuple(row) for row in footer_rows]
+        self._filter = None  # lower-cased filter text
+        self._generation = 0  # bumped on sort and filter, so loads started before are dropped
+        self.total_rows = total_rows
+        self._reset(rows, next_page)
+
+    def _reset(self, rows, next_page):
+        # Start paging over from a first page
+        self._generation += 1
+        self._first = [tuple(row) for row in rows]  # the first page is never evicted
+        first = [row for row in self._first if self._keep(row)]
+        self._loaders = [None]  # loader of every page found so far; the first page has none
+        self._starts = [0]  # index of each page's first (filtered) row
+        self._lengths = [len(first)]  # (filtered) rows in each page
+        self._pages = OrderedDict([(0, first)])  # page -> rows, least recently used first
+        self._wanted = (0, 0)  # pages the view needs, never evicted
+        self._next_page = next_page
+        self.loaded_rows = len(self._first)  # rows fetched so far, kept in memory or not
+        self._footer = self._pending_footer if next_page is None else []
+
+    @property
+    def complete(self):
+        return self._next_page is None
+
+    @property
+    def scroll_length(self):
+        if self.complete or self._filter is not None or self.total_rows is None:
+            return len(self)
+        return max(len(self), self.total_rows + len(self._pending_footer))
+
+    def _keep(self, row):
+        return self._filter is None or any(self._filter in str(value).lower() for value in row)
+
+    def _body_length(self):
+        return self._starts[-1] + self._lengths[-1]
+
+    def __len__(self):
+        return self._body_length() + len(self._footer)
+
+    def _page_of(self, index):
+        return bisect.bisect_right(self._starts, index) - 1
+
+    def row(self, index):
+        body = self._body_length()
+        if index >= body:
+            footer = index - body
+            return self._footer[footer] if footer < len(self._footer) else None
+        page = self._page_of(index)
+        rows = self._pages.get(page)
+        if rows is None:
+            return None
+        self._pages.move_to_end(page)
+        position = index - self._starts[page]
+        # A page fetched again after rows were deleted can come back short
+        return rows[position] if position < len(rows) else ()
+
+    def __iter__(self):
+        # Every row, fetching the pages not in memory on the calling thread without keeping them
+        for page, loader in enumerate(self._loaders):
+            rows = self._pages.get(page)
+            if rows is None:
+                rows = [row for row in map(tuple, loader()[0]) if self._keep(row)]
+            yield from rows
+        next_page = self._next_page
+        while next_page is not None:
+            rows, next_page = next_page()
+            yield from (row for row in map(tuple, rows) if self._keep(row))
+        yield from self._pending_footer
+
+    def page_requests(self, first, last):
+        body = self._body_length()
+        if body:
+            self._wanted = (self._page_of(min(first, body - 1)), self._page_of(min(last, body - 1)))
+            requests = [((self._generation, page), self._loaders[page])
+                        for page in range(self._wanted[0], self._wanted[1] + 1) if page not in self._pages]
+        else:
+            requests = []
+        # Pages are found in order, so only the next one can be asked for
+        if self._next_page is not None and body <= last:
+            requests.append(((self._generation, len(self._loaders)), self._next_page))
+        return requests
+
+    def add_page(self, key, result):
+        """Store a page fetched for key; False if it is no longer wanted"""
+        generation, page = key
+        if generation != self._generation or page > len(self._loaders):
+            return False
+        rows, next_page = result
+        kept = [row for row in map(tuple, rows) if self._keep(row)]
+        if page == len(self._loaders):
+            self._loaders.append(self._next_page)
+            self._starts.append(self._body_length())
+            self._lengths.append(len(kept))
+            self.loaded_rows += len(rows)
+            self._next_page = next_page
+            if next_page is None:
+                self._footer = self._pending_footer
+        self._pages[page] = kept
+        self._pages.move_to_end(page)
+        self._evict()
+        return True
+
+    def page_failed(self, key):
+        # Stop paging after a failed load (what is loaded stays usable); an evicted page shows blank
+        generation, page = key
+        if generation != self._generation:
+            return
+        if page == len(self._loaders):
+            self._next_page = None
+        elif page not in self._pages:
+            self._pages[page] = [()] * self._lengths[page]
+
+    def _evict(self):
+        first, last = self._wanted
+        for page in list(self._pages):
+            if len(self._pages) <= PAGE_CACHE_PAGES + 1:
+                break
+            if page != 0 and not first <= page <= last:
+                del self._pages[page]
+
+    def sort(self, column, reverse=False):
+        if self._sorted_pages is None:
+            raise ValueError("This report cannot be sorted.")
+        # Rows come back from the query already in order; only the filter is reapplied
+        rows, next_page = self._sorted_pages(column, reverse)
+        self._reset(rows, next_page)
+
+    def filter(self, text):
+        text = (text or "").strip().lower()
+        self._filter = text or None
+        self._reset(self._first, self._loaders[1] if len(self._loaders) > 1 else self._next_page)
+
+
+class VirtualTreeview(ttk.Treeview):
+    """
+    Treeview that materialises only the visible window of a row source.
+    Use set_source() instead of insert(); selection(), item() and the
+    <<TreeviewSelect>> event work as usual for the rows in view, and
+    selected_rows() returns the selected rows wherever they are.
+    """
+
+    def __init__(self, master=None, sortable=True, **kw):
+        self._yscrollcommand = kw.pop("yscrollcommand", None)
+        self.source = None
+        super().__init__(master, **kw)
+        self.sortable = sortable
+        self._offset = 0
+        self._visible = int(self.cget("height") or 10)
+        self._items = []  # iids of the window, top to bottom
+        self._item_index = {}  # iid -> source index it shows
+        self._selected = set()  # selected source indices
+        self._last_length = 0
+        self._sort_column = None
+        self._sort_reverse = False
+        self._heading_text = {}
+        self._loaded = queue.Queue()  # (source, key, future) of finished page loads
+        self._in_flight = set()  # (source, key) of page loads not yet applied
+        self._polling = False
+
+        self.tag_configure("evenrow", background="#f9f9f9")
+        self.tag_configure("oddrow", background="#e9e9e9")
+        self.bind("<Configure>", self._on_resize, add="+")
+        self.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind(sequence, self._on_wheel)
+        for sequence, delta in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"),
+                                ("<Home>", "home"), ("<End>", "end")):
+            self.bind(sequence, lambda event, delta=delta: self._on_key(delta))
+
+    # --- configuration -------------------------------------------------
+
+    def configure(self, cnf=None, **kw):
+        # The vertical scrollbar follows the row source, not the Tk items
+        if cnf and "yscrollcommand" in cnf:
+            cnf = dict(cnf)
+            kw["yscrollcommand"] = cnf.pop("yscrollcommand")
+        if "yscrollcommand" in kw:
+            self._yscrollcommand = kw.pop("yscrollcommand")
+            if self.source is None:
+                super().configure(yscrollcommand=self._yscrollcommand or "")
+            else:
+                self._update_scrollbar()
+            if not cnf and not kw:
+                return None
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def set_source(self, source):
+        """Show a row source (None clears the table)"""
+        self.source = source
+        self._offset = 0
+        self._selected.clear()
+        self._restore_headings()
+        if self._items:
+            super().delete(*self._items)
+        self._items = []
+        self._item_index = {}
+        self._in_flight.clear()
+        if source is None:
+            super().configure(yscrollcommand=self._yscrollcommand or "")
+            if self._yscrollcommand:
+                self._yscrollcommand(0.0, 1.0)
+            self._notify_length()
+            return
+        super().configure(yscrollcommand="")
+        if self.sortable:
+            for column in self["columns"]:
+                self.heading(column, command=lambda column=column: self.sort_by(column))
+        self._render()
+
+    def refresh(self):
+        # Redraw after the source changed underneath (e.g. rows appended)
+        if self.source is not None:
+            self._render()
+
+    def row_count(self):
+        return len(self.source) if self.source is not None else len(self.get_children())
+
+    def iter_rows(self):
+        """All rows of the table, not just the ones in view"""
+        if self.source is not None:
+            return iter(self.source)
+        return (tuple(self.item(item)["values"]) for item in self.get_children())
+
+    def selected_rows(self):
+        if self.source is None:
+            return [tuple(self.item(item)["values"]) for item in self.selection()]
+        rows = (self.source.row(index) for index in sorted(self._selected) if index < len(self.source))
+        return [row for row in rows if row is not None]
+
+    # --- sort and filter -----------------------------------------------
+
+    def sort_by(self, column):
+        """Sort on a column; clicking the same heading again reverses the order"""
+        if self.source is None:
+            return
+        reverse = self._sort_column == column and not self._sort_reverse
+        try:
+            self.source.sort(list(self["columns"]).index(column), reverse)
+        except Exception as e:
+            logger.error(f"Error sorting table on {column}: {e}")
+            messagebox.showerror("Error", f"Could not sort the table: {e}")
+            return
+        self._restore_headings()
+        self._sort_column, self._sort_reverse = column, reverse
+        self._heading_text[column] = self.heading(column, "text")
+        self.heading(column, text=f"{self._heading_text[column]} {'▼' if reverse else '▲'}")
+        self._selected.clear()
+        self._offset = 0
+        self._render()
+
+    def filter(self, text):
+        """Show only rows with a value containing text (case-insensitive)"""
+        if self.source is None:
+            return
+        self.source.filter(text)
+        self._selected.clear()
+        self._offset = 0
+        self._render()
+
+    def _restore_headings(self):
+        for column, text in self._heading_text.items():
+            self.heading(column, text=text)
+        self._heading_text = {}
+        self._sort_column, self._sort_reverse = None, False
+
+    # --- scrolling -----------------------------------------------------
+
+    def yview(self, *args):
+        if self.source is None:
+            return super().yview(*args)
+        if not args:
+            return self._fractions()
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.source.scroll_length))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.scroll_to(self._offset + (amount * self._visible if args[2] == "pages" else amount))
+        return None
+
+    def yview_moveto(self, fraction):
+        self.yview("moveto", fraction)
+
+    def yview_scroll(self, number, what):
+        self.yview("scroll", number, what)
+
+    def scroll_to(self, index):
+        """Make source row `index` the top row of the view"""
+        if self.source is None:
+            return
+        offset = max(0, int(index))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def see_index(self, index):
+        if index < self._offset:
+            self.scroll_to(index)
+        elif index >= self._offset + self._visible:
+            self.scroll_to(index - self._visible + 1)
+
+    def _on_wheel(self, event):
+        if self.source is None:
+            return None
+        if event.num == 4:
+            step = -WHEEL_ROWS
+        elif event.num == 5:
+            step = WHEEL_ROWS
+        else:
+            step = -WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS
+        self.scroll_to(self._offset + step)
+        return "break"
+
+    def _on_key(self, delta):
+        if self.source is None or not len(self.source):
+            return None
+        focus = self.focus()
+        current = self._item_index.get(focus, self._offset - 1) if focus else self._offset - 1
+        last = self.source.scroll_length - 1
+        if delta == "home":
+            target = 0
+        elif delta == "end":
+            target = last
+        elif delta == "page":
+            target = current + self._visible
+        elif delta == "-page":
+            target = current - self._visible
+        else:
+            target = current + delta
+        target = max(0, min(last, target))
+        self.see_index(target)
+        iid = next((iid for iid, index in self._item_index.items() if index == target), None)
+        if iid is not None:
+            self._selected = {target}
+            self.selection_set(iid)
+            self.focus(iid)
+        return "break"
+
+    def _on_resize(self, event=None):
+        if not self._items:
+            return
+        box = self.bbox(self._items[0])
+        if not box:
+            return
+        _, top, _, row_height = box
+        visible = max(1, (self.winfo_height() - top) // max(row_height, 1))
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _on_select(self, event=None):
+        # Keep selected rows that are scrolled out of view, replace the ones in view
+        if self.source is None:
+            return
+        in_view = set(self._item_index.values())
+        self._selected = {index for index in self._selected if index not in in_view}
+        self._selected.update(self._item_index[iid] for iid in self.selection() if iid in self._item_index)
+
+    # --- drawing -------------------------------------------------------
+
+    def _fractions(self):
+        # Sized by every row the source will have, so the thumb does not jump as pages arrive
+        total = self.source.scroll_length if self.source is not None else 0
+        if total <= 0:
+            return 0.0, 1.0
+        return self._offset / total, min(1.0, (self._offset + self._visible) / total)
+
+    def _update_scrollbar(self):
+        if self._yscrollcommand:
+            first, last = self._fractions()
+            self._yscrollcommand(first, last)
+
+    def _notify_length(self):
+        length = len(self.source) if self.source is not None else 0
+        if length != self._last_length:
+            self._last_length = length
+            try:
+                self.event_generate(ROW_SOURCE_CHANGED, when="tail")
+            except tk.TclError:
+                pass
+
+    def _request_pages(self):
+        # Start background loads for the pages the view and the rows ahead of it need
+        source = self.source
+        last = self._offset + self._visible * (LOAD_AHEAD_WINDOWS + 1)
+        for key, loader in source.page_requests(self._offset, last):
+            if (source, key) in self._in_flight:
+                continue
+            self._in_flight.add((source, key))
+            future = _page_loader().submit(loader)
+            future.add_done_callback(lambda done, key=key: self._loaded.put((source, key, done)))
+        if self._in_flight and not self._polling:
+            self._polling = True
+            self.after(PAGE_POLL_MS, self._poll_pages)
+
+    def _poll_pages(self):
+        # Runs on the Tk thread: store the pages that finished loading and redraw
+        self._polling = False
+        if not self.winfo_exists():
+            return
+        changed = False
+        while True:
+            try:
+                source, key, future = self._loaded.get_nowait()
+            except queue.Empty:
+                break
+            if (source, key) not in self._in_flight:
+                continue
+            self._in_flight.discard((source, key))
+            error = future.exception()
+            if error is not None:
+                source.page_failed(key)
+                changed = True
+                logger.error(f"Error loading more rows: {error}")
+                messagebox.showerror("Error", f"Could not load more rows: {error}")
+            elif source.add_page(key, future.result()):
+                changed = True
+        if changed and self.source is not None:
+            self._render()
+        elif self._in_flight and not self._polling:
+            self._polling = True
+            self.after(PAGE_POLL_MS, self._poll_pages)
+
+    def _render(self):
+        source = self.source
+        total = max(len(source), source.scroll_length)
+        self._offset = max(0, min(self._offset, total - self._visible))
+        self._request_pages()
+
+        count = max(0, min(self._visible, total - self._offset))
+        while len(self._items) < count:
+            self._items.append(self.insert("", "end"))
+        if len(self._items) > count:
+            super().delete(*self._items[count:])
+            del self._items[count:]
+
+        self._item_index = {}
+        selected = []
+        loading = (LOADING_TEXT,) + ("",) * (len(self["columns"]) - 1)
+        for position, iid in enumerate(self._items):
+            index = self._offset + position
+            values = source.row(index)
+            self.item(iid, values=loading if values is None else values,
+                      tags=("evenrow" if index % 2 == 0 else "oddrow",))
+            self._item_index[iid] = index
+            if index in self._selected:
+                selected.append(iid)
+        if selected or self.selection():
+            self.selection_set(selected)
+
+        self._update_scrollbar()
+        self._notify_length()